@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+"""
+重命名计划性能验证 - 在临时目录中生成大量会扁平化到同一目标名的文件，
+对比原先逐个 os.path.exists 探测冲突（rename 策略下循环探测 _N 序号）与先生成计划再执行的耗时和 exists 调用次数
+
+用法:
+    python debug/filename_formatter/debug_rename_plan_benchmark.py [文件数量] [不同目标名数量]
+"""
+
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+# 添加项目根目录到路径
+project_root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, project_root)
+
+from tools.filename_formatter.formatter import FilenameFormatter
+
+
+def build_tree(root: str, count: int, distinct: int):
+    """每个文件放在单独的子目录中，扁平化后只有 distinct 个不同的目标名"""
+    for index in range(count):
+        directory = os.path.join(root, f"sub{index:05d}")
+        os.makedirs(directory)
+        with open(os.path.join(directory, f"abc{index % distinct:03d}.mp4"), "wb") as f:
+            f.write(b"x")
+
+
+def legacy_rename(formatter: FilenameFormatter, base_path: str):
+    """原实现：每个文件调用 os.path.exists，冲突时循环探测 _N 序号"""
+    results = 0
+    for root, _, files in os.walk(base_path):
+        for fname in files:
+            full_path = os.path.join(root, fname)
+            target_path = os.path.join(base_path, formatter.apply_rename_rules(fname))
+            if os.path.abspath(target_path) == os.path.abspath(full_path):
+                continue
+            if os.path.exists(target_path):
+                base_name, ext = os.path.splitext(target_path)
+                counter = 1
+                while os.path.exists(target_path):
+                    target_path = f"{base_name}_{counter}{ext}"
+                    counter += 1
+            os.rename(full_path, target_path)
+            results += 1
+    return results
+
+
+def measure(label, function):
+    """统计耗时和 os.path.exists 调用次数"""
+    original_exists = os.path.exists
+    calls = [0]
+
+    def counting_exists(path):
+        calls[0] += 1
+        return original_exists(path)
+
+    os.path.exists = counting_exists
+    try:
+        start = time.perf_counter()
+        function()
+        elapsed = time.perf_counter() - start
+    finally:
+        os.path.exists = original_exists
+    print(f"{label:<32} {elapsed:8.2f}s  os.path.exists 调用: {calls[0]:>12,}")
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 3000
+    distinct = int(sys.argv[2]) if len(sys.argv) > 2 else 10
+    formatter = FilenameFormatter(min_file_size=0, default_rules_path="")
+    print(f"文件数: {count:,}，扁平化后不同目标名: {distinct}")
+    print("=" * 72)
+
+    for label, run in [
+        ("逐个 exists 探测（原实现）", lambda path: legacy_rename(formatter, path)),
+        ("计划预览（dry-run）", lambda path: formatter.plan_renames(
+            path, include_subdirs=True, flatten_output=True, conflict_resolution="rename")),
+        ("先计划后执行", lambda path: formatter.rename_in_directory(
+            path, include_subdirs=True, flatten_output=True, conflict_resolution="rename")),
+    ]:
+        root = tempfile.mkdtemp(prefix="rename_plan_benchmark_")
+        try:
+            build_tree(root, count, distinct)
+            measure(label, lambda: run(root))
+        finally:
+            shutil.rmtree(root, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
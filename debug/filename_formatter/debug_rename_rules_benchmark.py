@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+"""
+重命名规则性能验证 - 生成不同数量的网站前缀/后缀规则，对比逐条 str.replace 与 Aho-Corasick 规则引擎
+处理每个文件名的平均耗时，并检查两者结果一致
+
+用法:
+    python debug/filename_formatter/debug_rename_rules_benchmark.py [文件名数量]
+"""
+
+import os
+import random
+import sys
+import time
+
+# 添加项目根目录到路径
+project_root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, project_root)
+
+from tools.filename_formatter.rule_engine import RenameRuleEngine
+
+
+RULE_COUNTS = [10, 100, 900, 3000]
+
+
+def build_rules(count: int):
+    """生成网站前缀/后缀规则，最后附加几条分隔符清理规则（依赖前面规则的替换结果）"""
+    rules = []
+    for index in range(count):
+        if index % 2:
+            rules.append({"pattern": f"site{index:04d}.example.com@", "replace": ""})
+        else:
+            rules.append({"pattern": f"-example{index:04d}.net", "replace": ""})
+    rules += [{"pattern": "__", "replace": "_"}, {"pattern": "--", "replace": "-"}, {"pattern": "_-", "replace": "-"}]
+    return rules
+
+
+def build_filenames(count: int, rules):
+    """一半文件名带有某条规则的前缀或后缀，其余为普通文件名"""
+    rng = random.Random(42)
+    names = []
+    for index in range(count):
+        name = f"abc{index % 1000:03d}"
+        if rng.random() < 0.5:
+            pattern = rng.choice(rules[:-3])["pattern"]
+            name = pattern + name if pattern.endswith("@") else name + pattern
+        names.append(name + rng.choice(["_HD.mp4", "ch.mp4", "--cd1.mp4", ".mkv"]))
+    return names
+
+
+def legacy_apply(rules, filename: str) -> str:
+    """原实现：逐条 str.replace"""
+    for rule in rules:
+        filename = filename.replace(rule["pattern"], rule["replace"])
+    return filename
+
+
+def measure(function, filenames):
+    start = time.perf_counter()
+    results = [function(name) for name in filenames]
+    return results, (time.perf_counter() - start) / len(filenames) * 1e6
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    print(f"文件名数: {count:,}")
+    print(f"{'规则数':>8} {'逐条替换(µs/个)':>16} {'自动机(µs/个)':>14} {'编译(ms)':>10} {'结果一致':>8}")
+    print("=" * 64)
+    for rule_count in RULE_COUNTS:
+        rules = build_rules(rule_count)
+        filenames = build_filenames(count, rules)
+        start = time.perf_counter()
+        engine = RenameRuleEngine(rules)
+        compile_ms = (time.perf_counter() - start) * 1000
+        legacy, legacy_cost = measure(lambda name: legacy_apply(rules, name), filenames)
+        compiled, engine_cost = measure(engine.apply, filenames)
+        print(f"{len(rules):>8} {legacy_cost:>16.2f} {engine_cost:>14.2f} {compile_ms:>10.1f} {str(legacy == compiled):>8}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+#!/usr/bin/env python3
+"""
+近似重复检测性能验证 - 在内存数据库中生成大规模合成数据，测量 NearDuplicateDetector 的耗时
+
+用法:
+    python debug/video_info_collector/debug_near_duplicates_benchmark.py [行数]
+"""
+
+import os
+import random
+import sys
+import time
+
+# 添加项目根目录到路径
+project_root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, project_root)
+
+from tools.video_info_collector.sqlite_storage import SQLiteStorage
+from tools.video_info_collector.near_duplicate_detector import NearDuplicateDetector
+
+
+def build_database(row_count: int) -> SQLiteStorage:
+    """生成合成数据：约1%的记录带有一个重新编码的近似副本"""
+    storage = SQLiteStorage(":memory:")
+    random.seed(42)
+    rows = []
+    for i in range(row_count):
+        duration = round(random.uniform(600, 10800), 2)
+        size = int(duration * random.uniform(300_000, 1_500_000))
+        width, height = random.choice([(1280, 720), (1920, 1080), (3840, 2160)])
+        rows.append((f"/videos/TEST-{i:06d}.mp4", f"TEST-{i:06d}.mp4", duration, size, width, height))
+        if i % 100 == 0:
+            rows.append((f"/videos/copy/reencode_{i:06d}.mp4", f"reencode_{i:06d}.mp4",
+                         duration + 0.3, int(size * 1.02), width, height))
+
+    storage.connection.executemany("""
+        INSERT INTO video_info (file_path, filename, duration, file_size, width, height, created_time)
+        VALUES (?, ?, ?, ?, ?, ?, '2024-01-01')
+    """, rows)
+    storage.connection.commit()
+    return storage
+
+
+def main():
+    row_count = int(sys.argv[1]) if len(sys.argv) > 1 else 300_000
+    print(f"=== 生成 {row_count} 条合成记录 ===")
+    storage = build_database(row_count)
+
+    detector = NearDuplicateDetector(storage)
+    start = time.perf_counter()
+    clusters = detector.find_clusters()
+    elapsed = time.perf_counter() - start
+
+    print(f"找到 {len(clusters)} 个近似重复簇，耗时 {elapsed:.2f} 秒")
+    reencodes = sum(1 for cluster in clusters
+                    if any('/copy/' in path for path in cluster.file_paths))
+    print(f"其中包含合成重新编码副本的簇: {reencodes}")
+    print(f"最大簇大小: {max((cluster.size for cluster in clusters), default=0)}")
+    for cluster in clusters[:3]:
+        print(f"  {cluster.max_similarity:.3f}: {', '.join(cluster.file_paths[:4])}")
+    storage.close()
+
+
+if __name__ == "__main__":
+    main()
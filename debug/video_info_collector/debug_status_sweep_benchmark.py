@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+"""
+文件状态批量检查性能验证 - 在临时目录中生成大量小文件，对比逐个检查与 BatchStatusChecker 的耗时
+
+用法:
+    python debug/video_info_collector/debug_status_sweep_benchmark.py [文件数] [每目录文件数]
+"""
+
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+# 添加项目根目录到路径
+project_root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, project_root)
+
+from tools.video_info_collector.batch_status_checker import BatchStatusChecker
+from tools.video_info_collector.file_status_manager import FileStatus, FileStatusManager
+
+
+def build_tree(root: str, file_count: int, per_directory: int):
+    """生成测试文件，并返回路径列表（其中约1%为已删除文件）"""
+    paths = []
+    for i in range(file_count):
+        directory = os.path.join(root, f"disk_{i // per_directory:04d}")
+        if i % per_directory == 0:
+            os.makedirs(directory)
+        path = os.path.join(directory, f"TEST-{i:06d}.mp4")
+        if i % 100 != 0:
+            with open(path, 'wb') as f:
+                f.write(b'x')
+        paths.append(path)
+    return paths
+
+
+def main():
+    file_count = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    per_directory = int(sys.argv[2]) if len(sys.argv) > 2 else 200
+    root = tempfile.mkdtemp(prefix="status_sweep_")
+    try:
+        paths = build_tree(root, file_count, per_directory)
+        print(f"文件数: {file_count}，目录数: {(file_count + per_directory - 1) // per_directory}")
+
+        manager = FileStatusManager()
+        start = time.perf_counter()
+        serial = {path: manager.check_file_status(path) for path in paths}
+        print(f"逐个检查（打开并读取1字节）: {time.perf_counter() - start:.2f}s")
+
+        for stat_only in (True, False):
+            checker = BatchStatusChecker(stat_only=stat_only)
+            start = time.perf_counter()
+            batch = checker.check(paths)
+            elapsed = time.perf_counter() - start
+            label = "仅stat" if stat_only else "读取确认"
+            print(f"BatchStatusChecker（{label}）: {elapsed:.2f}s，结果一致: {batch == serial}")
+
+        missing = sum(1 for status in serial.values() if status == FileStatus.MISSING)
+        print(f"丢失文件: {missing}")
+    finally:
+        shutil.rmtree(root, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
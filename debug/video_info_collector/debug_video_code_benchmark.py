@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+"""
+video_code 提取性能验证 - 生成大量文件名，对比逐个正则依次匹配与合并后的优先级匹配器的吞吐量（文件名/秒）
+
+用法:
+    python debug/video_info_collector/debug_video_code_benchmark.py [文件名数量] [不同文件名比例]
+"""
+
+import os
+import random
+import re
+import sys
+import time
+
+# 添加项目根目录到路径
+project_root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, project_root)
+
+from tools.video_info_collector.metadata import VIDEO_CODE_PATTERNS, _match_video_code, extract_video_code
+from tools.video_info_collector.video_code_extractor import VideoCodeExtractor
+from tools.video_info_collector.code_recognizer import PrefixCodeRecognizer
+
+
+LABELS = ['TEST', 'DEMO', 'SAMPLE', 'ABC', 'XYZW', 'STARS']
+NOISE = ['1080p', '[BluRay]', '(2024)', 'x264', 'HD', 'uncensored', '中文字幕', 'part1', 'v2']
+
+
+def build_filenames(count: int, unique_ratio: float):
+    """生成测试文件名：编号、分隔符、噪声标记随机组合，按比例重复"""
+    rng = random.Random(42)
+    unique_count = max(1, int(count * unique_ratio))
+    unique = []
+    for index in range(unique_count):
+        label = rng.choice(LABELS)
+        separator = rng.choice(['-', '_', '', '.'])
+        parts = rng.sample(NOISE, rng.randint(0, 3))
+        parts.insert(rng.randint(0, len(parts)), f"{label}{separator}{index % 100000:03d}")
+        if rng.random() < 0.1:
+            parts = ['holiday', 'clip', str(index)]
+        unique.append(' '.join(parts) + rng.choice(['.mp4', '.mkv', '.avi']))
+    return [unique[rng.randrange(unique_count)] for _ in range(count)]
+
+
+def legacy_extract_video_code(filename):
+    """原实现：依次尝试每个正则"""
+    for pattern in VIDEO_CODE_PATTERNS:
+        match = re.search(pattern, filename, re.IGNORECASE)
+        if match:
+            return match.group(1)
+    return None
+
+
+def legacy_clean_filename(filename):
+    """原实现：七次 re.sub"""
+    cleaned = re.sub(r'\[.*?\]', ' ', filename)
+    cleaned = re.sub(r'\(.*?\)', ' ', cleaned)
+    for marker in [
+        r'\b(1080p|720p|480p|4K|HD|SD|BluRay|DVDRip|WEBRip|HDTV)\b',
+        r'\b(x264|x265|H264|H265|HEVC|AVC)\b',
+        r'\b(AAC|AC3|DTS|MP3|FLAC)\b',
+        r'\b(PROPER|REPACK|INTERNAL|LIMITED)\b'
+    ]:
+        cleaned = re.sub(marker, ' ', cleaned, flags=re.IGNORECASE)
+    return re.sub(r'\s+', ' ', cleaned).strip()
+
+
+def legacy_extract_code(extractor, filename):
+    """原实现：清理后依次 findall 每个规则"""
+    cleaned = legacy_clean_filename(os.path.splitext(os.path.basename(filename))[0])
+    for pattern in extractor.patterns:
+        matches = pattern.findall(cleaned)
+        if matches:
+            code = matches[0].upper()
+            if extractor._validate_code(code):
+                return code
+    return None
+
+
+def measure(label, function, filenames):
+    start = time.perf_counter()
+    results = [function(filename) for filename in filenames]
+    elapsed = time.perf_counter() - start
+    print(f"{label:<40} {elapsed:7.2f}s  {len(filenames) / elapsed:12,.0f} 个/秒")
+    return results
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    unique_ratio = float(sys.argv[2]) if len(sys.argv) > 2 else 0.2
+    filenames = build_filenames(count, unique_ratio)
+    print(f"文件名数: {count:,}，不同文件名: {len(set(filenames)):,}")
+    print("=" * 72)
+
+    print("metadata.extract_video_code")
+    legacy = measure("  依次匹配5个正则", legacy_extract_video_code, filenames)
+    combined = measure("  合并正则（无缓存）", _match_video_code.__wrapped__, filenames)
+    _match_video_code.cache_clear()
+    cached = measure("  合并正则 + LRU缓存", extract_video_code, filenames)
+    print(f"  结果一致: {legacy == combined == cached}")
+
+    print("PrefixCodeRecognizer（已知前缀 + 正则回退）")
+    recognizer = PrefixCodeRecognizer(LABELS, fallback=_match_video_code.__wrapped__)
+    recognized = measure("  前缀树识别（无缓存）", recognizer.extract, filenames)
+    changed = sum(1 for old, new in zip(legacy, recognized) if old != new)
+    print(f"  与正则结果不同: {changed:,} 个（已知前缀优先于分辨率、编码格式等标记）")
+
+    print("VideoCodeExtractor")
+    extractor = VideoCodeExtractor(cache_size=0)
+    legacy = measure("  7次re.sub + 依次findall", lambda name: legacy_extract_code(extractor, name), filenames)
+    combined = measure("  合并正则（无缓存）", extractor.extract_code, filenames)
+    cached = measure("  合并正则 + LRU缓存", VideoCodeExtractor().extract_code, filenames)
+    start = time.perf_counter()
+    batch = extractor.extract_codes_batch(filenames)
+    elapsed = time.perf_counter() - start
+    print(f"{'  extract_codes_batch（去重）':<40} {elapsed:7.2f}s  {count / elapsed:12,.0f} 个/秒")
+    print(f"  结果一致: {legacy == combined == cached == [batch[name] for name in filenames]}")
+
+
+if __name__ == '__main__':
+    main()
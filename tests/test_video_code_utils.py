@@ -0,0 +1,32 @@
+#!/usr/bin/env python3
+"""
+视频编码规范化工具测试用例
+"""
+
+import unittest
+
+from tools.video_code_utils import canonicalize_video_code, split_video_code
+
+
+class TestCanonicalizeVideoCode(unittest.TestCase):
+    """测试编码规范化"""
+
+    def test_variants_map_to_same_code(self):
+        """大小写、分隔符和前导零不同的写法得到同一个规范编码"""
+        for variant in ['ABC-123', 'abc123', 'ABC_123', 'abc-00123', ' Abc-0123 ']:
+            with self.subTest(variant=variant):
+                self.assertEqual(canonicalize_video_code(variant), 'ABC-123')
+        self.assertEqual(canonicalize_video_code('test-1'), 'TEST-001')
+        self.assertEqual(canonicalize_video_code('T28-00456'), 'T28-456')
+
+    def test_non_prefix_codes_only_uppercased(self):
+        """不是"前缀+数字"形式的编码只做大写和去空白"""
+        self.assertIsNone(split_video_code('123456_789'))
+        self.assertEqual(canonicalize_video_code('123456_789'), '123456_789')
+        self.assertEqual(canonicalize_video_code('abc-xyz'), 'ABC-XYZ')
+        self.assertIsNone(canonicalize_video_code('  '))
+        self.assertIsNone(canonicalize_video_code(None))
+
+
+if __name__ == '__main__':
+    unittest.main()
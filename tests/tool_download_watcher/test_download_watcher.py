@@ -0,0 +1,137 @@
+import errno
+import os
+from unittest.mock import patch
+
+import pytest
+
+import tools.filename_formatter.formatter as formatter_module
+from tools.filename_formatter.formatter import FilenameFormatter
+from tools.download_watcher.watcher import (
+    DownloadWatcher, StabilityTracker, INGEST_SUCCESS, INGEST_SKIPPED_EXISTS
+)
+from tools.video_info_collector.metadata import VideoMetadataExtractor
+from tools.video_info_collector.sqlite_storage import SQLiteStorage
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def storage(tmp_path):
+    storage = SQLiteStorage(str(tmp_path / "video.db"))
+    yield storage
+    storage.close()
+
+
+@pytest.fixture(autouse=True)
+def no_ffprobe():
+    with patch.object(VideoMetadataExtractor, "_run_ffprobe", return_value=None):
+        yield
+
+
+def make_watcher(tmp_path, storage, clock, **kwargs):
+    formatter = FilenameFormatter(video_extensions=(".mp4",), min_file_size=1)
+    formatter.rename_rules = [{"pattern": "example.com@", "replace": ""}]
+    return DownloadWatcher(str(tmp_path / "downloads"), str(tmp_path / "library"), storage,
+                           formatter=formatter, stable_seconds=30, clock=clock, **kwargs)
+
+
+def test_stability_tracker_requires_unchanged_signature():
+    clock = FakeClock()
+    tracker = StabilityTracker(30, clock)
+    assert not tracker.observe("a.mp4", (10, 1))
+    clock.now = 20
+    assert not tracker.observe("a.mp4", (20, 2))  # 仍在写入，重新计时
+    clock.now = 45
+    assert not tracker.observe("a.mp4", (20, 2))
+    clock.now = 50
+    assert tracker.observe("a.mp4", (20, 2))
+
+
+def test_watcher_ingests_only_finished_downloads(tmp_path, storage):
+    clock = FakeClock()
+    watcher = make_watcher(tmp_path, storage, clock)
+    nested = tmp_path / "downloads" / "batch"
+    nested.mkdir(parents=True)
+    finished = nested / "example.com@test-001.mp4"
+    finished.write_bytes(b"x" * 10)
+    growing = tmp_path / "downloads" / "TEST-002.mp4"
+    growing.write_bytes(b"x")
+    (tmp_path / "downloads" / ".TEST-003.mp4").write_bytes(b"x")
+
+    assert watcher.poll_once() == []
+    clock.now = 31
+    growing.write_bytes(b"x" * 5)
+    results = watcher.poll_once()
+
+    assert [r.status for r in results] == [INGEST_SUCCESS]
+    target = tmp_path / "library" / "TEST-001.mp4"
+    assert results[0].target == str(target)
+    assert target.exists() and not nested.exists()  # 清空的下载子目录被删除
+    assert growing.exists()
+
+    info = storage.get_video_info_by_path(str(target))
+    assert info["video_code"] == "TEST-001"
+    assert storage.get_merge_history_by_video_code("TEST-001")[0]["event_type"] == "insert_new"
+    assert "TEST-001" in storage.get_master_list_video_codes()
+
+
+def test_watcher_conflicts_skip_once_or_rename(tmp_path, storage):
+    clock = FakeClock()
+    (tmp_path / "library").mkdir()
+    (tmp_path / "library" / "TEST-001.mp4").write_bytes(b"old")
+    (tmp_path / "downloads").mkdir()
+    source = tmp_path / "downloads" / "example.com@TEST-001.mp4"
+    source.write_bytes(b"new")
+
+    watcher = make_watcher(tmp_path, storage, clock)
+    watcher.poll_once()
+    clock.now = 31
+    assert [r.status for r in watcher.poll_once()] == [INGEST_SKIPPED_EXISTS]
+    clock.now = 100
+    assert watcher.poll_once() == []  # 未变化的冲突文件不再重复处理
+    assert source.exists()
+
+    watcher = make_watcher(tmp_path, storage, clock, conflict_resolution="rename")
+    watcher.poll_once()
+    clock.now = 200
+    results = watcher.poll_once()
+    assert [r.status for r in results] == [INGEST_SUCCESS]
+    assert os.path.basename(results[0].target) == "TEST-001_1.mp4"
+    assert (tmp_path / "library" / "TEST-001.mp4").read_bytes() == b"old"
+
+
+def test_watcher_never_overwrites_files_created_after_listing(tmp_path, storage, monkeypatch):
+    clock = FakeClock()
+    (tmp_path / "library").mkdir()
+    (tmp_path / "downloads").mkdir()
+    (tmp_path / "downloads" / "TEST-001.mp4").write_bytes(b"new")
+    (tmp_path / "downloads" / "TEST-002.mp4").write_bytes(b"new")
+    watcher = make_watcher(tmp_path, storage, clock)
+    watcher.poll_once()
+    clock.now = 31
+
+    # 媒体库列出之后才出现的同名文件；另一个文件模拟跨文件系统移动
+    real_listing = formatter_module.DirectoryNames.__init__
+    def list_then_create(self, directory, listing=None):
+        real_listing(self, directory, listing)
+        (tmp_path / "library" / "TEST-001.mp4").write_bytes(b"original")
+    monkeypatch.setattr(formatter_module.DirectoryNames, "__init__", list_then_create)
+    real_rename = os.rename
+    def cross_device(source, target):
+        if source.endswith("TEST-002.mp4"):
+            raise OSError(errno.EXDEV, "Invalid cross-device link")
+        return real_rename(source, target)
+    monkeypatch.setattr(os, "rename", cross_device)
+
+    results = {os.path.basename(r.source): r.status for r in watcher.poll_once()}
+    assert results == {"TEST-001.mp4": INGEST_SKIPPED_EXISTS, "TEST-002.mp4": INGEST_SUCCESS}
+    assert (tmp_path / "library" / "TEST-001.mp4").read_bytes() == b"original"
+    assert (tmp_path / "downloads" / "TEST-001.mp4").exists()
+    assert (tmp_path / "library" / "TEST-002.mp4").read_bytes() == b"new"
+    assert not (tmp_path / "downloads" / "TEST-002.mp4").exists()
@@ -270,8 +270,9 @@ class TestFileSafety:
         log_files = [f for f in os.listdir(self.temp_dir) if f.startswith('.operation_log')]
         assert len(log_files) == 1
         
+        # 日志为 JSON Lines 格式，每行一条记录
         with open(os.path.join(self.temp_dir, log_files[0]), 'r') as f:
-            logs = json.load(f)
+            logs = [json.loads(line) for line in f if line.strip()]
         
         assert len(logs) == 1
         log_entry = logs[0]
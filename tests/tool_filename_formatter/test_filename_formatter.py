@@ -5,6 +5,7 @@ from pathlib import Path
 import pytest
 
 from tools.filename_formatter import FilenameFormatter, RenameResult
+from tools.filename_formatter.formatter import PLAN_RENAME
 
 
 def write_rules_yaml(tmp_path: Path, rules: list) -> Path:
@@ -30,6 +31,12 @@ def test_format_filename_lowercase_to_upper():
     assert fmt.format_filename("abc-123.mp4") == "ABC-123.mp4"
 
 
+def test_format_filename_uses_canonical_video_code():
+    fmt = FilenameFormatter(min_file_size=1)
+    assert fmt.format_filename("abc00123.mp4") == "ABC-123.mp4"
+    assert fmt.format_filename("ABC-1.mkv") == "ABC-001.mkv"
+
+
 def test_format_filename_unmatched_returns_original():
     fmt = FilenameFormatter(min_file_size=1)
     # 不符合字母+数字模式，保持原样
@@ -52,6 +59,42 @@ def test_apply_rename_rules_then_format(tmp_path, monkeypatch):
     assert fmt.apply_rename_rules("site1234.com@ABC123ch.mp4") == "ABC-123.mp4"
 
 
+def test_rename_rules_keep_sequential_semantics(tmp_path):
+    """后面的规则作用于前面规则的替换结果，与逐条 str.replace 一致"""
+    rules = [
+        {"pattern": "example.com@", "replace": "_"},
+        {"pattern": "__", "replace": "_"},
+        {"pattern": "_-", "replace": "-"},
+        {"pattern": "_", "replace": ""},
+        {"pattern": "", "replace": "ignored"},
+        {"pattern": "x", "replace": None},
+    ]
+    fmt = FilenameFormatter(default_rules_path=str(write_rules_yaml(tmp_path, rules)))
+
+    expected = "abc_example.com@-123.mp4"
+    for rule in rules[:4]:
+        expected = expected.replace(rule["pattern"], rule["replace"])
+    assert fmt.apply_rename_rules("abc_example.com@-123.mp4") == fmt.format_filename(expected) == "ABC-123.mp4"
+
+    # 替换 rename_rules 后重新编译
+    fmt.rename_rules = [{"pattern": "abc", "replace": "xyz"}]
+    assert fmt.apply_rename_rules("abc123.mp4") == "XYZ-123.mp4"
+
+
+def test_regex_rules_run_in_rule_order(tmp_path):
+    """正则规则按其在列表中的位置执行，无效正则被忽略"""
+    rules = [
+        {"pattern": "[website]", "replace": ""},
+        {"regex": r"[-_](?:1080p|720p|FHD)", "replace": ""},
+        {"regex": "([unclosed", "replace": ""},
+        {"regex": r"^(\d+)_([a-z]+)", "replace": r"\2\1"},
+    ]
+    fmt = FilenameFormatter(default_rules_path=str(write_rules_yaml(tmp_path, rules)))
+
+    assert fmt.apply_rename_rules("[website]abc123_1080p.mp4") == "ABC-123.mp4"
+    assert fmt.apply_rename_rules("123_abc.mp4") == "ABC-123.mp4"
+
+
 
 
 
@@ -164,6 +207,86 @@ def test_rename_in_directory_min_file_size_skip(tmp_path):
     assert all(Path(r.original).name != "ABC123.mp4" for r in results)
 
 
+def test_plan_resolves_flatten_conflicts_in_memory(tmp_path, monkeypatch):
+    # 多个子目录中的文件扁平化到同一目标名：冲突在内存中解决，不逐个调用 os.path.exists
+    for index in range(5):
+        sub = tmp_path / f"sub{index}"
+        sub.mkdir()
+        (sub / "abc123.mp4").write_bytes(b"a")
+    (tmp_path / "ABC-123.mp4").write_bytes(b"a")
+
+    fmt = FilenameFormatter(min_file_size=1)
+    calls = []
+    original_exists = os.path.exists
+    monkeypatch.setattr(os.path, "exists", lambda path: calls.append(path) or original_exists(path))
+    plan = fmt.plan_renames(str(tmp_path), include_subdirs=True, flatten_output=True, conflict_resolution="rename")
+
+    assert calls == [str(tmp_path)]
+    assert sorted(Path(item.target).name for item in plan if item.action == PLAN_RENAME) == [
+        f"ABC-123_{index}.mp4" for index in range(1, 6)
+    ]
+
+
+def test_dry_run_matches_execution(tmp_path):
+    # 预览与实际执行使用同一份计划：后一个文件的目标已被前一个计划占用时，预览也显示跳过
+    for name in ("a", "b"):
+        sub = tmp_path / name
+        sub.mkdir()
+        (sub / "abc123.mp4").write_bytes(b"a")
+
+    fmt = FilenameFormatter(min_file_size=1)
+    preview = fmt.rename_in_directory(str(tmp_path), include_subdirs=True, flatten_output=True, dry_run=True)
+    results = fmt.rename_in_directory(str(tmp_path), include_subdirs=True, flatten_output=True)
+
+    assert sorted(r.status for r in preview) == ["preview: would rename", "would skip: target exists"]
+    assert sorted(r.status for r in results) == ["skipped: target exists", "success"]
+    assert [r.original for r in preview] == [r.original for r in results]
+    assert (tmp_path / "ABC-123.mp4").exists()
+
+
+def test_execution_never_overwrites_files_created_after_planning(tmp_path, monkeypatch):
+    # 计划生成后目标位置出现了文件：执行时跳过，不覆盖
+    (tmp_path / "abc123.mp4").write_bytes(b"new")
+    fmt = FilenameFormatter(min_file_size=1)
+    plan = fmt.plan_renames(str(tmp_path))
+    (tmp_path / "ABC-123.mp4").write_bytes(b"original")
+
+    monkeypatch.setattr(fmt, "plan_renames", lambda *args, **kwargs: plan)
+    results = fmt.rename_in_directory(str(tmp_path))
+
+    assert [r.status for r in results] == ["skipped: target exists"]
+    assert (tmp_path / "ABC-123.mp4").read_bytes() == b"original"
+    assert (tmp_path / "abc123.mp4").read_bytes() == b"new"
+
+
+def test_flatten_prunes_only_vacated_dirs(tmp_path, monkeypatch):
+    # 只删除有文件移出后变空的目录及其变空的上级目录；原本就空的目录和仍有文件的目录保留
+    nested = tmp_path / "a" / "b" / "c"
+    nested.mkdir(parents=True)
+    (nested / "abc123.mp4").write_bytes(b"a")
+    (tmp_path / "a" / "keep").mkdir()
+    (tmp_path / "d").mkdir()
+    (tmp_path / "d" / "def456.mp4").write_bytes(b"d")
+    (tmp_path / "d" / "notes.txt").write_text("x")
+    for index in range(20):
+        (tmp_path / "untouched" / str(index)).mkdir(parents=True)
+
+    fmt = FilenameFormatter(min_file_size=1)
+    fmt.rename_in_directory(str(tmp_path), include_subdirs=True, flatten_output=True, dry_run=True)
+    assert nested.exists()
+
+    removed = []
+    real_rmdir = os.rmdir
+    monkeypatch.setattr(os, "rmdir", lambda path: (removed.append(path), real_rmdir(path)))
+    fmt.rename_in_directory(str(tmp_path), include_subdirs=True, flatten_output=True)
+
+    assert (tmp_path / "ABC-123.mp4").exists() and (tmp_path / "DEF-456.mp4").exists()
+    assert not (tmp_path / "a" / "b").exists()
+    assert (tmp_path / "a" / "keep").exists() and (tmp_path / "d" / "notes.txt").exists()
+    assert (tmp_path / "untouched" / "19").exists()
+    assert sorted(removed) == sorted(str(tmp_path / p) for p in ("a", "a/b", "a/b/c", "d"))
+
+
 # -----------------------------
 # 异常路径与参数校验
 # -----------------------------
@@ -0,0 +1,161 @@
+import os
+
+from tools.filename_formatter.formatter import FilenameFormatter, OperationJournal, OperationLog
+from tools.filename_formatter.journal_catalog import (
+    JournalCatalog, ROLLBACK_FAILED, ROLLBACK_OK, ROLLBACK_SKIP_DEPENDENCY, ROLLBACK_SKIP_EXISTS,
+    ROLLBACK_SKIP_MISSING, main
+)
+
+
+def rename_with_journal(journal: OperationJournal, source: str, target: str, timestamp: str) -> None:
+    """执行一次重命名并写入日志"""
+    os.rename(source, target)
+    journal.append(OperationLog(timestamp=timestamp, operation_type="rename",
+                                source_path=source, target_path=target, file_size=1))
+
+
+def make_file(path) -> str:
+    path.write_bytes(b"x")
+    return str(path)
+
+
+def build_history(tmp_path):
+    """两次运行、两个日志：example.com@test001 -> TEST-001 -> TEST-001_1，以及冲突和丢失的记录"""
+    origin = make_file(tmp_path / "example.com@test001.mp4")
+    first = str(tmp_path / "TEST-001.mp4")
+    second = str(tmp_path / "TEST-001_1.mp4")
+    gone_source = make_file(tmp_path / "site_TEST-002.mp4")
+    gone_target = str(tmp_path / "TEST-002.mp4")
+    taken_source = make_file(tmp_path / "site_TEST-003.mp4")
+    taken_target = str(tmp_path / "TEST-003.mp4")
+
+    with OperationJournal(str(tmp_path / ".operation_log_20261001_100000.jsonl")) as journal:
+        rename_with_journal(journal, origin, first, "2026-10-01T10:00:00")
+        rename_with_journal(journal, gone_source, gone_target, "2026-10-01T10:00:01")
+        rename_with_journal(journal, taken_source, taken_target, "2026-10-01T10:00:02")
+    with OperationJournal(str(tmp_path / ".operation_log_20261002_100000.jsonl")) as journal:
+        rename_with_journal(journal, first, second, "2026-10-02T10:00:00")
+
+    os.remove(gone_target)
+    make_file(tmp_path / "site_TEST-003.mp4")
+    return origin, second
+
+
+def test_index_is_incremental(tmp_path):
+    build_history(tmp_path)
+    catalog = JournalCatalog(":memory:")
+
+    assert catalog.index_directory(str(tmp_path)) == (2, 4)
+    assert catalog.index_directory(str(tmp_path)) == (2, 0)
+
+    # 追加到已导入的日志后只导入新增部分，末尾不完整的行留到下次
+    log_file = tmp_path / ".operation_log_20261002_100000.jsonl"
+    with open(log_file, "a", encoding="utf-8") as f:
+        f.write('{"timestamp": "2026-10-02T11:00:00", "operation_type": "rename", '
+                f'"source_path": "{tmp_path}/a.mp4", "target_path": "{tmp_path}/TEST-009.mp4"}}\n'
+                '{"timestamp": "2026-10-02T11:00')
+    assert catalog.register_journal(str(log_file)) == 1
+
+
+def test_trace_origin_follows_rename_chain(tmp_path):
+    origin, current = build_history(tmp_path)
+    catalog = JournalCatalog(":memory:")
+    catalog.index_directory(str(tmp_path))
+
+    chain = catalog.trace_origin(current)
+    assert [entry["target_path"] for entry in chain] == [current, str(tmp_path / "TEST-001.mp4")]
+    assert chain[-1]["source_path"] == origin
+    assert len(catalog.lookup(str(tmp_path / "TEST-001.mp4"))) == 2
+
+    assert main(["--catalog", str(tmp_path / "catalog.db"), "index", str(tmp_path)]) == 0
+    assert main(["--catalog", str(tmp_path / "catalog.db"), "lookup", current]) == 0
+
+
+def test_rollback_window_prechecks_conflicts_in_memory(tmp_path, monkeypatch):
+    origin, current = build_history(tmp_path)
+    catalog = JournalCatalog(":memory:")
+    catalog.index_directory(str(tmp_path))
+
+    # 只回滚第一天：第二天的记录不在窗口内
+    assert [item.action for item in catalog.plan_rollback(until="2026-10-01")] == [
+        ROLLBACK_SKIP_EXISTS, ROLLBACK_SKIP_MISSING, ROLLBACK_SKIP_MISSING
+    ]
+
+    def fail_exists(path):
+        raise AssertionError(f"unexpected os.path.exists({path})")
+
+    with monkeypatch.context() as patched:
+        patched.setattr(os.path, "exists", fail_exists)
+        plan = catalog.plan_rollback(since="2026-10-01", until="2026-10-02")
+    assert [item.action for item in plan] == [
+        ROLLBACK_OK, ROLLBACK_SKIP_EXISTS, ROLLBACK_SKIP_MISSING, ROLLBACK_OK
+    ]
+
+    assert catalog.rollback_window(since="2026-10-01", dry_run=True).rolled_back == 0
+    assert os.path.exists(current)
+
+    result = catalog.rollback_window(since="2026-10-01")
+    assert result.rolled_back == 2
+    assert result.skipped == {ROLLBACK_SKIP_EXISTS: 1, ROLLBACK_SKIP_MISSING: 1}
+    assert os.path.exists(origin) and not os.path.exists(current)
+
+    # 已回滚的记录不再出现在计划中
+    assert [item.action for item in catalog.plan_rollback()] == [ROLLBACK_SKIP_EXISTS, ROLLBACK_SKIP_MISSING]
+
+
+def test_failed_rollback_skips_dependent_items(tmp_path, capsys):
+    # x -> y，之后 sub/w -> x：回滚 x -> sub/w 失败时，y 不能再移回 x（否则覆盖来自 w 的文件）
+    x, y = str(tmp_path / "TEST-001.mp4"), str(tmp_path / "TEST-002.mp4")
+    (tmp_path / "sub").mkdir()
+    w = make_file(tmp_path / "sub" / "w.mp4")
+    make_file(tmp_path / "TEST-001.mp4")
+    with OperationJournal(str(tmp_path / ".operation_log_20261001_100000.jsonl")) as journal:
+        rename_with_journal(journal, x, y, "2026-10-01T10:00:00")
+        rename_with_journal(journal, w, x, "2026-10-01T10:00:01")
+    (tmp_path / "sub").rmdir()
+    (tmp_path / "sub").write_text("not a directory")
+
+    catalog_path = str(tmp_path / "catalog.db")
+    assert main(["--catalog", catalog_path, "index", str(tmp_path)]) == 0
+    with open(x, "w") as f:
+        f.write("from w")
+    assert main(["--catalog", catalog_path, "rollback"]) == 1
+
+    output = capsys.readouterr().out
+    assert "✅ 已回滚" not in output
+    assert "依赖的操作未能回滚" in output
+    with open(x) as f:
+        assert f.read() == "from w"
+    assert os.path.exists(y)
+
+    with JournalCatalog(catalog_path) as catalog:
+        result = catalog.rollback_window()
+    assert [outcome for _, outcome in result.outcomes] == [ROLLBACK_FAILED, ROLLBACK_SKIP_DEPENDENCY]
+    assert result.rolled_back == 0
+
+
+def test_relative_directory_journal_uses_absolute_paths(tmp_path, monkeypatch):
+    # 以相对目录重命名：日志中记录绝对路径，在其他工作目录下仍能查询和回滚
+    (tmp_path / "vids").mkdir()
+    make_file(tmp_path / "vids" / "abc123.mp4")
+    monkeypatch.chdir(tmp_path)
+    results = FilenameFormatter(min_file_size=1).rename_in_directory("vids", log_operations=True)
+    assert [r.status for r in results] == ["success"]
+
+    elsewhere = tmp_path / "elsewhere"
+    (elsewhere / "vids").mkdir(parents=True)
+    monkeypatch.chdir(elsewhere)
+    catalog = JournalCatalog(":memory:")
+    assert catalog.index_directory(str(tmp_path / "vids")) == (1, 1)
+    target = str(tmp_path / "vids" / "ABC-123.mp4")
+    assert [entry["source_path"] for entry in catalog.trace_origin(target)] == [str(tmp_path / "vids" / "abc123.mp4")]
+
+    # 相对路径的记录无法确定指向哪个文件，不导入
+    with OperationJournal(str(tmp_path / "vids" / ".operation_log_20261001_100000.jsonl")) as journal:
+        journal.append(OperationLog(timestamp="2026-10-01T10:00:00", operation_type="rename",
+                                    source_path="vids/def456.mp4", target_path="vids/DEF-456.mp4"))
+    assert catalog.index_directory(str(tmp_path / "vids")) == (2, 0)
+
+    result = catalog.rollback_window()
+    assert [outcome for _, outcome in result.outcomes] == [ROLLBACK_OK]
+    assert os.path.exists(tmp_path / "vids" / "abc123.mp4")
@@ -10,8 +10,8 @@ import shutil
 import pytest
 from pathlib import Path
 
-from tools.filename_formatter.formatter import FilenameFormatter
-from tools.filename_formatter.rollback import rollback_operations
+from tools.filename_formatter.formatter import FilenameFormatter, OperationJournal, OperationLog
+from tools.filename_formatter.rollback import iter_operations_reversed, rollback_operations
 
 
 class TestRollbackSafety:
@@ -221,6 +221,25 @@ class TestRollbackSafety:
 
 
 
+    def test_journal_flushes_in_groups_and_reads_in_reverse(self):
+        """日志按组刷新到磁盘；倒序读取跨越块边界，并跳过崩溃留下的不完整行"""
+        log_file = os.path.join(self.temp_dir, ".operation_log_test.jsonl")
+        journal = OperationJournal(log_file, flush_every=2)
+        for index in range(1, 4):
+            journal.append(OperationLog(timestamp=f"t{index}", operation_type="rename",
+                                        source_path=f"src-{index}.mp4", target_path=f"TEST-00{index}.mp4"))
+            if index == 2:
+                # 第一组已刷新，未关闭时即可读到
+                with open(log_file, 'r', encoding='utf-8') as f:
+                    assert len(f.readlines()) == 2
+        journal.close()
+
+        with open(log_file, 'a', encoding='utf-8') as f:
+            f.write('{"timestamp": "t4", "operation_ty')
+
+        operations = list(iter_operations_reversed(log_file, block_size=16))
+        assert [op['timestamp'] for op in operations] == ["t3", "t2", "t1"]
+
     def test_corrupted_log_file_handling(self):
         """测试损坏日志文件的处理"""
         # 创建损坏的日志文件
@@ -0,0 +1,108 @@
+"""
+测试后台分批验证
+"""
+
+import os
+import shutil
+import tempfile
+import unittest
+from unittest.mock import patch
+
+from tools.video_info_collector.background_verifier import (
+    BackgroundVerifier, ReadThrottle, STOP_COMPLETE, STOP_IO_BUDGET
+)
+from tools.video_info_collector.metadata import VideoInfo
+from tools.video_info_collector.scan_verifier import HEADER_SIZE
+from tools.video_info_collector.sqlite_storage import SQLiteStorage
+from tools.video_info_collector.volume_monitor import VolumeMonitor
+
+
+MP4_HEADER = b'\x00\x00\x00\x20ftypisom' + b'\x00' * 52
+
+
+class TestBackgroundVerifier(unittest.TestCase):
+    """测试BackgroundVerifier类"""
+
+    def setUp(self):
+        """设置测试环境"""
+        self.temp_dir = tempfile.mkdtemp()
+        self.storage = SQLiteStorage(os.path.join(self.temp_dir, "test.db"))
+        self.video_ids = [self._insert(f"TEST-{index:03d}.mp4") for index in range(1, 6)]
+
+    def tearDown(self):
+        """清理测试环境"""
+        self.storage.close()
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+
+    def _insert(self, name, content=MP4_HEADER):
+        file_path = os.path.join(self.temp_dir, name)
+        with open(file_path, 'wb') as f:
+            f.write(content)
+        return self.storage.insert_video_info(VideoInfo(file_path))
+
+    def _verifier(self, **kwargs):
+        return BackgroundVerifier(self.storage, volume_monitor=VolumeMonitor(mount_points=['/']), **kwargs)
+
+    def test_budget_stops_run_and_cursor_resumes(self):
+        """预算用完时停止并保存游标，下次运行从停止处继续，到达末尾完成一个周期"""
+        budget_mb = 2 * HEADER_SIZE / (1024 * 1024)
+
+        first = self._verifier(io_budget_mb=budget_mb).run()
+        self.assertEqual(first.verified, 2)
+        self.assertEqual(first.stop_reason, STOP_IO_BUDGET)
+        self.assertEqual(first.last_video_id, self.video_ids[1])
+
+        second = self._verifier(io_budget_mb=budget_mb).run()
+        self.assertEqual(second.verified, 2)
+        self.assertEqual(second.last_video_id, self.video_ids[3])
+
+        third = self._verifier().run()
+        self.assertEqual(third.verified, 1)
+        self.assertEqual(third.stop_reason, STOP_COMPLETE)
+        self.assertEqual(third.cycles_completed, 1)
+        self.assertEqual(self.storage.get_verification_cursor('header')['cycles_completed'], 1)
+
+        for video_id in self.video_ids:
+            state = self.storage.get_verification_state(video_id)
+            self.assertEqual(state['result'], 'valid')
+            self.assertIsNotNone(state['last_verified_time'])
+
+        # 最近验证过的记录不再重复验证
+        self.assertEqual(self._verifier().run().verified, 0)
+
+    def test_read_mode_detects_content_change(self):
+        """read模式记录内容哈希，大小不变但内容变化时判定为损坏"""
+        self.assertEqual(self._verifier(mode='read').run().results, {'valid': 5})
+
+        file_path = os.path.join(self.temp_dir, "TEST-003.mp4")
+        with open(file_path, 'r+b') as f:
+            f.seek(20)
+            f.write(b'\xff')
+
+        result = self._verifier(mode='read', reverify_days=0).run()
+        self.assertEqual(result.results, {'valid': 4, 'corrupted': 1})
+        self.assertEqual(result.problems[0]['file_path'], file_path)
+
+    def test_missing_file_updates_status(self):
+        """验证时发现文件已不存在，批量更新记录状态为missing"""
+        os.remove(os.path.join(self.temp_dir, "TEST-002.mp4"))
+
+        result = self._verifier().run()
+
+        self.assertEqual(result.status_changes, 1)
+        self.assertEqual(self.storage.get_video_info_by_id(self.video_ids[1])['file_status'], 'missing')
+
+    def test_read_throttle_sleeps_to_rate(self):
+        """限速器按累计读取量休眠"""
+        with patch('tools.video_info_collector.background_verifier.time.sleep') as sleep:
+            throttle = ReadThrottle(bytes_per_second=1000)
+            throttle.consume(500)
+            throttle.consume(500)
+
+        # sleep 被替换后时间不前进，最后一次休眠应补齐到累计读取量对应的1秒
+        self.assertAlmostEqual(sleep.call_args_list[-1].args[0], 1.0, delta=0.1)
+        self.assertIsNone(ReadThrottle(None).consume(10 ** 9))
+
+
+if __name__ == '__main__':
+    unittest.main()
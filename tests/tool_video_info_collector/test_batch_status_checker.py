@@ -0,0 +1,101 @@
+"""
+测试按目录分组的批量文件状态检查
+"""
+
+import os
+import shutil
+import tempfile
+import unittest
+from unittest.mock import patch
+
+from tools.video_info_collector.batch_status_checker import BatchStatusChecker
+from tools.video_info_collector.file_status_manager import FileStatus, FileStatusManager
+from tools.video_info_collector.metadata import VideoInfo
+
+
+class TestBatchStatusChecker(unittest.TestCase):
+    """测试BatchStatusChecker类"""
+
+    def setUp(self):
+        """设置测试环境"""
+        self.temp_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        """清理测试环境"""
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+
+    def _create_files(self, directory, count):
+        directory = os.path.join(self.temp_dir, directory)
+        os.makedirs(directory, exist_ok=True)
+        paths = []
+        for i in range(count):
+            path = os.path.join(directory, f"TEST-{i:03d}.mp4")
+            with open(path, 'w') as f:
+                f.write("content")
+            paths.append(path)
+        return paths
+
+    def test_present_missing_and_non_file_entries(self):
+        """测试存在、丢失、目录项以及整个目录不存在的情况"""
+        present = self._create_files("disk_a", 3)
+        sub_directory = os.path.join(self.temp_dir, "disk_a", "TEST-SUB.mp4")
+        os.makedirs(sub_directory)
+        missing = os.path.join(self.temp_dir, "disk_a", "TEST-999.mp4")
+        unmounted = [os.path.join(self.temp_dir, "unmounted", f"TEST-{i}.mp4") for i in range(3)]
+
+        result = BatchStatusChecker(max_workers=4).check(present + [missing, sub_directory] + unmounted)
+
+        for path in present:
+            self.assertEqual(result[path], FileStatus.PRESENT)
+        for path in [missing, sub_directory] + unmounted:
+            self.assertEqual(result[path], FileStatus.MISSING)
+
+    def test_one_scandir_per_directory(self):
+        """测试同一目录下的文件只做一次scandir，存在的文件不再逐个stat"""
+        paths = self._create_files("disk_a", 10) + self._create_files("disk_b", 10)
+
+        with patch('tools.video_info_collector.batch_status_checker.os.scandir',
+                   wraps=os.scandir) as scandir, \
+             patch.object(BatchStatusChecker, '_stat_status',
+                          wraps=BatchStatusChecker._stat_status) as stat_status:
+            result = BatchStatusChecker(max_workers=2).check(paths)
+
+        self.assertEqual(scandir.call_count, 2)
+        stat_status.assert_not_called()
+        self.assertTrue(all(status == FileStatus.PRESENT for status in result.values()))
+
+    def test_readable_check_when_not_stat_only(self):
+        """测试非stat_only模式下对存在的文件读取确认"""
+        paths = self._create_files("disk_a", 2)
+        broken_link = os.path.join(self.temp_dir, "disk_a", "TEST-LINK.mp4")
+        os.symlink(os.path.join(self.temp_dir, "nowhere.mp4"), broken_link)
+
+        with patch.object(BatchStatusChecker, '_readable_status',
+                          wraps=BatchStatusChecker._readable_status) as readable_status:
+            result = BatchStatusChecker(stat_only=False).check(paths + [broken_link])
+
+        self.assertEqual(readable_status.call_count, 2)
+        self.assertEqual(result[broken_link], FileStatus.MISSING)
+        self.assertEqual(result[paths[0]], FileStatus.PRESENT)
+
+    def test_file_status_manager_batch_operations(self):
+        """测试FileStatusManager的批量操作使用批量检查结果"""
+        paths = self._create_files("disk_a", 4)
+        videos = [VideoInfo(path) for path in paths]
+        videos[1].file_status = FileStatus.IGNORE.value
+        os.remove(paths[2])
+
+        manager = FileStatusManager(max_workers=4)
+        inconsistencies = manager.detect_status_inconsistencies(videos)
+        self.assertEqual([item['file_path'] for item in inconsistencies], [paths[2]])
+
+        results = manager.batch_check_status(videos)
+        self.assertEqual((results['present'], results['missing'], results['ignore']), (2, 1, 1))
+        self.assertEqual(videos[2].file_status, FileStatus.MISSING.value)
+
+        self.assertEqual(manager.unmark_ignore(videos), 1)
+        self.assertEqual(videos[1].file_status, FileStatus.PRESENT.value)
+
+
+if __name__ == '__main__':
+    unittest.main()
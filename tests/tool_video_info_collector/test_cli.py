@@ -11,6 +11,8 @@ from pathlib import Path
 from tools.video_info_collector.cli import cli_main
 from tools.video_info_collector.sqlite_storage import SQLiteStorage
 from tools.video_info_collector.metadata import VideoInfo
+from tools.video_info_collector.exporters import ExportStats
+from tools.video_info_collector.csv_ingestor import CSVIngestResult
 
 
 class TestCLI(unittest.TestCase):
@@ -82,8 +84,7 @@ class TestCLI(unittest.TestCase):
         
         with patch('tools.video_info_collector.cli.SQLiteStorage') as mock_storage:
             mock_storage_instance = MagicMock()
-            mock_storage_instance.export_to_csv.return_value = True
-            mock_storage_instance.get_total_count.return_value = 5
+            mock_storage_instance.export_to_csv.return_value = ExportStats(5, 0.1, csv_path)
             mock_storage.return_value = mock_storage_instance
             
             # 运行CLI - 新的接口使用--export参数
@@ -92,7 +93,29 @@ class TestCLI(unittest.TestCase):
             # 验证结果
             self.assertEqual(result, 0)
             mock_storage_instance.export_to_csv.assert_called_once_with(csv_path)
-            mock_storage_instance.get_total_count.assert_called_once()
+
+    def test_cli_export_jsonl_with_filters(self):
+        """测试JSON Lines导出并传递压缩与过滤参数"""
+        jsonl_path = os.path.join(self.temp_dir, "export.jsonl")
+        db_path = os.path.join(self.temp_dir, "test.db")
+        
+        with open(db_path, 'w') as f:
+            f.write("fake db")
+        
+        with patch('tools.video_info_collector.cli.SQLiteStorage') as mock_storage:
+            mock_storage_instance = MagicMock()
+            mock_storage_instance.export_to_jsonl.return_value = ExportStats(3, 0.1, jsonl_path)
+            mock_storage.return_value = mock_storage_instance
+            
+            result = cli_main(['--export', db_path, '--output', jsonl_path, '--format', 'json',
+                               '--compress', '--filter-file-status', 'present',
+                               '--filter-tag', 'test', '--filter-logical-path', 'movies'])
+            
+            self.assertEqual(result, 0)
+            mock_storage_instance.export_to_jsonl.assert_called_once_with(
+                jsonl_path, compress=True, file_status='present', tag='test', logical_path='movies'
+            )
+            mock_storage_instance.export_to_csv.assert_not_called()
 
     def test_cli_export_simple(self):
         """测试简化导出功能"""
@@ -105,8 +128,7 @@ class TestCLI(unittest.TestCase):
         
         with patch('tools.video_info_collector.cli.SQLiteStorage') as mock_storage:
             mock_storage_instance = MagicMock()
-            mock_storage_instance.export_simple_format.return_value = True
-            mock_storage_instance.get_total_count.return_value = 10
+            mock_storage_instance.export_simple_format.return_value = ExportStats(10, 0.1, simple_path)
             mock_storage.return_value = mock_storage_instance
             
             # 运行CLI - 使用--export-simple参数
@@ -115,7 +137,6 @@ class TestCLI(unittest.TestCase):
             # 验证结果
             self.assertEqual(result, 0)
             mock_storage_instance.export_simple_format.assert_called_once_with(simple_path)
-            mock_storage_instance.get_total_count.assert_called_once()
 
     def test_cli_export_simple_default_output(self):
         """测试简化导出功能使用默认输出路径"""
@@ -131,8 +152,7 @@ class TestCLI(unittest.TestCase):
                 mock_datetime.now.return_value.strftime.return_value = "20240101_120000"
                 
                 mock_storage_instance = MagicMock()
-                mock_storage_instance.export_simple_format.return_value = True
-                mock_storage_instance.get_total_count.return_value = 5
+                mock_storage_instance.export_simple_format.return_value = ExportStats(5, 0.1, 'simple_export.txt')
                 mock_storage.return_value = mock_storage_instance
                 
                 # 运行CLI - 不指定输出路径
@@ -170,13 +190,15 @@ class TestCLI(unittest.TestCase):
             
             mock_storage_instance = MagicMock()
             mock_storage_instance.check_csv_already_merged.return_value = False  # 假设CSV文件未被合并过
-            mock_storage_instance.get_csv_fingerprint.return_value = "test_fingerprint"
             mock_storage_instance.extract_scan_info_from_csv_filename.return_value = {
                 'original_scan_path': '/test/path',
                 'timestamp': '20240101_120000'
             }
             mock_storage_instance.add_csv_merge_history.return_value = 1
-            mock_storage_instance.load_videos_from_csv.return_value = [MagicMock()]  # 模拟加载的视频
+            # 一次读取得到指纹、记录数和模拟加载的视频
+            mock_storage_instance.ingest_csv.return_value = CSVIngestResult(
+                content_hash="test_fingerprint", row_count=1, videos=[MagicMock()]
+            )
             mock_storage_instance.get_all_video_infos.return_value = []  # 模拟现有视频
             mock_storage.return_value = mock_storage_instance
             
@@ -193,7 +215,7 @@ class TestCLI(unittest.TestCase):
             
             # 验证结果
             self.assertEqual(result, 0)
-            mock_storage_instance.load_videos_from_csv.assert_called_once_with(csv_path)
+            mock_storage_instance.ingest_csv.assert_called_once_with(csv_path)
             mock_merge_manager_instance.analyze_merge_candidates.assert_called_once()
             mock_merge_manager_instance.execute_merge_plan.assert_called_once()
     
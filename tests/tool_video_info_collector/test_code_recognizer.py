@@ -0,0 +1,93 @@
+"""
+测试基于已知前缀的video_code识别
+"""
+
+import csv
+import os
+import shutil
+import tempfile
+import unittest
+
+from tools.video_info_collector.cli import cli_main
+from tools.video_info_collector.code_recognizer import PrefixCodeRecognizer, split_video_code
+from tools.video_info_collector.metadata import VideoMetadataExtractor
+from tools.video_info_collector.sqlite_storage import SQLiteStorage
+
+
+class TestPrefixCodeRecognizer(unittest.TestCase):
+    """测试PrefixCodeRecognizer类"""
+
+    def setUp(self):
+        """设置测试环境"""
+        self.recognizer = PrefixCodeRecognizer.from_video_codes(['TEST-001', 'DEMO002', 'T28-123', '123456_789'])
+
+    def test_prefixes_derived_from_codes(self):
+        """从已有编码中拆出前缀，非"前缀+数字"形式的编码被忽略"""
+        self.assertEqual(split_video_code('demo_002'), ('DEMO', '_', '002'))
+        self.assertIsNone(split_video_code('123456_789'))
+        self.assertEqual(len(self.recognizer), 3)
+        self.assertFalse(self.recognizer.add_prefix('X'))
+
+    def test_known_prefix_preferred_over_noise_tokens(self):
+        """已知前缀优先于编码格式、分辨率等容易误认的标记"""
+        self.assertEqual(self.recognizer.extract('H264 TEST001.mp4'), 'TEST001')
+        self.assertEqual(self.recognizer.extract('[FHD-1080] test-002.mp4'), 'test-002')
+        self.assertEqual(self.recognizer.extract('x264 DEMO_003 1080p.mkv'), 'DEMO_003')
+        self.assertEqual(self.recognizer.extract('t28-456.avi'), 't28-456')
+
+    def test_word_boundaries_and_fallback(self):
+        """前缀只从词的开头匹配，数字后不能紧跟字母；未命中时退回正则规则"""
+        self.assertIsNone(self.recognizer.recognize('xTEST-001.mp4'))
+        self.assertIsNone(self.recognizer.recognize('TEST-001C.mp4'))
+        self.assertIsNone(self.recognizer.recognize('TEST-1.mp4'))
+        self.assertEqual(self.recognizer.extract('ABC-004.mp4'), 'ABC-004')
+        self.assertIsNone(PrefixCodeRecognizer(['TEST'], fallback=None).extract('ABC-004.mp4'))
+
+    def test_seeded_from_master_list(self):
+        """从主列表构建识别器，元数据提取时使用"""
+        temp_dir = tempfile.mkdtemp()
+        try:
+            storage = SQLiteStorage(os.path.join(temp_dir, "test.db"))
+            storage.upsert_master_list_entry('TEST-001', 'fp1')
+            storage.upsert_master_list_entry('DEMO-001', 'fp2')
+            storage.mark_master_list_as_deleted('DEMO-001')
+
+            recognizer = PrefixCodeRecognizer.from_storage(storage, fallback=None)
+            storage.close()
+
+            file_path = os.path.join(temp_dir, 'HEVC-265 TEST-002.mp4')
+            with open(file_path, 'wb') as f:
+                f.write(b'\x00' * 16)
+            video = VideoMetadataExtractor(code_recognizer=recognizer).extract_metadata(file_path)
+
+            self.assertEqual(len(recognizer), 1)
+            self.assertEqual(video.video_code, 'TEST-002')
+        finally:
+            shutil.rmtree(temp_dir, ignore_errors=True)
+
+    def test_cli_scan_uses_master_list_prefixes(self):
+        """扫描命令在数据库存在时使用主列表前缀识别编码，与路径更新一致"""
+        temp_dir = tempfile.mkdtemp()
+        try:
+            db_path = os.path.join(temp_dir, "test.db")
+            storage = SQLiteStorage(db_path)
+            storage.upsert_master_list_entry('TEST-001', 'fp1')
+            storage.close()
+
+            videos_dir = os.path.join(temp_dir, "videos")
+            os.makedirs(videos_dir)
+            with open(os.path.join(videos_dir, 'HEVC-265 TEST-002.mp4'), 'wb') as f:
+                f.write(b'\x00' * 16 * 1024)
+            csv_path = os.path.join(temp_dir, "scan.csv")
+
+            self.assertEqual(cli_main([videos_dir, '--database', db_path, '--output', csv_path]), 0)
+
+            with open(csv_path, newline='', encoding='utf-8') as f:
+                rows = list(csv.DictReader(f))
+            self.assertEqual([row['video_code'] for row in rows], ['TEST-002'])
+        finally:
+            shutil.rmtree(temp_dir, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,94 @@
+"""
+测试单次读取的流式CSV读取器
+"""
+
+import os
+import shutil
+import tempfile
+import time
+import unittest
+
+from tools.video_info_collector.csv_ingestor import CSVIngestor, compute_content_hash, ingest_csv
+from tools.video_info_collector.sqlite_storage import SQLiteStorage
+
+HEADER = ("file_path,filename,video_code,file_fingerprint,width,height,duration,video_codec,"
+          "audio_codec,file_size,bit_rate,frame_rate,created_time,tags,logical_path\n")
+
+
+def make_row(index, width="1920"):
+    """生成一行CSV文本"""
+    return (f"/videos/TEST-{index:03d}.mp4,TEST-{index:03d}.mp4,TEST-{index:03d},fp{index},{width},1080,"
+            f"3600.0,h264,aac,1000,5000,30,2024-01-01T00:00:00,a,disk/path\n")
+
+
+class TestCSVIngestor(unittest.TestCase):
+    """测试CSVIngestor类"""
+
+    def setUp(self):
+        """设置测试环境"""
+        self.temp_dir = tempfile.mkdtemp()
+        self.csv_path = os.path.join(self.temp_dir, "scan.csv")
+
+    def tearDown(self):
+        """清理测试环境"""
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+
+    def _write(self, *rows):
+        with open(self.csv_path, 'w', encoding='utf-8') as f:
+            f.write(HEADER)
+            f.writelines(rows)
+
+    def test_single_read_hash_count_and_records(self):
+        """测试一次读取同时得到内容哈希、记录数和解析结果"""
+        self._write(*(make_row(i) for i in range(1, 51)), make_row(99, width="bad"))
+
+        result = CSVIngestor(self.csv_path, chunk_size=64).read()
+        self.assertEqual(result.row_count, 51)
+        self.assertEqual(len(result.videos), 50)
+        self.assertEqual(result.skipped_count, 1)
+        self.assertEqual(result.content_hash, compute_content_hash(self.csv_path))
+        self.assertEqual(result.videos[0].video_code, "TEST-001")
+        self.assertEqual(result.videos[0].width, 1920)
+        self.assertEqual(result.videos[0].duration, 3600.0)
+
+    def test_hash_covers_whole_file_when_stopped_early(self):
+        """测试提前停止迭代时哈希仍覆盖整个文件"""
+        self._write(*(make_row(i) for i in range(1, 20)))
+
+        ingestor = CSVIngestor(self.csv_path, chunk_size=32)
+        rows = ingestor.iter_rows()
+        next(rows)
+        rows.close()
+        self.assertEqual(ingestor.content_hash, compute_content_hash(self.csv_path))
+
+    def test_hash_ignores_mtime_but_not_content(self):
+        """测试内容哈希不受修改时间影响，内容变化时改变"""
+        self._write(make_row(1))
+        original = ingest_csv(self.csv_path).content_hash
+
+        later = time.time() + 100
+        os.utime(self.csv_path, (later, later))
+        self.assertEqual(ingest_csv(self.csv_path).content_hash, original)
+
+        self._write(make_row(2))
+        self.assertNotEqual(ingest_csv(self.csv_path).content_hash, original)
+
+    def test_touched_csv_still_detected_as_merged(self):
+        """测试touch过的CSV仍被识别为已合并，且只按完整指纹精确匹配"""
+        self._write(make_row(1))
+        storage = SQLiteStorage(os.path.join(self.temp_dir, "test.db"))
+        try:
+            fingerprint = storage.ingest_csv(self.csv_path).content_hash
+            storage.add_csv_merge_history(self.csv_path, 1, 1, fingerprint, "/videos")
+
+            later = time.time() + 100
+            os.utime(self.csv_path, (later, later))
+            self.assertEqual(storage.get_csv_fingerprint(self.csv_path), fingerprint)
+            self.assertTrue(storage.check_csv_already_merged(fingerprint))
+            self.assertFalse(storage.check_csv_already_merged(fingerprint[:16]))
+        finally:
+            storage.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -120,7 +120,7 @@ class TestCSVWriter(unittest.TestCase):
         expected_headers = [
             'file_path', 'filename', 'video_code', 'file_fingerprint', 'width', 'height', 'resolution',
             'duration', 'duration_formatted', 'video_codec', 'audio_codec',
-            'file_size', 'bit_rate', 'frame_rate', 'created_time', 'tags', 'logical_path'
+            'file_size', 'bit_rate', 'frame_rate', 'created_time', 'tags', 'logical_path', 'scan_root'
         ]
         
         self.csv_writer.write_video_infos(self.test_video_infos[:1], self.csv_file_path)
@@ -254,6 +254,23 @@ class TestBatchStatusManagement(unittest.TestCase):
         
         return files
     
+    def test_probe_file_status_parallel(self):
+        """测试并行stat探测文件状态"""
+        from tools.video_info_collector.file_status_manager import FileStatusManager, FileStatus
+        
+        file_paths = self._create_test_files(5)
+        missing_path = os.path.join(self.temp_dir, "videos/TEST-999.mp4")
+        directory_path = os.path.join(self.temp_dir, "videos")
+        
+        result = FileStatusManager().probe_file_status(
+            file_paths + [missing_path, directory_path], max_workers=4
+        )
+        
+        for file_path in file_paths:
+            self.assertEqual(result[file_path], FileStatus.PRESENT)
+        self.assertEqual(result[missing_path], FileStatus.MISSING)
+        self.assertEqual(result[directory_path], FileStatus.MISSING)
+    
     def test_batch_status_update(self):
         """测试批量状态更新"""
         # 创建多个文件
@@ -411,6 +411,66 @@ class TestMasterList(unittest.TestCase):
         
         conn.close()
     
+    def test_refresh_master_list_for_codes(self):
+        """测试按video_code批量刷新主列表"""
+        conn = sqlite3.connect(self.db_path)
+        cursor = conn.cursor()
+        rows = [
+            ('/v/TEST-001.mp4', 'TEST-001', 'fp1', 'present'),
+            ('/v/TEST-001-old.mp4', 'TEST-001', 'fp0', 'replaced'),
+            ('/v/TEST-001-copy.mp4', 'TEST-001', 'fp1b', 'missing'),
+            ('/v/TEST-002.mp4', 'TEST-002', 'fp2', 'replaced'),
+            ('/v/TEST-003.mp4', 'TEST-003', 'fp3', 'present'),
+        ]
+        cursor.executemany('''
+            INSERT INTO video_info (file_path, filename, created_time, video_code, file_fingerprint, file_status)
+            VALUES (?, 'x.mp4', '2024-01-01', ?, ?, ?)
+        ''', rows)
+        cursor.execute('''
+            INSERT INTO video_master_list (video_code, file_fingerprint, file_count)
+            VALUES ('TEST-002', 'fp2', 5)
+        ''')
+        conn.commit()
+        conn.close()
+        
+        refreshed = self.storage.refresh_master_list_for_codes(['TEST-001', 'TEST-002', None])
+        self.assertEqual(refreshed, 2)
+        
+        entry = self.storage.get_master_list_by_code('TEST-001')
+        self.assertEqual(entry['file_count'], 2)
+        self.assertEqual(entry['file_fingerprint'], 'fp1b')
+        # 全部被替换时计数归零，保留原指纹
+        entry = self.storage.get_master_list_by_code('TEST-002')
+        self.assertEqual(entry['file_count'], 0)
+        self.assertEqual(entry['file_fingerprint'], 'fp2')
+        # 未触及的video_code不创建条目
+        self.assertIsNone(self.storage.get_master_list_by_code('TEST-003'))
+        
+        self.assertEqual(self.storage.refresh_master_list_for_codes([]), 0)
+    
+    def test_recalculate_master_list_file_counts(self):
+        """测试全量重新计算主列表文件计数"""
+        conn = sqlite3.connect(self.db_path)
+        cursor = conn.cursor()
+        cursor.executemany('''
+            INSERT INTO video_info (file_path, filename, created_time, video_code, file_status)
+            VALUES (?, 'x.mp4', '2024-01-01', ?, ?)
+        ''', [
+            ('/v/a.mp4', 'TEST-001', 'present'),
+            ('/v/b.mp4', 'TEST-001', 'present'),
+            ('/v/c.mp4', 'TEST-001', 'replaced'),
+        ])
+        cursor.executemany('''
+            INSERT INTO video_master_list (video_code, file_count) VALUES (?, ?)
+        ''', [('TEST-001', 9), ('TEST-404', 3)])
+        conn.commit()
+        conn.close()
+        
+        self.storage.recalculate_master_list_file_counts()
+        
+        self.assertEqual(self.storage.get_master_list_by_code('TEST-001')['file_count'], 2)
+        self.assertEqual(self.storage.get_master_list_by_code('TEST-404')['file_count'], 0)
+    
     def test_master_list_performance(self):
         """测试master list性能"""
         import time
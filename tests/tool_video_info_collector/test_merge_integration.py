@@ -19,6 +19,7 @@ import csv
 from pathlib import Path
 import sys
 from datetime import datetime
+from unittest.mock import patch
 
 # 添加项目根目录到Python路径
 project_root = Path(__file__).parent.parent.parent
@@ -27,6 +28,7 @@ sys.path.insert(0, str(project_root))
 from tools.video_info_collector.cli import cli_main
 from tools.video_info_collector.sqlite_storage import SQLiteStorage
 from tools.video_info_collector.metadata import VideoInfo
+from tools.video_info_collector.smart_merge_manager import SmartMergeManager, MergeAction
 
 
 class TestMergeIntegration(unittest.TestCase):
@@ -438,6 +440,198 @@ class TestMergeIntegration(unittest.TestCase):
         self.assertIsNotNone(abc_123_entry, "应该有ABC-123的master list条目")
         self.assertEqual(abc_123_entry['file_count'], 1, "file_count应该是1（不包括被替换的文件）")
 
+    
+    def test_execute_merge_plan_rolls_back_failed_action(self):
+        """测试执行计划中单个动作失败只回滚该动作，并记录失败明细"""
+        existing = self._create_video_info(self.video1_path, "ABC-123", "fp_old")
+        existing.id = self.storage.insert_video_info(existing)
+        blocker = self._create_video_info(self.video3_path, "GHI-789", "fp_blocker")
+        self.storage.insert_video_info(blocker)
+        
+        new_video = self._create_video_info(self.video2_path, "DEF-456", "fp_new")
+        # 替换动作的新文件路径已存在，插入会失败
+        replacement = self._create_video_info(self.video3_path, "ABC-123", "fp_replacement")
+        merge_results = {
+            'insert_new': [MergeAction('insert_new', new_video)],
+            'mark_replaced': [MergeAction('mark_replaced', replacement, existing)],
+        }
+        
+        merge_manager = SmartMergeManager(self.storage)
+        stats = merge_manager.execute_merge_plan(merge_results, scan_id=1, chunk_size=1)
+        
+        self.assertEqual(stats['inserted'], 1)
+        self.assertEqual(stats['marked_replaced'], 0)
+        self.assertEqual(stats['errors'], 1)
+        self.assertEqual(len(merge_manager.merge_failures), 1)
+        self.assertEqual(merge_manager.merge_failures[0]['action_type'], 'mark_replaced')
+        self.assertEqual(merge_manager.merge_failures[0]['file_path'], self.video1_path)
+        
+        # 旧文件状态回滚为present，失败动作没有留下merge_history事件
+        self.assertEqual(self.storage.get_video_info_by_path(self.video1_path)['file_status'], 'present')
+        event_types = [e['event_type'] for e in self.storage.get_merge_history_by_scan_session("1")]
+        self.assertEqual(event_types, ['insert_new'])
+    
+    def test_missing_detection_limited_to_scan_roots(self):
+        """测试丢失文件检测只覆盖扫描根目录，且扫描列出的路径不再探测"""
+        scanned_dir = os.path.join(self.temp_dir, "scanned")
+        other_dir = os.path.join(self.temp_dir, "other_disk")
+        os.makedirs(scanned_dir)
+        scanned_path = os.path.join(scanned_dir, "ABC-123.mp4")
+        with open(scanned_path, 'w') as f:
+            f.write("content")
+        
+        gone_in_scope = self._create_video_info(os.path.join(scanned_dir, "DEF-456.mp4"), "DEF-456", "fp2")
+        gone_out_of_scope = self._create_video_info(os.path.join(other_dir, "GHI-789.mp4"), "GHI-789", "fp3")
+        listed_but_unreadable = self._create_video_info(os.path.join(scanned_dir, "JKL-012.mp4"), "JKL-012", "fp4")
+        existing_videos = [gone_in_scope, gone_out_of_scope, listed_but_unreadable]
+        
+        new_video = self._create_video_info(scanned_path, "ABC-123", "fp1")
+        merge_manager = SmartMergeManager(self.storage)
+        results = merge_manager.analyze_merge_candidates(
+            [new_video], existing_videos, scan_roots=[scanned_dir],
+            listed_paths={scanned_path, listed_but_unreadable.file_path}
+        )
+        
+        missing_paths = [action.video_info.file_path for action in results['mark_missing']]
+        self.assertEqual(missing_paths, [gone_in_scope.file_path])
+        
+        # 扫描根目录未知时不做推断，检查全部现有记录
+        results = merge_manager.analyze_merge_candidates(
+            [new_video], existing_videos,
+            listed_paths={scanned_path, listed_but_unreadable.file_path}
+        )
+        missing_paths = sorted(action.video_info.file_path for action in results['mark_missing'])
+        self.assertEqual(missing_paths, sorted([gone_in_scope.file_path, gone_out_of_scope.file_path]))
+    
+    def test_merge_detects_deleted_subdirectory_via_recorded_scan_root(self):
+        """测试扫描CSV记录扫描根目录：整个子目录被删除后重新扫描合并，其中的记录被标记为丢失"""
+        library = os.path.join(self.temp_dir, "lib")
+        for subdir, name in (("a", "ABC-123.mp4"), ("b", "DEF-456.mp4")):
+            os.makedirs(os.path.join(library, subdir))
+            shutil.copy(self.video1_path, os.path.join(library, subdir, name))
+        
+        first_csv = os.path.join(self.temp_dir, "first.csv")
+        self.assertEqual(cli_main([library, '--output', first_csv]), 0)
+        self.assertEqual(cli_main(['--merge', first_csv, '--database', self.db_path]), 0)
+        
+        shutil.rmtree(os.path.join(library, "b"))
+        second_csv = os.path.join(self.temp_dir, "second.csv")
+        self.assertEqual(cli_main([library, '--output', second_csv]), 0)
+        self.assertEqual(cli_main(['--merge', second_csv, '--database', self.db_path]), 0)
+        
+        deleted = self.storage.get_video_info_by_path(os.path.join(library, "b", "DEF-456.mp4"))
+        self.assertEqual(deleted['file_status'], 'missing')
+        kept = self.storage.get_video_info_by_path(os.path.join(library, "a", "ABC-123.mp4"))
+        self.assertEqual(kept['file_status'], 'present')
+    
+    def test_merge_csv_directory_as_one_plan(self):
+        """测试批量合并目录下的多个CSV：跨文件去重，每个CSV各自记录合并历史"""
+        csv_dir = os.path.join(self.temp_dir, "csvs")
+        os.makedirs(csv_dir)
+        row1 = [self.video1_path, "ABC-123.mp4", "ABC-123", "fp_video1", 1920, 1080, "1920x1080",
+                3600.0, "01:00:00", "h264", "aac", 12000, 5000, 30, "2024-01-01T12:00:00", "test", ""]
+        row2 = [self.video2_path, "DEF-456.mp4", "DEF-456", "fp_video2", 1920, 1080, "1920x1080",
+                3600.0, "01:00:00", "h264", "aac", 12000, 5000, 30, "2024-01-01T12:00:00", "test", ""]
+        row3 = [self.video3_path, "GHI-789.mkv", "GHI-789", "fp_video3", 1920, 1080, "1920x1080",
+                3600.0, "01:00:00", "h264", "aac", 12000, 5000, 30, "2024-01-01T12:00:00", "test", ""]
+        self._create_csv_file(os.path.join("csvs", "temp_video_info_disk_a_20240101_120000.csv"), [row1, row2])
+        self._create_csv_file(os.path.join("csvs", "temp_video_info_disk_b_20240102_120000.csv"), [row2, row3])
+        
+        result = cli_main(['--merge', csv_dir, '--database', self.db_path])
+        self.assertEqual(result, 0)
+        self.assertEqual(len(self.storage.get_all_videos()), 3)
+        
+        cursor = self.storage.connection.cursor()
+        cursor.execute("SELECT id, files_found, files_processed FROM scan_history ORDER BY id")
+        history = [tuple(row) for row in cursor.fetchall()]
+        self.assertEqual([row[1:] for row in history], [(2, 1), (2, 2)])
+        
+        # 重复路径归属后扫描的CSV
+        first_events = self.storage.get_merge_history_by_scan_session(str(history[0][0]))
+        second_events = self.storage.get_merge_history_by_scan_session(str(history[1][0]))
+        self.assertEqual([event['new_path'] for event in first_events], [self.video1_path])
+        self.assertEqual(sorted(event['new_path'] for event in second_events),
+                         sorted([self.video2_path, self.video3_path]))
+        
+        # 再次合并时已合并的CSV被跳过
+        result = cli_main(['--merge', os.path.join(csv_dir, "*.csv"), '--database', self.db_path])
+        self.assertEqual(result, 0)
+        cursor.execute("SELECT COUNT(*) FROM scan_history")
+        self.assertEqual(cursor.fetchone()[0], 2)
+        
+        # 新CSV中已入库的记录按关键字参数记录skip_duplicate事件
+        self._create_csv_file(os.path.join("csvs", "temp_video_info_disk_c_20240103_120000.csv"), [row1])
+        result = cli_main(['--merge', csv_dir, '--database', self.db_path])
+        self.assertEqual(result, 0)
+        cursor.execute("SELECT MAX(id) FROM scan_history")
+        third_id = cursor.fetchone()[0]
+        skipped = [event for event in self.storage.get_merge_history() if event['event_type'] == 'skip_duplicate']
+        self.assertEqual([(event['video_code'], event['old_path'], event['new_path'], event['scan_session_id'])
+                          for event in skipped],
+                         [("ABC-123", None, self.video1_path, str(third_id))])
+    
+    def test_stage_review_and_commit(self):
+        """测试 scan --stage 写入暂存表，--review 不修改数据库，--commit-stage 合并并清空暂存表"""
+        scan_dir = os.path.join(self.temp_dir, "scan")
+        os.makedirs(scan_dir)
+        for name in ("ABC-123.mp4", "DEF-456.mp4"):
+            shutil.copy(self.video1_path, os.path.join(scan_dir, name))
+        
+        result = cli_main([scan_dir, '--stage', '--database', self.db_path])
+        self.assertEqual(result, 0)
+        self.assertEqual(self.storage.get_staging_count(), 2)
+        self.assertEqual(len(self.storage.get_all_videos()), 0)
+        
+        result = cli_main(['--review', '--database', self.db_path])
+        self.assertEqual(result, 0)
+        self.assertEqual(len(self.storage.get_all_videos()), 0)
+        
+        result = cli_main(['--commit-stage', '--database', self.db_path])
+        self.assertEqual(result, 0)
+        self.assertEqual(self.storage.get_staging_count(), 0)
+        self.assertEqual(
+            sorted(video['filename'] for video in self.storage.get_all_videos()),
+            ["ABC-123.mp4", "DEF-456.mp4"]
+        )
+        insert_events = [e for e in self.storage.get_merge_history() if e['event_type'] == 'insert_new']
+        self.assertEqual(len(insert_events), 2)
+        
+        # 删除一个文件后重新暂存提交，扫描范围内的记录被标记为丢失
+        os.remove(os.path.join(scan_dir, "DEF-456.mp4"))
+        self.assertEqual(cli_main([scan_dir, '--stage', '--database', self.db_path]), 0)
+        self.assertEqual(cli_main(['--commit-stage', '--database', self.db_path]), 0)
+        missing = self.storage.get_video_info_by_path(os.path.join(scan_dir, "DEF-456.mp4"))
+        self.assertEqual(missing['file_status'], 'missing')
+
+    
+    def test_commit_stage_keeps_staging_when_action_fails(self):
+        """测试提交暂存结果时有动作失败：暂存表保留，修复后重新提交成功且不误标丢失"""
+        scan_dir = os.path.join(self.temp_dir, "scan")
+        os.makedirs(scan_dir)
+        for name in ("ABC-123.mp4", "DEF-456.mp4"):
+            shutil.copy(self.video1_path, os.path.join(scan_dir, name))
+        self.assertEqual(cli_main([scan_dir, '--stage', '--database', self.db_path]), 0)
+        
+        failing_path = os.path.join(scan_dir, "DEF-456.mp4")
+        original_insert = SmartMergeManager._apply_insert_new
+        
+        def failing_insert(manager, action, scan_id):
+            if action.video_info.file_path == failing_path:
+                raise RuntimeError("forced failure")
+            return original_insert(manager, action, scan_id)
+        
+        with patch.object(SmartMergeManager, '_apply_insert_new', failing_insert):
+            result = cli_main(['--commit-stage', '--database', self.db_path])
+        self.assertEqual(result, 1)
+        self.assertEqual(self.storage.get_staging_count(), 2)
+        self.assertIsNone(self.storage.get_video_info_by_path(failing_path))
+        
+        # 重新提交：失败的记录补录，已合并的记录不受影响
+        self.assertEqual(cli_main(['--commit-stage', '--database', self.db_path]), 0)
+        self.assertEqual(self.storage.get_staging_count(), 0)
+        statuses = sorted((video['filename'], video['file_status']) for video in self.storage.get_all_videos())
+        self.assertEqual(statuses, [("ABC-123.mp4", "present"), ("DEF-456.mp4", "present")])
+
 
 if __name__ == '__main__':
-    unittest.main(verbosity=2)
\ No newline at end of file
+    unittest.main(verbosity=2)
@@ -0,0 +1,103 @@
+"""
+测试全库近似重复检测
+"""
+
+import os
+import shutil
+import tempfile
+import unittest
+
+from tools.video_info_collector.metadata import VideoInfo
+from tools.video_info_collector.near_duplicate_detector import NearDuplicateDetector
+from tools.video_info_collector.sqlite_storage import SQLiteStorage
+
+
+def make_video(file_path, fingerprint, file_size=1000000000, duration=3600.0, width=1920, height=1080):
+    """创建测试用视频信息（文件不需要真实存在）"""
+    video = VideoInfo(file_path, tags=["test"], logical_path="test/path")
+    video.file_fingerprint = fingerprint
+    video.file_size = file_size
+    video.width = width
+    video.height = height
+    video.duration = duration
+    video.video_codec = 'h264'
+    video.audio_codec = 'aac'
+    video.bit_rate = 5000000
+    video.frame_rate = 30.0
+    video.created_time = "2024-01-01T00:00:00"
+    return video
+
+
+class TestNearDuplicateDetector(unittest.TestCase):
+    """测试NearDuplicateDetector类"""
+
+    def setUp(self):
+        """设置测试环境"""
+        self.temp_dir = tempfile.mkdtemp()
+        self.storage = SQLiteStorage(os.path.join(self.temp_dir, "test.db"))
+
+    def tearDown(self):
+        """清理测试环境"""
+        self.storage.close()
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+
+    def _insert(self, *videos):
+        for video in videos:
+            self.storage.insert_video_info(video)
+
+    def test_empty_database(self):
+        """测试空数据库返回空结果"""
+        detector = NearDuplicateDetector(self.storage)
+        self.assertEqual(detector.find_pairs(), [])
+        self.assertEqual(detector.find_clusters(), [])
+
+    def test_reencode_with_different_video_code(self):
+        """测试以不同编号保存的重新编码版本被识别为近似重复"""
+        self._insert(
+            make_video("/videos/TEST-001.mp4", "fp1", file_size=1000000000, duration=3600.0),
+            make_video("/videos/other/EXAMPLE-001.mp4", "fp2", file_size=1005000000, duration=3600.3),
+            make_video("/videos/TEST-002.mp4", "fp3", file_size=1000000000, duration=1800.0),
+        )
+
+        clusters = NearDuplicateDetector(self.storage).find_clusters()
+        self.assertEqual(len(clusters), 1)
+        self.assertEqual(sorted(clusters[0].file_paths),
+                         ["/videos/TEST-001.mp4", "/videos/other/EXAMPLE-001.mp4"])
+        self.assertGreaterEqual(clusters[0].max_similarity, 0.98)
+
+    def test_duration_tolerance_across_buckets(self):
+        """测试时长落在相邻桶内的记录仍会被比较，超出容忍度的不会"""
+        self._insert(
+            make_video("/videos/TEST-001.mp4", "fp1", duration=100.45),
+            make_video("/videos/TEST-002.mp4", "fp2", duration=100.55),
+            make_video("/videos/TEST-003.mp4", "fp3", duration=101.5),
+        )
+
+        pairs = NearDuplicateDetector(self.storage, threshold=0.9).find_pairs()
+        self.assertEqual(len(pairs), 1)
+
+    def test_threshold_filters_pairs(self):
+        """测试阈值过滤体积差异较大的记录"""
+        self._insert(
+            make_video("/videos/TEST-001.mp4", "fp1", file_size=1000000000),
+            make_video("/videos/TEST-002.mp4", "fp2", file_size=800000000),
+        )
+
+        self.assertEqual(NearDuplicateDetector(self.storage, threshold=0.98).find_pairs(), [])
+        self.assertEqual(len(NearDuplicateDetector(self.storage, threshold=0.9).find_pairs()), 1)
+
+    def test_clusters_are_transitive(self):
+        """测试相似关系按传递闭包合并为同一簇"""
+        self._insert(
+            make_video("/videos/TEST-001.mp4", "fp1", duration=600.0),
+            make_video("/videos/TEST-002.mp4", "fp2", duration=600.4),
+            make_video("/videos/TEST-003.mp4", "fp3", duration=600.8),
+        )
+
+        clusters = NearDuplicateDetector(self.storage, threshold=0.9).find_clusters()
+        self.assertEqual(len(clusters), 1)
+        self.assertEqual(clusters[0].size, 3)
+
+
+if __name__ == '__main__':
+    unittest.main()
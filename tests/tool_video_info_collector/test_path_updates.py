@@ -0,0 +1,92 @@
+"""
+测试路径更新事件的批量应用
+"""
+
+import os
+import shutil
+import tempfile
+import unittest
+from unittest.mock import patch
+
+import yaml
+
+from tools.filename_formatter.formatter import FilenameFormatter
+from tools.video_info_collector.metadata import VideoInfo
+from tools.video_info_collector.path_updates import PathUpdateApplier, collapse_path_updates
+from tools.video_info_collector.sqlite_storage import SQLiteStorage
+
+
+class TestPathUpdates(unittest.TestCase):
+    """测试PathUpdateApplier类"""
+
+    def setUp(self):
+        """设置测试环境"""
+        self.temp_dir = tempfile.mkdtemp()
+        self.video_dir = os.path.join(self.temp_dir, "videos")
+        os.makedirs(self.video_dir)
+        self.storage = SQLiteStorage(os.path.join(self.temp_dir, "test.db"))
+
+        rules_path = os.path.join(self.temp_dir, "rename_rules.yaml")
+        with open(rules_path, 'w', encoding='utf-8') as f:
+            yaml.safe_dump({"rename_rules": [{"pattern": "example.com@", "replace": ""}]}, f)
+        self.formatter = FilenameFormatter(min_file_size=0, default_rules_path=rules_path)
+
+    def tearDown(self):
+        """清理测试环境"""
+        self.storage.close()
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+
+    def _insert(self, name):
+        file_path = os.path.join(self.video_dir, name)
+        with open(file_path, 'wb') as f:
+            f.write(b'x' * 100)
+        return self.storage.insert_video_info(VideoInfo(file_path))
+
+    def test_formatter_events_update_database_without_probing(self):
+        """重命名事件批量更新路径、文件名、video_code和指纹，不调用ffprobe"""
+        video_id = self._insert("example.com@test001.mp4")
+        self._insert("TEST-002.mp4")
+        events_file = os.path.join(self.temp_dir, "renames.jsonl")
+
+        self.formatter.rename_in_directory(self.video_dir, path_updates_file=events_file)
+        new_path = os.path.join(self.video_dir, "TEST-001.mp4")
+        self.assertTrue(os.path.exists(new_path))
+
+        with patch('tools.video_info_collector.metadata.subprocess.run') as run:
+            result = PathUpdateApplier(self.storage).apply_file(events_file)
+        run.assert_not_called()
+
+        self.assertEqual((result.requested, result.updated, result.not_found), (1, 1, 0))
+        record = self.storage.get_video_info_by_id(video_id)
+        self.assertEqual(record['file_path'], new_path)
+        self.assertEqual(record['filename'], "TEST-001.mp4")
+        self.assertEqual(record['video_code'], "TEST-001")
+        # 指纹与重新扫描新文件得到的一致，下次合并按路径直接匹配
+        self.assertEqual(record['file_fingerprint'], VideoInfo(new_path, probe_file=True).file_fingerprint)
+
+        history = self.storage.get_merge_history_by_video_code("TEST-001")
+        self.assertEqual([(h['event_type'], h['new_path']) for h in history], [('update_path', new_path)])
+        self.assertIn("TEST-001", self.storage.get_master_list_video_codes())
+
+    def test_conflicts_chains_and_swaps(self):
+        """多次重命名合并为一次；互换文件名不违反唯一约束；新路径被其他记录占用时跳过"""
+        a, b = (os.path.join(self.video_dir, name) for name in ("TEST-001.mp4", "TEST-002.mp4"))
+        c, d = (os.path.join(self.video_dir, name) for name in ("TEST-003.mp4", "TEST-004.mp4"))
+        for name in ("TEST-001.mp4", "TEST-002.mp4", "TEST-003.mp4", "TEST-004.mp4"):
+            self._insert(name)
+        missing = os.path.join(self.video_dir, "TEST-009.mp4")
+        tmp = os.path.join(self.video_dir, "swap.tmp")
+
+        self.assertEqual(collapse_path_updates([(a, tmp), (tmp, a)]), {})
+        updates = [(a, tmp), (b, a), (tmp, b), (c, d), (missing, os.path.join(self.video_dir, "TEST-010.mp4"))]
+        result = PathUpdateApplier(self.storage).apply(updates)
+
+        self.assertEqual((result.requested, result.updated, result.not_found), (4, 2, 1))
+        self.assertEqual(result.conflicts, [(c, d)])
+        self.assertEqual(self.storage.get_video_info_by_path(a)['filename'], "TEST-001.mp4")
+        self.assertEqual(self.storage.get_video_info_by_path(a)['video_code'], "TEST-001")
+        self.assertEqual(self.storage.get_video_info_by_path(b)['video_code'], "TEST-002")
+
+
+if __name__ == '__main__':
+    unittest.main()
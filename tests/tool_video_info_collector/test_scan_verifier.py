@@ -0,0 +1,101 @@
+"""
+测试单次遍历验证扫描
+"""
+
+import os
+import shutil
+import tempfile
+import unittest
+from unittest.mock import patch
+
+from tools.video_info_collector.file_status_manager import FileStatusManager
+from tools.video_info_collector.metadata import VideoInfo
+from tools.video_info_collector.scan_verifier import ScanVerifier, validate_container_header
+
+
+MP4_HEADER = b'\x00\x00\x00\x20ftypisom' + b'\x00' * 52
+
+
+class TestScanVerifier(unittest.TestCase):
+    """测试ScanVerifier类"""
+
+    def setUp(self):
+        """设置测试环境"""
+        self.temp_dir = tempfile.mkdtemp()
+        self.status_manager = FileStatusManager(detect_offline_volumes=False)
+        self.verifier = ScanVerifier(self.status_manager, max_workers=4, seed=1)
+
+    def tearDown(self):
+        """清理测试环境"""
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+
+    def _video(self, name, content=MP4_HEADER, exists=True, file_status='present', file_size=None):
+        file_path = os.path.join(self.temp_dir, name)
+        if exists:
+            with open(file_path, 'wb') as f:
+                f.write(content)
+        video = VideoInfo(file_path, probe_file=False)
+        video.file_status = file_status
+        video.file_size = len(content) if file_size is None else file_size
+        video.duration = 60.0
+        return video
+
+    def test_status_checked_once_per_file(self):
+        """状态检查只调用一次批量检查，同时完成统计、不一致检测和修复"""
+        videos = [
+            self._video("TEST-001.mp4"),
+            self._video("TEST-002.mp4", exists=False),
+            self._video("TEST-003.mp4", file_status='missing'),
+            self._video("TEST-004.mp4", file_status='ignore'),
+        ]
+
+        with patch.object(self.status_manager.status_checker, 'check',
+                          wraps=self.status_manager.status_checker.check) as check:
+            status_check, inconsistencies, fix_results = self.verifier.check_status(videos)
+
+        check.assert_called_once()
+        self.assertEqual(status_check['present'], 2)
+        self.assertEqual(status_check['missing'], 1)
+        self.assertEqual(status_check['ignore'], 1)
+        self.assertEqual(len(inconsistencies), 2)
+        self.assertEqual(fix_results['fixed_count'], 2)
+        self.assertEqual([video.file_status for video in videos], ['present', 'missing', 'present', 'ignore'])
+
+    def test_header_check_validates_signature_and_size(self):
+        """header模式校验容器签名并比较文件大小"""
+        self.assertTrue(validate_container_header(b'\x1a\x45\xdf\xa3' + b'\x00' * 60, '.mkv'))
+        self.assertFalse(validate_container_header(b'not a video file', '.mp4'))
+
+        videos = [
+            self._video("TEST-001.mp4"),
+            self._video("TEST-002.mp4", content=b'plain text, not a container'),
+            self._video("TEST-003.mp4", file_size=1024),
+        ]
+        results = self.verifier.check_integrity(videos, mode='header')
+
+        self.assertEqual(results['checked'], 3)
+        self.assertEqual(results['valid'], 1)
+        self.assertEqual(results['corrupted_files'], [videos[1].file_path])
+        self.assertEqual([item['file_path'] for item in results['mismatched_files']], [videos[2].file_path])
+
+    def test_sample_rate_bounds_deep_checks(self):
+        """抽样比例限制深度检查的文件数"""
+        videos = [self._video(f"TEST-{index:03d}.mp4") for index in range(10)]
+        results = self.verifier.check_integrity(videos, sample_rate=0.3)
+        self.assertEqual(results['checked'], 3)
+        self.assertEqual(results['skipped'], 7)
+
+    def test_probe_mode_detects_duration_change(self):
+        """probe模式重新探测时长，与数据库记录不一致时报告"""
+        video = self._video("TEST-001.mp4")
+        probe_output = {'format': {'duration': '42.0', 'size': str(video.file_size)}, 'streams': []}
+
+        with patch.object(self.verifier.metadata_extractor, '_run_ffprobe', return_value=probe_output):
+            results = self.verifier.check_integrity([video], mode='probe')
+
+        self.assertEqual(results['mismatched'], 1)
+        self.assertIn('duration', results['mismatched_files'][0]['detail'])
+
+
+if __name__ == '__main__':
+    unittest.main()
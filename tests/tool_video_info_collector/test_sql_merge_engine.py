@@ -0,0 +1,196 @@
+"""
+测试基于暂存表的SQL合并引擎
+"""
+
+import os
+import shutil
+import tempfile
+import unittest
+
+from tools.video_info_collector.csv_writer import CSVWriter
+from tools.video_info_collector.metadata import VideoInfo
+from tools.video_info_collector.smart_merge_manager import SmartMergeManager
+from tools.video_info_collector.sql_merge_engine import SQLMergeEngine
+from tools.video_info_collector.sqlite_storage import SQLiteStorage
+
+
+def make_video(file_path, fingerprint, file_size=1000000000, tags=None, **fields):
+    """创建测试用视频信息（文件不需要真实存在）"""
+    video = VideoInfo(file_path, tags=tags or ["test"], logical_path="test/path")
+    video.file_fingerprint = fingerprint
+    video.file_size = file_size
+    video.width = fields.get('width', 1920)
+    video.height = fields.get('height', 1080)
+    video.duration = fields.get('duration', 3600.0)
+    video.video_codec = fields.get('video_codec', 'h264')
+    video.audio_codec = 'aac'
+    video.bit_rate = fields.get('bit_rate', 5000000)
+    video.frame_rate = 30.0
+    video.created_time = "2024-01-01T00:00:00"
+    return video
+
+
+class TestSQLMergeEngine(unittest.TestCase):
+    """测试SQLMergeEngine类"""
+
+    def setUp(self):
+        """设置测试环境"""
+        self.temp_dir = tempfile.mkdtemp()
+        self.db_path = os.path.join(self.temp_dir, "test.db")
+        self.storage = SQLiteStorage(self.db_path)
+        self.engine = SQLMergeEngine(self.storage)
+        self.csv_writer = CSVWriter()
+
+    def tearDown(self):
+        """清理测试环境"""
+        self.storage.close()
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+
+    def _write_csv(self, videos, name="scan.csv"):
+        csv_path = os.path.join(self.temp_dir, name)
+        self.csv_writer.write_video_infos(videos, csv_path)
+        return csv_path
+
+    def _merge(self, videos, scan_id=None):
+        self.engine.load_csv(self._write_csv(videos))
+        counts = self.engine.classify()
+        return counts, self.engine.apply(scan_id)
+
+    def test_insert_new_and_unchanged(self):
+        """测试新文件插入，以及重复合并时跳过未变化的记录"""
+        videos = [make_video(f"/videos/TEST-00{i}.mp4", f"fp{i}") for i in range(1, 4)]
+
+        counts, stats = self._merge(videos, scan_id=1)
+        self.assertEqual(counts['insert_new'], 3)
+        self.assertEqual(stats['inserted'], 3)
+        self.assertEqual(self.storage.get_total_count(), 3)
+        self.assertEqual(self.storage.get_master_list_by_code("TEST-001")['file_count'], 1)
+
+        row = self.storage.get_video_info_by_path("/videos/TEST-001.mp4")
+        self.assertEqual(row['resolution'], "1920x1080")
+        self.assertEqual(row['duration_formatted'], "01:00:00")
+        self.assertEqual(self.storage.get_video_tags(row['id']), ["test"])
+
+        counts, stats = self._merge(videos, scan_id=2)
+        self.assertEqual(counts['unchanged'], 3)
+        self.assertEqual(stats['inserted'], 0)
+        self.assertEqual(self.storage.get_total_count(), 3)
+
+        events = self.storage.get_merge_history_by_scan_session("2")
+        self.assertEqual({event['event_type'] for event in events}, {'skip_duplicate'})
+
+    def test_file_move_updates_path(self):
+        """测试指纹匹配时更新文件路径"""
+        self._merge([make_video("/videos/old/TEST-001.mp4", "fp1")])
+
+        counts, stats = self._merge([make_video("/videos/new/TEST-001.mp4", "fp1", tags=["moved"])],
+                                    scan_id=7)
+        self.assertEqual(counts['update_path'], 1)
+        self.assertEqual(stats['updated'], 1)
+        self.assertEqual(self.storage.get_total_count(), 1)
+        self.assertIsNone(self.storage.get_video_info_by_path("/videos/old/TEST-001.mp4"))
+
+        row = self.storage.get_video_info_by_path("/videos/new/TEST-001.mp4")
+        self.assertEqual(row['file_status'], 'present')
+        self.assertEqual(sorted(self.storage.get_video_tags(row['id'])), ["moved", "test"])
+
+        events = self.storage.get_merge_history_by_scan_session("7")
+        self.assertEqual(len(events), 1)
+        self.assertEqual(events[0]['old_path'], "/videos/old/TEST-001.mp4")
+        self.assertEqual(events[0]['new_path'], "/videos/new/TEST-001.mp4")
+
+    def test_replacement_and_duplicate(self):
+        """测试文件替换和疑似重复下载的分类"""
+        self._merge([
+            make_video("/videos/TEST-001.mp4", "fp1", file_size=1000000000),
+            make_video("/videos/TEST-002.mp4", "fp2", file_size=1000000000),
+        ])
+
+        counts, stats = self._merge([
+            # 同目录、体积大幅变化：替换
+            make_video("/videos/TEST-001-4K.mp4", "fp1-new", file_size=3000000000),
+            # 同目录、属性几乎一致：疑似重复
+            make_video("/videos/TEST-002-copy.mp4", "fp2-copy", file_size=1000000001),
+        ])
+        self.assertEqual(counts['mark_replaced'], 1)
+        self.assertEqual(counts['duplicate_detection'], 1)
+        self.assertEqual(stats['marked_replaced'], 1)
+        self.assertEqual(stats['inserted'], 0)
+        self.assertEqual(stats['duplicates_detected'], 1)
+
+        old_row = self.storage.get_video_info_by_path("/videos/TEST-001.mp4")
+        self.assertEqual(old_row['file_status'], 'replaced')
+        self.assertIsNotNone(self.storage.get_video_info_by_path("/videos/TEST-001-4K.mp4"))
+        self.assertEqual(self.storage.get_master_list_by_code("TEST-001")['file_count'], 1)
+
+        duplicates = self.engine.get_actions('duplicate_detection')
+        self.assertEqual(duplicates[0]['target_path'], "/videos/TEST-002.mp4")
+        self.assertIsNone(self.storage.get_video_info_by_path("/videos/TEST-002-copy.mp4"))
+
+    def test_classification_matches_smart_merge_manager(self):
+        """测试分类结果与SmartMergeManager一致"""
+        self._merge([
+            make_video("/videos/a/TEST-001.mp4", "fp1"),
+            make_video("/videos/a/TEST-002.mp4", "fp2"),
+            make_video("/videos/a/TEST-003.mp4", "fp3"),
+        ])
+        new_videos = [
+            make_video("/videos/a/TEST-001.mp4", "fp1", file_size=1100000000),
+            make_video("/videos/b/TEST-002.mp4", "fp2"),
+            make_video("/videos/b/TEST-003.mp4", "fp3-new", video_codec="hevc"),
+            make_video("/videos/a/TEST-004.mp4", "fp4"),
+        ]
+
+        self.engine.load_csv(self._write_csv(new_videos))
+        counts = self.engine.classify()
+
+        manager = SmartMergeManager(self.storage)
+        results = manager.analyze_merge_candidates(
+            self.storage.load_videos_from_csv(os.path.join(self.temp_dir, "scan.csv")),
+            self.storage.get_all_video_infos()
+        )
+        for action in ('insert_new', 'update_path', 'mark_replaced', 'duplicate_detection'):
+            self.assertEqual(counts[action], len(results[action]), action)
+
+    def test_load_csv_skips_invalid_rows(self):
+        """测试载入CSV时跳过无效行并按路径去重"""
+        csv_path = os.path.join(self.temp_dir, "bad.csv")
+        with open(csv_path, 'w', encoding='utf-8') as f:
+            f.write("file_path,filename,width,height,duration,video_codec,audio_codec,"
+                    "file_size,bit_rate,frame_rate,created_time,tags\n")
+            f.write("/videos/TEST-001.mp4,TEST-001.mp4,1920,1080,60,h264,aac,100,1,30,2024-01-01,a;b\n")
+            f.write("/videos/TEST-001.mp4,TEST-001.mp4,1920,1080,60,h264,aac,100,1,30,2024-01-01,c\n")
+            f.write("/videos/TEST-002.mp4,TEST-002.mp4,bad,1080,60,h264,aac,100,1,30,2024-01-01,\n")
+
+        self.assertEqual(self.engine.load_csv(csv_path), 1)
+        self.engine.classify()
+        self.engine.apply()
+        row = self.storage.get_video_info_by_path("/videos/TEST-001.mp4")
+        self.assertEqual(self.storage.get_video_tags(row['id']), ["c"])
+
+    def test_replaced_row_drops_previous_tags(self):
+        """测试重复路径的旧行标签被整体删除，标签中的 _ 和 % 不按通配符匹配"""
+        csv_path = os.path.join(self.temp_dir, "tags.csv")
+        with open(csv_path, 'w', encoding='utf-8') as f:
+            f.write("file_path,filename,width,height,duration,video_codec,audio_codec,"
+                    "file_size,bit_rate,frame_rate,created_time,tags\n")
+            f.write("/videos/TEST-001.mp4,TEST-001.mp4,1920,1080,60,h264,aac,100,1,30,2024-01-01,a_b;c%\n")
+            f.write("/videos/TEST-002.mp4,TEST-002.mp4,1920,1080,60,h264,aac,100,1,30,2024-01-01,a_b\n")
+            f.write("/videos/TEST-001.mp4,TEST-001.mp4,1920,1080,60,h264,aac,100,1,30,2024-01-01,axb;cd\n")
+            f.write("/videos/TEST-002.mp4,TEST-002.mp4,1920,1080,60,h264,aac,100,1,30,2024-01-01,axb\n")
+
+        # batch_size=1：覆盖发生在不同批次之间；默认批次大小：覆盖发生在同一批次内
+        for batch_size in (1, self.engine.batch_size):
+            with self.subTest(batch_size=batch_size):
+                engine = SQLMergeEngine(self.storage, batch_size=batch_size)
+                self.assertEqual(engine.load_csv(csv_path), 2)
+                cursor = self.storage.connection.cursor()
+                cursor.execute(f"SELECT file_path, tag FROM {engine.STAGING_TAGS_TABLE} ORDER BY file_path, tag")
+                self.assertEqual([tuple(row) for row in cursor.fetchall()], [
+                    ("/videos/TEST-001.mp4", "axb"), ("/videos/TEST-001.mp4", "cd"),
+                    ("/videos/TEST-002.mp4", "axb"),
+                ])
+
+
+if __name__ == '__main__':
+    unittest.main()
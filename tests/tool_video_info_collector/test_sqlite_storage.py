@@ -379,6 +379,82 @@ class TestSQLiteStorage(unittest.TestCase):
         success = self.storage.export_simple_format(invalid_path)
         self.assertFalse(success)
 
+    def test_export_to_jsonl(self):
+        """测试流式导出为JSON Lines"""
+        import json
+        self.storage.insert_multiple_video_infos(self.test_video_infos)
+
+        jsonl_file_path = os.path.join(self.temp_dir, "exported_videos.jsonl")
+        stats = self.storage.export_to_jsonl(jsonl_file_path)
+        self.assertEqual(stats.rows, 3)
+
+        with open(jsonl_file_path, 'r', encoding='utf-8') as f:
+            records = [json.loads(line) for line in f]
+        self.assertEqual(len(records), 3)
+        self.assertEqual(records[0]['filename'], "video_0.mp4")
+
+    def test_export_to_csv_gzip(self):
+        """测试按 .gz 后缀自动压缩导出"""
+        import csv
+        import gzip
+        self.storage.insert_multiple_video_infos(self.test_video_infos)
+
+        gz_file_path = os.path.join(self.temp_dir, "exported_videos.csv.gz")
+        stats = self.storage.export_to_csv(gz_file_path)
+        self.assertEqual(stats.rows, 3)
+
+        with gzip.open(gz_file_path, 'rt', encoding='utf-8-sig') as f:
+            rows = list(csv.DictReader(f))
+        self.assertEqual(len(rows), 3)
+
+    def test_export_with_filters(self):
+        """测试按标签和逻辑路径过滤导出"""
+        self.storage.insert_multiple_video_infos(self.test_video_infos)
+
+        simple_file_path = os.path.join(self.temp_dir, "filtered_export.txt")
+        stats = self.storage.export_simple_format(simple_file_path, tag="tag1")
+        self.assertEqual(stats.rows, 1)
+
+        stats = self.storage.export_simple_format(simple_file_path, logical_path="test")
+        self.assertEqual(stats.rows, 3)
+
+        stats = self.storage.export_simple_format(simple_file_path, logical_path="test/path_2")
+        self.assertEqual(stats.rows, 1)
+        with open(simple_file_path, 'r', encoding='utf-8') as f:
+            self.assertTrue(f.read().startswith("video_2 "))
+
+        stats = self.storage.export_simple_format(simple_file_path, file_status="missing")
+        self.assertEqual(stats.rows, 0)
+
+
+    def test_transaction_defers_commit_until_exit(self):
+        """测试事务上下文内的写操作在退出时一次提交，异常时整体回滚"""
+        with self.storage.transaction():
+            self.storage.insert_video_info(self.test_video_infos[0])
+            other = SQLiteStorage(self.db_file_path)
+            self.assertEqual(other.get_total_count(), 0)
+            other.close()
+        self.assertEqual(self.storage.get_total_count(), 1)
+
+        with self.assertRaises(RuntimeError):
+            with self.storage.transaction():
+                self.storage.insert_video_info(self.test_video_infos[1])
+                raise RuntimeError("boom")
+        self.assertEqual(self.storage.get_total_count(), 1)
+
+    def test_savepoint_rolls_back_only_inner_changes(self):
+        """测试保存点失败时只回滚保存点内的修改"""
+        with self.storage.transaction():
+            self.storage.insert_video_info(self.test_video_infos[0])
+            with self.assertRaises(RuntimeError):
+                with self.storage.savepoint():
+                    self.storage.insert_video_info(self.test_video_infos[1])
+                    raise RuntimeError("boom")
+            with self.storage.savepoint():
+                self.storage.insert_video_info(self.test_video_infos[2])
+
+        paths = {video['file_path'] for video in self.storage.get_all_videos()}
+        self.assertEqual(paths, {"/path/to/video_0.mp4", "/path/to/video_2.mp4"})
 
     def test_search_videos_by_video_codes_single(self):
         """测试单个视频code查询"""
@@ -636,6 +712,27 @@ class TestSQLiteStorage(unittest.TestCase):
         
         self.assertEqual(enhanced_stats['total_videos'], 0)
         self.assertEqual(enhanced_stats['duplicate_video_groups'], 0)
+    
+    def test_stage_video_infos_round_trip(self):
+        """测试扫描结果写入暂存表后可完整读回，重复暂存按路径覆盖"""
+        video = self.test_video_infos[0]
+        video.file_fingerprint = "fp0"
+        staged = self.storage.stage_video_infos(self.test_video_infos, "/path/to")
+        self.assertEqual(staged, 3)
+        self.assertEqual(self.storage.stage_video_infos([video], "/path/to"), 1)
+        self.assertEqual(self.storage.get_staging_count(), 3)
+        self.assertEqual(self.storage.get_staged_scan_roots(), [os.path.abspath("/path/to")])
+        
+        loaded = {item.file_path: item for item in self.storage.load_staged_videos()}
+        restored = loaded[video.file_path]
+        self.assertEqual(restored.tags, ["tag0", "test"])
+        self.assertEqual(restored.logical_path, "test/path_0")
+        self.assertEqual(restored.file_fingerprint, "fp0")
+        self.assertEqual(restored.duration, 120.5)
+        self.assertEqual(restored.file_size, 75000000)
+        
+        self.assertEqual(self.storage.clear_staging(), 3)
+        self.assertEqual(self.storage.get_staging_count(), 0)
 
 
 if __name__ == '__main__':
@@ -0,0 +1,160 @@
+"""
+测试文件状态变更历史的持久化
+"""
+
+import os
+import shutil
+import tempfile
+import unittest
+from datetime import datetime, timedelta
+
+from tools.video_info_collector.enhanced_scanner import EnhancedVideoScanner
+from tools.video_info_collector.file_status_manager import FileStatus, FileStatusManager
+from tools.video_info_collector.metadata import VideoInfo
+from tools.video_info_collector.smart_merge_manager import MergeAction, SmartMergeManager
+from tools.video_info_collector.sqlite_storage import SQLiteStorage
+from tools.video_info_collector.status_history import StatusHistoryWriter
+from tools.video_info_collector.status_reconciler import StatusReconciler
+
+
+class TestStatusHistoryWriter(unittest.TestCase):
+    """测试StatusHistoryWriter及其与FileStatusManager的集成"""
+
+    def setUp(self):
+        """设置测试环境"""
+        self.temp_dir = tempfile.mkdtemp()
+        self.storage = SQLiteStorage(os.path.join(self.temp_dir, "test.db"))
+
+    def tearDown(self):
+        """清理测试环境"""
+        self.storage.close()
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+
+    def _video(self, name, video_code):
+        video = VideoInfo(os.path.join(self.temp_dir, name), probe_file=False)
+        video.video_code = video_code
+        video.file_status = FileStatus.PRESENT.value
+        return video
+
+    def _count_rows(self):
+        cursor = self.storage.connection.cursor()
+        cursor.execute("SELECT COUNT(*) FROM status_change_history")
+        return cursor.fetchone()[0]
+
+    def test_buffered_group_commit(self):
+        """缓冲未满时不写库，达到buffer_size时一次写入"""
+        writer = StatusHistoryWriter(self.storage, buffer_size=3, flush_interval=0)
+        manager = FileStatusManager(history_writer=writer)
+
+        manager.update_video_status(self._video("a.mp4", "TEST-001"), FileStatus.MISSING, "batch_check")
+        manager.update_video_status(self._video("b.mp4", "TEST-002"), FileStatus.MISSING, "batch_check")
+        self.assertEqual(self._count_rows(), 0)
+        self.assertEqual(writer.pending_count, 2)
+
+        manager.update_video_status(self._video("c.mp4", "TEST-003"), FileStatus.IGNORE, "user_request")
+        self.assertEqual(self._count_rows(), 3)
+        self.assertEqual(writer.pending_count, 0)
+
+    def test_query_by_path_code_and_time_range(self):
+        """按路径、video_code和时间范围查询，结果按时间倒序"""
+        writer = StatusHistoryWriter(self.storage, buffer_size=100, flush_interval=0)
+        now = datetime.now()
+        for offset, (name, code, new_status) in enumerate([
+            ("a.mp4", "TEST-001", "missing"),
+            ("b.mp4", "TEST-002", "missing"),
+            ("a.mp4", "TEST-001", "present"),
+        ]):
+            writer.record({
+                'file_path': os.path.join(self.temp_dir, name),
+                'video_code': code,
+                'old_status': 'present',
+                'new_status': new_status,
+                'reason': 'batch_check',
+                'timestamp': (now - timedelta(hours=3 - offset)).isoformat()
+            })
+
+        # query 会先写入缓冲区中的记录
+        by_path = writer.query(file_path=os.path.join(self.temp_dir, "a.mp4"))
+        self.assertEqual([change['new_status'] for change in by_path], ['present', 'missing'])
+
+        by_code = writer.query(video_code="TEST-002")
+        self.assertEqual(len(by_code), 1)
+        self.assertEqual(by_code[0]['file_path'], os.path.join(self.temp_dir, "b.mp4"))
+
+        recent = writer.query(since=(now - timedelta(hours=2, minutes=30)).isoformat())
+        self.assertEqual([change['video_code'] for change in recent], ["TEST-001", "TEST-002"])
+
+        window = writer.query(since=(now - timedelta(hours=4)).isoformat(),
+                              until=(now - timedelta(hours=2, minutes=30)).isoformat())
+        self.assertEqual(len(window), 1)
+        self.assertEqual(window[0]['video_code'], "TEST-001")
+
+    def test_in_memory_history_is_bounded(self):
+        """未配置写入器时只在内存中保留最近的记录，最新的排在前面"""
+        manager = FileStatusManager(history_limit=2)
+        for index in range(3):
+            manager.update_video_status(self._video(f"{index}.mp4", f"TEST-00{index}"), FileStatus.MISSING)
+
+        history = manager.get_status_change_history()
+        self.assertEqual(len(manager.status_change_history), 2)
+        self.assertEqual([change['video_code'] for change in history], ["TEST-002", "TEST-001"])
+        self.assertEqual(len(manager.get_status_change_history(video_code="TEST-001")), 1)
+
+    def test_cleanup_old_data_prunes_history_table(self):
+        """cleanup_old_data 删除超出保留期的状态变更记录"""
+        scanner = EnhancedVideoScanner(self.storage)
+        old_time = (datetime.now() - timedelta(days=40)).isoformat()
+        self.storage.insert_status_changes([{
+            'file_path': os.path.join(self.temp_dir, "old.mp4"), 'video_code': "TEST-001",
+            'old_status': 'present', 'new_status': 'missing', 'reason': 'batch_check',
+            'timestamp': old_time
+        }])
+        scanner.status_manager.update_video_status(self._video("new.mp4", "TEST-002"), FileStatus.MISSING)
+
+        result = scanner.cleanup_old_data(days_to_keep=30)
+
+        self.assertEqual(result['status_history_cleaned'], 1)
+        remaining = self.storage.get_status_changes()
+        self.assertEqual([change['video_code'] for change in remaining], ["TEST-002"])
+
+    def test_bulk_status_updates_write_history(self):
+        """对账等批量状态更新在同一事务中写入历史，状态未变化的记录不写"""
+        missing_id = self.storage.insert_video_info(self._video("gone.mp4", "TEST-001"))
+        present_path = os.path.join(self.temp_dir, "here.mp4")
+        with open(present_path, 'w') as f:
+            f.write("content")
+        self.storage.insert_video_info(self._video("here.mp4", "TEST-002"))
+
+        result = StatusReconciler(self.storage).reconcile()
+
+        self.assertEqual(result.fixed, 1)
+        history = self.storage.get_status_changes()
+        self.assertEqual([(change['video_code'], change['old_status'], change['new_status'], change['reason'])
+                          for change in history], [("TEST-001", 'present', 'missing', 'reconcile_status')])
+        self.assertEqual(self.storage.bulk_update_file_status([(missing_id, 'missing')]), 1)
+        self.assertEqual(self._count_rows(), 1)
+
+    def test_merge_status_changes_write_history(self):
+        """合并中的 mark_missing 写入历史；失败回滚的 mark_replaced 不留下历史"""
+        missing = self._video("gone.mp4", "TEST-001")
+        missing.id = self.storage.insert_video_info(missing)
+        replaced = self._video("old.mp4", "TEST-002")
+        replaced.id = self.storage.insert_video_info(replaced)
+        # 新文件路径已存在于数据库中，插入失败，整个动作回滚
+        duplicate = self._video("gone.mp4", "TEST-002")
+
+        manager = SmartMergeManager(self.storage)
+        stats = manager.execute_merge_plan({
+            'mark_missing': [MergeAction('mark_missing', missing, reason="file_not_found")],
+            'mark_replaced': [MergeAction('mark_replaced', duplicate, replaced, reason="replaced")],
+        })
+
+        self.assertEqual((stats['marked_missing'], stats['errors']), (1, 1))
+        history = self.storage.get_status_changes()
+        self.assertEqual([(change['video_code'], change['new_status'], change['reason']) for change in history],
+                         [("TEST-001", 'missing', "file_not_found")])
+        self.assertEqual(self.storage.get_video_info_by_id(replaced.id)['file_status'], 'present')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,108 @@
+"""
+测试数据库文件状态对账
+"""
+
+import os
+import shutil
+import tempfile
+import unittest
+from unittest.mock import patch
+
+from tools.video_info_collector.cli import cli_main
+from tools.video_info_collector.batch_status_checker import BatchStatusChecker
+from tools.video_info_collector.metadata import VideoInfo
+from tools.video_info_collector.sqlite_storage import SQLiteStorage
+from tools.video_info_collector.status_reconciler import StatusReconciler
+
+
+class TestStatusReconciler(unittest.TestCase):
+    """测试StatusReconciler类"""
+
+    def setUp(self):
+        """设置测试环境"""
+        self.temp_dir = tempfile.mkdtemp()
+        self.db_path = os.path.join(self.temp_dir, "test.db")
+        self.storage = SQLiteStorage(self.db_path)
+        self.video_dir = os.path.join(self.temp_dir, "videos")
+        os.makedirs(self.video_dir)
+
+    def tearDown(self):
+        """清理测试环境"""
+        self.storage.close()
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+
+    def _insert(self, name, file_status='present', exists=True):
+        file_path = os.path.join(self.video_dir, name)
+        if exists:
+            with open(file_path, 'w') as f:
+                f.write("content")
+        video = VideoInfo(file_path)
+        video.file_status = file_status
+        return self.storage.insert_video_info(video)
+
+    def _status(self, video_id):
+        return self.storage.get_video_info_by_id(video_id)['file_status']
+
+    def test_reconcile_writes_changes_in_bulk(self):
+        """测试对账结果一次批量写回数据库"""
+        ok_id = self._insert("TEST-001.mp4")
+        gone_id = self._insert("TEST-002.mp4", exists=False)
+        back_id = self._insert("TEST-003.mp4", file_status='missing')
+
+        with patch.object(self.storage, 'bulk_update_file_status',
+                          wraps=self.storage.bulk_update_file_status) as bulk_update:
+            result = StatusReconciler(self.storage).reconcile()
+
+        bulk_update.assert_called_once()
+        self.assertEqual(result.checked, 3)
+        self.assertEqual(result.inconsistencies_found, 2)
+        self.assertEqual(result.fixed, 2)
+        self.assertEqual(self._status(ok_id), 'present')
+        self.assertEqual(self._status(gone_id), 'missing')
+        self.assertEqual(self._status(back_id), 'present')
+        self.assertIsNotNone(self.storage.get_video_info_by_id(gone_id)['last_scan_time'])
+
+    def test_each_file_checked_once_and_manual_statuses_kept(self):
+        """测试每个文件只检查一次，ignore/replaced 状态不参与对账"""
+        self._insert("TEST-001.mp4")
+        ignored_id = self._insert("TEST-002.mp4", file_status='ignore', exists=False)
+        replaced_id = self._insert("TEST-003.mp4", file_status='replaced', exists=False)
+
+        checker = BatchStatusChecker()
+        with patch.object(checker, 'check', wraps=checker.check) as check:
+            result = StatusReconciler(self.storage, checker).reconcile()
+
+        check.assert_called_once()
+        self.assertEqual(result.checked, 1)
+        self.assertEqual(self._status(ignored_id), 'ignore')
+        self.assertEqual(self._status(replaced_id), 'replaced')
+
+    def test_dry_run_and_path_prefix(self):
+        """测试只报告模式和路径前缀过滤"""
+        gone_id = self._insert("TEST-001.mp4", exists=False)
+
+        result = StatusReconciler(self.storage).reconcile(apply=False)
+        self.assertEqual(result.inconsistencies_found, 1)
+        self.assertEqual(result.fixed, 0)
+        self.assertEqual(self._status(gone_id), 'present')
+
+        other_prefix = os.path.join(self.temp_dir, "VIDEOS")
+        result = StatusReconciler(self.storage).reconcile(path_prefix=other_prefix)
+        self.assertEqual(result.checked, 0)
+
+        result = StatusReconciler(self.storage).reconcile(path_prefix=self.video_dir)
+        self.assertEqual(result.fixed, 1)
+        self.assertEqual(self._status(gone_id), 'missing')
+
+    def test_cli_reconcile_status(self):
+        """测试 --reconcile-status 命令"""
+        gone_id = self._insert("TEST-001.mp4", exists=False)
+
+        self.assertEqual(cli_main(['--reconcile-status', '--dry-run', '--database', self.db_path]), 0)
+        self.assertEqual(self._status(gone_id), 'present')
+        self.assertEqual(cli_main(['--reconcile-status', '--database', self.db_path]), 0)
+        self.assertEqual(self._status(gone_id), 'missing')
+
+
+if __name__ == '__main__':
+    unittest.main()
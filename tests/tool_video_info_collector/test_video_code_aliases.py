@@ -0,0 +1,86 @@
+"""
+测试编码别名索引
+"""
+
+import os
+import shutil
+import tempfile
+import unittest
+
+from tools.video_info_collector.metadata import VideoInfo
+from tools.video_info_collector.sqlite_storage import SQLiteStorage
+
+
+class TestVideoCodeAliases(unittest.TestCase):
+    """测试编码别名表及按任意写法查询"""
+
+    def setUp(self):
+        """设置测试环境"""
+        self.temp_dir = tempfile.mkdtemp()
+        self.storage = SQLiteStorage(os.path.join(self.temp_dir, "test.db"))
+
+    def tearDown(self):
+        """清理测试环境"""
+        self.storage.close()
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+
+    def _insert(self, filename):
+        video = VideoInfo(os.path.join(self.temp_dir, filename), probe_file=False)
+        video.file_size = 1024
+        return self.storage.insert_video_info(video)
+
+    def test_search_resolves_variant_spellings(self):
+        """按任意写法查询都能找到数据库中该编码的所有写法"""
+        self._insert("ABC-123.mp4")
+        self._insert("abc123 1080p.mkv")
+        self._insert("DEF-456.mp4")
+
+        for query in ['abc123', 'ABC_123', 'abc-00123']:
+            with self.subTest(query=query):
+                results = self.storage.search_videos_by_video_codes([query])
+                self.assertEqual(sorted(row['video_code'] for row in results), ['ABC-123', 'abc123'])
+                self.assertEqual({row['canonical_code'] for row in results}, {'ABC-123'})
+
+        self.assertEqual(self.storage.get_video_code_aliases('abc_0123'), ['ABC-123', 'abc123'])
+        self.assertEqual(self.storage.search_videos_by_video_codes(['XYZ-999']), [])
+
+    def test_search_finds_rows_without_video_code_by_filename(self):
+        """无法识别编码的文件按文件名主干忽略大小写匹配"""
+        video_id = self._insert("holiday_clip.mp4")
+        self._insert("ABC-123.mp4")
+        cursor = self.storage.connection.cursor()
+        cursor.execute("SELECT video_code FROM video_info WHERE id = ?", (video_id,))
+        self.assertIsNone(cursor.fetchone()[0])
+
+        results = self.storage.search_videos_by_video_codes(['HOLIDAY_CLIP', 'abc123'])
+        self.assertEqual([(row['filename'], row['canonical_code']) for row in results],
+                         [('ABC-123.mp4', 'ABC-123'), ('holiday_clip.mp4', None)])
+        self.assertEqual(self.storage.search_videos_by_video_codes(['holiday']), [])
+
+    def test_lookup_uses_canonical_index(self):
+        """查询通过规范编码索引完成"""
+        self._insert("ABC-123.mp4")
+        cursor = self.storage.connection.cursor()
+        cursor.execute("""
+            EXPLAIN QUERY PLAN
+            SELECT v.* FROM video_code_aliases a JOIN video_info v ON v.video_code = a.alias
+            WHERE a.canonical_code IN (?)
+        """, ('ABC-123',))
+        plan = ' '.join(row[3] for row in cursor.fetchall())
+        self.assertIn('idx_code_alias_canonical', plan)
+
+    def test_rebuild_aliases_from_video_info(self):
+        """显式重建别名表：以video_info中的编码为准"""
+        self._insert("TEST-001.mp4")
+        self.storage.connection.execute("DELETE FROM video_code_aliases")
+        self.storage.connection.commit()
+        self.assertEqual(self.storage.search_videos_by_video_codes(['test_1']), [])
+
+        self.assertEqual(self.storage.rebuild_video_code_aliases(), 1)
+
+        results = self.storage.search_videos_by_video_codes(['test_1'])
+        self.assertEqual([row['video_code'] for row in results], ['TEST-001'])
+
+
+if __name__ == '__main__':
+    unittest.main()
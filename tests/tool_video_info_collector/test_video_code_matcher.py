@@ -0,0 +1,75 @@
+"""
+测试预编译的video_code优先级匹配与缓存
+"""
+
+import re
+import unittest
+
+from tools.video_info_collector.metadata import VIDEO_CODE_PATTERNS, extract_video_code
+from tools.video_info_collector.video_code_extractor import PriorityMatcher, VideoCodeExtractor
+
+
+def sequential_search(patterns, text):
+    """依次尝试每个规则的参考实现"""
+    for pattern in patterns:
+        match = re.search(pattern, text, re.IGNORECASE)
+        if match:
+            return match.group(1)
+    return None
+
+
+class TestPriorityMatcher(unittest.TestCase):
+    """测试PriorityMatcher类"""
+
+    def test_priority_wins_over_position(self):
+        """优先级高的规则即使出现在更靠后的位置也优先返回，同一规则取最左侧匹配"""
+        matcher = PriorityMatcher([r'([A-Z]+-\d+)', r'([A-Z]+\d+)'], re.IGNORECASE)
+
+        self.assertEqual(matcher.search('TEST001 DEMO-002 DEMO-003'), (0, 'DEMO-002'))
+        self.assertEqual(matcher.search('TEST001 TEST002'), (1, 'TEST001'))
+        self.assertEqual(matcher.search('holiday clip'), (None, None))
+
+    def test_matches_sequential_search(self):
+        """各种文件名上与依次尝试每个规则的结果一致"""
+        matcher = PriorityMatcher(VIDEO_CODE_PATTERNS, re.IGNORECASE)
+        names = [
+            'TEST-001.mp4', 'demo_002 1080p.mkv', 'SAMPLE.003', 'x264 TEST004', 'ABC-xyz',
+            'holiday 2024 TEST-05', 'TEST_1 DEMO-002', 'abc', '', '中文字幕 TEST-001-C',
+        ]
+        for name in names:
+            with self.subTest(name=name):
+                self.assertEqual(matcher.search(name)[1], sequential_search(VIDEO_CODE_PATTERNS, name))
+                self.assertEqual(extract_video_code(name), sequential_search(VIDEO_CODE_PATTERNS, name))
+
+
+class TestVideoCodeExtractorCache(unittest.TestCase):
+    """测试VideoCodeExtractor的缓存和批量提取"""
+
+    def test_invalid_candidate_falls_back_to_lower_priority(self):
+        """优先级最高的候选未通过校验时，继续尝试优先级更低的规则"""
+        extractor = VideoCodeExtractor()
+        # 'DVD' 能匹配优先级更高的规则，但不是有效编码
+        self.assertEqual(extractor.extract_code('DVD TEST123.mp4'), 'TEST123')
+        self.assertIsNone(extractor.extract_code('DVD.mp4'))
+
+    def test_add_custom_pattern_clears_cache(self):
+        """添加自定义规则后，已缓存的文件名按新规则重新提取"""
+        extractor = VideoCodeExtractor()
+        self.assertEqual(extractor.extract_code('/videos/TEST-001 Q42.mp4'), 'TEST-001')
+
+        self.assertTrue(extractor.add_custom_pattern(r'(Q\d{2})'))
+        self.assertEqual(extractor.extract_code('/other/TEST-001 Q42.mkv'), 'Q42')
+
+    def test_batch_matches_single_extraction(self):
+        """批量提取按文件名去重，结果与逐个提取一致"""
+        extractor = VideoCodeExtractor(cache_size=0)
+        filenames = ['/a/TEST-001.mp4', '/b/TEST-001.mkv', 'demo_002 [BluRay].avi', 'holiday.mp4', '']
+
+        batch = extractor.extract_codes_batch(filenames)
+
+        self.assertEqual(batch, {name: extractor.extract_code(name) if name else None for name in filenames})
+        self.assertEqual(batch['/b/TEST-001.mkv'], 'TEST-001')
+
+
+if __name__ == '__main__':
+    unittest.main()
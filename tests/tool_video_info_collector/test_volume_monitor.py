@@ -0,0 +1,123 @@
+"""
+测试挂载卷离线检测
+"""
+
+import os
+import shutil
+import tempfile
+import time
+import unittest
+from unittest.mock import patch
+
+from tools.video_info_collector.batch_status_checker import BatchStatusChecker
+from tools.video_info_collector.file_status_manager import FileStatus, FileStatusManager
+from tools.video_info_collector.metadata import VideoInfo
+from tools.video_info_collector.sqlite_storage import SQLiteStorage
+from tools.video_info_collector.status_reconciler import StatusReconciler
+from tools.video_info_collector.volume_monitor import VOLUME_PARENTS, VolumeMonitor
+
+
+OFFLINE_ROOT = "/Volumes/TEST-OFFLINE-DISK"
+
+
+class TestVolumeMonitor(unittest.TestCase):
+    """测试VolumeMonitor及其在状态检查中的使用"""
+
+    def setUp(self):
+        """设置测试环境"""
+        self.temp_dir = tempfile.mkdtemp()
+        self.monitor = VolumeMonitor(mount_points=['/', self.temp_dir])
+
+    def tearDown(self):
+        """清理测试环境"""
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+
+    def _create_file(self, name):
+        file_path = os.path.join(self.temp_dir, name)
+        with open(file_path, 'w') as f:
+            f.write("content")
+        return file_path
+
+    def test_mount_point_resolution(self):
+        """按最长前缀解析挂载点；外接卷父目录下未挂载的路径归到卷根目录"""
+        self.assertEqual(self.monitor.mount_point_for(os.path.join(self.temp_dir, "a", "b.mp4")),
+                         self.temp_dir)
+        self.assertEqual(self.monitor.mount_point_for("/srv/videos/a.mp4"), "/")
+        self.assertEqual(self.monitor.mount_point_for(f"{OFFLINE_ROOT}/movies/a.mp4"), OFFLINE_ROOT)
+
+    def test_offline_volume_skips_per_file_checks(self):
+        """离线卷只探测一次，其中的文件直接判定为OFFLINE，不逐个stat"""
+        online_file = self._create_file("TEST-001.mp4")
+        offline_files = [f"{OFFLINE_ROOT}/movies/TEST-{index:03d}.mp4" for index in range(50)]
+        checker = BatchStatusChecker(volume_monitor=self.monitor)
+
+        with patch.object(self.monitor, '_probe', wraps=self.monitor._probe) as probe, \
+                patch.object(BatchStatusChecker, '_stat_status',
+                             wraps=BatchStatusChecker._stat_status) as stat_status:
+            results = checker.check([online_file] + offline_files)
+
+        self.assertEqual(results[online_file], FileStatus.PRESENT)
+        self.assertTrue(all(results[path] == FileStatus.OFFLINE for path in offline_files))
+        # 每个挂载点只探测一次
+        self.assertEqual(sorted(call.args[0] for call in probe.call_args_list),
+                         sorted([OFFLINE_ROOT, self.temp_dir]))
+        self.assertEqual(stat_status.call_count, 1)
+
+    def test_plain_directory_under_volume_parent_is_online(self):
+        """/mnt/<dir> 这类不在挂载表中的普通目录不是离线卷：存在的文件为PRESENT，缺失的为MISSING"""
+        monitor = VolumeMonitor(mount_points=['/'])
+        plain_dir = os.path.join(self.temp_dir, "x")
+        os.makedirs(plain_dir)
+        existing = os.path.join(plain_dir, "a.mp4")
+        with open(existing, 'w') as f:
+            f.write("content")
+        missing = os.path.join(plain_dir, "b.mp4")
+
+        # 把临时目录当作 /mnt，避免测试写入真实的 /mnt
+        with patch.dict(VOLUME_PARENTS, {self.temp_dir: 1}):
+            self.assertEqual(monitor.mount_point_for(existing), plain_dir)
+            results = BatchStatusChecker(volume_monitor=monitor).check([existing, missing])
+
+        self.assertEqual(results[existing], FileStatus.PRESENT)
+        self.assertEqual(results[missing], FileStatus.MISSING)
+
+    def test_hanging_mount_probe_times_out(self):
+        """探测挂载点超时时视为离线"""
+        monitor = VolumeMonitor(mount_points=['/', self.temp_dir], probe_timeout=0.05)
+        real_stat = os.stat
+
+        def slow_stat(path, *args, **kwargs):
+            if path == self.temp_dir:
+                time.sleep(1)
+            return real_stat(path, *args, **kwargs)
+
+        with patch('tools.video_info_collector.volume_monitor.os.stat', side_effect=slow_stat):
+            started = time.monotonic()
+            self.assertFalse(monitor.is_online(self.temp_dir))
+        self.assertLess(time.monotonic() - started, 0.5)
+
+        manager = FileStatusManager(volume_monitor=monitor)
+        self.assertEqual(manager.check_file_status(os.path.join(self.temp_dir, "TEST-001.mp4")),
+                         FileStatus.OFFLINE)
+
+    def test_reconcile_marks_offline_and_restores(self):
+        """对账把离线卷上的记录标记为offline，卷上线后恢复为present"""
+        storage = SQLiteStorage(os.path.join(self.temp_dir, "test.db"))
+        try:
+            file_path = self._create_file("TEST-001.mp4")
+            video_id = storage.insert_video_info(VideoInfo(file_path))
+
+            with patch.object(self.monitor, 'is_online', return_value=False):
+                result = StatusReconciler(storage, BatchStatusChecker(volume_monitor=self.monitor)).reconcile()
+            self.assertEqual(result.fixed, 1)
+            self.assertEqual(storage.get_video_info_by_id(video_id)['file_status'], 'offline')
+
+            result = StatusReconciler(storage, BatchStatusChecker(volume_monitor=self.monitor)).reconcile()
+            self.assertEqual(result.inconsistencies[0]['recorded_status'], 'offline')
+            self.assertEqual(storage.get_video_info_by_id(video_id)['file_status'], 'present')
+        finally:
+            storage.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,9 @@
+"""
+Download Watcher tool package.
+
+监视下载目录：下载完成的视频规范化命名后移入媒体库，并立即写入 video_info_collector 数据库。
+"""
+
+from .watcher import DownloadWatcher, IngestResult, StabilityTracker
+
+__all__ = ["DownloadWatcher", "IngestResult", "StabilityTracker"]
@@ -0,0 +1,101 @@
+import argparse
+import sys
+from typing import List
+
+from dotenv import load_dotenv
+
+from ..filename_formatter.formatter import FilenameFormatter
+from ..video_info_collector.cli import get_default_paths
+from ..video_info_collector.sqlite_storage import SQLiteStorage
+from .watcher import DownloadWatcher, IngestResult, INGEST_SUCCESS, INGEST_SKIPPED_EXISTS
+
+
+def build_parser() -> argparse.ArgumentParser:
+    default_paths = get_default_paths()
+    parser = argparse.ArgumentParser(
+        prog="download-watcher",
+        description="监视下载目录：文件大小稳定（下载完成）后按 rename_rules 规范化文件名，\n"
+                    "移动到媒体库目录并立即写入 video_info_collector 数据库",
+        formatter_class=argparse.RawTextHelpFormatter,
+    )
+    parser.add_argument("downloads_dir", help="要监视的下载目录（递归）")
+    parser.add_argument("library_dir", help="媒体库目录，下载完成的文件移动到这里")
+    parser.add_argument(
+        "--database",
+        default=default_paths["default_database"],
+        help=f"SQLite数据库文件路径 (默认: {default_paths['default_database']})"
+    )
+    parser.add_argument(
+        "--stable-seconds",
+        type=float,
+        default=60.0,
+        help="文件大小和修改时间保持不变多少秒后视为下载完成 (默认: 60)"
+    )
+    parser.add_argument(
+        "--poll-interval",
+        type=float,
+        default=10.0,
+        help="轮询间隔秒数 (默认: 10)"
+    )
+    parser.add_argument(
+        "--conflict-resolution",
+        choices=["skip", "rename"],
+        default="skip",
+        help="媒体库中已有同名文件时的处理方式: skip(跳过，留在下载目录), rename(自动重命名)"
+    )
+    parser.add_argument("--tags", help="写入数据库时附加的标签，多个标签用分号分隔")
+    parser.add_argument("--path", help="写入数据库时的逻辑路径")
+    parser.add_argument(
+        "--max-polls",
+        type=int,
+        help="最多轮询次数后退出（默认一直运行，Ctrl+C 退出）"
+    )
+    return parser
+
+
+def _print_result(result: IngestResult) -> None:
+    if result.status == INGEST_SUCCESS:
+        print(f"success: {result.source} -> {result.target} (video_code: {result.video_code or '-'})")
+    elif result.status == INGEST_SKIPPED_EXISTS:
+        print(f"skipped: target exists: {result.source} -> {result.target}")
+    else:
+        print(f"error: {result.source} -> {result.target} ({result.detail})")
+
+
+def main(argv: List[str] = None) -> int:
+    parser = build_parser()
+    args = parser.parse_args(argv)
+
+    load_dotenv()
+    fmt = FilenameFormatter(default_rules_path=None)
+    tags = [tag.strip() for tag in args.tags.split(';') if tag.strip()] if args.tags else []
+
+    storage = SQLiteStorage(args.database)
+    try:
+        watcher = DownloadWatcher(
+            args.downloads_dir,
+            args.library_dir,
+            storage,
+            formatter=fmt,
+            stable_seconds=args.stable_seconds,
+            poll_interval=args.poll_interval,
+            conflict_resolution=args.conflict_resolution,
+            tags=tags,
+            logical_path=args.path,
+        )
+        print(f"监视目录: {watcher.downloads_dir}")
+        print(f"媒体库目录: {watcher.library_dir}")
+        print(f"数据库: {args.database}")
+        print(f"稳定时间: {args.stable_seconds} 秒, 轮询间隔: {args.poll_interval} 秒\n")
+        ingested = watcher.run(max_polls=args.max_polls, on_result=_print_result)
+        print(f"\n已入库: {ingested}")
+        return 0
+    except Exception as e:
+        print(f"执行失败: {e}")
+        return 1
+    finally:
+        storage.close()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
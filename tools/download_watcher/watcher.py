@@ -0,0 +1,259 @@
+"""
+下载目录监视模块
+
+定时轮询下载目录，文件大小和修改时间连续 stable_seconds 秒不变才认为下载完成（正在下载的文件不处理）；
+完成的文件按 rename_rules 规范化文件名后移动到媒体库目录，随即提取元数据写入 video_info_collector 数据库。
+相当于持续地、逐个文件地执行 filename_formatter + video_info_collector 扫描合并，不需要批量重新扫描。
+
+轮询只使用 os.scandir，不依赖文件系统事件，网络盘和外接硬盘上同样可用。
+"""
+
+import os
+import time
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Optional, Tuple
+
+from ..filename_formatter.formatter import FilenameFormatter, DirectoryNames, move_no_clobber, prune_vacated_dirs
+from ..video_info_collector.code_recognizer import PrefixCodeRecognizer
+from ..video_info_collector.metadata import VideoMetadataExtractor
+from ..video_info_collector.sqlite_storage import SQLiteStorage
+
+
+INGEST_SUCCESS = "success"
+INGEST_SKIPPED_EXISTS = "skipped: target exists"
+INGEST_ERROR = "error"
+
+
+@dataclass
+class IngestResult:
+    """单个文件的入库结果"""
+    source: str
+    target: str
+    status: str
+    video_id: Optional[int] = None
+    video_code: Optional[str] = None
+    detail: Optional[str] = None
+
+
+class StabilityTracker:
+    """记录每个文件最近一次观察到的大小和修改时间，判断下载是否已完成"""
+
+    def __init__(self, stable_seconds: float, clock: Callable[[], float] = time.monotonic):
+        """
+        初始化
+
+        Args:
+            stable_seconds: 大小和修改时间需要保持不变的秒数
+            clock: 单调时钟，测试时可替换
+        """
+        self.stable_seconds = stable_seconds
+        self.clock = clock
+        self._observed: Dict[str, Tuple[Tuple[int, int], float]] = {}
+
+    def observe(self, path: str, signature: Tuple[int, int]) -> bool:
+        """
+        记录一次观察
+
+        Args:
+            path: 文件路径
+            signature: (文件大小, 修改时间纳秒)
+
+        Returns:
+            bool: 签名已保持不变至少 stable_seconds 秒
+        """
+        now = self.clock()
+        previous = self._observed.get(path)
+        if previous is None or previous[0] != signature:
+            # 首次出现或仍在变化：重新计时，至少要两次观察结果相同才视为稳定
+            self._observed[path] = (signature, now)
+            return False
+        return now - previous[1] >= self.stable_seconds
+
+    def forget(self, path: str) -> None:
+        """不再跟踪某个文件（已处理或已消失）"""
+        self._observed.pop(path, None)
+
+    def retain(self, paths) -> None:
+        """只保留仍然存在的文件的记录"""
+        for path in set(self._observed) - set(paths):
+            del self._observed[path]
+
+
+class DownloadWatcher:
+    """监视下载目录，把下载完成的视频规范化命名后移入媒体库并写入数据库"""
+
+    def __init__(self, downloads_dir: str, library_dir: str, storage: SQLiteStorage,
+                 formatter: Optional[FilenameFormatter] = None, stable_seconds: float = 60.0,
+                 poll_interval: float = 10.0, conflict_resolution: str = "skip",
+                 tags: Optional[List[str]] = None, logical_path: Optional[str] = None,
+                 clock: Callable[[], float] = time.monotonic):
+        """
+        初始化下载目录监视器
+
+        Args:
+            downloads_dir: 下载目录（递归监视）
+            library_dir: 媒体库目录，下载完成的文件移动到这里
+            storage: video_info_collector 的 SQLite 存储对象
+            formatter: 文件名规范化工具，提供扩展名、最小文件大小和 rename_rules
+            stable_seconds: 文件大小和修改时间保持不变多少秒后视为下载完成
+            poll_interval: 两次轮询之间的秒数
+            conflict_resolution: 媒体库中已有同名文件时的处理方式：skip / rename（添加 _N 序号）
+            tags: 写入数据库时附加的标签
+            logical_path: 写入数据库时的逻辑路径
+            clock: 单调时钟，测试时可替换
+        """
+        if conflict_resolution not in ("skip", "rename"):
+            raise ValueError(f"未知的冲突处理方式: {conflict_resolution}")
+        self.downloads_dir = os.path.abspath(downloads_dir)
+        self.library_dir = os.path.abspath(library_dir)
+        self.storage = storage
+        self.formatter = formatter or FilenameFormatter()
+        self.poll_interval = poll_interval
+        self.conflict_resolution = conflict_resolution
+        self.tags = tags or []
+        self.logical_path = logical_path
+        self.tracker = StabilityTracker(stable_seconds, clock)
+        # 已因冲突跳过的文件签名，文件不变时不再重复处理和提示
+        self._skipped: Dict[str, Tuple[int, int]] = {}
+
+    def _candidates(self) -> Dict[str, Tuple[int, int]]:
+        """列出下载目录中符合扩展名和最小大小的视频文件及其 (大小, 修改时间纳秒)"""
+        candidates = {}
+        pending = [self.downloads_dir]
+        while pending:
+            directory = pending.pop()
+            try:
+                entries = list(os.scandir(directory))
+            except OSError:
+                continue
+            for entry in entries:
+                if entry.name.startswith("."):
+                    continue
+                try:
+                    if entry.is_dir(follow_symlinks=False):
+                        pending.append(entry.path)
+                        continue
+                    if not entry.is_file():
+                        continue
+                    stat = entry.stat()
+                except OSError:
+                    continue
+                if os.path.splitext(entry.name)[1].lower() not in self.formatter.video_extensions:
+                    continue
+                if stat.st_size < self.formatter.min_file_size:
+                    continue
+                candidates[entry.path] = (stat.st_size, stat.st_mtime_ns)
+        return candidates
+
+    def poll_once(self) -> List[IngestResult]:
+        """
+        轮询一次：处理所有已稳定的文件
+
+        Returns:
+            List[IngestResult]: 本次处理的文件结果
+        """
+        candidates = self._candidates()
+        self.tracker.retain(candidates)
+        for path in set(self._skipped) - set(candidates):
+            del self._skipped[path]
+
+        stable = [path for path, signature in sorted(candidates.items())
+                  if self._skipped.get(path) != signature and self.tracker.observe(path, signature)]
+        if not stable:
+            return []
+
+        # 每次轮询列出一次媒体库目录，冲突判断在内存中完成
+        library_names = DirectoryNames(self.library_dir)
+        extractor = VideoMetadataExtractor(code_recognizer=PrefixCodeRecognizer.from_storage(self.storage))
+        results = []
+        for path in stable:
+            result = self.ingest(path, library_names, extractor)
+            if result.status == INGEST_SKIPPED_EXISTS:
+                self._skipped[path] = candidates[path]
+            else:
+                self.tracker.forget(path)
+            results.append(result)
+
+        vacated = {os.path.dirname(r.source) for r in results if r.status == INGEST_SUCCESS}
+        prune_vacated_dirs(self.downloads_dir, vacated)
+        return results
+
+    def ingest(self, path: str, library_names: Optional[DirectoryNames] = None,
+               extractor: Optional[VideoMetadataExtractor] = None) -> IngestResult:
+        """
+        规范化文件名、移动到媒体库，并提取元数据写入数据库
+
+        Args:
+            path: 下载目录中的文件路径
+            library_names: 媒体库目录已占用的文件名，默认重新列出
+            extractor: 元数据提取器，默认用主列表中的已知前缀构建
+
+        Returns:
+            IngestResult: 入库结果
+        """
+        os.makedirs(self.library_dir, exist_ok=True)
+        library_names = library_names or DirectoryNames(self.library_dir)
+        new_name = self.formatter.apply_rename_rules(os.path.basename(path))
+        if new_name in library_names:
+            if self.conflict_resolution == "skip":
+                return IngestResult(path, os.path.join(self.library_dir, new_name), INGEST_SKIPPED_EXISTS)
+            new_name = library_names.free_name(new_name)
+        target = os.path.join(self.library_dir, new_name)
+
+        try:
+            # 媒体库列表是本次轮询的快照，移动时仍不覆盖期间出现的同名文件；跨文件系统时复制后删除
+            move_no_clobber(path, target)
+        except FileExistsError:
+            library_names.add(new_name)
+            return IngestResult(path, target, INGEST_SKIPPED_EXISTS)
+        except OSError as e:
+            return IngestResult(path, target, INGEST_ERROR, detail=str(e))
+        library_names.add(new_name)
+
+        try:
+            extractor = extractor or VideoMetadataExtractor(
+                code_recognizer=PrefixCodeRecognizer.from_storage(self.storage)
+            )
+            video_info = extractor.extract_metadata(target)
+            video_info.tags = list(self.tags)
+            video_info.logical_path = self.logical_path
+            with self.storage.transaction():
+                video_id = self.storage.upsert_video_info(video_info)
+                if video_id is None:
+                    raise RuntimeError("写入 video_info 失败")
+                self.storage.add_merge_event('insert_new', video_info.video_code, path, target,
+                                             'ingested by download_watcher')
+                if video_info.video_code:
+                    self.storage.record_video_code_aliases([video_info.video_code])
+                    self.storage.refresh_master_list_for_codes([video_info.video_code])
+        except Exception as e:
+            # 文件已移入媒体库，数据库写入失败时下次扫描仍可补录
+            return IngestResult(path, target, INGEST_ERROR, detail=f"database: {e}")
+        return IngestResult(path, target, INGEST_SUCCESS, video_id=video_id, video_code=video_info.video_code)
+
+    def run(self, max_polls: Optional[int] = None,
+            on_result: Optional[Callable[[IngestResult], None]] = None) -> int:
+        """
+        持续轮询，直到达到 max_polls 或被 Ctrl+C 中断
+
+        Args:
+            max_polls: 最多轮询次数，None表示一直运行
+            on_result: 每处理一个文件后的回调
+
+        Returns:
+            int: 成功入库的文件数
+        """
+        ingested = 0
+        polls = 0
+        try:
+            while max_polls is None or polls < max_polls:
+                for result in self.poll_once():
+                    ingested += result.status == INGEST_SUCCESS
+                    if on_result:
+                        on_result(result)
+                polls += 1
+                if max_polls is None or polls < max_polls:
+                    time.sleep(self.poll_interval)
+        except KeyboardInterrupt:
+            pass
+        return ingested
@@ -4,6 +4,12 @@ Filename Formatter tool package.
 提供面向用户的文件名规范化与批量重命名能力。
 """
 
-from .formatter import FilenameFormatter, RenameResult
+from .formatter import (
+    FilenameFormatter, RenameResult, RenamePlanItem, OperationJournal,
+    DirectoryNames, move_no_clobber, prune_vacated_dirs,
+)
 
-__all__ = ["FilenameFormatter", "RenameResult"]
\ No newline at end of file
+__all__ = [
+    "FilenameFormatter", "RenameResult", "RenamePlanItem", "OperationJournal",
+    "DirectoryNames", "move_no_clobber", "prune_vacated_dirs",
+]
\ No newline at end of file
@@ -34,6 +34,12 @@ def build_parser() -> argparse.ArgumentParser:
         action="store_true",
         help="记录所有操作到轻量级日志文件"
     )
+    parser.add_argument(
+        "--emit-path-updates",
+        metavar="FILE",
+        help="将成功的重命名以路径更新事件（JSON Lines）追加到指定文件，\n"
+             "供 video_info_collector --apply-path-updates 批量更新数据库路径，无需重新扫描"
+    )
     parser.add_argument(
         "--verify-size",
         action="store_true",
@@ -64,7 +70,8 @@ def main(argv: List[str] = None) -> int:
             dry_run=args.dry_run,
             conflict_resolution=args.conflict_resolution,
             log_operations=args.log_operations,
-            verify_size=args.verify_size
+            verify_size=args.verify_size,
+            path_updates_file=args.emit_path_updates
         )
 
         # 简洁输出
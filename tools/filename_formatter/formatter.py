@@ -1,8 +1,10 @@
 import os
 import re
+import errno
 import yaml
 import shutil
 import hashlib
+import heapq
 import json
 from dataclasses import dataclass, asdict
 from pathlib import Path
@@ -11,6 +13,9 @@ from datetime import datetime
 
 from dotenv import load_dotenv
 
+from ..video_code_utils import canonicalize_video_code
+from .rule_engine import RenameRuleEngine
+
 
 @dataclass
 class RenameResult:
@@ -18,6 +23,17 @@ class RenameResult:
     new: str
     status: str  # "success" | "skipped: same name" | "skipped: target exists" | "error: ..."
 
+PLAN_RENAME = "rename"
+PLAN_SKIP_SAME = "skip_same"
+PLAN_SKIP_EXISTS = "skip_exists"
+
+
+@dataclass
+class RenamePlanItem:
+    source: str
+    target: str
+    action: str  # PLAN_RENAME | PLAN_SKIP_SAME | PLAN_SKIP_EXISTS
+
 @dataclass
 class OperationLog:
     timestamp: str
@@ -29,6 +45,192 @@ class OperationLog:
     file_size: Optional[int] = None
 
 
+class OperationJournal:
+    """
+    追加写入的操作日志（JSON Lines，每行一条 OperationLog）
+
+    重命名过程中逐条追加，每累计 flush_every 条刷新到磁盘一次，
+    中途崩溃时已完成的操作仍留在日志中，内存占用也不随批量大小增长。
+    文件在写入第一条记录时才创建，没有任何操作时不会留下空日志。
+    """
+
+    def __init__(self, path: str, flush_every: int = 100):
+        self.path = path
+        self.flush_every = max(1, flush_every)
+        self.count = 0
+        self._file = None
+        self._pending = 0
+
+    def append(self, log: OperationLog) -> None:
+        """追加一条操作记录"""
+        if self._file is None:
+            self._file = open(self.path, "a", encoding="utf-8")
+        self._file.write(json.dumps(asdict(log), ensure_ascii=False) + "\n")
+        self.count += 1
+        self._pending += 1
+        if self._pending >= self.flush_every:
+            self.flush()
+
+    def flush(self) -> None:
+        """把已追加的记录写入磁盘"""
+        if self._file is not None and self._pending:
+            self._file.flush()
+            os.fsync(self._file.fileno())
+            self._pending = 0
+
+    def close(self) -> None:
+        """刷新并关闭日志文件"""
+        if self._file is not None:
+            self.flush()
+            self._file.close()
+            self._file = None
+
+    def __enter__(self) -> "OperationJournal":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.close()
+
+
+def _is_case_insensitive(directory: str) -> bool:
+    """
+    判断目录所在文件系统是否不区分大小写（如 macOS 默认的 APFS）：
+    比较目录名大小写互换后的路径是否指向同一目录；目录名不含字母时按区分大小写处理
+    """
+    parent, name = os.path.split(os.path.abspath(directory))
+    swapped = name.swapcase()
+    if swapped == name:
+        return False
+    try:
+        return os.path.samefile(directory, os.path.join(parent, swapped))
+    except OSError:
+        return False
+
+
+class DirectoryNames:
+    """
+    目标目录中已占用的文件名：每个目录只列出一次，之后的占用、释放和冲突序号分配都在内存中完成
+
+    列表只是某一时刻的快照，真正执行移动时仍需用 move_no_clobber 防止覆盖期间新出现的文件
+    """
+
+    def __init__(self, directory: str, listing: Optional[List[str]] = None):
+        self.case_insensitive = _is_case_insensitive(directory)
+        if listing is None:
+            try:
+                listing = os.listdir(directory)
+            except OSError:
+                listing = []
+        self._names = {self._key(name) for name in listing}
+        # 每个冲突文件名下一个待尝试的序号，避免重复从 _1 开始探测
+        self._next_suffix = {}
+
+    def _key(self, name: str) -> str:
+        return name.casefold() if self.case_insensitive else name
+
+    def __contains__(self, name: str) -> bool:
+        return self._key(name) in self._names
+
+    def add(self, name: str) -> None:
+        self._names.add(self._key(name))
+
+    def discard(self, name: str) -> None:
+        self._names.discard(self._key(name))
+
+    def free_name(self, name: str) -> str:
+        """为冲突的文件名分配未占用的 name_N.ext，序号从该文件名上次分配的位置继续"""
+        base_name, ext = os.path.splitext(name)
+        key = self._key(name)
+        counter = self._next_suffix.get(key, 1)
+        candidate = f"{base_name}_{counter}{ext}"
+        while candidate in self:
+            counter += 1
+            candidate = f"{base_name}_{counter}{ext}"
+        self._next_suffix[key] = counter + 1
+        return candidate
+
+
+def _same_file(source: str, target: str) -> bool:
+    try:
+        return os.path.samefile(source, target)
+    except OSError:
+        return False
+
+
+def move_no_clobber(source: str, target: str) -> None:
+    """
+    移动文件，目标已存在时不覆盖
+
+    os.rename 在 POSIX 上会直接覆盖已存在的目标，因此执行前再检查一次目标（每次移动一次检查）；
+    大小写不敏感的文件系统上只改变大小写时目标即源文件本身，允许执行。
+    跨文件系统时以独占方式（'xb'）创建目标后复制，复制完成才删除源文件。
+
+    Args:
+        source: 源文件路径
+        target: 目标文件路径
+
+    Raises:
+        FileExistsError: 目标已存在
+        OSError: 移动失败
+    """
+    if os.path.lexists(target) and not _same_file(source, target):
+        raise FileExistsError(errno.EEXIST, "目标已存在", target)
+    try:
+        os.rename(source, target)
+        return
+    except OSError as e:
+        if e.errno != errno.EXDEV:
+            raise
+
+    try:
+        with open(source, "rb") as src, open(target, "xb") as dst:
+            shutil.copyfileobj(src, dst)
+        shutil.copystat(source, target)
+    except FileExistsError:
+        raise
+    except BaseException:
+        try:
+            os.remove(target)
+        except OSError:
+            pass
+        raise
+    os.remove(source)
+
+
+def prune_vacated_dirs(base_path: str, directories) -> int:
+    """
+    自下而上删除有文件移出后变空的目录，以及因此变空的上级目录（不包括 base_path 本身）：
+    只检查有文件移出的目录，os.rmdir 只能删除空目录，删除失败即说明目录非空，不再向上检查
+
+    Args:
+        base_path: 根目录，不会被删除
+        directories: 有文件移出的目录
+
+    Returns:
+        int: 删除的目录数
+    """
+    base = os.path.abspath(base_path)
+    pending = {os.path.abspath(directory) for directory in directories}
+    # 按深度从深到浅处理，保证子目录先于上级目录被删除
+    heap = [(-directory.count(os.sep), directory) for directory in pending]
+    heapq.heapify(heap)
+    removed = 0
+    while heap:
+        _, directory = heapq.heappop(heap)
+        if not directory.startswith(base + os.sep):
+            continue
+        try:
+            os.rmdir(directory)
+        except OSError:
+            continue
+        removed += 1
+        parent = os.path.dirname(directory)
+        if parent not in pending:
+            pending.add(parent)
+            heapq.heappush(heap, (-parent.count(os.sep), parent))
+    return removed
+
+
 class FilenameFormatter:
     """
     文件名规范化与批量重命名工具（不移动文件，仅对命名进行处理）
@@ -53,6 +255,8 @@ class FilenameFormatter:
         config = self._load_config(rules_env_var, default_rules_path)
         # 规则
         self.rename_rules = list(config.get("rename_rules", []))
+        self._rule_engine: Optional[RenameRuleEngine] = None
+        self._rule_engine_source: Optional[Tuple[int, int]] = None
         # 扩展名：参数优先，其次配置，最后默认 [.mp4, .mkv, .mov]
         exts = list(video_extensions) if video_extensions is not None else config.get("video_extensions", [".mp4", ".mkv", ".mov"])
         norm_exts: List[str] = []
@@ -113,8 +317,6 @@ class FilenameFormatter:
             print(f"未找到重命名规则文件: {full_path}")
         return []
 
-        # 注：目前为简单字符串替换，后续可扩展为正则、顺序/优先级控制等
-
     def _load_config(self, rules_env_var: str, default_rules_path: str) -> dict:
         """
         从 YAML 加载完整配置：
@@ -185,41 +387,37 @@ class FilenameFormatter:
         对文件名进行规范化处理：
         - 全部大写
         - 确保字母与数字间存在连字符
+        - 数字部分按规范编码去除多余的前导零（至少三位），与编码别名索引一致
         - 保留原扩展名
         """
         name, ext = os.path.splitext(filename)
         name_upper = name.upper()
 
-        # 优先匹配大写模式
+        # 转为大写后匹配"字母+编号"
         m = re.match(r"^([A-Z]+)[-]*(\d+).*$", name_upper)
         if m:
             letters, numbers = m.groups()
-            return f"{letters}-{numbers}{ext}"
-
-        # 退回匹配小写模式
-        m2 = re.match(r"^([a-z]+)[-]*(\d+).*$", name)
-        if m2:
-            letters, numbers = m2.groups()
-            return f"{letters.upper()}-{numbers}{ext}"
+            return f"{canonicalize_video_code(f'{letters}-{numbers}')}{ext}"
 
         # 不可识别则返回原始文件名
         return filename
 
+    def _get_rule_engine(self) -> RenameRuleEngine:
+        """
+        获取编译后的规则引擎；rename_rules 被替换或增删规则后自动重新编译
+        （原地修改某条规则的内容后需将 _rule_engine 置为 None）。
+        """
+        source = (id(self.rename_rules), len(self.rename_rules))
+        if self._rule_engine is None or self._rule_engine_source != source:
+            self._rule_engine = RenameRuleEngine(self.rename_rules)
+            self._rule_engine_source = source
+        return self._rule_engine
+
     def apply_rename_rules(self, filename: str) -> str:
         """
-        先应用配置替换规则，再执行格式化。
+        先按顺序应用配置替换规则（字符串规则与正则规则），再执行格式化。
         """
-        result = filename
-        for rule in self.rename_rules:
-            try:
-                pattern = rule.get("pattern", "")
-                repl = rule.get("replace", "")
-                if pattern:
-                    result = result.replace(pattern, repl)
-            except Exception:
-                # 单条规则失败不影响整体
-                continue
-        return self.format_filename(result)
+        return self.format_filename(self._get_rule_engine().apply(filename))
 
     def is_standard(self, filename: str) -> bool:
         """
@@ -230,34 +428,36 @@ class FilenameFormatter:
     # ---------------------------
     # 批量重命名（不移动）
     # ---------------------------
-    def rename_in_directory(self, base_path: str, include_subdirs: bool = False, flatten_output: bool = False, dry_run: bool = False, conflict_resolution: str = "skip", log_operations: bool = False, verify_size: bool = False) -> List[RenameResult]:
+    def plan_renames(self, base_path: str, include_subdirs: bool = False, flatten_output: bool = False, conflict_resolution: str = "skip") -> List[RenamePlanItem]:
         """
-        对指定目录中的视频文件进行批量重命名：
-        - 仅处理扩展名匹配的文件
-        - 默认不递归子目录；可通过 include_subdirs=True 开启
-        - 遇到目标同名文件时安全跳过
-        - 可通过 flatten_output=True 将所有文件移动到根目录（扁平化输出）
-
-        返回：RenameResult 列表
+        生成完整的重命名计划（不修改任何文件）：
+        - 每个目录只列出一次，之后的冲突判断全部在内存中的文件名集合上完成，
+          不再对每个文件调用 os.path.exists，冲突时的 _N 序号也在内存中分配
+        - 按处理顺序模拟执行：已计划的重命名会释放源文件名并占用目标文件名，
+          因此预览结果与实际执行一致
+        - 规则与 rename_in_directory 相同（隐藏文件、扩展名、大小门槛、扁平化、冲突策略）
+
+        返回：RenamePlanItem 列表（按处理顺序）
         """
         if not os.path.exists(base_path):
             raise FileNotFoundError(f"目录不存在: {base_path}")
         if not os.path.isdir(base_path):
             raise NotADirectoryError(f"路径不是目录: {base_path}")
 
-        results = []
-        operation_logs = []
-        log_file = None
+        plan: List[RenamePlanItem] = []
+        directories = {}
 
-        # 如果启用日志记录，创建日志文件
-        if log_operations and not dry_run:
-            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-            log_file = os.path.join(base_path, f".operation_log_{timestamp}.json")
-            print(f"📝 操作日志将保存到: {log_file}")
+        def names_in(dir_path: str, listing: Optional[List[str]] = None) -> DirectoryNames:
+            key = os.path.abspath(dir_path)
+            names = directories.get(key)
+            if names is None:
+                names = DirectoryNames(dir_path, listing)
+                directories[key] = names
+            return names
 
-        def handle_file(dir_path: str, fname: str):
+        def plan_file(dir_path: str, fname: str):
             full_path = os.path.join(dir_path, fname)
-            
+
             # 跳过隐藏文件
             if fname.startswith("."):
                 return
@@ -275,126 +475,166 @@ class FilenameFormatter:
             new_name = self.apply_rename_rules(fname)
 
             # 确定目标路径：如果启用扁平化，则移动到根目录
-            if flatten_output:
-                target_dir = base_path
-            else:
-                target_dir = dir_path
-            
+            target_dir = base_path if flatten_output else dir_path
             target_path = os.path.join(target_dir, new_name)
 
             # 如果新旧路径相同，跳过
             if os.path.abspath(target_path) == os.path.abspath(full_path):
-                results.append(RenameResult(original=full_path, new=target_path, status="skipped: same name"))
+                plan.append(RenamePlanItem(source=full_path, target=target_path, action=PLAN_SKIP_SAME))
                 return
 
-            # 处理目标文件已存在的情况
-            if os.path.exists(target_path):
-                if conflict_resolution == "skip":
-                    if dry_run:
-                        results.append(RenameResult(original=full_path, new=target_path, status="would skip: target exists"))
-                    else:
-                        results.append(RenameResult(original=full_path, new=target_path, status="skipped: target exists"))
-                    return
-                elif conflict_resolution == "rename":
+            # 处理目标文件已存在（或已被此前计划的重命名占用）的情况
+            target_names = names_in(target_dir)
+            if new_name in target_names:
+                if conflict_resolution == "rename":
                     # 自动重命名：添加序号
-                    base_name, ext = os.path.splitext(target_path)
-                    counter = 1
-                    while os.path.exists(target_path):
-                        target_path = f"{base_name}_{counter}{ext}"
-                        counter += 1
-
-            if dry_run:
-                # 干运行模式：只预览，不实际执行
-                preview_status = "preview: would rename"
-                results.append(RenameResult(original=full_path, new=target_path, status=preview_status))
-            else:
-                try:
-                    file_size = None
-                    
-                    # 如果启用大小验证或日志记录，获取文件大小
-                    if verify_size or log_operations:
-                        try:
-                            file_size = os.path.getsize(full_path)
-                        except Exception:
-                            pass
-                    
-                    os.rename(full_path, target_path)
-                    
-                    # 轻量级文件大小验证
-                    if verify_size and file_size is not None:
-                        try:
-                            new_file_size = os.path.getsize(target_path)
-                            if new_file_size != file_size:
-                                # 大小不匹配，恢复原文件名
-                                os.rename(target_path, full_path)
-                                results.append(RenameResult(original=full_path, new=target_path, status=f"error: size mismatch - original={file_size}, new={new_file_size}"))
-                                return
-                        except Exception as e:
-                            results.append(RenameResult(original=full_path, new=target_path, status=f"error: size verification failed - {e}"))
-                            return
-                    
-                    # 记录重命名操作日志
-                    if log_operations:
-                        operation_logs.append(OperationLog(
-                            timestamp=datetime.now().isoformat(),
-                            operation_type="rename",
-                            source_path=full_path,
-                            target_path=target_path,
-                            backup_path=None,  # 不再使用备份
-                            file_hash=None,    # 不再计算哈希
-                            file_size=file_size
-                        ))
-                    
-                    status = "success"
-                    if verify_size:
-                        status += " (size verified)"
-                    results.append(RenameResult(original=full_path, new=target_path, status=status))
-                except Exception as e:
-                    results.append(RenameResult(original=full_path, new=target_path, status=f"error: {e}"))
+                    new_name = target_names.free_name(new_name)
+                    target_path = os.path.join(target_dir, new_name)
+                else:
+                    plan.append(RenamePlanItem(source=full_path, target=target_path, action=PLAN_SKIP_EXISTS))
+                    return
+
+            names_in(dir_path).discard(fname)
+            target_names.add(new_name)
+            plan.append(RenamePlanItem(source=full_path, target=target_path, action=PLAN_RENAME))
 
         if include_subdirs:
-            for root, _, files in os.walk(base_path):
+            for root, dirs, files in os.walk(base_path):
+                # os.walk 已列出该目录，直接作为该目录的已占用文件名
+                names_in(root, dirs + files)
                 for f in files:
-                    handle_file(root, f)
+                    plan_file(root, f)
         else:
-            for f in os.listdir(base_path):
-                if os.path.isfile(os.path.join(base_path, f)):
-                    handle_file(base_path, f)
+            with os.scandir(base_path) as entries:
+                entries = list(entries)
+            names_in(base_path, [entry.name for entry in entries])
+            for entry in entries:
+                if entry.is_file():
+                    plan_file(base_path, entry.name)
 
-        # 如果启用扁平化，清理空目录
-        if flatten_output and include_subdirs:
-            self._cleanup_empty_dirs(base_path)
+        return plan
 
-        # 保存操作日志
-        if log_operations and operation_logs and log_file:
-            try:
-                with open(log_file, 'w', encoding='utf-8') as f:
-                    json.dump([asdict(log) for log in operation_logs], f, indent=2, ensure_ascii=False)
-                print(f"✅ 操作日志已保存: {log_file}")
-            except Exception as e:
-                print(f"⚠️ 保存日志失败: {e}")
+    def rename_in_directory(self, base_path: str, include_subdirs: bool = False, flatten_output: bool = False, dry_run: bool = False, conflict_resolution: str = "skip", log_operations: bool = False, verify_size: bool = False, path_updates_file: Optional[str] = None) -> List[RenameResult]:
+        """
+        对指定目录中的视频文件进行批量重命名：
+        - 仅处理扩展名匹配的文件
+        - 默认不递归子目录；可通过 include_subdirs=True 开启
+        - 遇到目标同名文件时安全跳过
+        - 可通过 flatten_output=True 将所有文件移动到根目录（扁平化输出）
+
+        分两个阶段执行：先由 plan_renames 在内存中生成完整计划并解决所有冲突，
+        再按计划执行；dry_run 时直接输出同一份计划。
+
+        操作日志中的路径一律为绝对路径（base_path 为相对路径时也一样）。path_updates_file 不为空时，
+        每次成功的重命名还会追加到该文件（与操作日志相同的 JSON Lines 格式），
+        供 video_info_collector --apply-path-updates 批量更新数据库中的路径。
+
+        返回：RenameResult 列表
+        """
+        plan = self.plan_renames(base_path, include_subdirs=include_subdirs, flatten_output=flatten_output,
+                                 conflict_resolution=conflict_resolution)
+
+        results = []
+        journal = None
+        path_updates = None
+        # 本次有文件移出的目录，扁平化后只检查这些目录是否变空
+        vacated_dirs = set()
+
+        # 如果启用日志记录，边执行边追加写入日志文件（JSON Lines）
+        if log_operations and not dry_run:
+            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+            journal = OperationJournal(os.path.join(base_path, f".operation_log_{timestamp}.jsonl"))
+            print(f"📝 操作日志将保存到: {journal.path}")
+        if path_updates_file and not dry_run:
+            path_updates = OperationJournal(path_updates_file)
+
+        try:
+            for item in plan:
+                if item.action == PLAN_SKIP_SAME:
+                    results.append(RenameResult(original=item.source, new=item.target, status="skipped: same name"))
+                elif item.action == PLAN_SKIP_EXISTS:
+                    status = "would skip: target exists" if dry_run else "skipped: target exists"
+                    results.append(RenameResult(original=item.source, new=item.target, status=status))
+                elif dry_run:
+                    # 干运行模式：只预览，不实际执行
+                    results.append(RenameResult(original=item.source, new=item.target, status="preview: would rename"))
+                else:
+                    result = self._execute_rename(item, verify_size, journal, path_updates)
+                    results.append(result)
+                    source_dir = os.path.dirname(item.source)
+                    if result.status.startswith("success") and source_dir != os.path.dirname(item.target):
+                        vacated_dirs.add(source_dir)
+        finally:
+            if path_updates is not None:
+                try:
+                    path_updates.close()
+                    if path_updates.count:
+                        print(f"✅ 路径更新事件已保存: {path_updates.path}")
+                except Exception as e:
+                    print(f"⚠️ 保存路径更新事件失败: {e}")
+            if journal is not None:
+                try:
+                    journal.close()
+                    if journal.count:
+                        print(f"✅ 操作日志已保存: {journal.path}")
+                except Exception as e:
+                    print(f"⚠️ 保存日志失败: {e}")
+
+        # 如果启用扁平化，清理因文件移出而变空的目录
+        if flatten_output and include_subdirs and vacated_dirs:
+            prune_vacated_dirs(base_path, vacated_dirs)
 
         return results
 
-    def _cleanup_empty_dirs(self, base_path: str):
-        """清理空目录（从最深层开始）"""
-        base_path_obj = Path(base_path)
-        
-        # 收集所有子目录，按深度排序（深度优先）
-        subdirs = []
-        for root, dirs, _ in os.walk(base_path):
-            for d in dirs:
-                subdir_path = Path(root) / d
-                subdirs.append(subdir_path)
-        
-        # 按深度排序（深的目录先处理）
-        subdirs.sort(key=lambda p: len(p.parts), reverse=True)
-        
-        # 删除空目录
-        for subdir in subdirs:
+    def _execute_rename(self, item: RenamePlanItem, verify_size: bool, journal: Optional[OperationJournal],
+                        path_updates: Optional[OperationJournal] = None) -> RenameResult:
+        """执行计划中的一次重命名"""
+        full_path, target_path = item.source, item.target
+        try:
+            file_size = None
+
+            # 如果启用大小验证或日志记录，获取文件大小
+            if verify_size or journal is not None or path_updates is not None:
+                try:
+                    file_size = os.path.getsize(full_path)
+                except Exception:
+                    pass
+
             try:
-                if subdir.exists() and not any(subdir.iterdir()):
-                    subdir.rmdir()
-            except Exception:
-                # 忽略删除失败的情况
-                pass
\ No newline at end of file
+                move_no_clobber(full_path, target_path)
+            except FileExistsError:
+                # 计划生成后目标位置出现了文件（外部写入，或此前应让出该名称的重命名失败）
+                return RenameResult(original=full_path, new=target_path, status="skipped: target exists")
+
+            # 轻量级文件大小验证
+            if verify_size and file_size is not None:
+                try:
+                    new_file_size = os.path.getsize(target_path)
+                    if new_file_size != file_size:
+                        # 大小不匹配，恢复原文件名
+                        os.rename(target_path, full_path)
+                        return RenameResult(original=full_path, new=target_path, status=f"error: size mismatch - original={file_size}, new={new_file_size}")
+                except Exception as e:
+                    return RenameResult(original=full_path, new=target_path, status=f"error: size verification failed - {e}")
+
+            # 记录重命名操作日志；使用绝对路径，日志在其他工作目录下查询和回滚时仍指向同一文件
+            log = OperationLog(
+                timestamp=datetime.now().isoformat(),
+                operation_type="rename",
+                source_path=os.path.abspath(full_path),
+                target_path=os.path.abspath(target_path),
+                backup_path=None,  # 不再使用备份
+                file_hash=None,    # 不再计算哈希
+                file_size=file_size
+            )
+            if journal is not None:
+                journal.append(log)
+            if path_updates is not None:
+                path_updates.append(log)
+
+            status = "success"
+            if verify_size:
+                status += " (size verified)"
+            return RenameResult(original=full_path, new=target_path, status=status)
+        except Exception as e:
+            return RenameResult(original=full_path, new=target_path, status=f"error: {e}")
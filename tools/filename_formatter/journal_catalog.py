@@ -0,0 +1,471 @@
+#!/usr/bin/env python3
+"""
+重命名日志目录（journal catalog）
+
+每次带 --log-operations 的运行都会在处理目录下留下一个 .operation_log_<时间>.jsonl。
+本模块把这些日志汇总到一个 SQLite 数据库中，按源路径和目标路径建立索引：
+- index:    扫描目录，增量导入新增或追加过的日志（JSON Lines 从上次读到的位置继续）
+- lookup:   查询某个文件的来历，沿重命名链一直追溯到最初的文件名
+- rollback: 按时间窗口跨多个日志批量回滚；每个相关目录只列出一次，在内存中预检全部冲突后再执行
+
+用法:
+    python -m tools.filename_formatter.journal_catalog index /path/to/videos
+    python -m tools.filename_formatter.journal_catalog lookup /path/to/videos/TEST-001.mp4
+    python -m tools.filename_formatter.journal_catalog rollback --since 2026-10-01 --until 2026-10-07 --dry-run
+"""
+
+import argparse
+import json
+import os
+import sqlite3
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from .formatter import DirectoryNames, move_no_clobber
+
+
+DEFAULT_CATALOG_PATH = "output/filename_formatter/journal_catalog.db"
+JOURNAL_PREFIX = ".operation_log_"
+JOURNAL_SUFFIX = ".jsonl"
+
+ROLLBACK_OK = "rollback"
+ROLLBACK_SKIP_MISSING = "skip_missing_target"
+ROLLBACK_SKIP_EXISTS = "skip_source_exists"
+# 执行阶段的结果：依赖的更晚操作未能回滚而跳过，或回滚失败
+ROLLBACK_SKIP_DEPENDENCY = "skip_failed_dependency"
+ROLLBACK_FAILED = "failed"
+
+
+def is_journal_file(filename: str) -> bool:
+    """判断文件名是否为重命名日志（JSON Lines；回滚结果文件为 .json，不在此列）"""
+    return filename.startswith(JOURNAL_PREFIX) and filename.endswith(JOURNAL_SUFFIX)
+
+
+def _iter_journal_lines(log_file: str, offset: int) -> Iterator[Tuple[dict, int]]:
+    """
+    从 offset 开始顺序读取 JSON Lines 日志，返回 (记录, 该行结束位置)；
+    末尾不完整的行（写入中或崩溃留下的）不读取，下次从该行开头继续
+    """
+    with open(log_file, "rb") as f:
+        f.seek(offset)
+        position = offset
+        for line in f:
+            if not line.endswith(b"\n"):
+                break
+            position += len(line)
+            try:
+                operation = json.loads(line.decode("utf-8"))
+            except (UnicodeDecodeError, json.JSONDecodeError):
+                continue
+            if isinstance(operation, dict):
+                yield operation, position
+
+
+@dataclass
+class CatalogRollbackItem:
+    """批量回滚计划中的一项"""
+    entry_id: int
+    source_path: str
+    target_path: str
+    timestamp: str
+    action: str
+
+
+@dataclass
+class CatalogRollbackResult:
+    """批量回滚的结果"""
+    planned: List[CatalogRollbackItem] = field(default_factory=list)
+    # 每项的实际结果（按执行顺序）：ROLLBACK_OK 表示已回滚（预览模式下为将回滚），其余为跳过原因或 ROLLBACK_FAILED
+    outcomes: List[Tuple[CatalogRollbackItem, str]] = field(default_factory=list)
+    rolled_back: int = 0
+    skipped: Dict[str, int] = field(default_factory=dict)
+    errors: List[Tuple[CatalogRollbackItem, str]] = field(default_factory=list)
+
+
+class JournalCatalog:
+    """重命名日志目录数据库"""
+
+    def __init__(self, db_path: str = DEFAULT_CATALOG_PATH):
+        """
+        打开（必要时创建）日志目录数据库
+
+        Args:
+            db_path: 数据库文件路径，":memory:" 表示内存数据库
+        """
+        self.db_path = db_path
+        if db_path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+        self.connection = sqlite3.connect(db_path)
+        self.connection.row_factory = sqlite3.Row
+        self.connection.execute("PRAGMA foreign_keys = ON")
+        self._create_tables()
+        self._create_indexes()
+
+    def _create_tables(self):
+        """创建数据表"""
+        cursor = self.connection.cursor()
+        # 已导入的日志文件；indexed_bytes 为 JSON Lines 日志已导入到的字节位置
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS journals (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                path TEXT UNIQUE NOT NULL,
+                file_size INTEGER NOT NULL DEFAULT 0,
+                mtime REAL,
+                indexed_bytes INTEGER NOT NULL DEFAULT 0,
+                entry_count INTEGER NOT NULL DEFAULT 0,
+                indexed_time TEXT
+            )
+        """)
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS journal_entries (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                journal_id INTEGER NOT NULL REFERENCES journals(id) ON DELETE CASCADE,
+                seq INTEGER NOT NULL,
+                timestamp TEXT,
+                operation_type TEXT,
+                source_path TEXT NOT NULL,
+                target_path TEXT NOT NULL,
+                file_size INTEGER,
+                rolled_back_time TEXT,
+                UNIQUE(journal_id, seq)
+            )
+        """)
+        self.connection.commit()
+
+    def _create_indexes(self):
+        """创建索引"""
+        cursor = self.connection.cursor()
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_journal_entries_source ON journal_entries(source_path)")
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_journal_entries_target ON journal_entries(target_path)")
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_journal_entries_timestamp ON journal_entries(timestamp)")
+        self.connection.commit()
+
+    def close(self):
+        """关闭数据库连接"""
+        if self.connection:
+            self.connection.close()
+            self.connection = None
+
+    def __enter__(self) -> "JournalCatalog":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.close()
+
+    # ---------------------------
+    # 导入
+    # ---------------------------
+    def register_journal(self, log_file: str) -> int:
+        """
+        导入单个日志文件；文件未变化时跳过，只导入追加的部分
+
+        source_path/target_path 不是绝对路径的记录无法确定指向哪个文件，跳过不导入。
+
+        Args:
+            log_file: 日志文件路径
+
+        Returns:
+            int: 本次新导入的记录数
+        """
+        path = os.path.abspath(log_file)
+        stat = os.stat(path)
+        cursor = self.connection.cursor()
+        row = cursor.execute("SELECT * FROM journals WHERE path = ?", (path,)).fetchone()
+        if row and row["file_size"] == stat.st_size and row["mtime"] == stat.st_mtime:
+            return 0
+
+        appendable = row is not None and stat.st_size >= row["indexed_bytes"]
+        with self.connection:
+            if row is None:
+                cursor.execute("INSERT INTO journals (path) VALUES (?)", (path,))
+                journal_id, seq, offset = cursor.lastrowid, 0, 0
+            elif appendable:
+                journal_id, seq, offset = row["id"], row["entry_count"], row["indexed_bytes"]
+            else:
+                # 文件被替换（比已导入的部分还小）：整体重新导入
+                journal_id, seq, offset = row["id"], 0, 0
+                cursor.execute("DELETE FROM journal_entries WHERE journal_id = ?", (journal_id,))
+
+            operations = _iter_journal_lines(path, offset)
+            imported = 0
+            relative = 0
+            indexed_bytes = offset
+            batch = []
+            for operation, indexed_bytes in operations:
+                if not operation.get("source_path") or not operation.get("target_path"):
+                    continue
+                if not (os.path.isabs(operation["source_path"]) and os.path.isabs(operation["target_path"])):
+                    relative += 1
+                    continue
+                batch.append((journal_id, seq, operation.get("timestamp"), operation.get("operation_type"),
+                              operation["source_path"], operation["target_path"], operation.get("file_size")))
+                seq += 1
+                imported += 1
+                if len(batch) >= 1000:
+                    self._insert_entries(batch)
+                    batch = []
+            self._insert_entries(batch)
+
+            cursor.execute("""
+                UPDATE journals SET file_size = ?, mtime = ?, indexed_bytes = ?, entry_count = ?, indexed_time = ?
+                WHERE id = ?
+            """, (stat.st_size, stat.st_mtime, indexed_bytes, seq, datetime.now().isoformat(), journal_id))
+        if relative:
+            print(f"⚠️ 日志 {path} 中有 {relative} 条相对路径记录，已跳过")
+        return imported
+
+    def _insert_entries(self, batch: List[tuple]) -> None:
+        if batch:
+            self.connection.executemany("""
+                INSERT INTO journal_entries
+                (journal_id, seq, timestamp, operation_type, source_path, target_path, file_size)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+            """, batch)
+
+    def index_directory(self, root: str) -> Tuple[int, int]:
+        """
+        递归扫描目录中的日志文件并导入
+
+        Args:
+            root: 要扫描的目录
+
+        Returns:
+            Tuple[int, int]: (扫描到的日志数, 新导入的记录数)
+        """
+        journals = 0
+        imported = 0
+        for dir_path, _, files in os.walk(root):
+            for filename in files:
+                if is_journal_file(filename):
+                    journals += 1
+                    try:
+                        imported += self.register_journal(os.path.join(dir_path, filename))
+                    except (OSError, ValueError) as e:
+                        print(f"⚠️ 无法导入日志 {os.path.join(dir_path, filename)}: {e}")
+        return journals, imported
+
+    # ---------------------------
+    # 查询
+    # ---------------------------
+    def lookup(self, path: str) -> List[Dict]:
+        """
+        查询与某个路径相关的全部重命名记录（作为源或目标）
+
+        Args:
+            path: 文件路径
+
+        Returns:
+            List[Dict]: 记录列表，按时间排序，包含所在日志路径
+        """
+        path = os.path.abspath(path)
+        cursor = self.connection.execute("""
+            SELECT e.*, j.path AS journal_path FROM journal_entries e JOIN journals j ON j.id = e.journal_id
+            WHERE e.source_path = ?
+            UNION
+            SELECT e.*, j.path AS journal_path FROM journal_entries e JOIN journals j ON j.id = e.journal_id
+            WHERE e.target_path = ?
+            ORDER BY timestamp, seq
+        """, (path, path))
+        return [dict(row) for row in cursor.fetchall()]
+
+    def trace_origin(self, path: str) -> List[Dict]:
+        """
+        沿重命名链追溯文件的来历：当前路径 <- 上一次的源路径 <- ... <- 最初的文件名
+
+        Args:
+            path: 文件当前路径
+
+        Returns:
+            List[Dict]: 从最近一次到最早一次的重命名记录（已回滚的记录不计入）
+        """
+        chain = []
+        seen = set()
+        current = os.path.abspath(path)
+        timestamp = None
+        while current not in seen:
+            seen.add(current)
+            row = self.connection.execute("""
+                SELECT e.*, j.path AS journal_path FROM journal_entries e JOIN journals j ON j.id = e.journal_id
+                WHERE e.target_path = ? AND e.rolled_back_time IS NULL AND (? IS NULL OR e.timestamp <= ?)
+                ORDER BY e.timestamp DESC, e.seq DESC LIMIT 1
+            """, (current, timestamp, timestamp)).fetchone()
+            if row is None:
+                break
+            chain.append(dict(row))
+            current, timestamp = row["source_path"], row["timestamp"]
+        return chain
+
+    # ---------------------------
+    # 批量回滚
+    # ---------------------------
+    def plan_rollback(self, since: Optional[str] = None, until: Optional[str] = None) -> List[CatalogRollbackItem]:
+        """
+        生成时间窗口内所有未回滚记录的回滚计划（最新的先回滚）
+
+        冲突预检在内存中完成：涉及的每个目录只列出一次，之后按回滚顺序模拟文件名的占用和释放，
+        因此同一文件在窗口内被多次重命名时也能得到正确结果。
+
+        Args:
+            since: 起始时间（ISO格式，含），None表示不限
+            until: 结束时间（ISO格式，含；只给日期时包含当天），None表示不限
+
+        Returns:
+            List[CatalogRollbackItem]: 回滚计划
+        """
+        if until and len(until) == 10:
+            until = f"{until}T23:59:59.999999"
+        rows = self.connection.execute("""
+            SELECT e.id, e.source_path, e.target_path, e.timestamp
+            FROM journal_entries e
+            WHERE e.rolled_back_time IS NULL AND e.operation_type = 'rename'
+            AND (? IS NULL OR e.timestamp >= ?) AND (? IS NULL OR e.timestamp <= ?)
+            ORDER BY e.timestamp DESC, e.journal_id DESC, e.seq DESC
+        """, (since, since, until, until)).fetchall()
+
+        directories: Dict[str, DirectoryNames] = {}
+
+        def names_in(directory: str) -> DirectoryNames:
+            names = directories.get(directory)
+            if names is None:
+                names = directories[directory] = DirectoryNames(directory)
+            return names
+
+        plan = []
+        for row in rows:
+            source_dir, source_name = os.path.split(row["source_path"])
+            target_dir, target_name = os.path.split(row["target_path"])
+            target_names = names_in(target_dir)
+            source_names = names_in(source_dir)
+            if target_name not in target_names:
+                action = ROLLBACK_SKIP_MISSING
+            elif source_name in source_names:
+                action = ROLLBACK_SKIP_EXISTS
+            else:
+                action = ROLLBACK_OK
+                target_names.discard(target_name)
+                source_names.add(source_name)
+            plan.append(CatalogRollbackItem(row["id"], row["source_path"], row["target_path"],
+                                            row["timestamp"], action))
+        return plan
+
+    def rollback_window(self, since: Optional[str] = None, until: Optional[str] = None,
+                        dry_run: bool = False) -> CatalogRollbackResult:
+        """
+        按时间窗口跨多个日志批量回滚
+
+        计划假设更晚的回滚会如期让出或放回文件名；某项未能执行时，之后涉及同一路径的项一并跳过。
+        执行时每次移动前仍检查一次目标，绝不覆盖已存在的文件。
+
+        Args:
+            since: 起始时间（ISO格式，含），None表示不限
+            until: 结束时间（ISO格式，含），None表示不限
+            dry_run: 只生成计划，不实际执行
+
+        Returns:
+            CatalogRollbackResult: 回滚结果
+        """
+        result = CatalogRollbackResult(planned=self.plan_rollback(since, until))
+        done = []
+        # 未按计划回滚的项所涉及的路径：文件仍留在原处，依赖它们的后续项不能按计划执行
+        blocked_paths = set()
+        for item in result.planned:
+            outcome = item.action
+            if outcome == ROLLBACK_OK and not dry_run:
+                if item.source_path in blocked_paths or item.target_path in blocked_paths:
+                    outcome = ROLLBACK_SKIP_DEPENDENCY
+                else:
+                    try:
+                        os.makedirs(os.path.dirname(item.source_path), exist_ok=True)
+                        try:
+                            move_no_clobber(item.target_path, item.source_path)
+                        except FileExistsError:
+                            outcome = ROLLBACK_SKIP_EXISTS
+                        else:
+                            done.append((datetime.now().isoformat(), item.entry_id))
+                    except OSError as e:
+                        outcome = ROLLBACK_FAILED
+                        result.errors.append((item, str(e)))
+            if outcome != ROLLBACK_OK:
+                blocked_paths.update((item.source_path, item.target_path))
+                if outcome != ROLLBACK_FAILED:
+                    result.skipped[outcome] = result.skipped.get(outcome, 0) + 1
+            result.outcomes.append((item, outcome))
+
+        if done:
+            with self.connection:
+                self.connection.executemany(
+                    "UPDATE journal_entries SET rolled_back_time = ? WHERE id = ?", done
+                )
+        result.rolled_back = len(done)
+        return result
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog="journal-catalog", description="重命名日志目录：汇总、查询与批量回滚")
+    parser.add_argument("--catalog", default=DEFAULT_CATALOG_PATH, help=f"目录数据库路径（默认 {DEFAULT_CATALOG_PATH}）")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    index_parser = subparsers.add_parser("index", help="扫描目录并导入重命名日志")
+    index_parser.add_argument("directories", nargs="+", help="要扫描的目录")
+
+    lookup_parser = subparsers.add_parser("lookup", help="查询文件的重命名来历")
+    lookup_parser.add_argument("path", help="文件路径")
+
+    rollback_parser = subparsers.add_parser("rollback", help="按时间窗口批量回滚")
+    rollback_parser.add_argument("--since", help="起始时间（ISO格式，如 2026-10-01 或 2026-10-01T08:00:00）")
+    rollback_parser.add_argument("--until", help="结束时间（ISO格式，只给日期时包含当天）")
+    rollback_parser.add_argument("--dry-run", action="store_true", help="预览模式，不实际执行回滚")
+    return parser
+
+
+def main(argv: List[str] = None) -> int:
+    args = build_parser().parse_args(argv)
+    with JournalCatalog(args.catalog) as catalog:
+        if args.command == "index":
+            for directory in args.directories:
+                journals, imported = catalog.index_directory(directory)
+                print(f"📋 {directory}: {journals} 个日志，新导入 {imported} 条记录")
+            return 0
+
+        if args.command == "lookup":
+            chain = catalog.trace_origin(args.path)
+            if not chain:
+                entries = catalog.lookup(args.path)
+                if not entries:
+                    print(f"❌ 没有找到相关的重命名记录: {args.path}")
+                    return 1
+                for entry in entries:
+                    print(f"{entry['timestamp']}  {entry['source_path']} -> {entry['target_path']}  ({entry['journal_path']})")
+                return 0
+            for entry in chain:
+                print(f"{entry['timestamp']}  {entry['target_path']} <- {entry['source_path']}  ({entry['journal_path']})")
+            print(f"📁 最初的文件名: {chain[-1]['source_path']}")
+            return 0
+
+        result = catalog.rollback_window(args.since, args.until, dry_run=args.dry_run)
+        if not result.planned:
+            print("❌ 时间窗口内没有可回滚的操作")
+            return 1
+        errors = {item.entry_id: error for item, error in result.errors}
+        for item, outcome in result.outcomes:
+            if outcome == ROLLBACK_OK:
+                prefix = "📁 将回滚" if args.dry_run else "✅ 已回滚"
+                print(f"{prefix}: {item.target_path} -> {item.source_path}")
+            elif outcome == ROLLBACK_SKIP_MISSING:
+                print(f"⚠️ 目标文件不存在，跳过: {item.target_path}")
+            elif outcome == ROLLBACK_SKIP_EXISTS:
+                print(f"⚠️ 源文件已存在，跳过: {item.source_path}")
+            elif outcome == ROLLBACK_SKIP_DEPENDENCY:
+                print(f"⚠️ 依赖的操作未能回滚，跳过: {item.target_path} -> {item.source_path}")
+            else:
+                print(f"❌ 回滚失败: {item.target_path} -> {item.source_path}, 错误: {errors[item.entry_id]}")
+        print(f"\n📊 共 {len(result.planned)} 条记录，回滚 {result.rolled_back}，"
+              f"跳过 {sum(result.skipped.values())}，失败 {len(result.errors)}")
+        if args.dry_run:
+            print("\n💡 这只是预览！要实际执行回滚，请移除 --dry-run 参数")
+        return 0 if not result.errors else 1
+
+
+if __name__ == "__main__":
+    exit(main())
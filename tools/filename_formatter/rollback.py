@@ -2,6 +2,9 @@
 """
 文件重命名回滚工具
 根据操作日志回滚重命名操作
+
+操作日志为 JSON Lines 格式（每行一条记录），回滚时从文件末尾按块倒序读取，
+内存占用与日志大小无关。
 """
 
 import os
@@ -9,17 +12,67 @@ import json
 import shutil
 import argparse
 from pathlib import Path
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Iterator
+
+# 倒序读取日志时每次读取的块大小
+REVERSE_READ_BLOCK_SIZE = 64 * 1024
+
+
+def _parse_journal_line(line: bytes) -> Iterator[Dict[str, Any]]:
+    """解析一行日志记录；中途崩溃留下的不完整行被跳过"""
+    line = line.strip()
+    if not line:
+        return
+    try:
+        operation = json.loads(line.decode('utf-8'))
+    except (UnicodeDecodeError, json.JSONDecodeError):
+        print(f"⚠️ 跳过无法解析的日志行: {line[:80]!r}")
+        return
+    if isinstance(operation, dict):
+        yield operation
+
+
+def iter_operations_reversed(log_file: str, block_size: int = REVERSE_READ_BLOCK_SIZE) -> Iterator[Dict[str, Any]]:
+    """
+    从最新到最早倒序逐条读取操作日志
+
+    Args:
+        log_file: 操作日志文件路径（JSON Lines）
+        block_size: 每次从文件末尾向前读取的字节数
+
+    Returns:
+        Iterator[Dict[str, Any]]: 操作记录，最新的在前
+    """
+    with open(log_file, 'rb') as f:
+        position = f.seek(0, os.SEEK_END)
+        remainder = b''
+        while position > 0:
+            read_size = min(block_size, position)
+            position -= read_size
+            f.seek(position)
+            lines = (f.read(read_size) + remainder).split(b'\n')
+            # 块的第一行可能不完整，留到读取前一块时拼接
+            remainder = lines.pop(0)
+            for line in reversed(lines):
+                yield from _parse_journal_line(line)
+        yield from _parse_journal_line(remainder)
 
 
 def load_operation_log(log_file: str) -> List[Dict[str, Any]]:
-    """加载操作日志"""
+    """加载操作日志（按时间正序）"""
     try:
-        with open(log_file, 'r', encoding='utf-8') as f:
-            return json.load(f)
+        operations = list(iter_operations_reversed(log_file))
     except Exception as e:
         print(f"❌ 无法读取日志文件 {log_file}: {e}")
         return []
+    operations.reverse()
+    return operations
+
+
+def _chain_first(first: Dict[str, Any], rest: Iterator[Dict[str, Any]]) -> Iterator[Dict[str, Any]]:
+    """把已预读的第一条记录放回迭代序列"""
+    yield first
+    yield from rest
 
 
 def rollback_operations(log_file: str, dry_run: bool = False) -> bool:
@@ -33,22 +86,29 @@ def rollback_operations(log_file: str, dry_run: bool = False) -> bool:
     Returns:
         bool: 回滚是否成功
     """
-    operations = load_operation_log(log_file)
-    if not operations:
+    # 按时间倒序流式读取（最新的操作先回滚），不把整个日志载入内存
+    operations = iter_operations_reversed(log_file)
+    try:
+        first_operation = next(operations, None)
+    except Exception as e:
+        print(f"❌ 无法读取日志文件 {log_file}: {e}")
+        return False
+    if first_operation is None:
         print("❌ 没有找到可回滚的操作")
         return False
     
-    print(f"📋 找到 {len(operations)} 个操作记录")
-    
     if dry_run:
         print("🔍 预览模式 - 以下是将要回滚的操作：")
         print("=" * 50)
     
     success_count = 0
     error_count = 0
+    operation_count = 0
+    earliest_timestamp = ''
     
-    # 按时间倒序处理（最新的操作先回滚）
-    for operation in reversed(operations):
+    for operation in _chain_first(first_operation, operations):
+        operation_count += 1
+        earliest_timestamp = operation.get('timestamp', earliest_timestamp)
         op_type = operation.get('operation_type')
         source_path = operation.get('source_path')
         target_path = operation.get('target_path')
@@ -84,6 +144,7 @@ def rollback_operations(log_file: str, dry_run: bool = False) -> bool:
                 print(f"⚠️ 轻量级模式不支持操作类型 '{op_type}' 的回滚")
                 error_count += 1
     
+    print(f"\n📋 共 {operation_count} 个操作记录")
     if dry_run:
         print("\n💡 这只是预览！要实际执行回滚，请移除 --dry-run 参数")
     else:
@@ -93,13 +154,13 @@ def rollback_operations(log_file: str, dry_run: bool = False) -> bool:
         
         if success_count > 0:
             # 创建回滚日志
-            rollback_log = log_file.replace('.json', '_rollback.json')
+            rollback_log = os.path.splitext(log_file)[0] + '_rollback.json'
             try:
                 with open(rollback_log, 'w', encoding='utf-8') as f:
                     json.dump({
-                        'rollback_timestamp': operations[0]['timestamp'] if operations else '',
+                        'rollback_timestamp': earliest_timestamp,
                         'original_log_file': log_file,
-                        'operations_rolled_back': len(operations),
+                        'operations_rolled_back': operation_count,
                         'success_count': success_count,
                         'error_count': error_count
                     }, f, indent=2, ensure_ascii=False)
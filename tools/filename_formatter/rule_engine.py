@@ -0,0 +1,147 @@
+"""
+重命名规则引擎
+
+rename_rules 按顺序逐条执行：每条规则在上一条规则的结果上做替换。规则较多时（如上千条网站前缀/后缀），
+对每个文件名逐条调用 str.replace 需要扫描文件名上千次，而实际命中的通常只有一两条。
+
+本模块在加载时把所有字符串规则编译为一个 Aho-Corasick 自动机：一次扫描即可找出文件名中出现的、
+序号最小的规则，执行替换后只需在结果上继续查找序号更大的规则，因此每个文件名的扫描次数等于
+实际生效的规则数 + 1，与规则总数无关，执行结果与逐条 str.replace 完全一致。
+
+除字符串规则外还支持正则规则（regex + replace），在加载时编译，按其在规则列表中的位置执行。
+"""
+
+import re
+from bisect import bisect_right
+from typing import Dict, Iterable, List, Optional, Pattern, Tuple
+
+
+class RenameRuleEngine:
+    """按规则顺序执行替换的多模式匹配引擎"""
+
+    def __init__(self, rules: Iterable[dict]):
+        """
+        编译重命名规则
+
+        Args:
+            rules: 规则列表，每条为 {"pattern": 字符串, "replace": 字符串}
+                   或 {"regex": 正则表达式, "replace": 替换模板}；无效规则被忽略
+        """
+        # 每条有效规则：(字符串模式, 编译后的正则, 替换内容)，两种模式二选一
+        self._rules: List[Tuple[Optional[str], Optional[Pattern], str]] = []
+        self._regex_indices: List[int] = []
+
+        # Aho-Corasick 自动机：转移表、失败指针、每个状态匹配到的规则序号（升序）
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._outputs: List[List[int]] = [[]]
+
+        for rule in rules:
+            self._add_rule(rule)
+        self._build_failure_links()
+
+    def __len__(self) -> int:
+        return len(self._rules)
+
+    def _add_rule(self, rule: dict) -> None:
+        """编译单条规则，无效规则直接忽略（与逐条替换时单条规则失败不影响整体一致）"""
+        if not isinstance(rule, dict):
+            return
+        repl = rule.get("replace", "")
+        if not isinstance(repl, str):
+            return
+
+        expression = rule.get("regex")
+        if expression:
+            try:
+                compiled = re.compile(str(expression))
+            except re.error as e:
+                print(f"忽略无效的正则规则 {expression!r}: {e}")
+                return
+            self._regex_indices.append(len(self._rules))
+            self._rules.append((None, compiled, repl))
+            return
+
+        pattern = rule.get("pattern", "")
+        if not pattern or not isinstance(pattern, str):
+            return
+        index = len(self._rules)
+        self._rules.append((pattern, None, repl))
+
+        state = 0
+        for char in pattern:
+            next_state = self._goto[state].get(char)
+            if next_state is None:
+                next_state = len(self._goto)
+                self._goto[state][char] = next_state
+                self._goto.append({})
+                self._fail.append(0)
+                self._outputs.append([])
+            state = next_state
+        self._outputs[state].append(index)
+
+    def _build_failure_links(self) -> None:
+        """按广度优先计算失败指针，并把失败链上的匹配结果合并到每个状态"""
+        queue = list(self._goto[0].values())
+        for state in queue:
+            for char, next_state in self._goto[state].items():
+                queue.append(next_state)
+                fallback = self._fail[state]
+                while fallback and char not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                self._fail[next_state] = self._goto[fallback].get(char, 0)
+                if self._outputs[self._fail[next_state]]:
+                    self._outputs[next_state] = sorted(
+                        set(self._outputs[next_state]) | set(self._outputs[self._fail[next_state]])
+                    )
+
+    def _next_literal_rule(self, text: str, after: int) -> Optional[int]:
+        """一次扫描找出 text 中出现的、序号大于 after 的最小字符串规则序号"""
+        goto, fail, outputs = self._goto, self._fail, self._outputs
+        best = None
+        state = 0
+        for char in text:
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+            matched = outputs[state]
+            if matched and matched[-1] > after:
+                candidate = matched[bisect_right(matched, after)]
+                if best is None or candidate < best:
+                    best = candidate
+                    if best == after + 1:
+                        break
+        return best
+
+    def apply(self, text: str) -> str:
+        """
+        按规则顺序对文本执行替换
+
+        Args:
+            text: 原始文本（文件名）
+
+        Returns:
+            str: 依次执行所有规则后的文本
+        """
+        after = -1
+        regex_position = 0
+        while True:
+            literal_index = self._next_literal_rule(text, after) if len(self._goto) > 1 else None
+            while regex_position < len(self._regex_indices) and self._regex_indices[regex_position] <= after:
+                regex_position += 1
+            regex_index = self._regex_indices[regex_position] if regex_position < len(self._regex_indices) else None
+
+            if literal_index is None and regex_index is None:
+                return text
+            if regex_index is not None and (literal_index is None or regex_index < literal_index):
+                _, compiled, repl = self._rules[regex_index]
+                try:
+                    text = compiled.sub(repl, text)
+                except (re.error, IndexError) as e:
+                    # 替换模板引用了不存在的分组等，单条规则失败不影响整体
+                    print(f"正则规则 {compiled.pattern!r} 替换失败: {e}")
+                after = regex_index
+            else:
+                pattern, _, repl = self._rules[literal_index]
+                text = text.replace(pattern, repl)
+                after = literal_index
@@ -0,0 +1,56 @@
+#!/usr/bin/env python3
+"""
+视频编码（video_code）规范化工具模块
+
+同一个编码在文件名、数据库和用户输入中有多种写法，例如 abc123、ABC_123、abc-00123 都指 ABC-123。
+本模块提供统一的规范化规则，文件名格式化（FilenameFormatter）、编码提取和编码别名索引共用，
+保证各处得到相同的规范编码。
+"""
+
+import re
+from typing import Optional, Tuple
+
+
+# 编码 = 字母开头的前缀 + 可选分隔符 + 数字，如 TEST-001、DEMO002、T28-123
+VIDEO_CODE_PARTS_PATTERN = re.compile(r'^([A-Z][A-Z0-9]*?)([-_]?)(\d+)$', re.IGNORECASE)
+
+# 规范编码中数字部分的最少位数（不足时补零，多余的前导零去掉）
+CANONICAL_DIGITS = 3
+
+
+def split_video_code(video_code: str) -> Optional[Tuple[str, str, str]]:
+    """
+    把编码拆分为前缀、分隔符和数字部分
+
+    Args:
+        video_code: 视频编码，如 TEST-001
+
+    Returns:
+        Optional[Tuple[str, str, str]]: (大写前缀, 分隔符, 数字)，不是"前缀+数字"形式时返回None
+    """
+    match = VIDEO_CODE_PARTS_PATTERN.match(video_code.strip()) if video_code else None
+    if not match:
+        return None
+    return match.group(1).upper(), match.group(2), match.group(3)
+
+
+def canonicalize_video_code(video_code: str) -> Optional[str]:
+    """
+    把编码转换为规范形式：大写前缀 + 连字符 + 至少三位的数字
+
+    例如 abc123、ABC_123、abc-00123 都转换为 ABC-123；
+    不是"前缀+数字"形式的编码（如 123456_789）只去除首尾空白并转为大写。
+
+    Args:
+        video_code: 视频编码的任意写法
+
+    Returns:
+        Optional[str]: 规范编码，输入为空时返回None
+    """
+    if not video_code or not video_code.strip():
+        return None
+    parts = split_video_code(video_code)
+    if parts is None:
+        return video_code.strip().upper()
+    prefix, _, digits = parts
+    return f"{prefix}-{digits.lstrip('0').zfill(CANONICAL_DIGITS)}"
@@ -0,0 +1,267 @@
+"""
+后台分批验证模块
+
+超大媒体库一次完整的 verify_scan 开销太大。后台验证按 video_info.id 游标分批遍历 present 记录，
+每次运行受时间预算和读取量预算限制，并按 N MB/s 限速读取；游标保存在 verification_cursor 表中，
+下次运行从上次停止的位置继续。每条记录的验证时间和结果写入 verification_state 表，
+最近 reverify_days 天内验证过的记录会被跳过，因此一个完整验证周期可以分摊到多次运行（例如一周）。
+
+验证方式：
+- header: 校验容器签名和文件大小（几乎不产生读取量）
+- probe:  重新运行 ffprobe 确认时长和大小
+- read:   限速完整读取文件并计算SHA256，大小不变但内容哈希与上次不同时判定为损坏
+"""
+
+import hashlib
+import os
+import time
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+
+try:
+    from .sqlite_storage import SQLiteStorage
+    from .metadata import VideoInfo
+    from .scan_verifier import ScanVerifier, HEADER_SIZE
+    from .file_status_manager import FileStatusManager, FileStatus
+    from .volume_monitor import VolumeMonitor
+except ImportError:
+    from sqlite_storage import SQLiteStorage
+    from metadata import VideoInfo
+    from scan_verifier import ScanVerifier, HEADER_SIZE
+    from file_status_manager import FileStatusManager, FileStatus
+    from volume_monitor import VolumeMonitor
+
+
+VERIFY_MODES = ('header', 'probe', 'read')
+
+DEFAULT_CHUNK_SIZE = 1024 * 1024
+
+STOP_COMPLETE = 'complete'
+STOP_TIME_BUDGET = 'time_budget'
+STOP_IO_BUDGET = 'io_budget'
+
+
+class _BudgetExhausted(Exception):
+    """本次运行的预算已用完"""
+
+    def __init__(self, reason: str):
+        super().__init__(reason)
+        self.reason = reason
+
+
+class ReadThrottle:
+    """按平均速率限制读取：读取量超前于时间时休眠补齐"""
+
+    def __init__(self, bytes_per_second: Optional[float]):
+        """
+        初始化限速器
+
+        Args:
+            bytes_per_second: 每秒允许读取的字节数；None或0表示不限速
+        """
+        self.bytes_per_second = bytes_per_second
+        self._consumed = 0
+        self._started = time.monotonic()
+
+    def consume(self, byte_count: int) -> None:
+        """
+        记录一次读取，必要时休眠
+
+        Args:
+            byte_count: 本次读取的字节数
+        """
+        if not self.bytes_per_second:
+            return
+        self._consumed += byte_count
+        ahead = self._consumed / self.bytes_per_second - (time.monotonic() - self._started)
+        if ahead > 0:
+            time.sleep(ahead)
+
+
+@dataclass
+class BackgroundVerifyResult:
+    """一次后台验证运行的结果"""
+    verified: int = 0
+    results: Dict[str, int] = field(default_factory=dict)
+    problems: List[Dict] = field(default_factory=list)
+    status_changes: int = 0
+    skipped_offline: int = 0
+    bytes_read: int = 0
+    elapsed: float = 0.0
+    last_video_id: int = 0
+    cycles_completed: int = 0
+    stop_reason: str = STOP_COMPLETE
+
+
+class BackgroundVerifier:
+    """按id游标分批、受预算限制且可续跑的后台验证器"""
+
+    def __init__(self, storage: SQLiteStorage, mode: str = 'header', job_name: Optional[str] = None,
+                 throttle_mb_per_sec: Optional[float] = None, time_budget: Optional[float] = None,
+                 io_budget_mb: Optional[float] = None, reverify_days: float = 7.0,
+                 batch_size: int = 100, chunk_size: int = DEFAULT_CHUNK_SIZE,
+                 volume_monitor: Optional[VolumeMonitor] = None):
+        """
+        初始化后台验证器
+
+        Args:
+            storage: SQLite存储对象
+            mode: 验证方式，header / probe / read
+            job_name: 任务名称，不同任务各自保存游标，默认与验证方式相同
+            throttle_mb_per_sec: 读取限速（MB/s），None表示不限速
+            time_budget: 本次运行的时间预算（秒），None表示不限
+            io_budget_mb: 本次运行的读取量预算（MB），None表示不限
+            reverify_days: 最近多少天内验证过的记录不再重复验证
+            batch_size: 每批读取和提交的记录数
+            chunk_size: read 模式每次读取的字节数
+            volume_monitor: 卷监视器，离线卷上的记录本次跳过
+        """
+        if mode not in VERIFY_MODES:
+            raise ValueError(f"未知的验证方式: {mode}，可选: {VERIFY_MODES}")
+        self.storage = storage
+        self.mode = mode
+        self.job_name = job_name or mode
+        self.throttle_mb_per_sec = throttle_mb_per_sec
+        self.time_budget = time_budget
+        self.io_budget_bytes = io_budget_mb * 1024 * 1024 if io_budget_mb else None
+        self.reverify_days = reverify_days
+        self.batch_size = batch_size
+        self.chunk_size = chunk_size
+        self.volume_monitor = volume_monitor or VolumeMonitor()
+        self.verifier = ScanVerifier(FileStatusManager(volume_monitor=self.volume_monitor))
+
+    def _load_batch(self, after_id: int, verified_before: str) -> List[Dict]:
+        """按id顺序读取下一批需要验证的present记录"""
+        cursor = self.storage.connection.cursor()
+        cursor.execute("""
+            SELECT v.id, v.file_path, v.file_size, v.duration, v.video_code, s.content_hash
+            FROM video_info v
+            LEFT JOIN verification_state s ON s.video_id = v.id
+            WHERE v.id > ? AND v.file_status = ?
+            AND (s.last_verified_time IS NULL OR s.last_verified_time < ?)
+            ORDER BY v.id
+            LIMIT ?
+        """, (after_id, FileStatus.PRESENT.value, verified_before, self.batch_size))
+        return [dict(row) for row in cursor.fetchall()]
+
+    def _check_budget(self, result: BackgroundVerifyResult, started: float) -> None:
+        """预算用完时抛出 _BudgetExhausted"""
+        if self.time_budget is not None and time.monotonic() - started >= self.time_budget:
+            raise _BudgetExhausted(STOP_TIME_BUDGET)
+        if self.io_budget_bytes is not None and result.bytes_read >= self.io_budget_bytes:
+            raise _BudgetExhausted(STOP_IO_BUDGET)
+
+    def _read_file(self, row: Dict, result: BackgroundVerifyResult, started: float,
+                   throttle: ReadThrottle) -> Tuple[str, Optional[str], Optional[str]]:
+        """限速完整读取文件，返回 (结果, 详情, 内容哈希)"""
+        digest = hashlib.sha256()
+        size = 0
+        try:
+            with open(row['file_path'], 'rb') as f:
+                for chunk in iter(lambda: f.read(self.chunk_size), b''):
+                    size += len(chunk)
+                    digest.update(chunk)
+                    result.bytes_read += len(chunk)
+                    throttle.consume(len(chunk))
+                    # 本次运行的第一个文件总是读完，避免单个大文件超出预算后每次都从头重读
+                    if result.verified:
+                        self._check_budget(result, started)
+        except OSError as e:
+            return 'inaccessible', str(e), None
+
+        content_hash = digest.hexdigest()
+        if row['file_size'] and size != row['file_size']:
+            return 'mismatched', f"size {row['file_size']} -> {size}", content_hash
+        if row['content_hash'] and row['content_hash'] != content_hash:
+            return 'corrupted', 'content hash changed since last verification', content_hash
+        return 'valid', None, content_hash
+
+    def _verify_row(self, row: Dict, result: BackgroundVerifyResult, started: float,
+                    throttle: ReadThrottle) -> Tuple[str, Optional[str], Optional[str]]:
+        """验证单条记录，返回 (结果, 详情, 内容哈希)"""
+        if not os.path.isfile(row['file_path']):
+            return FileStatus.MISSING.value, None, None
+        if self.mode == 'read':
+            return self._read_file(row, result, started, throttle)
+
+        video = VideoInfo(row['file_path'], probe_file=False)
+        video.file_size = row['file_size']
+        video.duration = row['duration']
+        check = self.verifier.check_probe if self.mode == 'probe' else self.verifier.check_header
+        outcome, detail = check(video)
+        result.bytes_read += HEADER_SIZE
+        throttle.consume(HEADER_SIZE)
+        return outcome, detail, None
+
+    def run(self) -> BackgroundVerifyResult:
+        """
+        执行一次受预算限制的后台验证，从上次保存的游标继续
+
+        Returns:
+            BackgroundVerifyResult: 本次运行的结果
+        """
+        started = time.monotonic()
+        throttle = ReadThrottle(self.throttle_mb_per_sec * 1024 * 1024 if self.throttle_mb_per_sec else None)
+        result = BackgroundVerifyResult()
+
+        state = self.storage.get_verification_cursor(self.job_name) or {}
+        last_id = state.get('last_video_id') or 0
+        cycle_started = state.get('cycle_started_time')
+        cycles = state.get('cycles_completed') or 0
+        verified_before = (datetime.now() - timedelta(days=self.reverify_days)).isoformat()
+        wrapped = False
+
+        while True:
+            batch = self._load_batch(last_id, verified_before)
+            if not batch:
+                if last_id > 0:
+                    # 到达末尾：本周期完成，从头开始下一周期（仍受 reverify_days 限制）
+                    cycles += 1
+                    result.cycles_completed += 1
+                    last_id, cycle_started = 0, None
+                    self.storage.save_verification_cursor(self.job_name, last_id, cycle_started, cycles)
+                    if not wrapped:
+                        wrapped = True
+                        continue
+                break
+
+            if cycle_started is None:
+                cycle_started = datetime.now().isoformat()
+
+            records = []
+            status_updates = []
+            try:
+                for row in batch:
+                    self._check_budget(result, started)
+                    if not self.volume_monitor.is_online(self.volume_monitor.mount_point_for(row['file_path'])):
+                        # 卷离线时不记录结果，下次运行重试
+                        result.skipped_offline += 1
+                        last_id = row['id']
+                        continue
+
+                    outcome, detail, content_hash = self._verify_row(row, result, started, throttle)
+                    records.append((row['id'], outcome, detail, content_hash, datetime.now().isoformat()))
+                    result.verified += 1
+                    result.results[outcome] = result.results.get(outcome, 0) + 1
+                    if outcome == FileStatus.MISSING.value:
+                        status_updates.append((row['id'], FileStatus.MISSING.value))
+                    if outcome != 'valid':
+                        result.problems.append({'video_id': row['id'], 'file_path': row['file_path'],
+                                                'result': outcome, 'detail': detail})
+                    last_id = row['id']
+            except _BudgetExhausted as exhausted:
+                result.stop_reason = exhausted.reason
+            finally:
+                with self.storage.transaction():
+                    self.storage.record_verification_results(records)
+                    result.status_changes += self.storage.bulk_update_file_status(
+                        status_updates, reason='background_verify')
+                    self.storage.save_verification_cursor(self.job_name, last_id, cycle_started, cycles)
+
+            if result.stop_reason != STOP_COMPLETE:
+                break
+
+        result.last_video_id = last_id
+        result.elapsed = time.monotonic() - started
+        return result
@@ -0,0 +1,130 @@
+"""
+批量文件状态检查模块
+
+按父目录分组：同一目录下的多个文件只做一次 os.scandir，用目录项判断文件是否存在，
+避免逐个 stat；各目录在线程池中并行处理，线程数按网络文件系统（NAS/SMB）的高延迟设置。
+
+stat_only=True 时只判断文件是否存在；为 False 时对存在的文件再打开读取1字节确认可读，
+与 FileStatusManager.check_file_status 的判断标准一致。
+
+提供 VolumeMonitor 时先按挂载点分组，离线卷上的文件直接判定为 OFFLINE，不再逐个检查。
+"""
+
+import os
+import stat
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterable, List
+
+try:
+    from .file_status_manager import FileStatus
+except ImportError:
+    from file_status_manager import FileStatus
+
+
+# 网络文件系统上单次元数据请求延迟高，多线程并发可以掩盖往返时间
+DEFAULT_MAX_WORKERS = 32
+
+
+class BatchStatusChecker:
+    """按目录分组、并行执行的批量文件状态检查器"""
+
+    def __init__(self, stat_only: bool = True, max_workers: int = DEFAULT_MAX_WORKERS,
+                 scandir_threshold: int = 2, volume_monitor=None):
+        """
+        初始化批量状态检查器
+
+        Args:
+            stat_only: True只判断存在性；False时额外读取1字节确认可读
+            max_workers: 并行处理目录的线程数
+            scandir_threshold: 同一目录下待检查文件数达到该值时改用一次scandir，否则逐个stat
+            volume_monitor: 卷监视器（VolumeMonitor），提供时离线卷上的文件判定为 OFFLINE
+        """
+        self.stat_only = stat_only
+        self.max_workers = max_workers
+        self.scandir_threshold = scandir_threshold
+        self.volume_monitor = volume_monitor
+
+    @staticmethod
+    def _stat_status(file_path: str) -> FileStatus:
+        """仅通过stat判断文件状态，不打开文件"""
+        try:
+            return FileStatus.PRESENT if stat.S_ISREG(os.stat(file_path).st_mode) else FileStatus.MISSING
+        except (OSError, ValueError):
+            return FileStatus.MISSING
+
+    @staticmethod
+    def _readable_status(file_path: str) -> FileStatus:
+        """打开文件读取1字节，确认文件可读"""
+        try:
+            with open(file_path, 'rb') as f:
+                f.read(1)
+            return FileStatus.PRESENT
+        except (OSError, ValueError):
+            return FileStatus.MISSING
+
+    def _check_directory(self, directory: str, file_paths: List[str]) -> Dict[str, FileStatus]:
+        """检查同一目录下的一组文件"""
+        results: Dict[str, FileStatus] = {}
+        if len(file_paths) >= self.scandir_threshold:
+            try:
+                with os.scandir(directory or '.') as entries:
+                    listed = {entry.name: entry for entry in entries}
+            except FileNotFoundError:
+                # 目录不存在（例如整个磁盘未挂载），其中的文件都已丢失
+                return {path: FileStatus.MISSING for path in file_paths}
+            except OSError:
+                listed = None
+
+            if listed is not None:
+                for path in file_paths:
+                    entry = listed.get(os.path.basename(path))
+                    try:
+                        present = entry is not None and entry.is_file()
+                    except OSError:
+                        present = False
+                    # 目录项未找到时再stat确认（大小写不敏感的文件系统上名称可能不完全一致）
+                    results[path] = FileStatus.PRESENT if present else self._stat_status(path)
+
+        for path in file_paths:
+            if path not in results:
+                results[path] = self._stat_status(path)
+
+        if not self.stat_only:
+            for path, status in results.items():
+                if status == FileStatus.PRESENT:
+                    results[path] = self._readable_status(path)
+        return results
+
+    def check(self, file_paths: Iterable[str]) -> Dict[str, FileStatus]:
+        """
+        批量检查文件状态
+
+        Args:
+            file_paths: 文件路径列表
+
+        Returns:
+            Dict[str, FileStatus]: 文件路径到状态的映射（PRESENT、MISSING，或离线卷上的 OFFLINE）
+        """
+        paths = list(dict.fromkeys(file_paths))
+        results: Dict[str, FileStatus] = {}
+        if self.volume_monitor is not None:
+            paths, offline = self.volume_monitor.partition(paths)
+            for offline_paths in offline.values():
+                results.update(dict.fromkeys(offline_paths, FileStatus.OFFLINE))
+
+        by_directory: Dict[str, List[str]] = {}
+        for path in paths:
+            by_directory.setdefault(os.path.dirname(path), []).append(path)
+        if not by_directory:
+            return results
+
+        groups = list(by_directory.items())
+        if len(groups) == 1 or self.max_workers <= 1:
+            for directory, directory_paths in groups:
+                results.update(self._check_directory(directory, directory_paths))
+            return results
+
+        with ThreadPoolExecutor(max_workers=min(self.max_workers, len(groups))) as executor:
+            for group_result in executor.map(lambda group: self._check_directory(*group), groups):
+                results.update(group_result)
+        return results
@@ -15,6 +15,7 @@ from pathlib import Path
 
 from .scanner import VideoFileScanner
 from .metadata import VideoMetadataExtractor
+from .code_recognizer import PrefixCodeRecognizer
 from .csv_writer import CSVWriter
 from .sqlite_storage import SQLiteStorage
 from .error_handler import (
@@ -233,6 +234,32 @@ def generate_directory_based_filename(directory_path, timestamp, prefix="temp_vi
     return f"{filename_base}_{timestamp}.csv"
 
 
+def build_code_recognizer(database_path):
+    """
+    数据库已存在时，用主列表中的已知前缀构建编码识别器
+
+    扫描与 --apply-path-updates 使用同一识别规则，同一文件名得到相同的 video_code 和指纹。
+
+    Args:
+        database_path: SQLite数据库路径
+
+    Returns:
+        Optional[PrefixCodeRecognizer]: 识别器；数据库不存在或无法读取时为None（使用默认正则规则）
+    """
+    if not database_path or not os.path.exists(database_path):
+        return None
+    try:
+        storage = SQLiteStorage(database_path)
+    except Exception:
+        return None
+    try:
+        return PrefixCodeRecognizer.from_storage(storage)
+    except Exception:
+        return None
+    finally:
+        storage.close()
+
+
 def scan_command(args):
     """扫描目录并根据输出格式生成文件"""
     global _error_handler
@@ -280,8 +307,11 @@ def scan_command(args):
                 output_file = str(Path(default_paths['csv_dir']) / temp_filename)
     
     print(f"正在扫描目录: {directory}")
-    print(f"输出格式: {output_format}")
-    print(f"输出文件: {output_file}")
+    if getattr(args, 'stage', False):
+        print(f"输出: 暂存表 ({args.database})")
+    else:
+        print(f"输出格式: {output_format}")
+        print(f"输出文件: {output_file}")
     
     if _error_handler.verbose:
         print(f"🔧 递归扫描: {'是' if args.recursive else '否'}")
@@ -297,7 +327,9 @@ def scan_command(args):
         # 初始化扫描器和元数据提取器
         set_current_operation("初始化扫描器")
         scanner = VideoFileScanner()
-        metadata_extractor = VideoMetadataExtractor()
+        metadata_extractor = VideoMetadataExtractor(
+            code_recognizer=build_code_recognizer(getattr(args, 'database', None))
+        )
         
         # 扫描视频文件
         set_current_operation("扫描视频文件")
@@ -394,6 +426,10 @@ def scan_command(args):
                 print(f"失败的文件数量: {len(failed_files)}")
             return 1
         
+        # 暂存模式：直接写入目标数据库的暂存表，不生成CSV
+        if getattr(args, 'stage', False):
+            return _stage_scan_results(args, directory, video_files, video_infos, failed_files)
+        
         # 根据输出格式写入文件
         set_current_operation("写入文件")
         if output_format == 'sqlite':
@@ -456,7 +492,7 @@ def scan_command(args):
             try:
                 # 写入CSV文件（临时文件或最终文件）
                 csv_writer = CSVWriter()
-                csv_writer.write_video_infos(video_infos, output_file)
+                csv_writer.write_video_infos(video_infos, output_file, scan_root=str(directory))
                 
                 print(f"\n✅ 扫描完成!")
                 print(f"📊 处理结果:")
@@ -487,6 +523,261 @@ def scan_command(args):
         return 1
 
 
+# 暂存审阅时各动作的显示标记和名称
+_STAGE_DIFF_MARKERS = {
+    'insert_new': ('+', '新增'),
+    'update_path': ('~', '路径/信息更新'),
+    'mark_replaced': ('⇄', '替换'),
+    'duplicate_detection': ('≈', '疑似重复'),
+    'mark_missing': ('-', '标记丢失'),
+}
+
+
+def _stage_scan_results(args, directory, video_files, video_infos, failed_files):
+    """将扫描结果直接写入目标数据库的暂存表（scan --stage）"""
+    if not _error_handler.validate_database_path(args.database, must_exist=False):
+        return 1
+    
+    try:
+        set_current_operation("写入暂存表")
+        storage = SQLiteStorage(args.database)
+        staged_count = storage.stage_video_infos(video_infos, str(directory))
+        total_staged = storage.get_staging_count()
+        storage.close()
+    except Exception as e:
+        _error_handler.handle_database_error(f"写入暂存表失败: {e}", args.database, "暂存扫描结果")
+        return 1
+    
+    print(f"\n✅ 扫描完成!")
+    print(f"📊 处理结果:")
+    print(f"  • 发现文件: {len(video_files)}")
+    print(f"  • 成功处理: {len(video_infos)}")
+    if failed_files:
+        print(f"  • 处理失败: {len(failed_files)}")
+    print(f"  • 写入暂存表: {staged_count} (暂存表共 {total_staged} 条)")
+    print(f"🗄️  目标数据库: {args.database}")
+    print(f"\n💡 下一步操作:")
+    print(f"  python -m tools.video_info_collector --review --database {args.database}")
+    print(f"  python -m tools.video_info_collector --commit-stage --database {args.database}")
+    return 0
+
+
+def _analyze_staged_scan(storage):
+    """
+    对暂存表中的扫描结果做合并分析
+    
+    Returns:
+        Tuple: (暂存视频列表, 扫描根目录, SmartMergeManager, 合并分析结果)
+    """
+    from .smart_merge_manager import SmartMergeManager
+    
+    staged_videos = storage.load_staged_videos()
+    scan_roots = storage.get_staged_scan_roots()
+    merge_manager = SmartMergeManager(storage)
+    merge_results = merge_manager.analyze_merge_candidates(
+        staged_videos, storage.get_all_video_infos(), scan_roots=scan_roots
+    )
+    return staged_videos, scan_roots, merge_manager, merge_results
+
+
+def review_stage_command(args):
+    """审阅暂存表中的扫描结果：显示摘要和将要发生的变更，不修改数据库"""
+    try:
+        setup_signal_handlers()
+        set_current_operation("审阅暂存扫描结果")
+        
+        if not os.path.exists(args.database):
+            print(f"❌ 错误: 数据库文件不存在: {args.database}")
+            return 1
+        
+        storage = SQLiteStorage(args.database)
+        if not storage.get_staging_count():
+            print("ℹ️  暂存表为空，请先运行 scan --stage")
+            storage.close()
+            return 0
+        
+        staged_videos, scan_roots, merge_manager, merge_results = _analyze_staged_scan(storage)
+        storage.close()
+        check_interruption()
+        
+        changed = sum(len(merge_results.get(action_type, [])) for action_type in _STAGE_DIFF_MARKERS
+                      if action_type != 'mark_missing')
+        print("📋 暂存扫描结果:")
+        print("=" * 50)
+        print(f"暂存记录数: {len(staged_videos)}")
+        for root in scan_roots:
+            print(f"扫描根目录: {root}")
+        print(f"\n变更摘要:")
+        for action_type, (marker, label) in _STAGE_DIFF_MARKERS.items():
+            print(f"  {marker} {label}: {len(merge_results.get(action_type, []))}")
+        print(f"  = 无变化: {len(staged_videos) - changed}")
+        
+        limit = args.review_limit
+        print(f"\n变更明细:")
+        for action_type, (marker, label) in _STAGE_DIFF_MARKERS.items():
+            actions = merge_results.get(action_type, [])
+            for action in actions[:limit]:
+                if action.target_info and action.target_info.file_path != action.video_info.file_path:
+                    print(f"  {marker} {action.target_info.file_path} -> {action.video_info.file_path}")
+                else:
+                    print(f"  {marker} {action.video_info.file_path}")
+            if len(actions) > limit:
+                print(f"  {marker} ... 还有 {len(actions) - limit} 条{label}")
+        
+        print(f"\n📝 确认无误后执行:")
+        print(f"  python -m tools.video_info_collector --commit-stage --database {args.database}")
+        return 0
+        
+    except KeyboardInterrupt:
+        print("\n🛑 审阅操作被用户中断")
+        return 130
+    except Exception as e:
+        _error_handler.handle_database_error(f"审阅暂存结果失败: {e}", args.database, "审阅暂存")
+        return 1
+
+
+def commit_stage_command(args):
+    """将暂存表中的扫描结果通过智能合并写入数据库，全部成功后清空暂存表"""
+    try:
+        setup_signal_handlers()
+        set_current_operation("提交暂存扫描结果")
+        
+        if not os.path.exists(args.database):
+            print(f"❌ 错误: 数据库文件不存在: {args.database}")
+            return 1
+        
+        storage = SQLiteStorage(args.database)
+        if not storage.get_staging_count():
+            print("ℹ️  暂存表为空，没有需要提交的扫描结果")
+            storage.close()
+            return 0
+        
+        from .smart_merge_manager import SmartMergeManager
+        
+        staged_videos, scan_roots, merge_manager, merge_results = _analyze_staged_scan(storage)
+        check_interruption()
+        
+        # 每个扫描根目录记录一条扫描历史，动作事件记到所属根目录下
+        set_current_operation("记录扫描历史")
+        history_by_root = {}
+        for root in scan_roots:
+            root_videos = [video for video in staged_videos
+                           if SmartMergeManager._is_under_roots(video.file_path, [root])]
+            history_by_root[root] = storage.add_scan_history(
+                scan_path=root,
+                files_found=len(root_videos),
+                files_processed=0
+            )
+        scan_ids = {}
+        for action_list in merge_results.values():
+            for action in action_list:
+                for root, history_id in history_by_root.items():
+                    if SmartMergeManager._is_under_roots(action.video_info.file_path, [root]):
+                        scan_ids[action.video_info.file_path] = history_id
+                        break
+        
+        set_current_operation("执行合并计划")
+        first_history_id = next(iter(history_by_root.values()), None)
+        merge_stats = merge_manager.execute_merge_plan(merge_results, first_history_id, scan_ids=scan_ids)
+        success_count = merge_stats['inserted'] + merge_stats['updated']
+        failed_paths = {failure['file_path'] for failure in merge_manager.merge_failures}
+        for root, history_id in history_by_root.items():
+            root_success = sum(
+                1 for action_type in ('insert_new', 'update_path')
+                for action in merge_results.get(action_type, [])
+                if scan_ids.get(action.video_info.file_path) == history_id
+                and action.video_info.file_path not in failed_paths
+            )
+            storage.update_csv_merge_history_processed_count(history_id, root_success)
+        
+        # 有动作失败时保留整个暂存表：修复后再次 --commit-stage 即可重试，无需重新扫描；
+        # 只保留失败的记录会让同一扫描根目录下已合并的文件在重试时被误判为丢失
+        if not merge_stats['errors'] and not merge_manager.merge_failures:
+            storage.clear_staging()
+        storage.close()
+        
+        print(f"\n✅ 暂存结果已提交!")
+        print(f"📊 处理结果:")
+        print(f"  • 暂存记录数: {len(staged_videos)}")
+        print(f"  • 成功导入: {success_count}")
+        if merge_stats['marked_replaced']:
+            print(f"  • 替换文件: {merge_stats['marked_replaced']}")
+        if merge_stats['marked_missing']:
+            print(f"  • 标记丢失: {merge_stats['marked_missing']}")
+        if merge_stats['errors']:
+            print(f"  • 错误: {merge_stats['errors']}（暂存表已保留，修复后可重新提交）")
+        print(f"📁 数据库文件: {args.database}")
+        
+        return 1 if merge_stats['errors'] else 0
+        
+    except KeyboardInterrupt:
+        print("\n🛑 提交操作被用户中断")
+        return 130
+    except Exception as e:
+        _error_handler.handle_database_error(f"提交暂存结果失败: {e}", args.database, "提交暂存")
+        return 1
+
+
+def resolve_merge_csv_files(csv_arg):
+    """
+    解析 --merge 参数为CSV文件列表
+    
+    Args:
+        csv_arg: 单个CSV文件、包含CSV文件的目录，或glob模式（如 "csv/temp_*.csv"）
+        
+    Returns:
+        List[str]: 按文件名排序的CSV文件列表（文件名含时间戳，排序即为扫描先后顺序）
+    """
+    import glob
+    
+    if os.path.isdir(csv_arg):
+        return sorted(glob.glob(os.path.join(csv_arg, '*.csv')))
+    if glob.has_magic(csv_arg):
+        return sorted(path for path in glob.glob(csv_arg) if os.path.isfile(path))
+    return [csv_arg]
+
+
+def _read_csv_for_merge(storage, csv_file, use_sql_engine=False):
+    """
+    一次读取CSV文件：同时得到内容指纹、记录数，以及待合并的数据
+    
+    Args:
+        storage: SQLite存储对象
+        csv_file: CSV文件路径
+        use_sql_engine: True时直接载入SQL合并引擎的暂存表，否则解析为VideoInfo列表
+        
+    Returns:
+        Dict: csv_fingerprint、total_records，以及 new_videos / scan_roots（Python引擎）
+              或 engine / staged_count（SQL引擎）
+    """
+    if use_sql_engine:
+        from .sql_merge_engine import SQLMergeEngine
+        from .csv_ingestor import CSVIngestor
+        
+        engine = SQLMergeEngine(storage)
+        ingestor = CSVIngestor(csv_file)
+        staged_count = engine.load_rows(ingestor.iter_rows())
+        return {
+            'csv_fingerprint': ingestor.content_hash,
+            'total_records': ingestor.row_count,
+            'new_videos': None,
+            'scan_roots': None,
+            'engine': engine,
+            'staged_count': staged_count
+        }
+    
+    ingest_result = storage.ingest_csv(csv_file)
+    return {
+        'csv_fingerprint': ingest_result.content_hash,
+        'total_records': ingest_result.row_count,
+        'new_videos': ingest_result.videos,
+        # CSV中记录的扫描根目录，没有记录时为None（检查全部现有记录）
+        'scan_roots': ingest_result.scan_roots or None,
+        'engine': None,
+        'staged_count': len(ingest_result.videos)
+    }
+
+
 def merge_command(args):
     """合并CSV文件到SQLite数据库"""
     global _error_handler
@@ -497,13 +788,23 @@ def merge_command(args):
     
     set_current_operation("合并CSV文件到数据库")
     
-    csv_file = args.csv_file
+    csv_files = resolve_merge_csv_files(args.csv_file)
+    if not csv_files:
+        print(f"❌ 错误: 未找到匹配的CSV文件: {args.csv_file}")
+        return 1
+    
+    # 验证数据库路径（合并操作允许数据库文件不存在，会自动创建）
+    if len(csv_files) > 1:
+        if not _error_handler.validate_database_path(args.database, must_exist=False):
+            return 1
+        return _merge_multiple_csv_files(args, csv_files)
+    
+    csv_file = csv_files[0]
     
     # 验证CSV文件
     if not _error_handler.validate_file_path(csv_file, "CSV文件", must_exist=True):
         return 1
     
-    # 验证数据库路径（合并操作允许数据库文件不存在，会自动创建）
     if not _error_handler.validate_database_path(args.database, must_exist=False):
         return 1
     
@@ -516,10 +817,13 @@ def merge_command(args):
         # 初始化存储
         storage = SQLiteStorage(args.database)
         
-        set_current_operation("生成CSV文件指纹")
-        # 生成CSV文件指纹
-        print("正在生成CSV文件指纹...")
-        csv_fingerprint = storage.get_csv_fingerprint(csv_file)
+        set_current_operation("读取CSV文件")
+        # 一次读取CSV：计算内容指纹、统计记录数并解析数据
+        print("正在读取CSV文件并生成内容指纹...")
+        use_sql_engine = getattr(args, 'merge_engine', 'python') == 'sql'
+        loaded = _read_csv_for_merge(storage, csv_file, use_sql_engine)
+        csv_fingerprint = loaded['csv_fingerprint']
+        total_records = loaded['total_records']
         print(f"CSV文件指纹: {csv_fingerprint[:16]}...")
         check_interruption()
         
@@ -549,13 +853,6 @@ def merge_command(args):
         print(f"推断的原始扫描路径: {scan_info['original_scan_path']}")
         print(f"扫描时间戳: {scan_info['timestamp']}")
         
-        # 统计CSV文件中的记录数
-        import csv as csv_module
-        with open(csv_file, 'r', encoding='utf-8') as f:
-            csv_reader = csv_module.reader(f)
-            next(csv_reader)  # 跳过标题行
-            total_records = sum(1 for _ in csv_reader)
-        
         print(f"CSV文件包含 {total_records} 条记录")
         check_interruption()
         
@@ -563,11 +860,14 @@ def merge_command(args):
         set_current_operation("智能合并CSV数据")
         print("开始智能合并数据...")
         
+        if use_sql_engine:
+            return _merge_with_sql_engine(args, storage, loaded['engine'], loaded['staged_count'],
+                                          csv_file, csv_fingerprint, scan_info, total_records)
+        
         # 导入SmartMergeManager
         from .smart_merge_manager import SmartMergeManager
         
-        # 从CSV文件加载视频信息
-        new_videos = storage.load_videos_from_csv(args.csv_file)
+        new_videos = loaded['new_videos']
         if not new_videos:
             print("❌ CSV文件中没有有效的视频数据")
             storage.close()
@@ -580,7 +880,9 @@ def merge_command(args):
         merge_manager = SmartMergeManager(storage)
         
         # 分析合并候选项
-        merge_results = merge_manager.analyze_merge_candidates(new_videos, existing_videos)
+        merge_results = merge_manager.analyze_merge_candidates(
+            new_videos, existing_videos, scan_roots=loaded['scan_roots']
+        )
         
         # 记录合并历史（创建scan记录）
         set_current_operation("记录合并历史")
@@ -610,15 +912,16 @@ def merge_command(args):
                 for action in action_list:
                     processed_videos.add(action.video_info.file_path)
             
-            for new_video in new_videos:
-                if new_video.file_path not in processed_videos:
-                    # 这是一个被跳过的重复视频，记录merge事件
-                    storage.add_merge_event(
-                        'skip_duplicate',
-                        None, 
-                        new_video.file_path,
-                        history_id
-                    )
+            with storage.transaction():
+                for new_video in new_videos:
+                    if new_video.file_path not in processed_videos:
+                        # 这是一个被跳过的重复视频，记录merge事件
+                        storage.add_merge_event(
+                            'skip_duplicate',
+                            video_code=new_video.video_code,
+                            new_path=new_video.file_path,
+                            scan_session_id=history_id
+                        )
         
         # 更新合并历史记录的处理数量
         storage.update_csv_merge_history_processed_count(history_id, success_count)
@@ -646,15 +949,265 @@ def merge_command(args):
         return 1
 
 
+def _merge_multiple_csv_files(args, csv_files):
+    """
+    将多个CSV文件作为一个合并计划导入数据库
+    
+    跨CSV按文件路径去重（后扫描的记录优先），数据库现有记录只加载一次，
+    所有动作在同一个合并计划中执行；每个CSV仍各自写入一条合并历史记录。
+    
+    Args:
+        args: 命令行参数
+        csv_files: 按扫描先后排序的CSV文件列表
+        
+    Returns:
+        int: 退出码
+    """
+    print(f"📁 正在批量合并 {len(csv_files)} 个临时文件")
+    print(f"🗄️  目标数据库: {args.database}")
+    print(f"🔄 重复策略: {args.duplicate_strategy}")
+    
+    try:
+        set_current_operation("连接数据库")
+        storage = SQLiteStorage(args.database)
+        
+        for csv_file in csv_files:
+            if not _error_handler.validate_file_path(csv_file, "CSV文件", must_exist=True):
+                storage.close()
+                return 1
+        
+        if getattr(args, 'merge_engine', 'python') == 'sql':
+            # SQL引擎本身按暂存表批量处理，逐个CSV合并即可
+            storage.close()
+            exit_code = 0
+            for csv_file in csv_files:
+                print(f"\n📄 {csv_file}")
+                file_storage = SQLiteStorage(args.database)
+                loaded = _read_csv_for_merge(file_storage, csv_file, use_sql_engine=True)
+                if (file_storage.check_csv_already_merged(loaded['csv_fingerprint'])
+                        and not getattr(args, 'force', False)):
+                    print(f"⚠️  跳过已合并的CSV文件: {csv_file} (使用 --force 强制重新合并)")
+                    file_storage.close()
+                    continue
+                scan_info = file_storage.extract_scan_info_from_csv_filename(csv_file)
+                exit_code = max(exit_code, _merge_with_sql_engine(
+                    args, file_storage, loaded['engine'], loaded['staged_count'],
+                    csv_file, loaded['csv_fingerprint'], scan_info, loaded['total_records']
+                ))
+                check_interruption()
+            return exit_code
+        
+        from .smart_merge_manager import SmartMergeManager
+        
+        # 每个CSV只读取一次；跳过已合并过的文件，按路径去重：同一路径以后扫描的CSV为准
+        set_current_operation("分析CSV文件")
+        sources = []
+        videos_by_path = {}
+        owner_by_path = {}
+        for csv_file in csv_files:
+            loaded = _read_csv_for_merge(storage, csv_file)
+            if storage.check_csv_already_merged(loaded['csv_fingerprint']) and not getattr(args, 'force', False):
+                print(f"⚠️  跳过已合并的CSV文件: {csv_file} (使用 --force 强制重新合并)")
+                continue
+            videos = loaded['new_videos']
+            index = len(sources)
+            sources.append({
+                'csv_file': csv_file,
+                'csv_fingerprint': loaded['csv_fingerprint'],
+                'scan_info': storage.extract_scan_info_from_csv_filename(csv_file),
+                'total_records': loaded['total_records'],
+                'roots': loaded['scan_roots'],
+                'history_id': None
+            })
+            for video in videos:
+                videos_by_path[video.file_path] = video
+                owner_by_path[video.file_path] = index
+            print(f"  • {csv_file}: {loaded['total_records']} 条记录")
+            check_interruption()
+        
+        if not sources:
+            print("没有需要合并的CSV文件")
+            storage.close()
+            return 0
+        
+        new_videos = list(videos_by_path.values())
+        if not new_videos:
+            print("❌ CSV文件中没有有效的视频数据")
+            storage.close()
+            return 1
+        total_records = sum(source['total_records'] for source in sources)
+        print(f"共 {total_records} 条记录，跨文件去重后 {len(new_videos)} 条")
+        
+        # 数据库现有记录只加载一次，整体生成一个合并计划
+        set_current_operation("智能合并CSV数据")
+        print("开始智能合并数据...")
+        existing_videos = storage.get_all_video_infos()
+        merge_manager = SmartMergeManager(storage)
+        # 任一CSV没有记录扫描根目录时，丢失文件检测覆盖全部现有记录
+        if all(source['roots'] for source in sources):
+            scan_roots = sorted({root for source in sources for root in source['roots']})
+        else:
+            scan_roots = None
+        merge_results = merge_manager.analyze_merge_candidates(
+            new_videos, existing_videos, scan_roots=scan_roots
+        )
+        
+        set_current_operation("记录合并历史")
+        for source in sources:
+            source['history_id'] = storage.add_csv_merge_history(
+                csv_file_path=source['csv_file'],
+                files_found=source['total_records'],
+                files_processed=0,
+                csv_fingerprint=source['csv_fingerprint'],
+                original_scan_path=source['scan_info']['original_scan_path'],
+                tags=None,
+                logical_path=source['scan_info']['original_scan_path']
+            )
+        
+        # 每个动作记到来源CSV的合并历史下；丢失文件记到覆盖其路径的CSV
+        scan_ids = {path: sources[index]['history_id'] for path, index in owner_by_path.items()}
+        for action in merge_results.get('mark_missing', []):
+            for source in sources:
+                if source['roots'] and SmartMergeManager._is_under_roots(action.video_info.file_path,
+                                                                         source['roots']):
+                    scan_ids[action.video_info.file_path] = source['history_id']
+                    break
+        
+        set_current_operation("执行合并计划")
+        merge_stats = merge_manager.execute_merge_plan(
+            merge_results, sources[0]['history_id'], scan_ids=scan_ids
+        )
+        success_count = merge_stats['inserted'] + merge_stats['updated']
+        
+        # 按来源CSV统计成功数，并为跳过的重复视频记录merge事件
+        processed_videos = set()
+        for action_list in merge_results.values():
+            for action in action_list:
+                processed_videos.add(action.video_info.file_path)
+        failed_paths = {failure['file_path'] for failure in merge_manager.merge_failures}
+        processed_counts = [0] * len(sources)
+        for action_type in ('insert_new', 'update_path'):
+            for action in merge_results.get(action_type, []):
+                if action.video_info.file_path not in failed_paths:
+                    processed_counts[owner_by_path[action.video_info.file_path]] += 1
+        with storage.transaction():
+            for new_video in new_videos:
+                if new_video.file_path not in processed_videos:
+                    storage.add_merge_event('skip_duplicate', video_code=new_video.video_code,
+                                            new_path=new_video.file_path,
+                                            scan_session_id=scan_ids[new_video.file_path])
+            for source, processed_count in zip(sources, processed_counts):
+                storage.update_csv_merge_history_processed_count(source['history_id'], processed_count)
+        
+        check_interruption()
+        storage.close()
+        
+        print(f"\n✅ 批量合并完成!")
+        print(f"📊 处理结果:")
+        print(f"  • CSV文件数: {len(sources)}")
+        print(f"  • CSV记录数: {total_records}")
+        print(f"  • 成功导入: {success_count}")
+        if success_count < total_records:
+            print(f"  • 跳过记录: {total_records - success_count} (可能是重复记录)")
+        print(f"📁 数据库文件: {args.database}")
+        print(f"📝 合并历史记录ID: {', '.join(str(source['history_id']) for source in sources)}")
+        
+        return 0
+        
+    except KeyboardInterrupt:
+        print("\n🛑 合并操作被用户中断")
+        return 130
+    except Exception as e:
+        _error_handler.handle_database_error(f"批量合并操作失败: {e}", args.database, "导入CSV")
+        return 1
+
+
+def _merge_with_sql_engine(args, storage, engine, staged_count, csv_file, csv_fingerprint,
+                           scan_info, total_records):
+    """使用基于暂存表的SQL合并引擎执行合并（CSV已由 _read_csv_for_merge 载入暂存表）"""
+    from .sql_merge_engine import ACTION_DUPLICATE
+    
+    if not staged_count:
+        print("❌ CSV文件中没有有效的视频数据")
+        storage.close()
+        return 1
+    check_interruption()
+    
+    set_current_operation("分类合并候选项")
+    action_counts = engine.classify()
+    print(f"分类结果: 新增 {action_counts['insert_new']}, 路径更新 {action_counts['update_path']}, "
+          f"替换 {action_counts['mark_replaced']}, 疑似重复 {action_counts['duplicate_detection']}, "
+          f"无变化 {action_counts['unchanged']}")
+    
+    set_current_operation("记录合并历史")
+    history_id = storage.add_csv_merge_history(
+        csv_file_path=csv_file,
+        files_found=total_records,
+        files_processed=0,
+        csv_fingerprint=csv_fingerprint,
+        original_scan_path=scan_info['original_scan_path'],
+        tags=None,
+        logical_path=scan_info['original_scan_path']
+    )
+    
+    set_current_operation("执行合并计划")
+    merge_stats = engine.apply(history_id)
+    for duplicate in engine.get_actions(ACTION_DUPLICATE):
+        print(f"Duplicate detected: {duplicate['file_path']} vs {duplicate['target_path']}")
+    engine.drop_staging()
+    
+    success_count = merge_stats['inserted'] + merge_stats['updated']
+    storage.update_csv_merge_history_processed_count(history_id, success_count)
+    check_interruption()
+    storage.close()
+    
+    print(f"\n✅ 合并完成!")
+    print(f"📊 处理结果:")
+    print(f"  • CSV记录数: {total_records}")
+    print(f"  • 成功导入: {success_count}")
+    if merge_stats['marked_replaced']:
+        print(f"  • 替换文件: {merge_stats['marked_replaced']}")
+    if success_count < total_records:
+        print(f"  • 跳过记录: {total_records - success_count} (可能是重复记录)")
+    if merge_stats['errors']:
+        print(f"  • 错误: {merge_stats['errors']}")
+    print(f"📁 数据库文件: {args.database}")
+    print(f"📝 合并历史记录ID: {history_id}")
+    
+    return 1 if merge_stats['errors'] else 0
+
+
+def get_export_options(args):
+    """从命令行参数中收集导出选项（压缩与过滤条件），未设置的选项不传递"""
+    options = {}
+    if getattr(args, 'compress', False):
+        options['compress'] = True
+    if getattr(args, 'filter_file_status', None):
+        options['file_status'] = args.filter_file_status
+    if getattr(args, 'filter_tag', None):
+        options['tag'] = args.filter_tag
+    if getattr(args, 'filter_logical_path', None):
+        options['logical_path'] = args.filter_logical_path
+    return options
+
+
+def print_export_stats(export_stats):
+    """打印导出统计信息"""
+    print(f"  • 导出记录数: {export_stats.rows}")
+    print(f"  • 耗时: {export_stats.elapsed_seconds:.2f} 秒")
+    print(f"  • 导出速率: {export_stats.rows_per_second:.0f} 行/秒")
+
+
 def export_command(args):
-    """从SQLite数据库导出到CSV"""
+    """从SQLite数据库流式导出到CSV或JSON Lines"""
     global _error_handler
     
     # 确保错误处理器已初始化
     if _error_handler is None:
         _error_handler = create_error_handler()
     
-    set_current_operation("导出数据库到CSV")
+    export_format = getattr(args, 'format', 'csv')
+    set_current_operation(f"导出数据库到{export_format.upper()}")
     
     # 验证数据库路径（导出操作需要数据库文件存在）
     if not _error_handler.validate_database_path(args.database, must_exist=True):
@@ -664,11 +1217,15 @@ def export_command(args):
     if not args.output:
         default_paths = get_default_paths()
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        output_filename = f"exported_videos_{timestamp}.csv"
+        extension = 'jsonl' if export_format == 'json' else 'csv'
+        output_filename = f"exported_videos_{timestamp}.{extension}"
         args.output = str(Path(default_paths['csv_dir']) / output_filename)
     
+    export_options = get_export_options(args)
+    
     print(f"🗄️  数据库文件: {args.database}")
     print(f"📁 输出文件: {args.output}")
+    print(f"📋 导出格式: {'JSON Lines' if export_format == 'json' else 'CSV'}")
     
     try:
         set_current_operation("连接数据库")
@@ -678,22 +1235,21 @@ def export_command(args):
             return 1
         storage = SQLiteStorage(args.database)
         
-        set_current_operation("导出CSV文件")
-        # 使用SQLiteStorage的export_to_csv方法
-        success = storage.export_to_csv(args.output)
+        set_current_operation("流式导出")
+        if export_format == 'json':
+            export_stats = storage.export_to_jsonl(args.output, **export_options)
+        else:
+            export_stats = storage.export_to_csv(args.output, **export_options)
         check_interruption()
+        storage.close()
         
-        if success:
-            # 获取记录数量
-            total_count = storage.get_total_count()
-            storage.close()
+        if export_stats:
             print(f"\n✅ 导出完成!")
             print(f"📊 处理结果:")
-            print(f"  • 导出记录数: {total_count}")
+            print_export_stats(export_stats)
             print(f"📁 输出文件: {args.output}")
             return 0
         else:
-            storage.close()
             print("\n❌ 导出失败")
             return 1
         
@@ -701,7 +1257,7 @@ def export_command(args):
         print("\n🛑 导出操作被用户中断")
         return 130
     except Exception as e:
-        _error_handler.handle_database_error(f"导出操作失败: {e}", args.database, "导出CSV")
+        _error_handler.handle_database_error(f"导出操作失败: {e}", args.database, "导出")
         return 1
 
 
@@ -726,6 +1282,8 @@ def export_simple_command(args):
         output_filename = f"simple_export_{timestamp}.txt"
         args.output = str(Path(default_paths['csv_dir']) / output_filename)
     
+    export_options = get_export_options(args)
+    
     print(f"🗄️  数据库文件: {args.database}")
     print(f"📁 输出文件: {args.output}")
     print("📋 输出格式: filename filesize logical_path")
@@ -739,21 +1297,17 @@ def export_simple_command(args):
         storage = SQLiteStorage(args.database)
         
         set_current_operation("导出简化信息")
-        # 使用SQLiteStorage的export_simple_format方法
-        success = storage.export_simple_format(args.output)
+        export_stats = storage.export_simple_format(args.output, **export_options)
         check_interruption()
+        storage.close()
         
-        if success:
-            # 获取记录数量
-            total_count = storage.get_total_count()
-            storage.close()
+        if export_stats:
             print(f"\n✅ 简化导出完成!")
             print(f"📊 处理结果:")
-            print(f"  • 导出记录数: {total_count}")
+            print_export_stats(export_stats)
             print(f"📁 输出文件: {args.output}")
             return 0
         else:
-            storage.close()
             print("\n❌ 简化导出失败")
             return 1
         
@@ -819,6 +1373,10 @@ def search_video_code_command(args):
         
         for result in results:
             video_code = result['video_code']
+            # 数据库中的写法与规范编码不同时一并显示，便于确认是按别名匹配到的
+            canonical_code = result.get('canonical_code')
+            if canonical_code and canonical_code != video_code:
+                video_code = f"{video_code} ({canonical_code})"
             file_size = format_file_size(result['file_size']) if result['file_size'] else 'N/A'
             logical_path = result['logical_path'] or 'N/A'
             
@@ -908,7 +1466,8 @@ def init_db_command(args):
                 'video_tags': '视频标签表',
                 'scan_history': '扫描历史表',
                 'video_master_list': '视频主列表表',
-                'merge_history': '合并历史表'
+                'merge_history': '合并历史表',
+                'video_code_aliases': '编码别名表'
             }
             description = table_descriptions.get(table_name, table_name)
             print(f"  {status} {table_name} - {description}")
@@ -1026,6 +1585,200 @@ def stats_command(args):
         return 1
 
 
+def reconcile_status_command(args):
+    """对账数据库中记录的文件状态与磁盘实际状态，并批量写回差异"""
+    try:
+        setup_signal_handlers()
+        set_current_operation("文件状态对账")
+        
+        if not os.path.exists(args.database):
+            print(f"❌ 错误: 数据库文件不存在: {args.database}")
+            return 1
+        
+        from .status_reconciler import StatusReconciler
+        
+        storage = SQLiteStorage(args.database)
+        reconciler = StatusReconciler(storage)
+        result = reconciler.reconcile(apply=not args.dry_run, path_prefix=args.path_prefix)
+        storage.close()
+        check_interruption()
+        
+        print("🔄 文件状态对账结果:")
+        print("=" * 50)
+        print(f"检查记录数: {result.checked}")
+        print(f"状态不一致: {result.inconsistencies_found}")
+        for item in result.inconsistencies[:args.review_limit]:
+            print(f"  • {item['file_path']}: {item['recorded_status']} -> {item['actual_status']}")
+        if result.inconsistencies_found > args.review_limit:
+            print(f"  ... 还有 {result.inconsistencies_found - args.review_limit} 条")
+        offline_count = sum(1 for item in result.inconsistencies if item['actual_status'] == 'offline')
+        if offline_count:
+            print(f"💤 所在卷离线: {offline_count} 条记录（未逐个检查文件）")
+        
+        if args.dry_run:
+            print("\n🔍 预览模式 - 未写入数据库")
+        else:
+            print(f"\n✅ 已更新: {result.fixed}")
+        
+        return 0
+        
+    except KeyboardInterrupt:
+        print("\n🛑 状态对账被用户中断")
+        return 130
+    except Exception as e:
+        _error_handler.handle_database_error(f"文件状态对账失败: {e}", args.database, "状态对账")
+        return 1
+
+
+def near_duplicates_command(args):
+    """全库近似重复检测命令（不依赖video_code，按时长/大小/分辨率比较）"""
+    try:
+        setup_signal_handlers()
+        set_current_operation("近似重复检测")
+        
+        db_path = args.database
+        if not os.path.exists(db_path):
+            print(f"❌ 错误: 数据库文件不存在: {db_path}")
+            print("💡 提示: 请先运行扫描命令生成数据，或使用 --init-db 初始化数据库")
+            return 1
+        
+        from .near_duplicate_detector import NearDuplicateDetector
+        
+        storage = SQLiteStorage(db_path)
+        detector = NearDuplicateDetector(
+            storage,
+            threshold=args.similarity_threshold,
+            duration_tolerance=args.duration_tolerance
+        )
+        clusters = detector.find_clusters()
+        storage.close()
+        check_interruption()
+        
+        print("🔍 近似重复检测结果:")
+        print("=" * 50)
+        if not clusters:
+            print("未发现近似重复文件")
+            return 0
+        
+        for index, cluster in enumerate(clusters, 1):
+            print(f"\n[{index}] {cluster.size} 个文件 (最高相似度: {cluster.max_similarity:.3f})")
+            for file_path, video_code in zip(cluster.file_paths, cluster.video_codes):
+                print(f"  • {file_path}  [{video_code or '无video_code'}]")
+        print(f"\n共 {len(clusters)} 组近似重复文件")
+        
+        return 0
+        
+    except KeyboardInterrupt:
+        print("\n🛑 近似重复检测被用户中断")
+        return 130
+    except Exception as e:
+        _error_handler.handle_database_error(f"近似重复检测失败: {e}", args.database, "近似重复检测")
+        return 1
+
+
+def background_verify_command(args):
+    """后台分批验证命令：按游标续跑，受时间/读取量预算限制并限速读取"""
+    try:
+        setup_signal_handlers()
+        set_current_operation("后台验证")
+        
+        if not os.path.exists(args.database):
+            print(f"❌ 错误: 数据库文件不存在: {args.database}")
+            return 1
+        
+        from .background_verifier import BackgroundVerifier, STOP_COMPLETE
+        
+        storage = SQLiteStorage(args.database)
+        verifier = BackgroundVerifier(
+            storage,
+            mode=args.verify_mode,
+            throttle_mb_per_sec=args.throttle,
+            time_budget=args.time_budget,
+            io_budget_mb=args.io_budget,
+            reverify_days=args.reverify_days
+        )
+        result = verifier.run()
+        summary = storage.get_verification_summary()
+        storage.close()
+        check_interruption()
+        
+        print(f"🩺 后台验证结果 ({args.verify_mode}):")
+        print("=" * 50)
+        print(f"本次验证: {result.verified} 条，读取 {result.bytes_read / 1024 / 1024:.1f} MB，耗时 {result.elapsed:.1f} 秒")
+        for outcome, count in sorted(result.results.items()):
+            print(f"  • {outcome}: {count}")
+        if result.skipped_offline:
+            print(f"💤 所在卷离线跳过: {result.skipped_offline}")
+        for problem in result.problems[:args.review_limit]:
+            detail = f" ({problem['detail']})" if problem['detail'] else ""
+            print(f"  ⚠️  {problem['file_path']}: {problem['result']}{detail}")
+        if len(result.problems) > args.review_limit:
+            print(f"  ... 还有 {len(result.problems) - args.review_limit} 条")
+        
+        if result.stop_reason != STOP_COMPLETE:
+            print(f"\n⏸️  预算已用完 ({result.stop_reason})，下次运行从 id > {result.last_video_id} 继续")
+        elif result.cycles_completed:
+            print("\n✅ 已完成一轮完整验证")
+        print(f"尚未验证的记录: {summary['never_verified']}")
+        if summary['oldest_verified_time']:
+            print(f"最早的验证时间: {summary['oldest_verified_time']}")
+        
+        return 0
+        
+    except KeyboardInterrupt:
+        print("\n🛑 后台验证被用户中断（已验证的批次和游标已保存）")
+        return 130
+    except Exception as e:
+        _error_handler.handle_database_error(f"后台验证失败: {e}", args.database, "后台验证")
+        return 1
+
+
+def apply_path_updates_command(args):
+    """应用 filename_formatter --emit-path-updates 生成的路径更新事件（不重新扫描、不调用ffprobe）"""
+    try:
+        setup_signal_handlers()
+        set_current_operation("应用路径更新")
+        
+        if not os.path.exists(args.database):
+            print(f"❌ 错误: 数据库文件不存在: {args.database}")
+            return 1
+        if not os.path.exists(args.path_updates_file):
+            print(f"❌ 错误: 路径更新文件不存在: {args.path_updates_file}")
+            return 1
+        
+        from .path_updates import PathUpdateApplier
+        
+        storage = SQLiteStorage(args.database)
+        session_id = f"path_updates_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
+        result = PathUpdateApplier(storage).apply_file(args.path_updates_file, dry_run=args.dry_run,
+                                                        scan_session_id=session_id)
+        storage.close()
+        check_interruption()
+        
+        print("📁 路径更新结果:")
+        print("=" * 50)
+        print(f"重命名事件（合并后）: {result.requested}")
+        print(f"{'将更新' if args.dry_run else '已更新'}: {result.updated}")
+        print(f"数据库中无记录: {result.not_found}")
+        if result.code_changes:
+            print(f"video_code 随文件名变化: {result.code_changes}")
+        if result.conflicts:
+            print(f"⚠️  新路径已被其他记录占用，跳过: {len(result.conflicts)}")
+            for old_path, new_path in result.conflicts[:args.review_limit]:
+                print(f"  • {old_path} -> {new_path}")
+        
+        if args.dry_run:
+            print("\n💡 这只是预览！要实际更新数据库，请移除 --dry-run 参数")
+        return 0
+        
+    except KeyboardInterrupt:
+        print("\n🛑 应用路径更新被用户中断（数据库未修改）")
+        return 130
+    except Exception as e:
+        _error_handler.handle_database_error(f"应用路径更新失败: {e}", args.database, "应用路径更新")
+        return 1
+
+
 def create_parser():
     """创建命令行参数解析器"""
     # 获取默认路径配置
@@ -1053,9 +1806,19 @@ def create_parser():
   # 合并临时文件到数据库
   python -m tools.video_info_collector --merge output/video_info_collector/csv/temp_video_info_20240120_154500.csv
   
+  # 使用SQL合并引擎（合并耗时只与CSV规模相关）
+  python -m tools.video_info_collector --merge output/video_info_collector/csv/temp_video_info_20240120_154500.csv --merge-engine sql
+  
+  # 批量合并目录下（或glob匹配）的所有CSV文件，只加载一次数据库
+  python -m tools.video_info_collector --merge output/video_info_collector/csv/
+  python -m tools.video_info_collector --merge "output/video_info_collector/csv/temp_*.csv"
+  
   # 从数据库导出
   python -m tools.video_info_collector --export output/video_info_collector/database/video_database.db --output output/video_info_collector/csv/exported_data.csv
   
+  # 流式导出为JSON Lines并gzip压缩，只导出present状态的记录
+  python -m tools.video_info_collector --export output/video_info_collector/database/video_database.db --output videos.jsonl.gz --format json --filter-file-status present
+  
   # 从数据库简化导出（仅包含filename、filesize、logical_path）
   python -m tools.video_info_collector --export-simple output/video_info_collector/database/video_database.db --output simple_export.txt
   
@@ -1070,6 +1833,24 @@ def create_parser():
   python -m tools.video_info_collector --stats --group-by resolution  # 按分辨率分组统计
   python -m tools.video_info_collector --stats --group-by duration  # 按时长分组统计
   
+  # 对账文件状态（先用 --dry-run 预览）
+  python -m tools.video_info_collector --reconcile-status --path-prefix /Volumes/disk_a/ --dry-run
+  
+  # 全库近似重复检测（找出以不同编号保存的重新编码版本）
+  python -m tools.video_info_collector --find-near-duplicates --similarity-threshold 0.97
+  
+  # 后台分批验证（每次最多运行1小时、限速20MB/s，下次运行从上次停止处继续）
+  python -m tools.video_info_collector --background-verify --verify-mode read --time-budget 3600 --throttle 20
+  
+  # 应用 filename_formatter 的重命名结果（只更新数据库路径，不重新扫描）
+  python -m tools.filename_formatter /path/to/videos --emit-path-updates renames.jsonl
+  python -m tools.video_info_collector --apply-path-updates renames.jsonl --dry-run
+  
+  # 扫描结果直接写入数据库暂存表，审阅后提交（不经过CSV）
+  python -m tools.video_info_collector /path/to/videos --stage
+  python -m tools.video_info_collector --review
+  python -m tools.video_info_collector --commit-stage
+  
   # 初始化/重置数据库
   python -m tools.video_info_collector --init-db
   python -m tools.video_info_collector --init-db --database /path/to/custom.db
@@ -1089,7 +1870,7 @@ def create_parser():
     
     # 合并操作
     group.add_argument('--merge', dest='csv_file', metavar='CSV_FILE',
-                      help='合并临时CSV文件到数据库')
+                      help='合并临时CSV文件到数据库（可为单个文件、目录或glob模式，多个文件作为一个合并计划执行）')
     
     # 导出操作
     group.add_argument('--export', dest='export_db', metavar='DATABASE',
@@ -1105,12 +1886,36 @@ def create_parser():
     
     # 视频code查询操作
     group.add_argument('--search-video-code', dest='search_video_codes', metavar='VIDEO_CODES',
-                      help='根据视频code查询（支持多个video_code，用空格或逗号分隔）')
+                      help='根据视频code查询（支持多个video_code，用空格或逗号分隔；不区分写法，'
+                           '如 abc123、ABC_123、abc-00123 均匹配 ABC-123）')
     
     # 数据统计操作
     group.add_argument('--stats', action='store_true',
                       help='显示数据库统计信息')
     
+    # 暂存审阅与提交操作
+    group.add_argument('--review', action='store_true',
+                      help='审阅 scan --stage 写入暂存表的扫描结果（只显示摘要和变更，不修改数据库）')
+    group.add_argument('--commit-stage', action='store_true',
+                      help='将暂存表中的扫描结果通过智能合并写入数据库')
+    
+    # 文件状态对账操作
+    group.add_argument('--reconcile-status', action='store_true',
+                      help='对账数据库中的文件状态（present/missing/offline）与磁盘实际状态，并批量写回差异（配合 --dry-run 只报告）')
+    
+    # 近似重复检测操作
+    group.add_argument('--find-near-duplicates', action='store_true',
+                      help='全库检测近似重复文件（不依赖video_code，按时长、大小、分辨率比较）')
+    
+    # 后台验证操作
+    group.add_argument('--background-verify', action='store_true',
+                      help='按id游标分批验证文件，受时间/读取量预算限制，下次运行从上次停止处继续')
+    
+    # 路径更新操作
+    group.add_argument('--apply-path-updates', dest='path_updates_file', metavar='EVENTS_FILE',
+                      help='应用 filename_formatter --emit-path-updates 生成的路径更新事件（也可直接使用操作日志），'
+                           '批量更新数据库中的路径、文件名、video_code和指纹，不重新扫描')
+    
     # 扫描目录（位置参数）
     parser.add_argument('directory', nargs='?',
                        help='要扫描的目录路径')
@@ -1141,17 +1946,51 @@ def create_parser():
                        choices=['skip', 'update', 'append'], 
                        default='skip',
                        help='重复项处理策略 (默认: skip)')
+    parser.add_argument('--stage', action='store_true',
+                       help='扫描结果直接写入目标数据库的暂存表（不生成CSV），之后用 --review / --commit-stage 审阅和提交')
+    parser.add_argument('--review-limit', type=int, default=20,
+                       help='审阅/对账时每类变更最多显示的明细条数 (默认: 20)')
+    parser.add_argument('--path-prefix',
+                       help='状态对账时只处理该文件路径前缀下的记录')
     parser.add_argument('--force', action='store_true',
                        help='强制重新合并已经合并过的CSV文件')
+    parser.add_argument('--merge-engine', choices=['python', 'sql'], default='python',
+                       help='合并引擎：python（逐条分析）/sql（暂存表+集合SQL，适合大数据库）(默认: python)')
     
     # 导出参数
     parser.add_argument('--format', choices=['csv', 'json'], default='csv',
-                       help='导出格式 (默认: csv)')
+                       help='导出格式：csv/json（JSON Lines，每行一条记录）(默认: csv)')
+    parser.add_argument('--compress', action='store_true',
+                       help='gzip压缩导出文件（输出路径以 .gz 结尾时自动启用）')
+    parser.add_argument('--filter-file-status', choices=['present', 'missing', 'ignore', 'replaced', 'offline'],
+                       help='导出时按文件状态过滤')
+    parser.add_argument('--filter-tag',
+                       help='导出时按标签过滤（精确匹配）')
+    parser.add_argument('--filter-logical-path',
+                       help='导出时按逻辑路径过滤（包含子路径）')
     
     # 统计参数
     parser.add_argument('--group-by', choices=['tags', 'resolution', 'duration'], 
                        help='分组统计维度：tags(标签)、resolution(分辨率)、duration(时长)')
     
+    # 近似重复检测参数
+    parser.add_argument('--similarity-threshold', type=float, default=0.98,
+                       help='近似重复的相似度阈值，0-1 (默认: 0.98)')
+    parser.add_argument('--duration-tolerance', type=float, default=0.5,
+                       help='近似重复的时长差容忍度，单位秒 (默认: 0.5)')
+    
+    # 后台验证参数
+    parser.add_argument('--verify-mode', choices=['header', 'probe', 'read'], default='header',
+                       help='后台验证方式：header(容器签名和大小)/probe(重新探测时长和大小)/read(完整读取并校验内容哈希) (默认: header)')
+    parser.add_argument('--time-budget', type=float,
+                       help='后台验证本次运行的时间预算，单位秒')
+    parser.add_argument('--io-budget', type=float,
+                       help='后台验证本次运行的读取量预算，单位MB')
+    parser.add_argument('--throttle', type=float,
+                       help='后台验证的读取限速，单位MB/s')
+    parser.add_argument('--reverify-days', type=float, default=7.0,
+                       help='最近多少天内验证过的文件不再重复验证 (默认: 7)')
+    
     return parser
 
 
@@ -1192,6 +2031,24 @@ def cli_main(argv=None):
     elif args.stats:
         # 数据统计操作
         return stats_command(args)
+    elif args.review:
+        # 审阅暂存扫描结果
+        return review_stage_command(args)
+    elif args.commit_stage:
+        # 提交暂存扫描结果
+        return commit_stage_command(args)
+    elif args.reconcile_status:
+        # 文件状态对账操作
+        return reconcile_status_command(args)
+    elif args.find_near_duplicates:
+        # 近似重复检测操作
+        return near_duplicates_command(args)
+    elif args.background_verify:
+        # 后台验证操作
+        return background_verify_command(args)
+    elif args.path_updates_file:
+        # 应用路径更新事件
+        return apply_path_updates_command(args)
     elif args.directory:
         # 扫描操作
         return scan_command(args)
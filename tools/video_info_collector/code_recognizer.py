@@ -0,0 +1,192 @@
+"""
+基于已知前缀的video_code识别模块
+
+大部分编码的字母前缀（厂牌）都已出现在 video_master_list 中。本模块用这些已知前缀构建前缀树，
+从文件名中每个词的开头沿前缀树向前匹配，命中已知前缀后再要求紧跟可选分隔符和数字，
+整个文件名只需线性扫描一遍，不会产生正则回溯。
+
+分辨率、编码格式、发布标记等容易被正则误认为编码的词（如 H264、FHD-1080）不在已知前缀中，
+因此会被跳过；没有命中已知前缀时退回原有的正则规则。
+"""
+
+from typing import Callable, Dict, Iterable, List, Optional
+
+try:
+    from .metadata import extract_video_code
+    from .sqlite_storage import SQLiteStorage
+except ImportError:
+    from metadata import extract_video_code
+    from sqlite_storage import SQLiteStorage
+
+try:
+    from ..video_code_utils import split_video_code
+except ImportError:
+    from tools.video_code_utils import split_video_code
+
+
+_ASCII_ALNUM = frozenset('ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789')
+_ASCII_DIGITS = frozenset('0123456789')
+_SEPARATORS = frozenset('-_')
+
+# 前缀树中标记"到此为一个完整前缀"的键
+_END = ''
+
+MIN_PREFIX_LENGTH = 2
+
+
+class PrefixCodeRecognizer:
+    """用已知前缀的前缀树识别video_code，未命中时退回正则规则"""
+
+    def __init__(self, prefixes: Iterable[str] = (),
+                 fallback: Optional[Callable[[str], Optional[str]]] = extract_video_code,
+                 min_digits: int = 2, max_digits: int = 6):
+        """
+        初始化识别器
+
+        Args:
+            prefixes: 已知前缀（不区分大小写）
+            fallback: 未命中已知前缀时使用的提取函数，None表示不回退
+            min_digits: 前缀后数字部分的最少位数
+            max_digits: 前缀后数字部分的最多位数
+        """
+        self.fallback = fallback
+        self.min_digits = min_digits
+        self.max_digits = max_digits
+        self._root: Dict[str, dict] = {}
+        self._prefixes = set()
+        for prefix in prefixes:
+            self.add_prefix(prefix)
+
+    @classmethod
+    def from_video_codes(cls, video_codes: Iterable[str], **kwargs) -> 'PrefixCodeRecognizer':
+        """
+        从已有编码中提取前缀构建识别器
+
+        Args:
+            video_codes: 编码列表
+            **kwargs: 传给构造函数的其他参数
+
+        Returns:
+            PrefixCodeRecognizer: 识别器
+        """
+        prefixes = set()
+        for video_code in video_codes:
+            parts = split_video_code(video_code)
+            if parts:
+                prefixes.add(parts[0])
+        return cls(prefixes, **kwargs)
+
+    @classmethod
+    def from_storage(cls, storage: SQLiteStorage, **kwargs) -> 'PrefixCodeRecognizer':
+        """
+        用主列表中active条目的编码前缀构建识别器
+
+        Args:
+            storage: SQLite存储对象
+            **kwargs: 传给构造函数的其他参数
+
+        Returns:
+            PrefixCodeRecognizer: 识别器
+        """
+        return cls.from_video_codes(storage.get_master_list_video_codes(), **kwargs)
+
+    def __len__(self) -> int:
+        return len(self._prefixes)
+
+    def add_prefix(self, prefix: str) -> bool:
+        """
+        添加已知前缀
+
+        Args:
+            prefix: 前缀（字母开头，由字母和数字组成）
+
+        Returns:
+            bool: 是否添加成功
+        """
+        prefix = prefix.strip().upper() if prefix else ''
+        if len(prefix) < MIN_PREFIX_LENGTH or not prefix[0].isalpha() \
+                or not all(char in _ASCII_ALNUM for char in prefix):
+            return False
+
+        node = self._root
+        for char in prefix:
+            child = node.get(char)
+            if child is None:
+                # 大小写两个键指向同一个子节点，匹配时无需逐字符转换大小写
+                child = {}
+                node[char] = child
+                node[char.lower()] = child
+            node = child
+        node[_END] = True
+        self._prefixes.add(prefix)
+        return True
+
+    def _match_number(self, text: str, position: int) -> Optional[int]:
+        """匹配前缀之后的可选分隔符和数字，返回编码的结束位置"""
+        length = len(text)
+        if position < length and text[position] in _SEPARATORS:
+            position += 1
+        digits_start = position
+        while position < length and text[position] in _ASCII_DIGITS and position - digits_start <= self.max_digits:
+            position += 1
+        digit_count = position - digits_start
+        if not self.min_digits <= digit_count <= self.max_digits:
+            return None
+        if position < length and text[position] in _ASCII_ALNUM:
+            return None
+        return position
+
+    def recognize(self, filename: str) -> Optional[str]:
+        """
+        只按已知前缀识别编码
+
+        Args:
+            filename: 文件名
+
+        Returns:
+            Optional[str]: 文件名中第一个"已知前缀+数字"的原始字符串，未命中返回None
+        """
+        if not filename or not self._root:
+            return None
+
+        root = self._root
+        length = len(filename)
+        for start in range(length):
+            # 只从词的开头匹配（前一个字符不是字母或数字）
+            node = root.get(filename[start])
+            if node is None or (start and filename[start - 1] in _ASCII_ALNUM):
+                continue
+
+            prefix_ends: List[int] = []
+            position = start + 1
+            while True:
+                if _END in node:
+                    prefix_ends.append(position)
+                if position >= length:
+                    break
+                node = node.get(filename[position])
+                if node is None:
+                    break
+                position += 1
+
+            # 较长的前缀优先（例如同时已知 TES 和 TEST）
+            for prefix_end in reversed(prefix_ends):
+                end = self._match_number(filename, prefix_end)
+                if end is not None:
+                    return filename[start:end]
+        return None
+
+    def extract(self, filename: str) -> Optional[str]:
+        """
+        提取编码：优先按已知前缀识别，未命中时使用回退规则
+
+        Args:
+            filename: 文件名
+
+        Returns:
+            Optional[str]: 提取的视频编码
+        """
+        code = self.recognize(filename)
+        if code is None and self.fallback is not None:
+            code = self.fallback(filename)
+        return code
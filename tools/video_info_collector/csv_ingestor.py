@@ -0,0 +1,197 @@
+"""
+流式CSV读取模块
+
+一次顺序读取临时CSV文件，同时完成三件事：计算整个文件内容的SHA256哈希、统计记录数、
+逐行产出解析后的记录。合并流程不再需要先读一遍生成指纹、再读一遍计数、最后再读一遍解析。
+
+内容哈希只取决于文件字节，与修改时间无关，仅仅 touch 过的CSV仍会被识别为已合并。
+"""
+
+import csv
+import hashlib
+import io
+import os
+from dataclasses import dataclass, field
+from typing import Dict, Iterator, List, Optional, Set
+
+try:
+    from .metadata import VideoInfo
+except ImportError:
+    from metadata import VideoInfo
+
+
+DEFAULT_CHUNK_SIZE = 1024 * 1024
+
+
+class _HashingReader(io.RawIOBase):
+    """读取底层二进制文件时同步更新哈希"""
+
+    def __init__(self, raw, digest):
+        self._raw = raw
+        self._digest = digest
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, buffer) -> int:
+        count = self._raw.readinto(buffer)
+        if count:
+            self._digest.update(memoryview(buffer)[:count])
+        return count
+
+
+def compute_content_hash(csv_path: str, chunk_size: int = DEFAULT_CHUNK_SIZE) -> str:
+    """
+    分块计算文件内容的SHA256哈希
+
+    Args:
+        csv_path: 文件路径
+        chunk_size: 每次读取的字节数
+
+    Returns:
+        str: 十六进制哈希值
+    """
+    digest = hashlib.sha256()
+    with open(csv_path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def parse_video_row(row: Dict[str, str]) -> VideoInfo:
+    """
+    将CSV行解析为VideoInfo
+
+    Args:
+        row: csv.DictReader 产出的行
+
+    Returns:
+        VideoInfo: 视频信息对象
+
+    Raises:
+        ValueError, KeyError: 行缺少必需字段或数值格式错误
+    """
+    video_info = VideoInfo(file_path=row['file_path'],
+                           tags=row.get('tags', '').split(',') if row.get('tags') else [],
+                           logical_path=row.get('logical_path', ''), probe_file=False)
+    video_info.filename = row['filename']
+    video_info.video_code = row.get('video_code', '')
+    video_info.file_fingerprint = row.get('file_fingerprint', '')
+    video_info.created_time = row['created_time']
+    video_info.width = int(row['width']) if row['width'] else None
+    video_info.height = int(row['height']) if row['height'] else None
+    video_info.duration = float(row['duration']) if row['duration'] else None
+    video_info.video_codec = row['video_codec'] if row['video_codec'] else None
+    video_info.audio_codec = row['audio_codec'] if row['audio_codec'] else None
+    video_info.file_size = int(row['file_size']) if row['file_size'] else None
+    video_info.bit_rate = int(row['bit_rate']) if row['bit_rate'] else None
+    video_info.frame_rate = float(row['frame_rate']) if row.get('frame_rate') else None
+    return video_info
+
+
+@dataclass
+class CSVIngestResult:
+    """CSV一次读取的结果"""
+    content_hash: str
+    row_count: int
+    videos: List[VideoInfo] = field(default_factory=list)
+    skipped_count: int = 0
+    scan_roots: List[str] = field(default_factory=list)
+
+
+class CSVIngestor:
+    """单次读取CSV：边读边计算内容哈希、统计行数并产出记录"""
+
+    def __init__(self, csv_path: str, chunk_size: int = DEFAULT_CHUNK_SIZE):
+        """
+        初始化CSV读取器
+
+        Args:
+            csv_path: CSV文件路径
+            chunk_size: 底层每次读取的字节数
+        """
+        self.csv_path = csv_path
+        self.chunk_size = chunk_size
+        self.content_hash: Optional[str] = None
+        self.row_count = 0
+        self.skipped_count = 0
+        self.scan_roots: Set[str] = set()
+
+    def iter_rows(self) -> Iterator[Dict[str, str]]:
+        """
+        逐行产出CSV原始记录（字典）
+
+        迭代结束（或提前中止）时 content_hash 和 row_count 才会被设置；
+        提前中止时剩余字节仍会读完，保证哈希覆盖整个文件。
+        扫描时写入的 scan_root 列同时收集到 scan_roots。
+
+        Yields:
+            Dict[str, str]: CSV行
+        """
+        digest = hashlib.sha256()
+        self.content_hash = None
+        self.row_count = 0
+        self.scan_roots = set()
+        with open(self.csv_path, 'rb') as raw:
+            hashing = _HashingReader(raw, digest)
+            buffered = io.BufferedReader(hashing, buffer_size=self.chunk_size)
+            text = io.TextIOWrapper(buffered, encoding='utf-8-sig', newline='')
+            try:
+                for row in csv.DictReader(text):
+                    self.row_count += 1
+                    if row.get('scan_root'):
+                        self.scan_roots.add(row['scan_root'])
+                    yield row
+            finally:
+                for chunk in iter(lambda: buffered.read(self.chunk_size), b''):
+                    pass
+                self.content_hash = digest.hexdigest()
+                text.detach()
+
+    def iter_videos(self) -> Iterator[VideoInfo]:
+        """
+        逐行产出解析后的VideoInfo，格式错误的行计入 skipped_count 并跳过
+
+        Yields:
+            VideoInfo: 视频信息对象
+        """
+        self.skipped_count = 0
+        for row in self.iter_rows():
+            try:
+                yield parse_video_row(row)
+            except (ValueError, KeyError):
+                self.skipped_count += 1
+
+    def read(self) -> CSVIngestResult:
+        """
+        读取整个CSV文件
+
+        Returns:
+            CSVIngestResult: 内容哈希、记录数、解析后的视频列表和扫描根目录
+        """
+        videos = list(self.iter_videos())
+        return CSVIngestResult(
+            content_hash=self.content_hash,
+            row_count=self.row_count,
+            videos=videos,
+            skipped_count=self.skipped_count,
+            scan_roots=sorted(self.scan_roots),
+        )
+
+
+def ingest_csv(csv_path: str) -> CSVIngestResult:
+    """
+    一次读取CSV文件，返回内容哈希、记录数和视频列表
+
+    Args:
+        csv_path: CSV文件路径
+
+    Returns:
+        CSVIngestResult: 读取结果
+
+    Raises:
+        FileNotFoundError: CSV文件不存在
+    """
+    if not os.path.exists(csv_path):
+        raise FileNotFoundError(f"CSV文件不存在: {csv_path}")
+    return CSVIngestor(csv_path).read()
@@ -6,7 +6,7 @@ CSV文件写入器
 
 import csv
 import os
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional
 
 from .metadata import VideoInfo
 
@@ -30,16 +30,18 @@ class CSVWriter:
             'file_path', 'filename', 'video_code', 'file_fingerprint', 'width', 'height', 'resolution',
             'duration', 'duration_formatted', 'video_codec', 'audio_codec',
             'file_size', 'bit_rate', 'frame_rate', 'created_time',
-            'tags', 'logical_path'
+            'tags', 'logical_path', 'scan_root'
         ]
     
-    def write_video_infos(self, video_infos: List[VideoInfo], csv_file_path: str):
+    def write_video_infos(self, video_infos: List[VideoInfo], csv_file_path: str,
+                          scan_root: Optional[str] = None):
         """
         写入视频信息到CSV文件（覆盖模式）
         
         Args:
             video_infos: 视频信息列表
             csv_file_path: CSV文件路径
+            scan_root: 扫描根目录，合并时用于限定丢失文件检测范围
         """
         # 确保目录存在
         dir_path = os.path.dirname(csv_file_path)
@@ -58,20 +60,22 @@ class CSVWriter:
             
             # 写入数据行
             for video_info in video_infos:
-                row_data = self._video_info_to_row(video_info)
+                row_data = self._video_info_to_row(video_info, scan_root)
                 writer.writerow(row_data)
     
-    def append_video_infos(self, video_infos: List[VideoInfo], csv_file_path: str):
+    def append_video_infos(self, video_infos: List[VideoInfo], csv_file_path: str,
+                           scan_root: Optional[str] = None):
         """
         追加视频信息到CSV文件
         
         Args:
             video_infos: 视频信息列表
             csv_file_path: CSV文件路径
+            scan_root: 扫描根目录，合并时用于限定丢失文件检测范围
         """
         # 如果文件不存在，创建新文件
         if not os.path.exists(csv_file_path):
-            self.write_video_infos(video_infos, csv_file_path)
+            self.write_video_infos(video_infos, csv_file_path, scan_root)
             return
         
         # 追加到现有文件
@@ -84,7 +88,7 @@ class CSVWriter:
             
             # 写入数据行（不写标题行）
             for video_info in video_infos:
-                row_data = self._video_info_to_row(video_info)
+                row_data = self._video_info_to_row(video_info, scan_root)
                 writer.writerow(row_data)
     
     def read_csv_file(self, csv_file_path: str) -> List[Dict[str, Any]]:
@@ -111,17 +115,19 @@ class CSVWriter:
         
         return rows
     
-    def _video_info_to_row(self, video_info: VideoInfo) -> Dict[str, str]:
+    def _video_info_to_row(self, video_info: VideoInfo, scan_root: Optional[str] = None) -> Dict[str, str]:
         """
         将VideoInfo对象转换为CSV行数据
         
         Args:
             video_info: 视频信息对象
+            scan_root: 扫描根目录
             
         Returns:
             字典格式的行数据
         """
         data_dict = video_info.to_dict()
+        data_dict['scan_root'] = os.path.abspath(scan_root) if scan_root else None
         
         # 格式化特定字段
         row_data = {}
@@ -15,6 +15,9 @@ try:
     from .smart_merge_manager import SmartMergeManager
     from .fingerprint_manager import FingerprintManager
     from .file_status_manager import FileStatusManager, FileStatus
+    from .status_history import StatusHistoryWriter
+    from .scan_verifier import ScanVerifier
+    from .code_recognizer import PrefixCodeRecognizer
 except ImportError:
     from scanner import VideoFileScanner
     from metadata import VideoMetadataExtractor, VideoInfo
@@ -22,6 +25,9 @@ except ImportError:
     from smart_merge_manager import SmartMergeManager
     from fingerprint_manager import FingerprintManager
     from file_status_manager import FileStatusManager, FileStatus
+    from status_history import StatusHistoryWriter
+    from scan_verifier import ScanVerifier
+    from code_recognizer import PrefixCodeRecognizer
 
 
 class EnhancedVideoScanner:
@@ -40,7 +46,9 @@ class EnhancedVideoScanner:
         self.metadata_extractor = VideoMetadataExtractor()
         self.merge_manager = SmartMergeManager(storage)
         self.fingerprint_manager = FingerprintManager()
-        self.status_manager = FileStatusManager()
+        self.status_history = StatusHistoryWriter(storage)
+        self.status_manager = FileStatusManager(history_writer=self.status_history)
+        self.verifier = ScanVerifier(self.status_manager, self.metadata_extractor)
         
         # 扫描统计
         self.scan_stats = {
@@ -167,12 +175,17 @@ class EnhancedVideoScanner:
         # 对变更文件执行完整扫描流程
         return self._process_file_list(changed_files, 'incremental')
     
-    def verify_scan(self, check_integrity: bool = True) -> Dict[str, any]:
+    def verify_scan(self, check_integrity: bool = True, integrity_mode: str = 'header',
+                    sample_rate: float = 1.0) -> Dict[str, any]:
         """
         验证扫描（检查数据库记录与实际文件的一致性）
         
+        每个文件只做一次状态检查，结果同时用于统计、不一致检测和自动修复。
+        
         Args:
             check_integrity: 是否检查文件完整性
+            integrity_mode: 完整性检查方式，'header' 校验容器签名和大小，'probe' 重新探测时长和大小
+            sample_rate: 完整性检查的抽样比例 (0-1]
             
         Returns:
             Dict: 验证结果报告
@@ -182,14 +195,9 @@ class EnhancedVideoScanner:
         # 获取所有数据库记录
         existing_videos = self._load_existing_videos()
         
-        # 检查文件状态
-        status_results = self.status_manager.batch_check_status(existing_videos)
-        
-        # 检测状态不一致
-        inconsistencies = self.status_manager.detect_status_inconsistencies(existing_videos)
-        
-        # 自动修复不一致
-        fix_results = self.status_manager.auto_fix_inconsistencies(existing_videos)
+        # 一次检查文件状态，同时得到不一致项并自动修复
+        status_results, inconsistencies, fix_results = self.verifier.check_status(existing_videos)
+        self.status_history.flush()
         
         report = {
             'scan_type': 'verify',
@@ -200,20 +208,33 @@ class EnhancedVideoScanner:
             'auto_fixed': fix_results,
             'details': {
                 'missing_files': [v.file_path for v in self.status_manager.get_missing_files(existing_videos)],
-                'ignored_files': [v.file_path for v in self.status_manager.get_ignored_files(existing_videos)]
+                'ignored_files': [v.file_path for v in self.status_manager.get_ignored_files(existing_videos)],
+                'offline_files': [v.file_path for v in self.status_manager.get_offline_files(existing_videos)]
             }
         }
         
         if check_integrity:
             print("检查文件完整性...")
-            integrity_results = self._check_file_integrity(existing_videos)
+            integrity_results = self._check_file_integrity(existing_videos, integrity_mode, sample_rate)
             report['integrity_check'] = integrity_results
         
         return report
     
+    def refresh_code_recognizer(self) -> PrefixCodeRecognizer:
+        """
+        用主列表中的已知前缀重建编码识别器（每批提取前调用，以包含新合并的编码）
+        
+        Returns:
+            PrefixCodeRecognizer: 新的识别器
+        """
+        recognizer = PrefixCodeRecognizer.from_storage(self.storage)
+        self.metadata_extractor.code_recognizer = recognizer
+        return recognizer
+    
     def _extract_metadata_batch(self, file_paths: List[str]) -> List[VideoInfo]:
         """批量提取元数据"""
         videos = []
+        self.refresh_code_recognizer()
         
         for i, file_path in enumerate(file_paths):
             try:
@@ -331,36 +352,10 @@ class EnhancedVideoScanner:
             'merge_report': self.merge_manager.create_merge_report(merge_results)
         }
     
-    def _check_file_integrity(self, videos: List[VideoInfo]) -> Dict[str, any]:
-        """检查文件完整性"""
-        integrity_results = {
-            'checked': 0,
-            'valid': 0,
-            'corrupted': 0,
-            'inaccessible': 0,
-            'corrupted_files': []
-        }
-        
-        for video in videos:
-            if video.file_status != FileStatus.PRESENT.value:
-                continue
-                
-            integrity_results['checked'] += 1
-            
-            try:
-                # 简单的完整性检查：尝试读取文件头
-                with open(video.file_path, 'rb') as f:
-                    header = f.read(1024)  # 读取前1KB
-                    if len(header) > 0:
-                        integrity_results['valid'] += 1
-                    else:
-                        integrity_results['corrupted'] += 1
-                        integrity_results['corrupted_files'].append(video.file_path)
-            except (IOError, OSError):
-                integrity_results['inaccessible'] += 1
-                integrity_results['corrupted_files'].append(video.file_path)
-        
-        return integrity_results
+    def _check_file_integrity(self, videos: List[VideoInfo], mode: str = 'header',
+                              sample_rate: float = 1.0) -> Dict[str, any]:
+        """检查文件完整性（并行执行，可抽样）"""
+        return self.verifier.check_integrity(videos, mode=mode, sample_rate=sample_rate)
     
     def _generate_scan_report(self, scan_id: int, merge_results: Dict, 
                             merge_stats: Dict, start_time: datetime, 
@@ -397,7 +392,9 @@ class EnhancedVideoScanner:
     
     def cleanup_old_data(self, days_to_keep: int = 30) -> Dict[str, int]:
         """清理旧数据"""
+        # 先写入缓冲中的状态变更，保证清理范围覆盖全部历史
+        self.status_history.flush()
         return {
             'merge_history_cleaned': self.storage.cleanup_old_merge_history(days_to_keep),
-            'status_history_cleaned': len(self.status_manager.status_change_history)  # 清理状态变更历史
+            'status_history_cleaned': self.storage.cleanup_old_status_history(days_to_keep)
         }
\ No newline at end of file
@@ -0,0 +1,239 @@
+"""
+流式导出模块
+
+以 fetchmany 分批读取 video_info 表，逐批写出 CSV、JSON Lines 或简化文本格式，
+内存占用与数据库规模无关。支持 gzip 压缩输出和按文件状态、标签、逻辑路径过滤。
+"""
+
+import csv
+import gzip
+import json
+import os
+import time
+from dataclasses import dataclass
+from typing import Callable, Iterator, List, Optional, Tuple
+
+
+@dataclass
+class ExportStats:
+    """导出统计结果"""
+    rows: int
+    elapsed_seconds: float
+    output_path: str
+
+    @property
+    def rows_per_second(self) -> float:
+        """导出速率（行/秒）"""
+        if self.elapsed_seconds <= 0:
+            return float(self.rows)
+        return self.rows / self.elapsed_seconds
+
+
+class StreamingExporter:
+    """基于游标分批读取的流式导出器"""
+
+    def __init__(self, connection, batch_size: int = 1000,
+                 progress_callback: Optional[Callable[[int], None]] = None):
+        """
+        初始化流式导出器
+
+        Args:
+            connection: sqlite3 数据库连接
+            batch_size: 每次 fetchmany 读取的行数
+            progress_callback: 每写完一批后调用，参数为已导出行数
+        """
+        self.connection = connection
+        self.batch_size = batch_size
+        self.progress_callback = progress_callback
+
+    # ---------------------------
+    # 查询构建
+    # ---------------------------
+    @staticmethod
+    def build_filter_clause(file_status: Optional[str] = None, tag: Optional[str] = None,
+                            logical_path: Optional[str] = None) -> Tuple[str, List]:
+        """
+        构建过滤条件
+
+        Args:
+            file_status: 文件状态（present/missing/ignore/replaced）
+            tag: 标签（精确匹配）
+            logical_path: 逻辑路径（匹配该路径及其子路径）
+
+        Returns:
+            Tuple[str, List]: WHERE子句（不含WHERE关键字）和参数列表
+        """
+        clauses = []
+        params: List = []
+
+        if file_status:
+            clauses.append("video_info.file_status = ?")
+            params.append(file_status)
+
+        if tag:
+            clauses.append(
+                "EXISTS (SELECT 1 FROM video_tags vt "
+                "WHERE vt.video_id = video_info.id AND vt.tag = ?)"
+            )
+            params.append(tag)
+
+        if logical_path:
+            prefix = logical_path.rstrip('/')
+            escaped = prefix.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+            clauses.append("(video_info.logical_path = ? OR video_info.logical_path LIKE ? ESCAPE '\\')")
+            params.extend([prefix, f"{escaped}/%"])
+
+        return (" AND ".join(clauses) if clauses else "1=1"), params
+
+    def _iter_batches(self, columns: str, file_status: Optional[str] = None,
+                      tag: Optional[str] = None,
+                      logical_path: Optional[str] = None) -> Tuple[List[str], Iterator[List]]:
+        """执行查询并返回列名与分批迭代器"""
+        where_clause, params = self.build_filter_clause(file_status, tag, logical_path)
+        cursor = self.connection.cursor()
+        cursor.execute(
+            f"SELECT {columns} FROM video_info WHERE {where_clause} ORDER BY video_info.filename",
+            params
+        )
+        fieldnames = [description[0] for description in cursor.description]
+
+        def batches():
+            while True:
+                rows = cursor.fetchmany(self.batch_size)
+                if not rows:
+                    break
+                yield rows
+
+        return fieldnames, batches()
+
+    # ---------------------------
+    # 输出文件
+    # ---------------------------
+    @staticmethod
+    def _open_output(output_path: str, encoding: str, compress: Optional[bool]):
+        """打开输出文件，compress为None时根据 .gz 后缀自动判断"""
+        if compress is None:
+            compress = output_path.endswith('.gz')
+        dir_path = os.path.dirname(output_path)
+        if dir_path and not os.path.isdir(dir_path):
+            raise FileNotFoundError(f"输出目录不存在: {dir_path}")
+        if compress:
+            return gzip.open(output_path, 'wt', encoding=encoding, newline='')
+        return open(output_path, 'w', encoding=encoding, newline='')
+
+    def _report(self, rows: int):
+        if self.progress_callback:
+            self.progress_callback(rows)
+
+    # ---------------------------
+    # 导出格式
+    # ---------------------------
+    def export_csv(self, output_path: str, compress: Optional[bool] = None,
+                   **filters) -> ExportStats:
+        """
+        流式导出为CSV（列与 video_info 表一致）
+
+        Args:
+            output_path: 输出文件路径
+            compress: 是否gzip压缩，None表示按 .gz 后缀判断
+            **filters: file_status / tag / logical_path 过滤条件
+
+        Returns:
+            ExportStats: 导出统计
+        """
+        start = time.perf_counter()
+        fieldnames, batches = self._iter_batches("video_info.*", **filters)
+        rows_written = 0
+
+        with self._open_output(output_path, 'utf-8-sig', compress) as f:
+            writer = None
+            for rows in batches:
+                if writer is None:
+                    writer = csv.writer(f)
+                    writer.writerow(fieldnames)
+                writer.writerows(rows)
+                rows_written += len(rows)
+                self._report(rows_written)
+
+        return ExportStats(rows_written, time.perf_counter() - start, output_path)
+
+    def export_jsonl(self, output_path: str, compress: Optional[bool] = None,
+                     **filters) -> ExportStats:
+        """
+        流式导出为JSON Lines（每行一个JSON对象）
+
+        Args:
+            output_path: 输出文件路径
+            compress: 是否gzip压缩，None表示按 .gz 后缀判断
+            **filters: file_status / tag / logical_path 过滤条件
+
+        Returns:
+            ExportStats: 导出统计
+        """
+        start = time.perf_counter()
+        fieldnames, batches = self._iter_batches("video_info.*", **filters)
+        rows_written = 0
+
+        with self._open_output(output_path, 'utf-8', compress) as f:
+            for rows in batches:
+                f.writelines(
+                    json.dumps(dict(zip(fieldnames, row)), ensure_ascii=False) + '\n'
+                    for row in rows
+                )
+                rows_written += len(rows)
+                self._report(rows_written)
+
+        return ExportStats(rows_written, time.perf_counter() - start, output_path)
+
+    def export_simple(self, output_path: str, compress: Optional[bool] = None,
+                      **filters) -> ExportStats:
+        """
+        流式导出简化格式：每行为 "filename_without_ext filesize logical_path"
+
+        Args:
+            output_path: 输出文件路径
+            compress: 是否gzip压缩，None表示按 .gz 后缀判断
+            **filters: file_status / tag / logical_path 过滤条件
+
+        Returns:
+            ExportStats: 导出统计
+        """
+        start = time.perf_counter()
+        _, batches = self._iter_batches(
+            "video_info.filename, video_info.file_size, video_info.logical_path", **filters
+        )
+        rows_written = 0
+
+        with self._open_output(output_path, 'utf-8', compress) as f:
+            for rows in batches:
+                f.writelines(
+                    f"{os.path.splitext(filename or '')[0]} "
+                    f"{format_size_gb(file_size or 0)} {logical_path or ''}\n"
+                    for filename, file_size, logical_path in rows
+                )
+                rows_written += len(rows)
+                self._report(rows_written)
+
+        return ExportStats(rows_written, time.perf_counter() - start, output_path)
+
+
+def format_size_gb(size_bytes: int) -> str:
+    """
+    格式化文件大小为GB格式
+
+    Args:
+        size_bytes: 文件大小（字节）
+
+    Returns:
+        str: 格式化后的文件大小（如：5G, 5.23G）
+    """
+    if size_bytes is None or size_bytes == 0:
+        return "0G"
+
+    size_gb = size_bytes / (1024 * 1024 * 1024)
+
+    if size_gb >= 10:
+        # 大于等于10G时，显示整数
+        return f"{round(size_gb)}G"
+    # 小于10G时，显示两位小数
+    return f"{size_gb:.2f}G"
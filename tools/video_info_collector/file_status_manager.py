@@ -5,8 +5,9 @@
 """
 
 import os
+from collections import deque
 from datetime import datetime
-from typing import List, Dict, Optional, Set
+from typing import Iterable, List, Dict, Optional, Set
 from enum import Enum
 
 try:
@@ -21,13 +22,42 @@ class FileStatus(Enum):
     MISSING = "missing"    # 文件丢失或不可访问
     IGNORE = "ignore"      # 在其它目录下新发现同指纹文件，标记为忽略
     REPLACED = "replaced"  # 文件已被同video_code的新版本替换
+    OFFLINE = "offline"    # 文件所在的卷（外接磁盘/网络挂载）当前不在线
 
 
 class FileStatusManager:
     """文件状态管理器"""
     
-    def __init__(self):
-        self.status_change_history: List[Dict] = []
+    def __init__(self, stat_only: bool = True, max_workers: int = 32,
+                 history_writer=None, history_limit: int = 1000,
+                 detect_offline_volumes: bool = True, volume_monitor=None):
+        """
+        初始化文件状态管理器
+        
+        Args:
+            stat_only: 批量检查（batch_check_status / detect_status_inconsistencies / unmark_ignore）
+                       是否只判断存在性；False时对存在的文件再读取1字节确认可读
+            max_workers: 批量检查的并行线程数
+            history_writer: 状态变更历史写入器（StatusHistoryWriter），提供时变更会持久化到数据库
+            history_limit: 内存中保留的最近状态变更条数
+            detect_offline_volumes: 是否按挂载点检测离线卷，离线卷上的文件判定为 offline 而不是 missing
+            volume_monitor: 自定义卷监视器（VolumeMonitor），默认按系统挂载表创建
+        """
+        try:
+            from .batch_status_checker import BatchStatusChecker
+            from .volume_monitor import VolumeMonitor
+        except ImportError:
+            from batch_status_checker import BatchStatusChecker
+            from volume_monitor import VolumeMonitor
+        
+        # 按时间顺序追加，超出上限时自动丢弃最旧的记录
+        self.status_change_history = deque(maxlen=history_limit)
+        self.history_writer = history_writer
+        if volume_monitor is None and detect_offline_volumes:
+            volume_monitor = VolumeMonitor()
+        self.volume_monitor = volume_monitor
+        self.status_checker = BatchStatusChecker(stat_only=stat_only, max_workers=max_workers,
+                                                 volume_monitor=volume_monitor)
     
     def check_file_status(self, file_path: str) -> FileStatus:
         """
@@ -39,6 +69,10 @@ class FileStatusManager:
         Returns:
             FileStatus: 文件状态
         """
+        if self.volume_monitor is not None and not self.volume_monitor.is_online(
+                self.volume_monitor.mount_point_for(file_path)):
+            return FileStatus.OFFLINE
+        
         if os.path.exists(file_path) and os.path.isfile(file_path):
             try:
                 # 尝试访问文件以确保可读
@@ -50,6 +84,32 @@ class FileStatusManager:
         else:
             return FileStatus.MISSING
     
+    def probe_file_status(self, file_paths: Iterable[str], max_workers: int = 16) -> Dict[str, FileStatus]:
+        """
+        并行探测一批文件的状态（只做stat，不读取文件内容）
+        
+        Args:
+            file_paths: 文件路径列表
+            max_workers: 并行探测的线程数
+            
+        Returns:
+            Dict[str, FileStatus]: 文件路径到状态的映射
+        """
+        return type(self.status_checker)(stat_only=True, max_workers=max_workers,
+                                         volume_monitor=self.volume_monitor).check(file_paths)
+    
+    def check_files_status(self, file_paths: Iterable[str]) -> Dict[str, FileStatus]:
+        """
+        批量检查文件状态：按父目录分组scandir，并行执行
+        
+        Args:
+            file_paths: 文件路径列表
+            
+        Returns:
+            Dict[str, FileStatus]: 文件路径到状态的映射
+        """
+        return self.status_checker.check(file_paths)
+    
     def update_video_status(self, video_info: VideoInfo, new_status: FileStatus, 
                           reason: Optional[str] = None) -> bool:
         """
@@ -67,13 +127,17 @@ class FileStatusManager:
         video_info.file_status = new_status.value
         
         # 记录状态变更历史
-        self.status_change_history.append({
+        change = {
             'file_path': video_info.file_path,
+            'video_code': getattr(video_info, 'video_code', None),
             'old_status': old_status,
             'new_status': new_status.value,
             'reason': reason,
             'timestamp': datetime.now().isoformat()
-        })
+        }
+        self.status_change_history.append(change)
+        if self.history_writer is not None:
+            self.history_writer.record(change)
         
         return True
     
@@ -92,9 +156,15 @@ class FileStatusManager:
             'present': 0,
             'missing': 0,
             'ignore': 0,
+            'offline': 0,
             'status_changes': []
         }
         
+        actual_statuses = self.check_files_status(
+            video_info.file_path for video_info in video_infos
+            if video_info.file_status != FileStatus.IGNORE.value
+        )
+        
         for video_info in video_infos:
             results['checked'] += 1
             
@@ -104,7 +174,7 @@ class FileStatusManager:
                 continue
             
             # 检查实际状态
-            actual_status = self.check_file_status(video_info.file_path)
+            actual_status = actual_statuses[video_info.file_path]
             old_status = video_info.file_status
             
             # 更新状态
@@ -121,6 +191,8 @@ class FileStatusManager:
                 results['present'] += 1
             elif actual_status == FileStatus.MISSING:
                 results['missing'] += 1
+            elif actual_status == FileStatus.OFFLINE:
+                results['offline'] += 1
         
         return results
     
@@ -152,13 +224,13 @@ class FileStatusManager:
         Returns:
             int: 成功取消标记的文件数量
         """
-        count = 0
-        for video_info in video_infos:
-            if video_info.file_status == FileStatus.IGNORE.value:
-                actual_status = self.check_file_status(video_info.file_path)
-                self.update_video_status(video_info, actual_status, "unmark_ignore")
-                count += 1
-        return count
+        ignored = [video_info for video_info in video_infos
+                   if video_info.file_status == FileStatus.IGNORE.value]
+        actual_statuses = self.check_files_status(video_info.file_path for video_info in ignored)
+        
+        for video_info in ignored:
+            self.update_video_status(video_info, actual_statuses[video_info.file_path], "unmark_ignore")
+        return len(ignored)
     
     def get_files_by_status(self, video_infos: List[VideoInfo], 
                            status: FileStatus) -> List[VideoInfo]:
@@ -186,6 +258,10 @@ class FileStatusManager:
         """获取被忽略的文件"""
         return self.get_files_by_status(video_infos, FileStatus.IGNORE)
     
+    def get_offline_files(self, video_infos: List[VideoInfo]) -> List[VideoInfo]:
+        """获取所在卷离线的文件"""
+        return self.get_files_by_status(video_infos, FileStatus.OFFLINE)
+    
     def get_status_statistics(self, video_infos: List[VideoInfo]) -> Dict[str, any]:
         """
         获取状态统计信息
@@ -201,6 +277,7 @@ class FileStatusManager:
             'present': 0,
             'missing': 0,
             'ignore': 0,
+            'offline': 0,
             'unknown': 0
         }
         
@@ -212,12 +289,14 @@ class FileStatusManager:
                 stats['missing'] += 1
             elif status == FileStatus.IGNORE.value:
                 stats['ignore'] += 1
+            elif status == FileStatus.OFFLINE.value:
+                stats['offline'] += 1
             else:
                 stats['unknown'] += 1
         
         # 计算百分比
         if stats['total'] > 0:
-            for key in ['present', 'missing', 'ignore', 'unknown']:
+            for key in ['present', 'missing', 'ignore', 'offline', 'unknown']:
                 stats[f'{key}_percentage'] = (stats[key] / stats['total']) * 100
         
         return stats
@@ -233,13 +312,12 @@ class FileStatusManager:
             List[Dict]: 不一致的文件信息
         """
         inconsistencies = []
+        checked = [video_info for video_info in video_infos
+                   if video_info.file_status != FileStatus.IGNORE.value]
+        actual_statuses = self.check_files_status(video_info.file_path for video_info in checked)
         
-        for video_info in video_infos:
-            # 跳过被忽略的文件
-            if video_info.file_status == FileStatus.IGNORE.value:
-                continue
-            
-            actual_status = self.check_file_status(video_info.file_path)
+        for video_info in checked:
+            actual_status = actual_statuses[video_info.file_path]
             recorded_status = video_info.file_status
             
             if actual_status.value != recorded_status:
@@ -255,7 +333,7 @@ class FileStatusManager:
     
     def auto_fix_inconsistencies(self, video_infos: List[VideoInfo]) -> Dict[str, int]:
         """
-        自动修复状态不一致
+        自动修复状态不一致（只修改内存中的对象；修复数据库请使用 StatusReconciler）
         
         Args:
             video_infos: 视频信息列表
@@ -265,15 +343,17 @@ class FileStatusManager:
         """
         inconsistencies = self.detect_status_inconsistencies(video_infos)
         
+        # 按路径建立索引，避免对每个不一致项线性查找
+        by_path = {}
+        for video_info in video_infos:
+            by_path.setdefault(video_info.file_path, video_info)
+        
         fixed_count = 0
         for inconsistency in inconsistencies:
-            # 找到对应的video_info对象
-            for video_info in video_infos:
-                if video_info.file_path == inconsistency['file_path']:
-                    actual_status = FileStatus(inconsistency['actual_status'])
-                    self.update_video_status(video_info, actual_status, "auto_fix")
-                    fixed_count += 1
-                    break
+            video_info = by_path.get(inconsistency['file_path'])
+            if video_info is not None:
+                self.update_video_status(video_info, FileStatus(inconsistency['actual_status']), "auto_fix")
+                fixed_count += 1
         
         return {
             'inconsistencies_found': len(inconsistencies),
@@ -281,28 +361,57 @@ class FileStatusManager:
         }
     
     def get_status_change_history(self, file_path: Optional[str] = None, 
-                                 limit: int = 100) -> List[Dict]:
+                                 limit: int = 100, video_code: Optional[str] = None,
+                                 since: Optional[str] = None,
+                                 until: Optional[str] = None) -> List[Dict]:
         """
         获取状态变更历史
         
+        配置了 history_writer 时查询数据库中的完整历史，否则查询内存中最近的记录。
+        
         Args:
             file_path: 特定文件路径（可选）
             limit: 返回记录数限制
+            video_code: 特定视频代码（可选）
+            since: 起始时间（ISO格式，包含）
+            until: 结束时间（ISO格式，不包含）
             
         Returns:
-            List[Dict]: 状态变更历史
+            List[Dict]: 状态变更历史，按时间倒序
         """
-        history = self.status_change_history
+        if self.history_writer is not None:
+            return self.history_writer.query(file_path=file_path, video_code=video_code,
+                                             since=since, until=until, limit=limit)
         
-        if file_path:
-            history = [h for h in history if h['file_path'] == file_path]
+        # 内存记录按时间顺序追加，倒序遍历即为最新优先，无需排序
+        history = []
+        for change in reversed(self.status_change_history):
+            if len(history) >= limit:
+                break
+            if file_path and change['file_path'] != file_path:
+                continue
+            if video_code and change.get('video_code') != video_code:
+                continue
+            if since and change['timestamp'] < since:
+                continue
+            if until and change['timestamp'] >= until:
+                continue
+            history.append(change)
+        return history
+    
+    def flush_history(self) -> int:
+        """
+        把缓冲中的状态变更写入数据库
         
-        # 按时间倒序排列，返回最新的记录
-        history.sort(key=lambda x: x['timestamp'], reverse=True)
-        return history[:limit]
+        Returns:
+            int: 写入的记录数；未配置 history_writer 时为0
+        """
+        if self.history_writer is None:
+            return 0
+        return self.history_writer.flush()
     
     def clear_history(self):
-        """清空状态变更历史"""
+        """清空内存中的状态变更历史（数据库中的记录由 cleanup_old_status_history 清理）"""
         self.status_change_history.clear()
     
     def export_status_report(self, video_infos: List[VideoInfo]) -> Dict[str, any]:
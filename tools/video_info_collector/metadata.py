@@ -10,8 +10,40 @@ import subprocess
 import hashlib
 import re
 from datetime import datetime
+from functools import lru_cache
 from typing import List, Optional, Dict, Any
 
+try:
+    from .video_code_extractor import PriorityMatcher
+except ImportError:
+    from video_code_extractor import PriorityMatcher
+
+try:
+    from ..video_code_utils import canonicalize_video_code
+except ImportError:
+    from tools.video_code_utils import canonicalize_video_code
+
+
+# 视频编码格式（按优先级排序）
+VIDEO_CODE_PATTERNS = [
+    r'([A-Z]{2,5}-\d{3,5})(?=[\W_]|$)',      # 如 ABC-123, MIDE-456 (字母-数字，限制长度)
+    r'([A-Z]{3}-[A-Z]{3})(?=[\W_]|$)',       # 如 ABC-abc (3字母-3字母，严格格式)
+    r'([A-Z]+\d{3,})(?=[\W_]|$)',            # 如 SSIS123, PRED456
+    r'(\d{6}_\d{3})(?=[\W_]|$)',             # 如 123456_789
+    r'([A-Z]{3,}\-\d{2,})(?=[\W_]|$)',       # 如 STARS-123
+]
+
+# 各格式合并后的预编译匹配器，结果与依次尝试每个格式相同
+_VIDEO_CODE_MATCHER = PriorityMatcher(VIDEO_CODE_PATTERNS, re.IGNORECASE)
+
+VIDEO_CODE_CACHE_SIZE = 65536
+
+
+@lru_cache(maxsize=VIDEO_CODE_CACHE_SIZE)
+def _match_video_code(filename: str) -> Optional[str]:
+    """按优先级匹配视频编码（结果按文件名缓存）"""
+    return _VIDEO_CODE_MATCHER.search(filename)[1]
+
 
 def extract_video_code(filename: str) -> Optional[str]:
     """
@@ -26,29 +58,15 @@ def extract_video_code(filename: str) -> Optional[str]:
     if not filename:
         return None
     
-    # 定义多种视频编码格式的正则表达式
-    patterns = [
-        r'([A-Z]{2,5}-\d{3,5})(?=[\W_]|$)',      # 如 ABC-123, MIDE-456 (字母-数字，限制长度)
-        r'([A-Z]{3}-[A-Z]{3})(?=[\W_]|$)',       # 如 ABC-abc (3字母-3字母，严格格式)
-        r'([A-Z]+\d{3,})(?=[\W_]|$)',            # 如 SSIS123, PRED456
-        r'(\d{6}_\d{3})(?=[\W_]|$)',             # 如 123456_789
-        r'([A-Z]{3,}\-\d{2,})(?=[\W_]|$)',       # 如 STARS-123
-    ]
-    
-    for pattern in patterns:
-        # 使用不区分大小写的匹配，但返回原始字符串
-        match = re.search(pattern, filename, re.IGNORECASE)
-        if match:
-            return match.group(1)
-    
-    # 如果没有匹配到特定模式，返回None
-    return None
+    # 按优先级返回第一个匹配的格式（不区分大小写，返回原始字符串）
+    return _match_video_code(filename)
 
 
 class VideoInfo:
     """视频信息数据类"""
     
-    def __init__(self, file_path: str, tags: Optional[List[str]] = None, logical_path: Optional[str] = None):
+    def __init__(self, file_path: str, tags: Optional[List[str]] = None, logical_path: Optional[str] = None,
+                 probe_file: bool = True, code_recognizer=None):
         """
         初始化视频信息对象
         
@@ -56,6 +74,10 @@ class VideoInfo:
             file_path: 视频文件路径
             tags: 标签列表
             logical_path: 逻辑路径
+            probe_file: 是否访问文件获取大小、时间并生成指纹；从CSV、暂存表或数据库
+                        还原记录时这些字段随后会被覆盖，应传False以避免逐个stat
+            code_recognizer: 编码识别器（提供 extract(filename) 方法，如 PrefixCodeRecognizer），
+                             None时使用 extract_video_code
         """
         self.file_path = file_path
         self.filename = os.path.basename(file_path)
@@ -82,13 +104,15 @@ class VideoInfo:
         self.last_merge_time: Optional[datetime] = None
         
         # 获取文件基本信息
-        self._get_basic_info()
+        if probe_file:
+            self._get_basic_info()
         
         # 提取video_code
-        self._extract_video_code()
+        self._extract_video_code(code_recognizer)
         
         # 生成文件指纹
-        self._generate_fingerprint()
+        if probe_file:
+            self._generate_fingerprint()
     
     def _get_basic_info(self):
         """获取文件基本信息"""
@@ -100,9 +124,12 @@ class VideoInfo:
         except (OSError, IOError):
             pass
     
-    def _extract_video_code(self):
+    def _extract_video_code(self, code_recognizer=None):
         """提取视频编码"""
-        self.video_code = extract_video_code(self.filename)
+        if code_recognizer is not None:
+            self.video_code = code_recognizer.extract(self.filename)
+        else:
+            self.video_code = extract_video_code(self.filename)
     
     def _generate_fingerprint(self):
         """生成文件指纹"""
@@ -135,6 +162,11 @@ class VideoInfo:
         fingerprint_string = '|'.join(fingerprint_data)
         self.file_fingerprint = hashlib.md5(fingerprint_string.encode('utf-8')).hexdigest()
     
+    @property
+    def canonical_video_code(self) -> Optional[str]:
+        """规范形式的视频编码（如 abc_00123 -> ABC-123），用于跨写法匹配"""
+        return canonicalize_video_code(self.video_code)
+    
     @property
     def resolution(self) -> Optional[str]:
         """获取分辨率字符串"""
@@ -163,7 +195,7 @@ class VideoInfo:
     @file_status.setter
     def file_status(self, value: str):
         """设置文件状态，验证有效性"""
-        valid_statuses = ['present', 'missing', 'ignore', 'replaced']
+        valid_statuses = ['present', 'missing', 'ignore', 'replaced', 'offline']
         if value not in valid_statuses:
             raise ValueError(f"Invalid file status '{value}'. Valid statuses are: {valid_statuses}")
         self._file_status = value
@@ -196,9 +228,14 @@ class VideoInfo:
 class VideoMetadataExtractor:
     """视频元数据提取器"""
     
-    def __init__(self):
-        """初始化提取器"""
-        pass
+    def __init__(self, code_recognizer=None):
+        """
+        初始化提取器
+        
+        Args:
+            code_recognizer: 编码识别器（如 PrefixCodeRecognizer），None时使用默认正则规则
+        """
+        self.code_recognizer = code_recognizer
     
     def extract_metadata(self, file_path: str) -> VideoInfo:
         """
@@ -216,7 +253,7 @@ class VideoMetadataExtractor:
         if not os.path.exists(file_path):
             raise FileNotFoundError(f"Video file not found: {file_path}")
         
-        video_info = VideoInfo(file_path)
+        video_info = VideoInfo(file_path, code_recognizer=self.code_recognizer)
         
         # 尝试使用ffprobe提取详细信息
         try:
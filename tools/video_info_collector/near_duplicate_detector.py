@@ -0,0 +1,217 @@
+"""
+全库近似重复检测模块
+
+把 video_info 中的时长、文件大小、像素数三列载入 NumPy 数组，按时长分桶，
+在桶内（以及相邻桶之间）向量化计算两两相似度，找出不依赖 video_code 的近似重复文件簇，
+例如以不同编号或无编号保存的重新编码版本。
+
+相似度权重与 SmartMergeManager._calculate_similarity 一致（大小0.3、时长0.3、分辨率0.2），
+由于不比较 video_code，按实际参与比较的权重归一化。
+"""
+
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+try:
+    from .sqlite_storage import SQLiteStorage
+except ImportError:
+    from sqlite_storage import SQLiteStorage
+
+
+@dataclass
+class DuplicateCluster:
+    """近似重复文件簇"""
+    video_ids: List[int]
+    file_paths: List[str] = field(default_factory=list)
+    video_codes: List[Optional[str]] = field(default_factory=list)
+    max_similarity: float = 0.0
+
+    @property
+    def size(self) -> int:
+        """簇内文件数"""
+        return len(self.video_ids)
+
+
+class NearDuplicateDetector:
+    """基于时长分桶和向量化相似度计算的近似重复检测器"""
+
+    SIZE_WEIGHT = 0.3
+    DURATION_WEIGHT = 0.3
+    RESOLUTION_WEIGHT = 0.2
+
+    def __init__(self, storage: SQLiteStorage, threshold: float = 0.98,
+                 duration_tolerance: float = 0.5, block_size: int = 2048):
+        """
+        初始化近似重复检测器
+
+        Args:
+            storage: SQLite存储对象
+            threshold: 判定为近似重复的相似度阈值 (0-1)
+            duration_tolerance: 时长差容忍度（秒），同时作为分桶宽度
+            block_size: 超大桶按行分块计算，限制单次相似度矩阵的大小
+        """
+        self.storage = storage
+        self.threshold = threshold
+        self.duration_tolerance = max(duration_tolerance, 1e-6)
+        self.block_size = block_size
+
+    def _load_columns(self, include_missing: bool) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+        """载入 id / 时长 / 大小 / 像素数 四列，按时长排序"""
+        statuses = ('present', 'missing') if include_missing else ('present',)
+        placeholders = ','.join('?' * len(statuses))
+        cursor = self.storage.connection.cursor()
+        cursor.execute(f"""
+            SELECT id, duration, COALESCE(file_size, 0), COALESCE(width, 0) * COALESCE(height, 0)
+            FROM video_info
+            WHERE duration > 0 AND file_status IN ({placeholders})
+            ORDER BY duration
+        """, statuses)
+        rows = cursor.fetchall()
+        if not rows:
+            empty = np.empty(0)
+            return empty.astype(np.int64), empty, empty, empty
+
+        data = np.array([tuple(row) for row in rows], dtype=np.float64)
+        return data[:, 0].astype(np.int64), data[:, 1], data[:, 2], data[:, 3]
+
+    def _pair_similarity(self, duration_a, size_a, pixels_a, duration_b, size_b, pixels_b) -> np.ndarray:
+        """
+        计算两组记录之间的相似度矩阵（行为a，列为b）
+
+        缺失值（0）不参与对应维度的比较，与 _calculate_similarity 的处理方式一致。
+        """
+        score = np.zeros((len(duration_a), len(duration_b)))
+        weight = np.zeros_like(score)
+
+        for values_a, values_b, dimension_weight in (
+            (size_a, size_b, self.SIZE_WEIGHT),
+            (duration_a, duration_b, self.DURATION_WEIGHT),
+            (pixels_a, pixels_b, self.RESOLUTION_WEIGHT),
+        ):
+            a = values_a[:, None]
+            b = values_b[None, :]
+            valid = (a > 0) & (b > 0)
+            largest = np.maximum(a, b)
+            with np.errstate(divide='ignore', invalid='ignore'):
+                similarity = np.where(valid, 1.0 - np.abs(a - b) / largest, 0.0)
+            score += similarity * dimension_weight
+            weight += valid * dimension_weight
+
+        with np.errstate(divide='ignore', invalid='ignore'):
+            return np.where(weight > 0, score / weight, 0.0)
+
+    def find_pairs(self, include_missing: bool = False) -> List[Tuple[int, int, float]]:
+        """
+        找出相似度超过阈值的记录对
+
+        Args:
+            include_missing: 是否包含missing状态的记录
+
+        Returns:
+            List[Tuple[int, int, float]]: (video_id_a, video_id_b, similarity) 列表
+        """
+        ids, durations, sizes, pixels = self._load_columns(include_missing)
+        if len(ids) < 2:
+            return []
+
+        # 已按时长排序，桶 b 的候选为桶 b 及桶 b+1 内的记录，可覆盖所有时长差在容忍度内的记录对
+        buckets = np.floor(durations / self.duration_tolerance).astype(np.int64)
+        bucket_values, bucket_starts = np.unique(buckets, return_index=True)
+        bucket_ends = np.append(bucket_starts[1:], len(ids))
+
+        pairs: List[Tuple[int, int, float]] = []
+        for index, bucket in enumerate(bucket_values):
+            start, end = bucket_starts[index], bucket_ends[index]
+            candidate_end = end
+            if index + 1 < len(bucket_values) and bucket_values[index + 1] == bucket + 1:
+                candidate_end = bucket_ends[index + 1]
+            if candidate_end - start < 2:
+                continue
+
+            for block_start in range(start, end, self.block_size):
+                block_end = min(block_start + self.block_size, end)
+                # 只与排序位置在自己之后的记录比较，避免重复计数
+                column_start = block_start
+                similarity = self._pair_similarity(
+                    durations[block_start:block_end], sizes[block_start:block_end],
+                    pixels[block_start:block_end],
+                    durations[column_start:candidate_end], sizes[column_start:candidate_end],
+                    pixels[column_start:candidate_end],
+                )
+                row_offsets = np.arange(block_start, block_end)[:, None]
+                column_offsets = np.arange(column_start, candidate_end)[None, :]
+                close = np.abs(durations[block_start:block_end, None]
+                               - durations[None, column_start:candidate_end]) <= self.duration_tolerance
+                mask = (column_offsets > row_offsets) & close & (similarity >= self.threshold)
+
+                rows, columns = np.nonzero(mask)
+                for row, column in zip(rows, columns):
+                    pairs.append((int(ids[block_start + row]), int(ids[column_start + column]),
+                                  float(similarity[row, column])))
+
+        return pairs
+
+    def find_clusters(self, include_missing: bool = False) -> List[DuplicateCluster]:
+        """
+        找出近似重复文件簇（相似关系按传递闭包合并）
+
+        Args:
+            include_missing: 是否包含missing状态的记录
+
+        Returns:
+            List[DuplicateCluster]: 按簇大小降序排列的近似重复簇
+        """
+        pairs = self.find_pairs(include_missing)
+        if not pairs:
+            return []
+
+        parent: Dict[int, int] = {}
+
+        def find(node: int) -> int:
+            parent.setdefault(node, node)
+            while parent[node] != node:
+                parent[node] = parent[parent[node]]
+                node = parent[node]
+            return node
+
+        best: Dict[int, float] = {}
+        for id_a, id_b, similarity in pairs:
+            root_a, root_b = find(id_a), find(id_b)
+            if root_a != root_b:
+                parent[root_b] = root_a
+                best[root_a] = max(best.get(root_a, 0.0), best.pop(root_b, 0.0))
+            best[root_a] = max(best.get(root_a, 0.0), similarity)
+
+        members: Dict[int, List[int]] = {}
+        for node in parent:
+            members.setdefault(find(node), []).append(node)
+
+        details = self._load_details(list(parent))
+        clusters = []
+        for root, video_ids in members.items():
+            video_ids.sort()
+            clusters.append(DuplicateCluster(
+                video_ids=video_ids,
+                file_paths=[details[video_id][0] for video_id in video_ids],
+                video_codes=[details[video_id][1] for video_id in video_ids],
+                max_similarity=best.get(root, 0.0),
+            ))
+
+        clusters.sort(key=lambda cluster: (-cluster.size, cluster.file_paths[0]))
+        return clusters
+
+    def _load_details(self, video_ids: List[int]) -> Dict[int, Tuple[str, Optional[str]]]:
+        """批量加载簇内记录的路径和video_code"""
+        details: Dict[int, Tuple[str, Optional[str]]] = {}
+        cursor = self.storage.connection.cursor()
+        for offset in range(0, len(video_ids), 500):
+            chunk = video_ids[offset:offset + 500]
+            cursor.execute(
+                f"SELECT id, file_path, video_code FROM video_info WHERE id IN ({','.join('?' * len(chunk))})",
+                chunk
+            )
+            for row in cursor.fetchall():
+                details[row[0]] = (row[1], row[2])
+        return details
@@ -0,0 +1,180 @@
+"""
+路径更新事件模块
+
+filename_formatter 重命名文件后，数据库中的记录仍指向旧路径；下一次合并只能靠指纹找回，
+而指纹包含文件名，重命名后的文件会被当作新文件重新探测。
+
+filename_formatter --emit-path-updates 把每次成功的重命名写成路径更新事件（与操作日志相同的
+JSON Lines 格式），本模块读取这些事件并批量更新 video_info 中的路径、文件名、video_code 和指纹，
+同时在 merge_history 中记录 update_path 事件。整个过程只读写数据库，不访问视频文件，
+也不调用 ffprobe。
+"""
+
+import json
+import os
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+try:
+    from .sqlite_storage import SQLiteStorage
+    from .code_recognizer import PrefixCodeRecognizer
+    from .fingerprint_manager import FingerprintManager
+except ImportError:
+    from sqlite_storage import SQLiteStorage
+    from code_recognizer import PrefixCodeRecognizer
+    from fingerprint_manager import FingerprintManager
+
+
+def iter_path_updates(events_file: str) -> Iterator[Tuple[str, str]]:
+    """
+    按时间顺序读取路径更新事件
+
+    读取 filename_formatter 的 JSON Lines 操作日志/路径更新文件（source_path、target_path），
+    无法解析的行被跳过。
+
+    Args:
+        events_file: 事件文件路径
+
+    Returns:
+        Iterator[Tuple[str, str]]: (旧路径, 新路径)
+    """
+    with open(events_file, 'r', encoding='utf-8') as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                event = json.loads(line)
+            except json.JSONDecodeError:
+                continue
+            if not isinstance(event, dict) or event.get('operation_type', 'rename') != 'rename':
+                continue
+            old_path = event.get('source_path')
+            new_path = event.get('target_path')
+            if old_path and new_path:
+                yield old_path, new_path
+
+
+def collapse_path_updates(updates: Iterable[Tuple[str, str]]) -> Dict[str, str]:
+    """
+    把按时间顺序的重命名序列合并为"最初路径 -> 最终路径"的映射
+
+    同一文件被多次重命名（A -> B -> C）时只保留 A -> C，改回原名的文件被去掉。
+
+    Args:
+        updates: (旧路径, 新路径) 序列
+
+    Returns:
+        Dict[str, str]: 最初路径到最终路径的映射
+    """
+    final: Dict[str, str] = {}
+    origin_of: Dict[str, str] = {}
+    for old_path, new_path in updates:
+        origin = origin_of.pop(old_path, old_path)
+        final[origin] = new_path
+        origin_of[new_path] = origin
+    return {origin: new_path for origin, new_path in final.items() if origin != new_path}
+
+
+@dataclass
+class PathUpdateResult:
+    """路径更新的结果"""
+    requested: int = 0
+    updated: int = 0
+    not_found: int = 0
+    conflicts: List[Tuple[str, str]] = field(default_factory=list)
+    code_changes: int = 0
+
+
+class PathUpdateApplier:
+    """把路径更新事件批量应用到数据库"""
+
+    def __init__(self, storage: SQLiteStorage, code_recognizer: Optional[PrefixCodeRecognizer] = None):
+        """
+        初始化
+
+        Args:
+            storage: SQLite存储对象
+            code_recognizer: 从新文件名提取video_code的识别器，默认用主列表中的已知前缀构建
+        """
+        self.storage = storage
+        self.code_recognizer = code_recognizer or PrefixCodeRecognizer.from_storage(storage)
+        self.fingerprint_manager = FingerprintManager()
+
+    def _fingerprint(self, row: Dict, filename: str, video_code: Optional[str]) -> Optional[str]:
+        """按新文件名重新计算指纹（文件大小和创建时间取自数据库，与重新扫描得到的指纹一致）"""
+        if row['file_size'] is None or not row['created_time']:
+            return row['file_fingerprint']
+        try:
+            created_time = datetime.fromisoformat(row['created_time'])
+        except ValueError:
+            return row['file_fingerprint']
+        return self.fingerprint_manager.generate_lightweight_fingerprint(
+            filename, row['file_size'], created_time, video_code
+        )
+
+    def apply(self, updates: Iterable[Tuple[str, str]], dry_run: bool = False,
+              scan_session_id: Optional[str] = None) -> PathUpdateResult:
+        """
+        批量应用路径更新
+
+        Args:
+            updates: 按时间顺序的 (旧路径, 新路径) 序列
+            dry_run: 只统计，不修改数据库
+            scan_session_id: 写入 merge_history 的会话ID
+
+        Returns:
+            PathUpdateResult: 更新结果
+        """
+        mapping = collapse_path_updates(
+            (os.path.abspath(old_path), os.path.abspath(new_path)) for old_path, new_path in updates
+        )
+        result = PathUpdateResult(requested=len(mapping))
+        rows = self.storage.get_videos_for_path_updates(mapping)
+        result.not_found = len(mapping) - len(rows)
+
+        # 新路径已被数据库中另一条不会移走的记录占用时跳过；被跳过的记录不再移走，需重新检查
+        moving = {row['id'] for row in rows}
+        while True:
+            blocked = {row['id'] for row in rows
+                       if row['occupant_id'] is not None and row['occupant_id'] not in moving}
+            if not blocked:
+                break
+            result.conflicts.extend((row['file_path'], row['new_path']) for row in rows if row['id'] in blocked)
+            rows = [row for row in rows if row['id'] not in blocked]
+            moving -= blocked
+
+        changes = []
+        for row in rows:
+            filename = os.path.basename(row['new_path'])
+            video_code = self.code_recognizer.extract(filename) or row['video_code']
+            if video_code != row['video_code']:
+                result.code_changes += 1
+            changes.append({
+                'id': row['id'],
+                'old_path': row['file_path'],
+                'new_path': row['new_path'],
+                'filename': filename,
+                'old_video_code': row['video_code'],
+                'video_code': video_code,
+                'file_fingerprint': self._fingerprint(row, filename, video_code),
+            })
+
+        result.updated = len(changes) if dry_run else self.storage.bulk_update_video_paths(changes, scan_session_id)
+        return result
+
+    def apply_file(self, events_file: str, dry_run: bool = False,
+                   scan_session_id: Optional[str] = None) -> PathUpdateResult:
+        """
+        读取事件文件并批量应用
+
+        Args:
+            events_file: filename_formatter --emit-path-updates 生成的文件（或操作日志）
+            dry_run: 只统计，不修改数据库
+            scan_session_id: 写入 merge_history 的会话ID
+
+        Returns:
+            PathUpdateResult: 更新结果
+        """
+        return self.apply(iter_path_updates(events_file), dry_run=dry_run, scan_session_id=scan_session_id)
@@ -0,0 +1,254 @@
+"""
+单次遍历的验证扫描模块
+
+状态检查：对所有非 ignore 记录只做一次批量状态检查（按目录分组 scandir），
+同一份结果同时用于状态统计、不一致检测和自动修复，不再对每个文件重复检查三次。
+
+深度检查（可选，线程池并行执行，可按比例抽样限制开销）：
+- header: 读取文件头校验容器格式签名，并用已打开文件的 fstat 比较大小与数据库记录
+- probe:  重新运行 ffprobe，确认时长和大小仍与数据库记录一致；ffprobe 不可用时退回 header 检查
+"""
+
+import math
+import os
+import random
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Tuple
+
+try:
+    from .metadata import VideoInfo, VideoMetadataExtractor
+    from .file_status_manager import FileStatusManager, FileStatus
+except ImportError:
+    from metadata import VideoInfo, VideoMetadataExtractor
+    from file_status_manager import FileStatusManager, FileStatus
+
+
+DEEP_CHECK_MODES = ('header', 'probe')
+
+HEADER_SIZE = 64
+
+# MP4/MOV 系列文件开头常见的顶层 box 类型
+_ISO_BMFF_BOXES = (b'ftyp', b'moov', b'mdat', b'free', b'skip', b'wide', b'pnot')
+
+# 各扩展名对应的容器格式
+_CONTAINER_BY_EXTENSION = {
+    '.mp4': 'iso_bmff', '.m4v': 'iso_bmff', '.mov': 'iso_bmff', '.3gp': 'iso_bmff',
+    '.mkv': 'matroska', '.webm': 'matroska',
+    '.avi': 'avi',
+    '.flv': 'flv',
+    '.wmv': 'asf', '.asf': 'asf',
+    '.ts': 'mpeg_ts', '.m2ts': 'mpeg_ts', '.mts': 'mpeg_ts',
+    '.mpg': 'mpeg_ps', '.mpeg': 'mpeg_ps', '.vob': 'mpeg_ps',
+    '.rm': 'realmedia', '.rmvb': 'realmedia',
+}
+
+
+def validate_container_header(header: bytes, extension: str) -> bool:
+    """
+    按扩展名校验文件头的容器格式签名
+
+    Args:
+        header: 文件开头的字节（至少 HEADER_SIZE 字节时判断最准确）
+        extension: 小写扩展名（含点）
+
+    Returns:
+        bool: 签名有效；未知扩展名只要求文件非空
+    """
+    if not header:
+        return False
+
+    container = _CONTAINER_BY_EXTENSION.get(extension)
+    if container == 'iso_bmff':
+        return header[4:8] in _ISO_BMFF_BOXES
+    if container == 'matroska':
+        return header.startswith(b'\x1a\x45\xdf\xa3')
+    if container == 'avi':
+        return header.startswith(b'RIFF') and header[8:12] == b'AVI '
+    if container == 'flv':
+        return header.startswith(b'FLV')
+    if container == 'asf':
+        return header.startswith(b'\x30\x26\xb2\x75\x8e\x66\xcf\x11')
+    if container == 'mpeg_ts':
+        # m2ts 每个包前有4字节时间码
+        return header[0:1] == b'\x47' or header[4:5] == b'\x47'
+    if container == 'mpeg_ps':
+        return header.startswith(b'\x00\x00\x01\xba')
+    if container == 'realmedia':
+        return header.startswith(b'.RMF')
+    return True
+
+
+class ScanVerifier:
+    """单次遍历状态检查 + 可选并行深度检查的验证器"""
+
+    def __init__(self, status_manager: Optional[FileStatusManager] = None,
+                 metadata_extractor: Optional[VideoMetadataExtractor] = None,
+                 max_workers: int = 8, duration_tolerance: float = 1.0,
+                 seed: Optional[int] = None):
+        """
+        初始化验证器
+
+        Args:
+            status_manager: 文件状态管理器，状态变更通过它记录
+            metadata_extractor: probe 模式使用的元数据提取器
+            max_workers: 深度检查的并行线程数
+            duration_tolerance: probe 模式下时长允许的误差（秒）
+            seed: 抽样随机种子，便于复现
+        """
+        self.status_manager = status_manager or FileStatusManager()
+        self.metadata_extractor = metadata_extractor or VideoMetadataExtractor()
+        self.max_workers = max_workers
+        self.duration_tolerance = duration_tolerance
+        self._random = random.Random(seed)
+
+    def check_status(self, videos: List[VideoInfo]) -> Tuple[Dict, List[Dict], Dict[str, int]]:
+        """
+        一次批量检查所有非 ignore 记录，统计状态、找出不一致并在内存中修复
+
+        Args:
+            videos: 视频信息列表（状态会被原地更新）
+
+        Returns:
+            Tuple[Dict, List[Dict], Dict[str, int]]: (状态统计, 不一致列表, 修复统计)
+        """
+        status_check = {
+            'checked': 0,
+            'present': 0,
+            'missing': 0,
+            'ignore': 0,
+            'offline': 0,
+            'status_changes': []
+        }
+        checked = [video for video in videos if video.file_status != FileStatus.IGNORE.value]
+        actual_statuses = self.status_manager.check_files_status(video.file_path for video in checked)
+
+        status_check['checked'] = len(videos)
+        status_check['ignore'] = len(videos) - len(checked)
+
+        inconsistencies = []
+        for video in checked:
+            actual_status = actual_statuses[video.file_path]
+            status_check[actual_status.value] += 1
+            if actual_status.value == video.file_status:
+                continue
+
+            inconsistencies.append({
+                'file_path': video.file_path,
+                'recorded_status': video.file_status,
+                'actual_status': actual_status.value,
+                'video_code': video.video_code,
+                'file_size': video.file_size
+            })
+            status_check['status_changes'].append({
+                'file_path': video.file_path,
+                'old_status': video.file_status,
+                'new_status': actual_status.value
+            })
+            self.status_manager.update_video_status(video, actual_status, "verify")
+
+        fix_results = {
+            'inconsistencies_found': len(inconsistencies),
+            'fixed_count': len(inconsistencies)
+        }
+        return status_check, inconsistencies, fix_results
+
+    def _sample(self, videos: List[VideoInfo], sample_rate: float) -> List[VideoInfo]:
+        """按比例随机抽样（至少抽取1个）"""
+        if sample_rate >= 1.0 or not videos:
+            return videos
+        count = max(1, math.ceil(len(videos) * max(sample_rate, 0.0)))
+        return self._random.sample(videos, min(count, len(videos)))
+
+    def check_header(self, video: VideoInfo) -> Tuple[str, Optional[str]]:
+        """
+        读取文件头校验签名，并比较大小
+
+        Args:
+            video: 视频信息对象
+
+        Returns:
+            Tuple[str, Optional[str]]: (valid/corrupted/inaccessible/mismatched, 详情)
+        """
+        try:
+            with open(video.file_path, 'rb') as f:
+                header = f.read(HEADER_SIZE)
+                actual_size = os.fstat(f.fileno()).st_size
+        except (OSError, ValueError):
+            return 'inaccessible', None
+
+        extension = os.path.splitext(video.file_path)[1].lower()
+        if not validate_container_header(header, extension):
+            return 'corrupted', 'invalid container header'
+        if video.file_size and actual_size != video.file_size:
+            return 'mismatched', f'size {video.file_size} -> {actual_size}'
+        return 'valid', None
+
+    def check_probe(self, video: VideoInfo) -> Tuple[str, Optional[str]]:
+        """
+        重新运行ffprobe，比较时长和大小
+
+        Args:
+            video: 视频信息对象
+
+        Returns:
+            Tuple[str, Optional[str]]: (valid/corrupted/inaccessible/mismatched, 详情)
+        """
+        if not os.path.isfile(video.file_path):
+            return 'inaccessible', None
+        metadata = self.metadata_extractor._run_ffprobe(video.file_path)
+        if not metadata:
+            # ffprobe 不可用或无法解析时退回文件头检查
+            return self.check_header(video)
+
+        probed = VideoInfo(video.file_path, probe_file=False)
+        self.metadata_extractor._parse_metadata(probed, metadata)
+        if video.duration and probed.duration is not None \
+                and abs(probed.duration - video.duration) > self.duration_tolerance:
+            return 'mismatched', f'duration {video.duration} -> {probed.duration}'
+        if video.file_size and probed.file_size is not None and probed.file_size != video.file_size:
+            return 'mismatched', f'size {video.file_size} -> {probed.file_size}'
+        return 'valid', None
+
+    def check_integrity(self, videos: List[VideoInfo], mode: str = 'header',
+                        sample_rate: float = 1.0) -> Dict[str, any]:
+        """
+        并行深度检查 present 状态的文件
+
+        Args:
+            videos: 视频信息列表
+            mode: 'header' 校验容器签名和大小；'probe' 重新探测时长和大小
+            sample_rate: 抽样比例 (0-1]，1表示检查全部
+
+        Returns:
+            Dict: 深度检查结果
+        """
+        if mode not in DEEP_CHECK_MODES:
+            raise ValueError(f"未知的深度检查模式: {mode}，可选: {DEEP_CHECK_MODES}")
+
+        present = [video for video in videos if video.file_status == FileStatus.PRESENT.value]
+        sampled = self._sample(present, sample_rate)
+        results = {
+            'mode': mode,
+            'checked': len(sampled),
+            'skipped': len(present) - len(sampled),
+            'valid': 0,
+            'corrupted': 0,
+            'inaccessible': 0,
+            'mismatched': 0,
+            'corrupted_files': [],
+            'mismatched_files': []
+        }
+        if not sampled:
+            return results
+
+        check = self.check_probe if mode == 'probe' else self.check_header
+        with ThreadPoolExecutor(max_workers=max(1, min(self.max_workers, len(sampled)))) as executor:
+            outcomes = list(executor.map(check, sampled))
+
+        for video, (outcome, detail) in zip(sampled, outcomes):
+            results[outcome] += 1
+            if outcome in ('corrupted', 'inaccessible'):
+                results['corrupted_files'].append(video.file_path)
+            elif outcome == 'mismatched':
+                results['mismatched_files'].append({'file_path': video.file_path, 'detail': detail})
+        return results
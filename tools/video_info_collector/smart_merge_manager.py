@@ -13,11 +13,13 @@ try:
     from .fingerprint_manager import FingerprintManager
     from .file_status_manager import FileStatusManager, FileStatus
     from .sqlite_storage import SQLiteStorage
+    from .status_history import StatusHistoryWriter
 except ImportError:
     from metadata import VideoInfo
     from fingerprint_manager import FingerprintManager
     from file_status_manager import FileStatusManager, FileStatus
     from sqlite_storage import SQLiteStorage
+    from status_history import StatusHistoryWriter
 
 
 class MergeAction:
@@ -38,17 +40,30 @@ class SmartMergeManager:
     def __init__(self, storage: SQLiteStorage):
         self.storage = storage
         self.fingerprint_manager = FingerprintManager()
-        self.status_manager = FileStatusManager()
+        # 每条状态变更立即写入：写入发生在动作的SAVEPOINT内，动作失败时随之回滚，由外层事务统一提交
+        self.status_history = StatusHistoryWriter(storage, buffer_size=1)
+        self.status_manager = FileStatusManager(history_writer=self.status_history)
         self.merge_actions: List[MergeAction] = []
+        self.merge_failures: List[Dict[str, str]] = []
+        self._touched_video_codes: Set[str] = set()
     
     def analyze_merge_candidates(self, new_videos: List[VideoInfo], 
-                               existing_videos: List[VideoInfo]) -> Dict[str, List]:
+                               existing_videos: List[VideoInfo],
+                               scan_roots: Optional[List[str]] = None,
+                               listed_paths: Optional[Set[str]] = None,
+                               max_workers: int = 16) -> Dict[str, List]:
         """
         分析合并候选项
         
+        丢失文件检测只覆盖扫描根目录下的记录（未知扫描根目录时覆盖全部记录）：
+        先与本次扫描列出的路径做集合差，只有差集中的路径才用并行stat探测确认是否真的不存在。
+        
         Args:
             new_videos: 新扫描的视频列表
             existing_videos: 数据库中现有的视频列表
+            scan_roots: 本次扫描的根目录，None表示未知，检查全部现有记录
+            listed_paths: 本次扫描列出的文件路径，None时使用新视频的路径
+            max_workers: 并行探测文件状态的线程数
             
         Returns:
             Dict: 分析结果
@@ -86,19 +101,60 @@ class SmartMergeManager:
             if action:
                 results[action.action_type].append(action)
         
-        # 检查现有视频中的丢失文件
-        for existing_video in existing_videos:
-            if existing_video.file_status != FileStatus.IGNORE.value:
-                actual_status = self.status_manager.check_file_status(existing_video.file_path)
-                if actual_status == FileStatus.MISSING and existing_video.file_status != FileStatus.MISSING.value:
-                    action = MergeAction(
-                        'mark_missing', existing_video, 
-                        reason=f"File not found during scan: {existing_video.file_path}"
-                    )
-                    results['mark_missing'].append(action)
+        # 检查扫描范围内的丢失文件
+        results['mark_missing'] = self._find_missing_videos(
+            new_videos, existing_videos, scan_roots, listed_paths, max_workers
+        )
         
         return results
     
+    @staticmethod
+    def _is_under_roots(file_path: str, roots: List[str]) -> bool:
+        """判断路径是否位于任一根目录之下"""
+        path = os.path.abspath(file_path)
+        for root in roots:
+            if path == root or path.startswith(root if root.endswith(os.sep) else root + os.sep):
+                return True
+        return False
+    
+    def _find_missing_videos(self, new_videos: List[VideoInfo], existing_videos: List[VideoInfo],
+                             scan_roots: Optional[List[str]], listed_paths: Optional[Set[str]],
+                             max_workers: int) -> List[MergeAction]:
+        """
+        找出扫描范围内已丢失的现有视频
+        
+        Returns:
+            List[MergeAction]: mark_missing 动作列表
+        """
+        # 扫描根目录未知时不做推断：仍在的文件所在目录会漏掉整个被删除的子目录
+        roots = None if scan_roots is None else [os.path.abspath(root) for root in scan_roots]
+        
+        if listed_paths is None:
+            listed_paths = {video.file_path for video in new_videos}
+        
+        candidates = [
+            video for video in existing_videos
+            if video.file_status not in (FileStatus.IGNORE.value, FileStatus.MISSING.value)
+            and video.file_path not in listed_paths
+            and (roots is None or self._is_under_roots(video.file_path, roots))
+        ]
+        if not candidates:
+            return []
+        
+        # 扫描列表可能被扩展名或大小过滤，差集中的路径还需确认；
+        # 所在卷离线的文件探测结果为 OFFLINE，不会被误标为丢失
+        probed = self.status_manager.probe_file_status(
+            (video.file_path for video in candidates), max_workers=max_workers
+        )
+        return [
+            MergeAction(
+                'mark_missing', video,
+                reason=f"File not found during scan: {video.file_path}"
+            )
+            for video in candidates
+            if probed[video.file_path] == FileStatus.MISSING
+        ]
+    
     def _determine_merge_action(self, new_video: VideoInfo, 
                               existing_by_fingerprint: Dict, 
                               existing_by_video_code: Dict, 
@@ -319,14 +375,30 @@ class SmartMergeManager:
         
         return False
     
+    # 执行顺序：(动作类型, 处理方法名, 统计键)
+    _ACTION_HANDLERS = [
+        ('insert_new', '_apply_insert_new', 'inserted'),
+        ('update_path', '_apply_update_path', 'updated'),
+        ('mark_missing', '_apply_mark_missing', 'marked_missing'),
+        ('mark_replaced', '_apply_mark_replaced', 'marked_replaced'),
+        ('duplicate_detection', '_apply_duplicate_detection', 'duplicates_detected'),
+    ]
+    
     def execute_merge_plan(self, merge_results: Dict[str, List], 
-                          scan_id: Optional[int] = None) -> Dict[str, int]:
+                          scan_id: Optional[int] = None,
+                          chunk_size: Optional[int] = None,
+                          scan_ids: Optional[Dict[str, int]] = None) -> Dict[str, int]:
         """
         执行合并计划
         
+        所有动作在事务中执行，每个动作包在独立的SAVEPOINT里：单个动作失败只回滚该动作，
+        并记录到 merge_failures；其余动作在事务结束时一次提交。
+        
         Args:
             merge_results: 合并分析结果
             scan_id: 扫描ID
+            chunk_size: 每个事务包含的动作数，None表示整个计划在一个事务中完成
+            scan_ids: 按文件路径指定扫描ID（多个CSV合并为一个计划时使用），未指定的路径使用scan_id
             
         Returns:
             Dict[str, int]: 执行统计
@@ -339,148 +411,156 @@ class SmartMergeManager:
             'duplicates_detected': 0,
             'errors': 0
         }
+        self.merge_failures = []
         
-        # 执行新插入
-        for action in merge_results.get('insert_new', []):
-            try:
-                video_id = self.storage.insert_video_info(action.video_info)
-                if video_id:
-                    # 更新master list
-                    self._update_master_list(action.video_info, 'insert_new')
-                    # 记录merge history
-                    if scan_id:
-                        self.storage.add_merge_event(
-                            'insert_new', 
-                            action.video_info.video_code,  # 传递正确的video_code
-                            None,  # old_path
-                            action.video_info.file_path,  # new_path
-                            None,  # details
-                            scan_id  # scan_session_id
-                        )
-                    stats['inserted'] += 1
-            except Exception as e:
-                print(f"Error inserting video {action.video_info.file_path}: {e}")
-                stats['errors'] += 1
-        
-        # 执行路径更新
-        for action in merge_results.get('update_path', []):
-            try:
-                # 更新现有记录
-                self._update_existing_video(action.target_info, action.video_info)
-                # 持久化到数据库
-                if hasattr(action.target_info, 'id') and action.target_info.id:
-                    update_data = {
-                        'filename': action.target_info.filename,
-                        'file_size': action.target_info.file_size,
-                        'duration': action.target_info.duration,
-                        'width': action.target_info.width,
-                        'height': action.target_info.height,
-                        'video_codec': action.target_info.video_codec,
-                        'audio_codec': action.target_info.audio_codec,
-                        'bit_rate': action.target_info.bit_rate,
-                        'frame_rate': action.target_info.frame_rate,
-                        'file_status': action.target_info.file_status,
-                        'logical_path': action.target_info.logical_path
-                    }
-                    self.storage.update_video_info(action.target_info.id, update_data)
-                # 记录merge history
-                if scan_id:
-                    self.storage.add_merge_event(
-                        'update_path',
-                        action.target_info.video_code,  # video_code
-                        action.target_info.file_path,   # old_path
-                        action.video_info.file_path,    # new_path
-                        None,  # details
-                        scan_id  # scan_session_id
-                    )
-                stats['updated'] += 1
-            except Exception as e:
-                print(f"Error updating video {action.video_info.file_path}: {e}")
-                stats['errors'] += 1
-        
-        # 标记丢失文件
-        for action in merge_results.get('mark_missing', []):
-            try:
-                self.status_manager.update_video_status(
-                    action.video_info, FileStatus.MISSING, action.reason
-                )
-                # 持久化到数据库
-                if hasattr(action.video_info, 'id') and action.video_info.id:
-                    update_data = {'file_status': action.video_info.file_status}
-                    self.storage.update_video_info(action.video_info.id, update_data)
-                # 记录merge history
-                if scan_id:
-                    self.storage.add_merge_event(
-                        'mark_missing',
-                        action.video_info.video_code,  # video_code
-                        action.video_info.file_path,   # old_path
-                        None,  # new_path
-                        None,  # details
-                        scan_id  # scan_session_id
-                    )
-                stats['marked_missing'] += 1
-            except Exception as e:
-                print(f"Error marking video as missing {action.video_info.file_path}: {e}")
-                stats['errors'] += 1
-        
-        # 标记被替换文件
-        for action in merge_results.get('mark_replaced', []):
-            try:
-                # 标记旧文件为REPLACED状态
-                self.status_manager.update_video_status(
-                    action.target_info, FileStatus.REPLACED, action.reason
-                )
-                # 持久化到数据库
-                if hasattr(action.target_info, 'id') and action.target_info.id:
-                    update_data = {'file_status': action.target_info.file_status}
-                    self.storage.update_video_info(action.target_info.id, update_data)
-                # 插入新文件
-                video_id = self.storage.insert_video_info(action.video_info)
-                if video_id:
-                    # 更新master list（新文件）
-                    self._update_master_list(action.video_info, 'insert_new')
-                    # 更新master list计数（考虑被替换的文件）
-                    self._update_master_list(action.target_info, 'mark_replaced')
-                    # 记录merge history
-                    if scan_id:
-                        self.storage.add_merge_event(
-                            'mark_replaced',
-                            action.target_info.video_code,  # video_code
-                            action.target_info.file_path,   # old_path
-                            action.video_info.file_path,    # new_path
-                            None,  # details
-                            scan_id  # scan_session_id
-                        )
-                stats['marked_replaced'] += 1
-            except Exception as e:
-                print(f"Error marking video as replaced {action.target_info.file_path}: {e}")
-                stats['errors'] += 1
-        
-        # 处理重复检测
-        for action in merge_results.get('duplicate_detection', []):
-            try:
-                # 这里可以根据策略决定如何处理重复文件
-                # 例如：标记为重复、移动到特定目录、或者询问用户
-                print(f"Duplicate detected: {action.video_info.file_path} vs {action.target_info.file_path}")
-                stats['duplicates_detected'] += 1
-            except Exception as e:
-                print(f"Error handling duplicate {action.video_info.file_path}: {e}")
-                stats['errors'] += 1
+        planned = [
+            (action_type, getattr(self, handler_name), stat_key, action)
+            for action_type, handler_name, stat_key in self._ACTION_HANDLERS
+            for action in merge_results.get(action_type, [])
+        ]
+        if not planned:
+            return stats
+        
+        step = chunk_size or len(planned)
+        for start in range(0, len(planned), step):
+            self._touched_video_codes = set()
+            with self.storage.transaction():
+                for action_type, handler, stat_key, action in planned[start:start + step]:
+                    try:
+                        with self.storage.savepoint():
+                            action_scan_id = (scan_ids.get(action.video_info.file_path, scan_id)
+                                              if scan_ids else scan_id)
+                            applied = handler(action, action_scan_id)
+                        if applied:
+                            stats[stat_key] += 1
+                    except Exception as e:
+                        failed_path = (action.target_info.file_path if action_type == 'mark_replaced'
+                                       else action.video_info.file_path)
+                        print(f"Error applying {action_type} for {failed_path}: {e}")
+                        stats['errors'] += 1
+                        self.merge_failures.append({
+                            'action_type': action_type,
+                            'file_path': failed_path,
+                            'error': str(e)
+                        })
+                # 本批次涉及的video_code一次性刷新master list
+                self.storage.refresh_master_list_for_codes(self._touched_video_codes)
         
         return stats
     
+    def _apply_insert_new(self, action: MergeAction, scan_id: Optional[int]) -> bool:
+        """执行新插入，路径已存在时跳过"""
+        video_id = self.storage.insert_video_info(action.video_info)
+        if not video_id:
+            return False
+        # 更新master list
+        self._update_master_list(action.video_info, 'insert_new')
+        # 记录merge history
+        if scan_id:
+            self.storage.add_merge_event(
+                'insert_new', 
+                action.video_info.video_code,  # 传递正确的video_code
+                None,  # old_path
+                action.video_info.file_path,  # new_path
+                None,  # details
+                scan_id  # scan_session_id
+            )
+        return True
+    
+    def _apply_update_path(self, action: MergeAction, scan_id: Optional[int]) -> bool:
+        """执行路径更新"""
+        # 更新现有记录
+        self._update_existing_video(action.target_info, action.video_info)
+        # 持久化到数据库
+        if hasattr(action.target_info, 'id') and action.target_info.id:
+            update_data = {
+                'filename': action.target_info.filename,
+                'file_size': action.target_info.file_size,
+                'duration': action.target_info.duration,
+                'width': action.target_info.width,
+                'height': action.target_info.height,
+                'video_codec': action.target_info.video_codec,
+                'audio_codec': action.target_info.audio_codec,
+                'bit_rate': action.target_info.bit_rate,
+                'frame_rate': action.target_info.frame_rate,
+                'file_status': action.target_info.file_status,
+                'logical_path': action.target_info.logical_path
+            }
+            self.storage.update_video_info(action.target_info.id, update_data)
+        # 记录merge history
+        if scan_id:
+            self.storage.add_merge_event(
+                'update_path',
+                action.target_info.video_code,  # video_code
+                action.target_info.file_path,   # old_path
+                action.video_info.file_path,    # new_path
+                None,  # details
+                scan_id  # scan_session_id
+            )
+        return True
+    
+    def _apply_mark_missing(self, action: MergeAction, scan_id: Optional[int]) -> bool:
+        """标记丢失文件"""
+        self.status_manager.update_video_status(
+            action.video_info, FileStatus.MISSING, action.reason
+        )
+        # 持久化到数据库
+        if hasattr(action.video_info, 'id') and action.video_info.id:
+            update_data = {'file_status': action.video_info.file_status}
+            self.storage.update_video_info(action.video_info.id, update_data)
+        # 记录merge history
+        if scan_id:
+            self.storage.add_merge_event(
+                'mark_missing',
+                action.video_info.video_code,  # video_code
+                action.video_info.file_path,   # old_path
+                None,  # new_path
+                None,  # details
+                scan_id  # scan_session_id
+            )
+        return True
+    
+    def _apply_mark_replaced(self, action: MergeAction, scan_id: Optional[int]) -> bool:
+        """标记被替换文件并插入新文件，新文件插入失败时整体回滚"""
+        # 标记旧文件为REPLACED状态
+        self.status_manager.update_video_status(
+            action.target_info, FileStatus.REPLACED, action.reason
+        )
+        # 持久化到数据库
+        if hasattr(action.target_info, 'id') and action.target_info.id:
+            update_data = {'file_status': action.target_info.file_status}
+            self.storage.update_video_info(action.target_info.id, update_data)
+        # 插入新文件
+        video_id = self.storage.insert_video_info(action.video_info)
+        if not video_id:
+            raise ValueError(f"新文件已存在于数据库中: {action.video_info.file_path}")
+        # 更新master list（新文件）
+        self._update_master_list(action.video_info, 'insert_new')
+        # 更新master list计数（考虑被替换的文件）
+        self._update_master_list(action.target_info, 'mark_replaced')
+        # 记录merge history
+        if scan_id:
+            self.storage.add_merge_event(
+                'mark_replaced',
+                action.target_info.video_code,  # video_code
+                action.target_info.file_path,   # old_path
+                action.video_info.file_path,    # new_path
+                None,  # details
+                scan_id  # scan_session_id
+            )
+        return True
+    
+    def _apply_duplicate_detection(self, action: MergeAction, scan_id: Optional[int]) -> bool:
+        """处理重复检测"""
+        # 这里可以根据策略决定如何处理重复文件
+        # 例如：标记为重复、移动到特定目录、或者询问用户
+        print(f"Duplicate detected: {action.video_info.file_path} vs {action.target_info.file_path}")
+        return True
+    
     def _update_master_list(self, video_info: VideoInfo, event_type: str):
-        """更新master list"""
+        """记录受影响的video_code，master list在事务结束前统一批量刷新"""
         if video_info.video_code:
-            if event_type == 'mark_replaced':
-                # 对于替换事件，重新计算该video_code的文件计数
-                self.storage.update_master_list_file_count(video_info.video_code)
-            else:
-                # 对于其他事件，使用原有的upsert逻辑
-                self.storage.upsert_master_list_entry(
-                    video_info.video_code,
-                    video_info.file_fingerprint
-                )
+            self._touched_video_codes.add(video_info.video_code)
     
     def _update_existing_video(self, existing_video: VideoInfo, new_video: VideoInfo):
         """更新现有视频记录"""
@@ -0,0 +1,560 @@
+"""
+基于SQL集合运算的合并引擎
+
+将CSV批量载入临时暂存表（TEMP TABLE），通过 file_path、file_fingerprint、video_code
+上的索引连接完成 insert_new / update_path / mark_replaced / duplicate_detection 分类，
+再以少量 INSERT…SELECT / UPDATE…FROM 语句一次性应用。合并耗时只与CSV规模相关，
+不需要把整个数据库加载为 VideoInfo 对象。
+
+分类规则与 SmartMergeManager._determine_merge_action 保持一致：
+1. 路径已存在：元数据或标签有变化则 update_path，否则跳过
+2. 指纹匹配：文件移动，update_path
+3. video_code 匹配：指纹相同则 update_path；满足替换条件则 mark_replaced；
+   相似度超过阈值则 duplicate_detection
+4. 其余为 insert_new
+"""
+
+import os
+import re
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Any
+
+try:
+    from .sqlite_storage import SQLiteStorage
+    from .csv_ingestor import CSVIngestor
+except ImportError:
+    from sqlite_storage import SQLiteStorage
+    from csv_ingestor import CSVIngestor
+
+
+# 分类动作（与 SmartMergeManager 的结果键一致，另加 unchanged 表示无需操作）
+ACTION_INSERT_NEW = 'insert_new'
+ACTION_UPDATE_PATH = 'update_path'
+ACTION_MARK_REPLACED = 'mark_replaced'
+ACTION_DUPLICATE = 'duplicate_detection'
+ACTION_UNCHANGED = 'unchanged'
+
+_TAG_SPLIT_PATTERN = re.compile(r'[;,]')
+
+
+def _dir_prefix(file_path: str) -> str:
+    """返回路径中最后一个 '/' 之前（含）的部分，与SQL中的 rtrim 写法等价"""
+    return file_path[:file_path.rfind('/') + 1]
+
+
+# 现有记录所在目录前缀：rtrim(path, 去掉所有'/'后的字符集) 会截到最后一个'/'为止
+_EXISTING_DIR_PREFIX = "rtrim(e.file_path, replace(e.file_path, '/', ''))"
+
+# 替换场景判定（对应 SmartMergeManager._is_replacement_scenario）
+_REPLACEMENT_CONDITION = f"""
+    (
+        (s.file_size AND e.file_size
+            AND (s.file_size * 1.0 / e.file_size > 1.2 OR s.file_size * 1.0 / e.file_size < 0.8))
+        OR (s.width AND s.height AND e.width AND e.height
+            AND (s.width * s.height * 1.0 / (e.width * e.height) > 1.2
+                 OR s.width * s.height * 1.0 / (e.width * e.height) < 0.8))
+        OR (s.bit_rate AND e.bit_rate
+            AND (s.bit_rate * 1.0 / e.bit_rate > 1.2 OR s.bit_rate * 1.0 / e.bit_rate < 0.8))
+        OR (s.video_codec IS NOT NULL AND NULLIF(e.video_codec, '') IS NOT NULL
+            AND s.video_codec != e.video_codec)
+        OR (s.dir_prefix != {_EXISTING_DIR_PREFIX})
+    )
+"""
+
+# 相似度计算（对应 SmartMergeManager._calculate_similarity，video_code 已相同）
+_SIMILARITY_EXPRESSION = """
+    (
+        CASE WHEN s.file_size AND e.file_size
+             THEN 0.3 * (1.0 - abs(s.file_size - e.file_size) * 1.0 / max(s.file_size, e.file_size))
+             ELSE 0 END
+        + CASE WHEN s.duration AND e.duration
+             THEN 0.3 * (1.0 - abs(s.duration - e.duration) / max(s.duration, e.duration))
+             ELSE 0 END
+        + CASE WHEN s.width AND s.height AND e.width AND e.height
+             THEN 0.2 * (1.0 - abs(s.width * s.height - e.width * e.height) * 1.0
+                              / max(s.width * s.height, e.width * e.height))
+             ELSE 0 END
+        + 0.2
+    ) / (
+        CASE WHEN s.file_size AND e.file_size THEN 0.3 ELSE 0 END
+        + CASE WHEN s.duration AND e.duration THEN 0.3 ELSE 0 END
+        + CASE WHEN s.width AND s.height AND e.width AND e.height THEN 0.2 ELSE 0 END
+        + 0.2
+    )
+"""
+
+# 元数据是否有变化（对应 SmartMergeManager._should_update_existing）
+_CHANGED_CONDITION = """
+    (
+        (s.file_size IS NOT NULL AND s.file_size IS NOT e.file_size)
+        OR (s.duration IS NOT NULL AND s.duration IS NOT e.duration)
+        OR (s.width IS NOT NULL AND s.width IS NOT e.width)
+        OR (s.height IS NOT NULL AND s.height IS NOT e.height)
+        OR (s.video_codec IS NOT NULL AND s.video_codec IS NOT e.video_codec)
+        OR (s.audio_codec IS NOT NULL AND s.audio_codec IS NOT e.audio_codec)
+        OR (s.bit_rate IS NOT NULL AND s.bit_rate IS NOT e.bit_rate)
+        OR (s.frame_rate IS NOT NULL AND s.frame_rate IS NOT e.frame_rate)
+        OR s.tags != COALESCE((
+            SELECT group_concat(tag, ';') FROM (
+                SELECT tag FROM video_tags WHERE video_id = e.id ORDER BY tag
+            )
+        ), '')
+    )
+"""
+
+
+class SQLMergeEngine:
+    """基于暂存表和集合SQL的合并引擎"""
+
+    STAGING_TABLE = 'merge_staging'
+    STAGING_TAGS_TABLE = 'merge_staging_tags'
+
+    def __init__(self, storage: SQLiteStorage, similarity_threshold: float = 0.8,
+                 batch_size: int = 5000):
+        """
+        初始化SQL合并引擎
+
+        Args:
+            storage: SQLite存储对象
+            similarity_threshold: 判定为重复下载的相似度阈值
+            batch_size: 载入CSV时每批写入暂存表的行数
+        """
+        self.storage = storage
+        self.connection = storage.connection
+        self.similarity_threshold = similarity_threshold
+        self.batch_size = batch_size
+
+    # ---------------------------
+    # 暂存表
+    # ---------------------------
+    def _create_staging_tables(self):
+        """创建（或清空）临时暂存表"""
+        cursor = self.connection.cursor()
+        cursor.execute(f"""
+            CREATE TEMP TABLE IF NOT EXISTS {self.STAGING_TABLE} (
+                file_path TEXT PRIMARY KEY,
+                filename TEXT NOT NULL,
+                dir_prefix TEXT,
+                video_code TEXT,
+                file_fingerprint TEXT,
+                width INTEGER,
+                height INTEGER,
+                duration REAL,
+                video_codec TEXT,
+                audio_codec TEXT,
+                file_size INTEGER,
+                bit_rate INTEGER,
+                frame_rate REAL,
+                created_time TEXT,
+                logical_path TEXT,
+                tags TEXT NOT NULL DEFAULT '',
+                action TEXT,
+                target_id INTEGER,
+                similarity REAL
+            )
+        """)
+        cursor.execute(f"""
+            CREATE TEMP TABLE IF NOT EXISTS {self.STAGING_TAGS_TABLE} (
+                file_path TEXT NOT NULL,
+                tag TEXT NOT NULL,
+                PRIMARY KEY (file_path, tag)
+            )
+        """)
+        cursor.execute(f"CREATE INDEX IF NOT EXISTS temp.idx_staging_action ON {self.STAGING_TABLE}(action)")
+        cursor.execute(f"DELETE FROM {self.STAGING_TABLE}")
+        cursor.execute(f"DELETE FROM {self.STAGING_TAGS_TABLE}")
+
+    def drop_staging(self):
+        """删除临时暂存表"""
+        cursor = self.connection.cursor()
+        cursor.execute(f"DROP TABLE IF EXISTS temp.{self.STAGING_TABLE}")
+        cursor.execute(f"DROP TABLE IF EXISTS temp.{self.STAGING_TAGS_TABLE}")
+
+    @staticmethod
+    def _parse_row(row: Dict[str, str]) -> Optional[tuple]:
+        """
+        将CSV行转换为暂存表记录，字段解析规则与 load_videos_from_csv 一致
+
+        Returns:
+            Optional[tuple]: (记录元组, 标签列表)，无效行返回None
+        """
+        def text(key):
+            value = (row.get(key) or '').strip()
+            return value or None
+
+        try:
+            file_path = row['file_path']
+            filename = row['filename']
+            if not file_path or not filename:
+                return None
+            tags = sorted({tag.strip() for tag in _TAG_SPLIT_PATTERN.split(row.get('tags') or '')
+                           if tag.strip()})
+            record = (
+                file_path,
+                filename,
+                _dir_prefix(file_path),
+                text('video_code'),
+                text('file_fingerprint'),
+                int(row['width']) if row['width'] else None,
+                int(row['height']) if row['height'] else None,
+                float(row['duration']) if row['duration'] else None,
+                text('video_codec'),
+                text('audio_codec'),
+                int(row['file_size']) if row['file_size'] else None,
+                int(row['bit_rate']) if row['bit_rate'] else None,
+                float(row['frame_rate']) if row.get('frame_rate') else None,
+                row['created_time'],
+                row.get('logical_path', ''),
+                ';'.join(tags),
+            )
+            return record, tags
+        except (ValueError, KeyError):
+            return None
+
+    def load_csv(self, csv_path: str) -> int:
+        """
+        将CSV文件批量载入暂存表（同一路径出现多次时保留最后一行）
+
+        Args:
+            csv_path: CSV文件路径
+
+        Returns:
+            int: 暂存表中的有效记录数
+        """
+        return self.load_rows(CSVIngestor(csv_path).iter_rows())
+
+    def load_rows(self, rows: Iterable[Dict[str, str]]) -> int:
+        """
+        将CSV行批量载入暂存表，可直接接收 CSVIngestor.iter_rows() 以便在同一次读取中计算内容哈希
+
+        Args:
+            rows: csv.DictReader 格式的行
+
+        Returns:
+            int: 暂存表中的有效记录数
+        """
+        self._create_staging_tables()
+        cursor = self.connection.cursor()
+
+        insert_sql = f"""
+            INSERT OR REPLACE INTO {self.STAGING_TABLE} (
+                file_path, filename, dir_prefix, video_code, file_fingerprint,
+                width, height, duration, video_codec, audio_codec,
+                file_size, bit_rate, frame_rate, created_time, logical_path, tags
+            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+        """
+        tag_sql = f"INSERT OR IGNORE INTO {self.STAGING_TAGS_TABLE} (file_path, tag) VALUES (?, ?)"
+        clear_tags_sql = f"DELETE FROM {self.STAGING_TAGS_TABLE} WHERE file_path = ?"
+
+        # 同一路径出现多次时保留最后一行：批次内按路径覆盖，写入前删除此前批次留下的标签
+        records: Dict[str, tuple] = {}
+        tags_by_path: Dict[str, List[str]] = {}
+
+        def flush():
+            cursor.executemany(clear_tags_sql, ((file_path,) for file_path in records))
+            cursor.executemany(insert_sql, records.values())
+            cursor.executemany(tag_sql, ((file_path, tag) for file_path, tags in tags_by_path.items()
+                                         for tag in tags))
+            records.clear()
+            tags_by_path.clear()
+
+        for row in rows:
+            parsed = self._parse_row(row)
+            if parsed is None:
+                continue
+            record, tags = parsed
+            records[record[0]] = record
+            tags_by_path[record[0]] = tags
+            if len(records) >= self.batch_size:
+                flush()
+        flush()
+        self.connection.commit()
+
+        cursor.execute(f"SELECT COUNT(*) FROM {self.STAGING_TABLE}")
+        return cursor.fetchone()[0]
+
+    # ---------------------------
+    # 分类
+    # ---------------------------
+    def classify(self) -> Dict[str, int]:
+        """
+        对暂存表中的记录进行分类，结果写入暂存表的 action / target_id 列
+
+        Returns:
+            Dict[str, int]: 各动作的记录数
+        """
+        staging = self.STAGING_TABLE
+        cursor = self.connection.cursor()
+        cursor.execute(f"UPDATE {staging} SET action = NULL, target_id = NULL, similarity = NULL")
+
+        # 1. 路径已存在
+        cursor.execute(f"""
+            UPDATE {staging} AS s
+            SET target_id = e.id,
+                action = CASE WHEN {_CHANGED_CONDITION}
+                              THEN '{ACTION_UPDATE_PATH}' ELSE '{ACTION_UNCHANGED}' END
+            FROM video_info AS e
+            WHERE e.file_path = s.file_path
+        """)
+
+        # 2. 指纹匹配（文件移动）
+        cursor.execute(f"""
+            UPDATE {staging} AS s
+            SET action = '{ACTION_UPDATE_PATH}', target_id = m.id
+            FROM (
+                SELECT file_fingerprint, MAX(id) AS id FROM video_info
+                WHERE file_fingerprint IN (
+                    SELECT file_fingerprint FROM {staging}
+                    WHERE action IS NULL AND file_fingerprint IS NOT NULL
+                )
+                GROUP BY file_fingerprint
+            ) AS m
+            WHERE s.action IS NULL AND m.file_fingerprint = s.file_fingerprint
+        """)
+
+        # 3a. 相同video_code且双方都没有指纹，视为同一文件移动
+        cursor.execute(f"""
+            UPDATE {staging} AS s
+            SET action = '{ACTION_UPDATE_PATH}',
+                target_id = (
+                    SELECT MIN(e.id) FROM video_info e
+                    WHERE e.video_code = s.video_code AND NULLIF(e.file_fingerprint, '') IS NULL
+                )
+            WHERE s.action IS NULL AND s.video_code IS NOT NULL AND s.file_fingerprint IS NULL
+            AND EXISTS (
+                SELECT 1 FROM video_info e
+                WHERE e.video_code = s.video_code AND NULLIF(e.file_fingerprint, '') IS NULL
+            )
+        """)
+
+        # 3b. 文件替换
+        cursor.execute(f"""
+            UPDATE {staging} AS s
+            SET action = '{ACTION_MARK_REPLACED}',
+                target_id = (
+                    SELECT MIN(e.id) FROM video_info e
+                    WHERE e.video_code = s.video_code
+                    AND e.file_status = 'present'
+                    AND NULLIF(e.file_fingerprint, '') IS NOT NULL
+                    AND e.file_fingerprint != s.file_fingerprint
+                    AND {_REPLACEMENT_CONDITION}
+                )
+            WHERE s.action IS NULL AND s.video_code IS NOT NULL AND s.file_fingerprint IS NOT NULL
+        """)
+        cursor.execute(f"""
+            UPDATE {staging} SET action = NULL
+            WHERE action = '{ACTION_MARK_REPLACED}' AND target_id IS NULL
+        """)
+
+        # 3c. 疑似重复下载
+        cursor.execute(f"""
+            UPDATE {staging} AS s
+            SET action = '{ACTION_DUPLICATE}', target_id = d.target_id, similarity = d.similarity
+            FROM (
+                SELECT s.file_path, MIN(e.id) AS target_id, MAX({_SIMILARITY_EXPRESSION}) AS similarity
+                FROM {staging} s
+                JOIN video_info e ON e.video_code = s.video_code
+                WHERE s.action IS NULL AND e.file_status = 'present'
+                AND {_SIMILARITY_EXPRESSION} > ?
+                GROUP BY s.file_path
+            ) AS d
+            WHERE s.action IS NULL AND d.file_path = s.file_path
+        """, (self.similarity_threshold,))
+
+        # 4. 其余为新文件
+        cursor.execute(f"UPDATE {staging} SET action = '{ACTION_INSERT_NEW}' WHERE action IS NULL")
+        self.connection.commit()
+
+        return self.get_action_counts()
+
+    def get_action_counts(self) -> Dict[str, int]:
+        """获取暂存表中各动作的记录数"""
+        counts = {action: 0 for action in (ACTION_INSERT_NEW, ACTION_UPDATE_PATH, ACTION_MARK_REPLACED,
+                                           ACTION_DUPLICATE, ACTION_UNCHANGED)}
+        cursor = self.connection.cursor()
+        cursor.execute(f"SELECT action, COUNT(*) FROM {self.STAGING_TABLE} GROUP BY action")
+        for action, count in cursor.fetchall():
+            if action in counts:
+                counts[action] = count
+        return counts
+
+    def get_actions(self, action: str) -> List[Dict[str, Any]]:
+        """
+        获取指定动作的记录明细
+
+        Args:
+            action: 动作类型
+
+        Returns:
+            List[Dict[str, Any]]: 包含 file_path、video_code、target_path、similarity 的记录列表
+        """
+        cursor = self.connection.cursor()
+        cursor.execute(f"""
+            SELECT s.file_path, s.video_code, e.file_path AS target_path, s.similarity
+            FROM {self.STAGING_TABLE} s
+            LEFT JOIN video_info e ON e.id = s.target_id
+            WHERE s.action = ?
+            ORDER BY s.file_path
+        """, (action,))
+        return [dict(row) for row in cursor.fetchall()]
+
+    # ---------------------------
+    # 应用
+    # ---------------------------
+    def apply(self, scan_id: Optional[int] = None) -> Dict[str, int]:
+        """
+        在单个事务中应用分类结果
+
+        Args:
+            scan_id: 扫描ID，提供时写入 merge_history 事件
+
+        Returns:
+            Dict[str, int]: 执行统计（键与 SmartMergeManager.execute_merge_plan 一致）
+        """
+        staging = self.STAGING_TABLE
+        now = datetime.now().isoformat()
+        stats = {
+            'inserted': 0,
+            'updated': 0,
+            'marked_missing': 0,
+            'marked_replaced': 0,
+            'duplicates_detected': 0,
+            'errors': 0
+        }
+
+        cursor = self.connection.cursor()
+        try:
+            with self.storage.transaction():
+                # 同一条现有记录只由一行暂存记录更新
+                cursor.execute(f"""
+                    UPDATE {staging} SET action = '{ACTION_UNCHANGED}'
+                    WHERE action = '{ACTION_UPDATE_PATH}'
+                    AND rowid NOT IN (
+                        SELECT MAX(rowid) FROM {staging}
+                        WHERE action = '{ACTION_UPDATE_PATH}' GROUP BY target_id
+                    )
+                """)
+
+                # 合并历史（需在更新路径之前记录旧路径）
+                if scan_id:
+                    cursor.execute(f"""
+                        INSERT INTO merge_history (event_type, video_code, old_path, new_path, scan_session_id)
+                        SELECT s.action,
+                               CASE WHEN s.action = '{ACTION_INSERT_NEW}' THEN s.video_code ELSE e.video_code END,
+                               e.file_path, s.file_path, ?
+                        FROM {staging} s
+                        LEFT JOIN video_info e ON e.id = s.target_id
+                        WHERE s.action IN ('{ACTION_INSERT_NEW}', '{ACTION_UPDATE_PATH}', '{ACTION_MARK_REPLACED}')
+                    """, (scan_id,))
+                    cursor.execute(f"""
+                        INSERT INTO merge_history (event_type, video_code, new_path, scan_session_id)
+                        SELECT 'skip_duplicate', video_code, file_path, ?
+                        FROM {staging} WHERE action = '{ACTION_UNCHANGED}'
+                    """, (scan_id,))
+
+                # 标记被替换的旧文件
+                cursor.execute(f"""
+                    UPDATE video_info
+                    SET file_status = 'replaced', updated_time = CURRENT_TIMESTAMP
+                    FROM {staging} s
+                    WHERE s.action = '{ACTION_MARK_REPLACED}' AND video_info.id = s.target_id
+                """)
+
+                # 更新路径及元数据
+                cursor.execute(f"""
+                    UPDATE video_info
+                    SET file_path = s.file_path,
+                        filename = s.filename,
+                        file_size = COALESCE(NULLIF(s.file_size, 0), video_info.file_size),
+                        duration = COALESCE(NULLIF(s.duration, 0), video_info.duration),
+                        width = COALESCE(NULLIF(s.width, 0), video_info.width),
+                        height = COALESCE(NULLIF(s.height, 0), video_info.height),
+                        video_codec = COALESCE(s.video_codec, video_info.video_codec),
+                        audio_codec = COALESCE(s.audio_codec, video_info.audio_codec),
+                        bit_rate = COALESCE(NULLIF(s.bit_rate, 0), video_info.bit_rate),
+                        frame_rate = COALESCE(NULLIF(s.frame_rate, 0), video_info.frame_rate),
+                        file_status = 'present',
+                        last_scan_time = ?,
+                        updated_time = CURRENT_TIMESTAMP
+                    FROM {staging} s
+                    WHERE s.action = '{ACTION_UPDATE_PATH}' AND video_info.id = s.target_id
+                """, (now,))
+                stats['updated'] = cursor.rowcount
+                cursor.execute(f"""
+                    UPDATE video_info
+                    SET resolution = CASE WHEN width AND height THEN width || 'x' || height END,
+                        duration_formatted = CASE WHEN duration THEN printf('%02d:%02d:%02d',
+                            CAST(duration AS INTEGER) / 3600,
+                            (CAST(duration AS INTEGER) % 3600) / 60,
+                            CAST(duration AS INTEGER) % 60) END
+                    WHERE id IN (SELECT target_id FROM {staging} WHERE action = '{ACTION_UPDATE_PATH}')
+                """)
+
+                # 插入新文件（含替换场景中的新文件）
+                cursor.execute(f"""
+                    INSERT INTO video_info (
+                        file_path, filename, width, height, resolution,
+                        duration, duration_formatted, video_codec, audio_codec,
+                        file_size, bit_rate, frame_rate, logical_path, created_time,
+                        video_code, file_fingerprint, file_status, last_scan_time
+                    )
+                    SELECT file_path, filename, width, height,
+                           CASE WHEN width AND height THEN width || 'x' || height END,
+                           duration,
+                           CASE WHEN duration THEN printf('%02d:%02d:%02d',
+                               CAST(duration AS INTEGER) / 3600,
+                               (CAST(duration AS INTEGER) % 3600) / 60,
+                               CAST(duration AS INTEGER) % 60) END,
+                           video_codec, audio_codec, file_size, bit_rate, frame_rate,
+                           logical_path, created_time, video_code, file_fingerprint, 'present', ?
+                    FROM {staging}
+                    WHERE action IN ('{ACTION_INSERT_NEW}', '{ACTION_MARK_REPLACED}')
+                    ORDER BY rowid
+                    ON CONFLICT(file_path) DO NOTHING
+                """, (now,))
+                stats['marked_replaced'] = self.get_action_counts()[ACTION_MARK_REPLACED]
+                stats['inserted'] = cursor.rowcount - stats['marked_replaced']
+
+                # 标签：新文件写入全部标签，更新的记录合并标签
+                cursor.execute(f"""
+                    INSERT OR IGNORE INTO video_tags (video_id, tag)
+                    SELECT e.id, t.tag
+                    FROM {self.STAGING_TAGS_TABLE} t
+                    JOIN {staging} s ON s.file_path = t.file_path
+                    JOIN video_info e ON e.file_path = s.file_path
+                    WHERE s.action IN ('{ACTION_INSERT_NEW}', '{ACTION_MARK_REPLACED}', '{ACTION_UPDATE_PATH}')
+                """)
+
+                # master list：新插入和发生替换的video_code批量刷新
+                cursor.execute(f"""
+                    SELECT DISTINCT video_code FROM {staging}
+                    WHERE action IN ('{ACTION_INSERT_NEW}', '{ACTION_MARK_REPLACED}')
+                    AND video_code IS NOT NULL
+                """)
+                touched_codes = [row[0] for row in cursor.fetchall()]
+                self.storage.refresh_master_list_for_codes(touched_codes)
+                self.storage.record_video_code_aliases(touched_codes)
+        except Exception as e:
+            # 事务已整体回滚，之前累计的计数作废
+            print(f"Error applying SQL merge plan: {e}")
+            stats = dict.fromkeys(stats, 0)
+            stats['errors'] = 1
+            return stats
+
+        stats['duplicates_detected'] = self.get_action_counts()[ACTION_DUPLICATE]
+        return stats
+
+    def merge_csv(self, csv_path: str, scan_id: Optional[int] = None) -> Dict[str, int]:
+        """
+        载入、分类并应用一个CSV文件
+
+        Args:
+            csv_path: CSV文件路径
+            scan_id: 扫描ID
+
+        Returns:
+            Dict[str, int]: 执行统计
+        """
+        self.load_csv(csv_path)
+        self.classify()
+        return self.apply(scan_id)
@@ -7,13 +7,23 @@ SQLite数据库存储模块
 import sqlite3
 import csv
 import os
+from contextlib import contextmanager
 from typing import List, Optional, Dict, Any, Tuple
-from datetime import datetime
+from datetime import datetime, timedelta
 
 try:
     from .metadata import VideoInfo
+    from .exporters import StreamingExporter, ExportStats, format_size_gb
+    from .csv_ingestor import CSVIngestor, CSVIngestResult, compute_content_hash
 except ImportError:
     from metadata import VideoInfo
+    from exporters import StreamingExporter, ExportStats, format_size_gb
+    from csv_ingestor import CSVIngestor, CSVIngestResult, compute_content_hash
+
+try:
+    from ..video_code_utils import canonicalize_video_code
+except ImportError:
+    from tools.video_code_utils import canonicalize_video_code
 
 
 class SQLiteStorage:
@@ -28,6 +38,8 @@ class SQLiteStorage:
         """
         self.db_path = db_path
         self.connection = None
+        self._transaction_depth = 0
+        self._savepoint_counter = 0
         self._connect()
         self._create_tables()
         self._create_indexes()
@@ -37,7 +49,52 @@ class SQLiteStorage:
         self.connection = sqlite3.connect(self.db_path, check_same_thread=False)
         self.connection.row_factory = sqlite3.Row
     
-
+    def _commit(self):
+        """提交当前修改；处于 transaction()/savepoint() 中时由外层统一提交"""
+        if self._transaction_depth == 0:
+            self.connection.commit()
+    
+    @contextmanager
+    def transaction(self):
+        """
+        事务上下文：期间各写方法不再单独提交，正常退出时一次提交，异常时整体回滚。
+        嵌套使用时只有最外层负责提交或回滚。
+        """
+        outermost = self._transaction_depth == 0
+        if outermost and not self.connection.in_transaction:
+            self.connection.execute("BEGIN")
+        self._transaction_depth += 1
+        try:
+            yield self
+        except BaseException:
+            self._transaction_depth -= 1
+            if outermost:
+                self.connection.rollback()
+            raise
+        else:
+            self._transaction_depth -= 1
+            if outermost:
+                self.connection.commit()
+    
+    @contextmanager
+    def savepoint(self):
+        """
+        保存点上下文：异常时只回滚保存点内的修改并重新抛出异常，不影响外层事务中的其他操作
+        """
+        self._savepoint_counter += 1
+        name = f"sp_{self._savepoint_counter}"
+        self.connection.execute(f"SAVEPOINT {name}")
+        self._transaction_depth += 1
+        try:
+            yield self
+        except BaseException:
+            self._transaction_depth -= 1
+            self.connection.execute(f"ROLLBACK TO {name}")
+            self.connection.execute(f"RELEASE {name}")
+            raise
+        else:
+            self._transaction_depth -= 1
+            self.connection.execute(f"RELEASE {name}")
     
     def _create_tables(self):
         """创建数据表 - 符合README设计的三表结构"""
@@ -124,7 +181,74 @@ class SQLiteStorage:
             )
         """)
         
-        self.connection.commit()
+        # 扫描暂存表 - scan --stage 直接写入，--review 审阅后由 --commit-stage 合并
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS scan_staging (
+                file_path TEXT PRIMARY KEY,
+                filename TEXT NOT NULL,
+                video_code TEXT,
+                file_fingerprint TEXT,
+                width INTEGER,
+                height INTEGER,
+                duration REAL,
+                video_codec TEXT,
+                audio_codec TEXT,
+                file_size INTEGER,
+                bit_rate INTEGER,
+                frame_rate REAL,
+                created_time TEXT NOT NULL,
+                tags TEXT,
+                logical_path TEXT,
+                scan_root TEXT NOT NULL,
+                staged_time TEXT DEFAULT CURRENT_TIMESTAMP
+            )
+        """)
+        
+        # 文件状态变更历史表 - 由 StatusHistoryWriter 批量写入
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS status_change_history (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                file_path TEXT NOT NULL,
+                video_code TEXT,
+                old_status TEXT,
+                new_status TEXT NOT NULL,
+                reason TEXT,
+                change_time TEXT NOT NULL
+            )
+        """)
+        
+        # 后台验证状态表 - 每条视频记录最近一次验证的时间和结果
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS verification_state (
+                video_id INTEGER PRIMARY KEY,
+                last_verified_time TEXT NOT NULL,
+                result TEXT NOT NULL,
+                detail TEXT,
+                content_hash TEXT
+            )
+        """)
+        
+        # 后台验证游标表 - 记录每个验证任务处理到的video_info.id，下次运行从此处继续
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS verification_cursor (
+                job_name TEXT PRIMARY KEY,
+                last_video_id INTEGER NOT NULL DEFAULT 0,
+                cycle_started_time TEXT,
+                cycles_completed INTEGER NOT NULL DEFAULT 0,
+                updated_time TEXT DEFAULT CURRENT_TIMESTAMP
+            )
+        """)
+        
+        # 编码别名表 - 记录出现过的每种编码写法及其规范编码（abc123、ABC_123 -> ABC-123）
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS video_code_aliases (
+                alias TEXT PRIMARY KEY,
+                canonical_code TEXT NOT NULL,
+                first_seen TEXT DEFAULT CURRENT_TIMESTAMP
+            )
+        """)
+        
+        self._commit()
     
     def _create_indexes(self):
         """创建数据库索引"""
@@ -138,6 +262,7 @@ class SQLiteStorage:
         cursor.execute("CREATE INDEX IF NOT EXISTS idx_video_code ON video_info(video_code)")
         cursor.execute("CREATE INDEX IF NOT EXISTS idx_video_fingerprint ON video_info(file_fingerprint)")
         cursor.execute("CREATE INDEX IF NOT EXISTS idx_video_status ON video_info(file_status)")
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_video_code_status ON video_info(video_code, file_status)")
         cursor.execute("CREATE INDEX IF NOT EXISTS idx_video_scan_time ON video_info(last_scan_time)")
         cursor.execute("CREATE INDEX IF NOT EXISTS idx_video_merge_time ON video_info(last_merge_time)")
         
@@ -151,7 +276,7 @@ class SQLiteStorage:
         cursor.execute("CREATE INDEX IF NOT EXISTS idx_video_tags_video_id ON video_tags(video_id)")
         cursor.execute("CREATE INDEX IF NOT EXISTS idx_video_tags_tag ON video_tags(tag)")
         
-        self.connection.commit()
+        self._commit()
         
         # scan_history表索引
         cursor.execute("CREATE INDEX IF NOT EXISTS idx_scan_path ON scan_history(scan_path)")
@@ -168,7 +293,21 @@ class SQLiteStorage:
         cursor.execute("CREATE INDEX IF NOT EXISTS idx_merge_time ON merge_history(merge_time)")
         cursor.execute("CREATE INDEX IF NOT EXISTS idx_merge_scan_session ON merge_history(scan_session_id)")
         
-        self.connection.commit()
+        # scan_staging表的索引
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_staging_scan_root ON scan_staging(scan_root)")
+        
+        # status_change_history表索引
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_status_history_path ON status_change_history(file_path, change_time)")
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_status_history_code ON status_change_history(video_code, change_time)")
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_status_history_time ON status_change_history(change_time)")
+        
+        # verification_state表索引
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_verification_time ON verification_state(last_verified_time)")
+        
+        # video_code_aliases表索引
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_code_alias_canonical ON video_code_aliases(canonical_code)")
+        
+        self._commit()
     
     def insert_video_info(self, video_info: VideoInfo) -> Optional[int]:
         """
@@ -234,7 +373,8 @@ class SQLiteStorage:
                         VALUES (?, ?)
                     """, (video_id, tag.strip()))
             
-            self.connection.commit()
+            self.record_video_code_aliases([video_info.video_code])
+            self._commit()
             return video_id
         except sqlite3.IntegrityError:
             return None
@@ -281,7 +421,7 @@ class SQLiteStorage:
             ) VALUES (?, ?, ?, ?, ?)
         """, (scan_path, files_found, files_processed, tags_str, logical_path))
         
-        self.connection.commit()
+        self._commit()
         return cursor.lastrowid
 
     def add_csv_merge_history(self, csv_file_path: str, files_found: int, files_processed: int, 
@@ -313,7 +453,7 @@ class SQLiteStorage:
             ) VALUES (?, ?, ?, ?, ?, ?)
         """, (csv_file_path, files_found, files_processed, tags_str, logical_path, f"csv_merge:{csv_fingerprint}"))
         
-        self.connection.commit()
+        self._commit()
         return cursor.lastrowid
 
     def check_csv_already_merged(self, csv_fingerprint: str) -> bool:
@@ -330,15 +470,17 @@ class SQLiteStorage:
         
         cursor.execute("""
             SELECT COUNT(*) FROM scan_history 
-            WHERE status LIKE ? AND status LIKE ?
-        """, ('csv_merge:%', f'%{csv_fingerprint}%'))
+            WHERE status = ?
+        """, (f"csv_merge:{csv_fingerprint}",))
         
         result = cursor.fetchone()
         return result[0] > 0 if result else False
 
     def get_csv_fingerprint(self, csv_file_path: str) -> str:
         """
-        生成CSV文件的指纹，用于检测重复合并
+        生成CSV文件的指纹（整个文件内容的SHA256哈希），用于检测重复合并
+        
+        指纹只取决于文件内容，修改时间变化不会影响结果。
         
         Args:
             csv_file_path: CSV文件路径
@@ -346,51 +488,25 @@ class SQLiteStorage:
         Returns:
             str: CSV文件指纹
         """
-        import hashlib
-        import os
-        
         if not os.path.exists(csv_file_path):
             raise FileNotFoundError(f"CSV文件不存在: {csv_file_path}")
         
-        # 获取文件基本信息
-        file_stat = os.stat(csv_file_path)
-        file_size = file_stat.st_size
-        file_mtime = int(file_stat.st_mtime)
-        
-        # 读取文件内容的前后几行来生成指纹
-        fingerprint_data = []
-        
-        try:
-            with open(csv_file_path, 'r', encoding='utf-8') as f:
-                lines = f.readlines()
-                
-                # 添加文件基本信息
-                fingerprint_data.append(f"size:{file_size}")
-                fingerprint_data.append(f"lines:{len(lines)}")
-                fingerprint_data.append(f"mtime:{file_mtime}")
-                
-                # 添加前3行和后3行的内容（如果存在）
-                if lines:
-                    # 标题行
-                    if len(lines) > 0:
-                        fingerprint_data.append(f"header:{lines[0].strip()}")
-                    
-                    # 前几行数据
-                    for i in range(1, min(4, len(lines))):
-                        fingerprint_data.append(f"line{i}:{lines[i].strip()}")
-                    
-                    # 后几行数据（避免重复）
-                    if len(lines) > 4:
-                        for i in range(max(4, len(lines) - 3), len(lines)):
-                            fingerprint_data.append(f"tail{i}:{lines[i].strip()}")
+        return compute_content_hash(csv_file_path)
+
+    def ingest_csv(self, csv_path: str) -> CSVIngestResult:
+        """
+        一次读取CSV文件，同时得到内容指纹、记录数和视频信息列表
         
-        except Exception as e:
-            # 如果读取失败，至少使用文件基本信息
-            fingerprint_data = [f"size:{file_size}", f"mtime:{file_mtime}", f"error:{str(e)}"]
+        Args:
+            csv_path: CSV文件路径
+            
+        Returns:
+            CSVIngestResult: content_hash 与 get_csv_fingerprint 结果一致
+        """
+        if not os.path.exists(csv_path):
+            raise FileNotFoundError(f"CSV文件不存在: {csv_path}")
         
-        # 生成MD5哈希
-        fingerprint_str = '|'.join(fingerprint_data)
-        return hashlib.md5(fingerprint_str.encode('utf-8')).hexdigest()
+        return CSVIngestor(csv_path).read()
 
     def extract_scan_info_from_csv_filename(self, csv_file_path: str) -> Dict[str, Any]:
         """
@@ -492,7 +608,7 @@ class SQLiteStorage:
                 video_info.created_time.isoformat() if isinstance(video_info.created_time, datetime) else str(video_info.created_time),
                 video_info.file_path
             ))
-            self.connection.commit()
+            self._commit()
             return existing_info['id']
         else:
             # 插入新记录
@@ -686,7 +802,7 @@ class SQLiteStorage:
         """
         cursor = self.connection.cursor()
         cursor.execute("DELETE FROM video_info WHERE id = ?", (video_id,))
-        self.connection.commit()
+        self._commit()
         return cursor.rowcount > 0
     
     def update_video_info(self, video_id: int, update_data: Dict[str, Any]) -> bool:
@@ -723,9 +839,138 @@ class SQLiteStorage:
         
         cursor = self.connection.cursor()
         cursor.execute(query, params)
-        self.connection.commit()
+        self._commit()
         return cursor.rowcount > 0
     
+    def bulk_update_file_status(self, changes: List[Tuple[int, str]], reason: Optional[str] = None) -> int:
+        """
+        批量更新文件状态（一次 executemany，在事务中执行）
+        
+        状态确有变化的记录同时写入 status_change_history，与状态更新在同一事务中提交。
+        
+        Args:
+            changes: (video_id, file_status) 列表
+            reason: 写入状态变更历史的原因
+            
+        Returns:
+            int: 更新的记录数
+        """
+        if not changes:
+            return 0
+        
+        scan_time = datetime.now().isoformat()
+        with self.transaction():
+            cursor = self.connection.cursor()
+            # 分批读取更新前的状态，用于写入状态变更历史
+            current = {}
+            video_ids = [video_id for video_id, _ in changes]
+            for start in range(0, len(video_ids), 500):
+                chunk = video_ids[start:start + 500]
+                cursor.execute(f"""
+                    SELECT id, file_path, video_code, file_status FROM video_info
+                    WHERE id IN ({','.join('?' * len(chunk))})
+                """, chunk)
+                current.update((row['id'], row) for row in cursor.fetchall())
+            
+            cursor.executemany("""
+                UPDATE video_info 
+                SET file_status = ?, last_scan_time = ?, updated_time = CURRENT_TIMESTAMP
+                WHERE id = ?
+            """, [(file_status, scan_time, video_id) for video_id, file_status in changes])
+            updated = cursor.rowcount
+            
+            self.insert_status_changes([
+                {
+                    'file_path': current[video_id]['file_path'],
+                    'video_code': current[video_id]['video_code'],
+                    'old_status': current[video_id]['file_status'],
+                    'new_status': file_status,
+                    'reason': reason,
+                    'timestamp': scan_time
+                }
+                for video_id, file_status in changes
+                if video_id in current and current[video_id]['file_status'] != file_status
+            ])
+        return updated
+    
+    def get_videos_for_path_updates(self, mapping: Dict[str, str]) -> List[Dict[str, Any]]:
+        """
+        批量查询路径更新涉及的记录（通过临时表与 file_path 索引连接，一次查询）
+        
+        Args:
+            mapping: 旧路径 -> 新路径
+            
+        Returns:
+            List[Dict[str, Any]]: 旧路径在数据库中的记录，附带 new_path 和
+                                  occupant_id（新路径已被占用时为占用记录的id）
+        """
+        if not mapping:
+            return []
+        cursor = self.connection.cursor()
+        cursor.execute("""
+            CREATE TEMP TABLE IF NOT EXISTS path_update_staging (
+                old_path TEXT PRIMARY KEY,
+                new_path TEXT NOT NULL
+            )
+        """)
+        cursor.execute("DELETE FROM path_update_staging")
+        cursor.executemany("INSERT OR REPLACE INTO path_update_staging (old_path, new_path) VALUES (?, ?)",
+                           mapping.items())
+        cursor.execute("""
+            SELECT v.id, v.file_path, v.file_size, v.created_time, v.video_code, v.file_fingerprint,
+                   u.new_path, occupant.id AS occupant_id
+            FROM path_update_staging u
+            JOIN video_info v ON v.file_path = u.old_path
+            LEFT JOIN video_info occupant ON occupant.file_path = u.new_path
+            ORDER BY v.id
+        """)
+        rows = [dict(row) for row in cursor.fetchall()]
+        cursor.execute("DELETE FROM path_update_staging")
+        return rows
+    
+    def bulk_update_video_paths(self, changes: List[Dict[str, Any]],
+                                scan_session_id: Optional[str] = None) -> int:
+        """
+        批量更新记录的路径、文件名、video_code和指纹，并写入 update_path 合并事件（在一个事务中执行）
+        
+        先把所有记录改到临时路径再改到新路径，因此互相交换文件名的记录也不会违反 file_path 唯一约束。
+        
+        Args:
+            changes: 每项包含 id、old_path、new_path、filename、old_video_code、video_code、file_fingerprint
+            scan_session_id: 合并事件的会话ID
+            
+        Returns:
+            int: 更新的记录数
+        """
+        if not changes:
+            return 0
+        
+        with self.transaction():
+            cursor = self.connection.cursor()
+            cursor.executemany("UPDATE video_info SET file_path = ? WHERE id = ?",
+                               [(f"\0path-update:{change['id']}", change['id']) for change in changes])
+            cursor.executemany("""
+                UPDATE video_info
+                SET file_path = ?, filename = ?, video_code = ?, file_fingerprint = ?,
+                    updated_time = CURRENT_TIMESTAMP
+                WHERE id = ?
+            """, [(change['new_path'], change['filename'], change['video_code'], change['file_fingerprint'],
+                   change['id']) for change in changes])
+            cursor.executemany("""
+                INSERT INTO merge_history (event_type, video_code, old_path, new_path, details, scan_session_id)
+                VALUES ('update_path', ?, ?, ?, 'renamed by filename_formatter', ?)
+            """, [(change['video_code'], change['old_path'], change['new_path'], scan_session_id)
+                  for change in changes])
+            
+            new_codes = {change['video_code'] for change in changes if change['video_code']}
+            old_codes = {change['old_video_code'] for change in changes if change['old_video_code']}
+            self.record_video_code_aliases(new_codes)
+            self.refresh_master_list_for_codes(new_codes | old_codes)
+            # 旧编码已没有对应文件时 refresh 不会更新其条目，单独把计数归零
+            for video_code in old_codes - new_codes:
+                self.update_master_list_file_count(video_code)
+        return len(changes)
+    
     def _format_file_size(self, size_bytes: int) -> str:
         """
         格式化文件大小为GB格式
@@ -736,85 +981,64 @@ class SQLiteStorage:
         Returns:
             str: 格式化后的文件大小（如：5G, 5.23G）
         """
-        if size_bytes is None or size_bytes == 0:
-            return "0G"
-        
-        # 转换为GB
-        size_gb = size_bytes / (1024 * 1024 * 1024)
-        
-        # 四舍五入到两位小数
-        if size_gb >= 10:
-            # 大于等于10G时，显示整数
-            return f"{round(size_gb)}G"
-        else:
-            # 小于10G时，显示两位小数
-            return f"{size_gb:.2f}G"
+        return format_size_gb(size_bytes)
 
-    def export_to_csv(self, csv_path: str) -> bool:
+    def export_to_csv(self, csv_path: str, compress: Optional[bool] = None,
+                      **filters) -> Optional[ExportStats]:
         """
-        导出到CSV文件
+        流式导出到CSV文件
         
         Args:
             csv_path: CSV文件路径
+            compress: 是否gzip压缩，None表示按 .gz 后缀自动判断
+            **filters: 过滤条件 file_status / tag / logical_path
             
         Returns:
-            bool: 导出是否成功
+            Optional[ExportStats]: 导出统计，失败返回None
         """
         try:
-            cursor = self.connection.cursor()
-            cursor.execute("SELECT * FROM video_info ORDER BY filename")
-            rows = cursor.fetchall()
-            
-            with open(csv_path, 'w', newline='', encoding='utf-8-sig') as csvfile:
-                if rows:
-                    writer = csv.DictWriter(csvfile, fieldnames=rows[0].keys())
-                    writer.writeheader()
-                    for row in rows:
-                        writer.writerow(dict(row))
-            
-            return True
+            return StreamingExporter(self.connection).export_csv(csv_path, compress, **filters)
         except Exception:
-            return False
+            return None
 
-    def export_simple_format(self, output_path: str) -> bool:
+    def export_to_jsonl(self, output_path: str, compress: Optional[bool] = None,
+                        **filters) -> Optional[ExportStats]:
+        """
+        流式导出到JSON Lines文件
+        
+        Args:
+            output_path: 输出文件路径
+            compress: 是否gzip压缩，None表示按 .gz 后缀自动判断
+            **filters: 过滤条件 file_status / tag / logical_path
+            
+        Returns:
+            Optional[ExportStats]: 导出统计，失败返回None
+        """
+        try:
+            return StreamingExporter(self.connection).export_jsonl(output_path, compress, **filters)
+        except Exception as e:
+            print(f"JSON Lines导出失败: {e}")
+            return None
+
+    def export_simple_format(self, output_path: str, compress: Optional[bool] = None,
+                             **filters) -> Optional[ExportStats]:
         """
         简化格式导出：只包含filename（去掉后缀）、filesize（格式化为GB）和logical_path
         输出格式：每行为 "filename_without_ext filesize logical_path"
         
         Args:
             output_path: 输出文件路径
+            compress: 是否gzip压缩，None表示按 .gz 后缀自动判断
+            **filters: 过滤条件 file_status / tag / logical_path
             
         Returns:
-            bool: 导出是否成功
+            Optional[ExportStats]: 导出统计，失败返回None
         """
         try:
-            cursor = self.connection.cursor()
-            cursor.execute("""
-                SELECT filename, file_size, logical_path 
-                FROM video_info 
-                ORDER BY filename
-            """)
-            rows = cursor.fetchall()
-            
-            with open(output_path, 'w', encoding='utf-8') as f:
-                for row in rows:
-                    filename = row['filename'] or ''
-                    file_size = row['file_size'] or 0
-                    logical_path = row['logical_path'] or ''
-                    
-                    # 去掉文件名后缀
-                    filename_without_ext = os.path.splitext(filename)[0] if filename else ''
-                    
-                    # 格式化文件大小
-                    formatted_size = self._format_file_size(file_size)
-                    
-                    # 输出格式：filename_without_ext filesize logical_path
-                    f.write(f"{filename_without_ext} {formatted_size} {logical_path}\n")
-            
-            return True
+            return StreamingExporter(self.connection).export_simple(output_path, compress, **filters)
         except Exception as e:
             print(f"简化导出失败: {e}")
-            return False
+            return None
     
     def import_from_csv(self, csv_path: str) -> int:
         """
@@ -875,48 +1099,129 @@ class SQLiteStorage:
         
         return [dict(row) for row in rows]
     
-    def search_videos_by_video_codes(self, video_codes: List[str]) -> List[Dict[str, Any]]:
+    def record_video_code_aliases(self, video_codes) -> int:
+        """
+        记录编码写法到规范编码的映射（已存在的写法忽略）
+        
+        Args:
+            video_codes: 出现过的编码写法
+            
+        Returns:
+            int: 新增的别名数
+        """
+        aliases = [(code, canonicalize_video_code(code)) for code in set(video_codes) if code and code.strip()]
+        if not aliases:
+            return 0
+        cursor = self.connection.cursor()
+        before = self.connection.total_changes
+        cursor.executemany("""
+            INSERT OR IGNORE INTO video_code_aliases (alias, canonical_code) VALUES (?, ?)
+        """, aliases)
+        self._commit()
+        return self.connection.total_changes - before
+    
+    def rebuild_video_code_aliases(self) -> int:
+        """
+        以video_info为准重建编码别名表（规范化规则变化后显式调用；别名在写入video_info时即已记录）
+        
+        Returns:
+            int: 别名数
+        """
+        cursor = self.connection.cursor()
+        cursor.execute("SELECT DISTINCT video_code FROM video_info WHERE video_code IS NOT NULL")
+        codes = [row[0] for row in cursor.fetchall()]
+        with self.transaction():
+            cursor.execute("DELETE FROM video_code_aliases")
+            self.record_video_code_aliases(codes)
+        cursor.execute("SELECT COUNT(*) FROM video_code_aliases")
+        return cursor.fetchone()[0]
+    
+    def get_video_code_aliases(self, video_code: str) -> List[str]:
+        """
+        获取与给定编码规范形式相同的所有已知写法
+        
+        Args:
+            video_code: 编码的任意写法
+            
+        Returns:
+            List[str]: 已知写法列表
+        """
+        canonical_code = canonicalize_video_code(video_code)
+        if canonical_code is None:
+            return []
+        cursor = self.connection.cursor()
+        cursor.execute("SELECT alias FROM video_code_aliases WHERE canonical_code = ? ORDER BY alias",
+                       (canonical_code,))
+        return [row[0] for row in cursor.fetchall()]
+    
+    def get_videos_by_video_code_variants(self, video_codes: List[str]) -> List[Dict[str, Any]]:
         """
-        根据视频code列表查询视频信息
+        按编码的任意写法查询视频记录
+        
+        输入的每种写法先转换为规范编码（abc123、ABC_123、abc-00123 -> ABC-123），
+        再通过编码别名表的规范编码索引找到数据库中该编码的所有写法，按 video_code 索引取出记录。
+        别名表没有解析到的输入（包括无法识别编码的文件）再按文件名主干忽略大小写精确匹配。
         
         Args:
-            video_codes: 视频code列表（文件名去掉扩展名）
+            video_codes: 视频code列表（任意写法）
             
         Returns:
-            List[Dict[str, Any]]: 匹配的视频信息列表，只包含video_code、file_size、logical_path字段
+            List[Dict[str, Any]]: video_info记录（附加canonical_code字段），别名匹配的记录按规范编码和
+                                  文件名排序在前，文件名匹配的记录（canonical_code为None）按文件名排序在后
         """
+        video_codes = [code for code in video_codes or [] if code]
         if not video_codes:
             return []
         
         cursor = self.connection.cursor()
-        
-        # 构建查询条件，支持多个video_code的精确匹配（忽略大小写）
-        placeholders = ','.join(['?' for _ in video_codes])
-        query = f"""
-            SELECT 
-                CASE 
-                    WHEN INSTR(filename, '.') > 0 
+        rows = []
+        canonical_by_input = {code: canonicalize_video_code(code) for code in video_codes}
+        canonical_codes = sorted({code for code in canonical_by_input.values() if code})
+        if canonical_codes:
+            placeholders = ','.join(['?' for _ in canonical_codes])
+            cursor.execute(f"""
+                SELECT v.*, a.canonical_code
+                FROM video_code_aliases a
+                JOIN video_info v ON v.video_code = a.alias
+                WHERE a.canonical_code IN ({placeholders})
+                ORDER BY a.canonical_code, v.filename
+            """, canonical_codes)
+            rows = [dict(row) for row in cursor.fetchall()]
+        
+        resolved = {row['canonical_code'] for row in rows}
+        unresolved = sorted({code.lower() for code, canonical in canonical_by_input.items()
+                             if canonical not in resolved})
+        if unresolved:
+            seen_ids = {row['id'] for row in rows}
+            placeholders = ','.join(['?' for _ in unresolved])
+            cursor.execute(f"""
+                SELECT *, NULL AS canonical_code
+                FROM video_info
+                WHERE LOWER(CASE
+                    WHEN INSTR(filename, '.') > 0
                     THEN SUBSTR(filename, 1, INSTR(filename, '.') - 1)
                     ELSE filename
-                END as video_code,
-                file_size,
-                logical_path,
-                filename
-            FROM video_info 
-            WHERE LOWER(CASE 
-                WHEN INSTR(filename, '.') > 0 
-                THEN SUBSTR(filename, 1, INSTR(filename, '.') - 1)
-                ELSE filename
-            END) IN ({placeholders})
-            ORDER BY video_code
+                END) IN ({placeholders})
+                ORDER BY filename
+            """, unresolved)
+            rows.extend(dict(row) for row in cursor.fetchall() if row['id'] not in seen_ids)
+        return rows
+    
+    def search_videos_by_video_codes(self, video_codes: List[str]) -> List[Dict[str, Any]]:
         """
+        根据视频code列表查询视频信息（不区分写法；没有编码的文件按文件名主干匹配，
+        见 get_videos_by_video_code_variants）
         
-        # 将所有video_codes转换为小写进行匹配
-        lower_video_codes = [video_code.lower() for video_code in video_codes]
-        cursor.execute(query, lower_video_codes)
-        rows = cursor.fetchall()
-        
-        return [dict(row) for row in rows]
+        Args:
+            video_codes: 视频code列表（任意写法）
+            
+        Returns:
+            List[Dict[str, Any]]: 匹配的视频信息列表，包含video_code、canonical_code、file_size、
+                                  logical_path、filename字段
+        """
+        fields = ('video_code', 'canonical_code', 'file_size', 'logical_path', 'filename')
+        return [{field: row[field] for field in fields}
+                for row in self.get_videos_by_video_code_variants(video_codes)]
     
     def get_statistics_by_tags(self) -> List[Dict[str, Any]]:
         """
@@ -1088,7 +1393,7 @@ class SQLiteStorage:
             """, (video_code, file_fingerprint))
             master_id = cursor.lastrowid
         
-        self.connection.commit()
+        self._commit()
         return master_id
     
     def get_master_list_by_code(self, video_code: str) -> Optional[Dict[str, Any]]:
@@ -1113,6 +1418,23 @@ class SQLiteStorage:
         rows = cursor.fetchall()
         return [dict(row) for row in rows]
     
+    def get_master_list_video_codes(self, active_only: bool = True) -> List[str]:
+        """
+        获取主列表中的video_code（只读取编码列，用于构建已知前缀）
+        
+        Args:
+            active_only: 是否只返回active状态的条目
+            
+        Returns:
+            List[str]: video_code列表
+        """
+        cursor = self.connection.cursor()
+        if active_only:
+            cursor.execute("SELECT video_code FROM video_master_list WHERE status = 'active'")
+        else:
+            cursor.execute("SELECT video_code FROM video_master_list")
+        return [row[0] for row in cursor.fetchall()]
+    
     def mark_master_list_as_deleted(self, video_code: str):
         """标记主列表条目为已删除"""
         cursor = self.connection.cursor()
@@ -1121,7 +1443,7 @@ class SQLiteStorage:
             SET status = 'deleted', last_updated = CURRENT_TIMESTAMP
             WHERE video_code = ?
         """, (video_code,))
-        self.connection.commit()
+        self._commit()
     
     def get_master_list_statistics(self) -> Dict[str, Any]:
         """获取主列表统计信息"""
@@ -1144,19 +1466,77 @@ class SQLiteStorage:
         """重新计算主列表的文件计数，排除REPLACED状态的文件"""
         cursor = self.connection.cursor()
         
-        # 更新所有video_code的file_count，基于video_info表中非REPLACED状态的记录
+        # 基于 (video_code, file_status) 索引分组计数，一次性回写所有有记录的video_code
         cursor.execute("""
             UPDATE video_master_list 
-            SET file_count = (
-                SELECT COUNT(*) 
-                FROM video_info 
+            SET file_count = counts.file_count,
+                last_updated = CURRENT_TIMESTAMP
+            FROM (
+                SELECT video_code, COUNT(*) AS file_count
+                FROM video_info
+                WHERE video_code IS NOT NULL AND file_status != 'replaced'
+                GROUP BY video_code
+            ) AS counts
+            WHERE counts.video_code = video_master_list.video_code
+        """)
+        
+        # video_info中已没有有效记录的video_code计数归零
+        cursor.execute("""
+            UPDATE video_master_list 
+            SET file_count = 0,
+                last_updated = CURRENT_TIMESTAMP
+            WHERE NOT EXISTS (
+                SELECT 1 FROM video_info 
                 WHERE video_info.video_code = video_master_list.video_code 
                 AND video_info.file_status != 'replaced'
-            ),
-            last_updated = CURRENT_TIMESTAMP
+            )
+        """)
+        
+        self._commit()
+    
+    def refresh_master_list_for_codes(self, video_codes) -> int:
+        """
+        批量刷新指定video_code的主列表条目
+        
+        以video_info为准重新计算file_count（排除REPLACED状态）和最新的file_fingerprint，
+        不存在的条目自动创建，整个刷新只有一条 INSERT … ON CONFLICT DO UPDATE 语句。
+        
+        Args:
+            video_codes: 需要刷新的video_code集合
+            
+        Returns:
+            int: 刷新的条目数
+        """
+        codes = [(code,) for code in set(video_codes) if code]
+        if not codes:
+            return 0
+        
+        cursor = self.connection.cursor()
+        cursor.execute("CREATE TEMP TABLE IF NOT EXISTS touched_video_codes (video_code TEXT PRIMARY KEY)")
+        cursor.execute("DELETE FROM touched_video_codes")
+        cursor.executemany("INSERT OR IGNORE INTO touched_video_codes (video_code) VALUES (?)", codes)
+        
+        cursor.execute("""
+            INSERT INTO video_master_list (video_code, file_fingerprint, status, file_count)
+            SELECT v.video_code,
+                   (SELECT latest.file_fingerprint FROM video_info latest
+                    WHERE latest.video_code = v.video_code AND latest.file_status != 'replaced'
+                    ORDER BY latest.id DESC LIMIT 1),
+                   'active',
+                   SUM(v.file_status != 'replaced')
+            FROM touched_video_codes t
+            JOIN video_info v ON v.video_code = t.video_code
+            GROUP BY v.video_code
+            ON CONFLICT(video_code) DO UPDATE SET
+                file_fingerprint = COALESCE(excluded.file_fingerprint, video_master_list.file_fingerprint),
+                file_count = excluded.file_count,
+                last_updated = CURRENT_TIMESTAMP
         """)
+        refreshed = cursor.rowcount
         
-        self.connection.commit()
+        cursor.execute("DELETE FROM touched_video_codes")
+        self._commit()
+        return refreshed
     
     def update_master_list_file_count(self, video_code: str):
         """更新特定video_code的文件计数，排除REPLACED状态的文件"""
@@ -1174,7 +1554,7 @@ class SQLiteStorage:
             WHERE video_code = ?
         """, (video_code, video_code))
         
-        self.connection.commit()
+        self._commit()
     
     # ==================== Merge History 操作方法 ====================
     
@@ -1204,7 +1584,7 @@ class SQLiteStorage:
         """, (event_type, video_code, old_path, new_path, details, scan_session_id))
         
         history_id = cursor.lastrowid
-        self.connection.commit()
+        self._commit()
         return history_id
     
     def get_merge_history_by_video_code(self, video_code: str, limit: int = 50) -> List[Dict[str, Any]]:
@@ -1276,9 +1656,212 @@ class SQLiteStorage:
         """.format(days_to_keep))
         
         deleted_count = cursor.rowcount
-        self.connection.commit()
+        self._commit()
+        return deleted_count
+    
+    def insert_status_changes(self, changes: List[Dict]) -> int:
+        """
+        批量写入状态变更历史（一次 executemany，在事务中执行）
+        
+        Args:
+            changes: 状态变更记录列表，键为 file_path / video_code / old_status / new_status / reason / timestamp
+            
+        Returns:
+            int: 写入的记录数
+        """
+        if not changes:
+            return 0
+        
+        with self.transaction():
+            cursor = self.connection.cursor()
+            cursor.executemany("""
+                INSERT INTO status_change_history (
+                    file_path, video_code, old_status, new_status, reason, change_time
+                ) VALUES (?, ?, ?, ?, ?, ?)
+            """, [
+                (change['file_path'], change.get('video_code'), change.get('old_status'),
+                 change['new_status'], change.get('reason'), change['timestamp'])
+                for change in changes
+            ])
+        return len(changes)
+    
+    def get_status_changes(self, file_path: Optional[str] = None, video_code: Optional[str] = None,
+                           since: Optional[str] = None, until: Optional[str] = None,
+                           limit: int = 100) -> List[Dict]:
+        """
+        查询状态变更历史（按时间倒序）
+        
+        Args:
+            file_path: 只返回该文件的记录
+            video_code: 只返回该视频代码的记录
+            since: 起始时间（ISO格式，包含）
+            until: 结束时间（ISO格式，不包含）
+            limit: 返回记录数限制
+            
+        Returns:
+            List[Dict]: 状态变更记录，键与 FileStatusManager 的内存记录一致
+        """
+        conditions = []
+        params: List = []
+        if file_path:
+            conditions.append("file_path = ?")
+            params.append(file_path)
+        if video_code:
+            conditions.append("video_code = ?")
+            params.append(video_code)
+        if since:
+            conditions.append("change_time >= ?")
+            params.append(since)
+        if until:
+            conditions.append("change_time < ?")
+            params.append(until)
+        
+        query = """
+            SELECT file_path, video_code, old_status, new_status, reason, change_time
+            FROM status_change_history
+        """
+        if conditions:
+            query += " WHERE " + " AND ".join(conditions)
+        query += " ORDER BY change_time DESC, id DESC LIMIT ?"
+        params.append(limit)
+        
+        cursor = self.connection.cursor()
+        cursor.execute(query, params)
+        return [
+            {
+                'file_path': row['file_path'],
+                'video_code': row['video_code'],
+                'old_status': row['old_status'],
+                'new_status': row['new_status'],
+                'reason': row['reason'],
+                'timestamp': row['change_time']
+            }
+            for row in cursor.fetchall()
+        ]
+    
+    def cleanup_old_status_history(self, days_to_keep: int = 30) -> int:
+        """
+        清理旧的状态变更历史
+        
+        Args:
+            days_to_keep: 保留最近多少天的记录
+            
+        Returns:
+            int: 删除的记录数
+        """
+        # change_time 以本地时间的ISO格式写入，截止时间也按同一格式计算后直接比较字符串
+        cutoff = (datetime.now() - timedelta(days=days_to_keep)).isoformat()
+        cursor = self.connection.cursor()
+        cursor.execute("DELETE FROM status_change_history WHERE change_time < ?", (cutoff,))
+        deleted_count = cursor.rowcount
+        self._commit()
         return deleted_count
     
+    def get_verification_cursor(self, job_name: str) -> Optional[Dict]:
+        """
+        获取后台验证任务的游标
+        
+        Args:
+            job_name: 验证任务名称
+            
+        Returns:
+            Optional[Dict]: 游标记录，任务尚未运行过时返回None
+        """
+        cursor = self.connection.cursor()
+        cursor.execute("SELECT * FROM verification_cursor WHERE job_name = ?", (job_name,))
+        row = cursor.fetchone()
+        return dict(row) if row else None
+    
+    def save_verification_cursor(self, job_name: str, last_video_id: int,
+                                 cycle_started_time: Optional[str], cycles_completed: int) -> None:
+        """
+        保存后台验证任务的游标
+        
+        Args:
+            job_name: 验证任务名称
+            last_video_id: 已处理到的video_info.id
+            cycle_started_time: 当前验证周期的开始时间
+            cycles_completed: 已完成的验证周期数
+        """
+        cursor = self.connection.cursor()
+        cursor.execute("""
+            INSERT INTO verification_cursor (job_name, last_video_id, cycle_started_time, cycles_completed, updated_time)
+            VALUES (?, ?, ?, ?, CURRENT_TIMESTAMP)
+            ON CONFLICT(job_name) DO UPDATE SET
+                last_video_id = excluded.last_video_id,
+                cycle_started_time = excluded.cycle_started_time,
+                cycles_completed = excluded.cycles_completed,
+                updated_time = excluded.updated_time
+        """, (job_name, last_video_id, cycle_started_time, cycles_completed))
+        self._commit()
+    
+    def record_verification_results(self, results: List[Tuple[int, str, Optional[str], Optional[str], str]]) -> int:
+        """
+        批量写入验证结果（同一记录覆盖上次结果）
+        
+        Args:
+            results: (video_id, result, detail, content_hash, verified_time) 列表
+            
+        Returns:
+            int: 写入的记录数
+        """
+        if not results:
+            return 0
+        
+        cursor = self.connection.cursor()
+        cursor.executemany("""
+            INSERT INTO verification_state (video_id, result, detail, content_hash, last_verified_time)
+            VALUES (?, ?, ?, ?, ?)
+            ON CONFLICT(video_id) DO UPDATE SET
+                result = excluded.result,
+                detail = excluded.detail,
+                content_hash = COALESCE(excluded.content_hash, verification_state.content_hash),
+                last_verified_time = excluded.last_verified_time
+        """, results)
+        self._commit()
+        return len(results)
+    
+    def get_verification_state(self, video_id: int) -> Optional[Dict]:
+        """
+        获取单条视频记录的最近验证结果
+        
+        Args:
+            video_id: 视频记录ID
+            
+        Returns:
+            Optional[Dict]: 验证状态，从未验证过时返回None
+        """
+        cursor = self.connection.cursor()
+        cursor.execute("SELECT * FROM verification_state WHERE video_id = ?", (video_id,))
+        row = cursor.fetchone()
+        return dict(row) if row else None
+    
+    def get_verification_summary(self) -> Dict[str, Any]:
+        """
+        获取验证覆盖情况汇总
+        
+        Returns:
+            Dict: 各验证结果的数量、从未验证的present记录数和最早的验证时间
+        """
+        cursor = self.connection.cursor()
+        cursor.execute("SELECT result, COUNT(*) FROM verification_state GROUP BY result")
+        by_result = {row[0]: row[1] for row in cursor.fetchall()}
+        
+        cursor.execute("""
+            SELECT COUNT(*) FROM video_info v
+            LEFT JOIN verification_state s ON s.video_id = v.id
+            WHERE v.file_status = 'present' AND s.video_id IS NULL
+        """)
+        never_verified = cursor.fetchone()[0]
+        
+        cursor.execute("SELECT MIN(last_verified_time) FROM verification_state")
+        oldest = cursor.fetchone()[0]
+        return {
+            'by_result': by_result,
+            'never_verified': never_verified,
+            'oldest_verified_time': oldest
+        }
+    
     def validate_database_structure(self) -> Dict[str, bool]:
         """验证数据库表结构是否完整
         
@@ -1293,7 +1876,12 @@ class SQLiteStorage:
             'video_tags', 
             'scan_history',
             'video_master_list',
-            'merge_history'
+            'merge_history',
+            'scan_staging',
+            'status_change_history',
+            'verification_state',
+            'verification_cursor',
+            'video_code_aliases'
         ]
         
         validation_results = {}
@@ -1362,6 +1950,99 @@ class SQLiteStorage:
         rows = cursor.fetchall()
         return [row['tag'] for row in rows]
 
+    def stage_video_infos(self, video_infos: List[VideoInfo], scan_root: str) -> int:
+        """
+        将扫描结果写入暂存表（同一路径重复暂存时覆盖旧记录）
+        
+        Args:
+            video_infos: 扫描得到的视频信息列表
+            scan_root: 扫描根目录，提交时用于限定丢失文件检测范围
+            
+        Returns:
+            int: 写入的记录数
+        """
+        scan_root = os.path.abspath(scan_root)
+        rows = [
+            (
+                video.file_path, video.filename, video.video_code, video.file_fingerprint,
+                video.width, video.height, video.duration, video.video_codec, video.audio_codec,
+                video.file_size, video.bit_rate, video.frame_rate,
+                video.created_time.isoformat() if isinstance(video.created_time, datetime)
+                else video.created_time,
+                ';'.join(video.tags) if video.tags else '',
+                video.logical_path, scan_root
+            )
+            for video in video_infos
+        ]
+        cursor = self.connection.cursor()
+        cursor.executemany("""
+            INSERT OR REPLACE INTO scan_staging (
+                file_path, filename, video_code, file_fingerprint, width, height, duration,
+                video_codec, audio_codec, file_size, bit_rate, frame_rate, created_time,
+                tags, logical_path, scan_root
+            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+        """, rows)
+        self._commit()
+        return len(rows)
+    
+    def load_staged_videos(self) -> List[VideoInfo]:
+        """
+        读取暂存表中的全部视频信息
+        
+        Returns:
+            List[VideoInfo]: 暂存的视频信息列表
+        """
+        cursor = self.connection.cursor()
+        cursor.execute("SELECT * FROM scan_staging ORDER BY file_path")
+        videos = []
+        for row in cursor.fetchall():
+            video_info = VideoInfo(file_path=row['file_path'],
+                                   tags=row['tags'].split(';') if row['tags'] else [],
+                                   logical_path=row['logical_path'], probe_file=False)
+            video_info.filename = row['filename']
+            video_info.video_code = row['video_code']
+            video_info.file_fingerprint = row['file_fingerprint']
+            video_info.created_time = row['created_time']
+            video_info.width = row['width']
+            video_info.height = row['height']
+            video_info.duration = row['duration']
+            video_info.video_codec = row['video_codec']
+            video_info.audio_codec = row['audio_codec']
+            video_info.file_size = row['file_size']
+            video_info.bit_rate = row['bit_rate']
+            video_info.frame_rate = row['frame_rate']
+            videos.append(video_info)
+        return videos
+    
+    def get_staged_scan_roots(self) -> List[str]:
+        """
+        获取暂存记录涉及的扫描根目录
+        
+        Returns:
+            List[str]: 扫描根目录列表
+        """
+        cursor = self.connection.cursor()
+        cursor.execute("SELECT DISTINCT scan_root FROM scan_staging ORDER BY scan_root")
+        return [row[0] for row in cursor.fetchall()]
+    
+    def get_staging_count(self) -> int:
+        """获取暂存表中的记录数"""
+        cursor = self.connection.cursor()
+        cursor.execute("SELECT COUNT(*) FROM scan_staging")
+        return cursor.fetchone()[0]
+    
+    def clear_staging(self) -> int:
+        """
+        清空暂存表
+        
+        Returns:
+            int: 删除的记录数
+        """
+        cursor = self.connection.cursor()
+        cursor.execute("DELETE FROM scan_staging")
+        self._commit()
+        return cursor.rowcount
+    
     def load_videos_from_csv(self, csv_path: str) -> List[VideoInfo]:
         """
         从CSV文件加载视频信息
@@ -1372,39 +2053,13 @@ class SQLiteStorage:
         Returns:
             List[VideoInfo]: 视频信息列表
         """
-        videos = []
-        
         if not os.path.exists(csv_path):
-            return videos
+            return []
         
         try:
-            with open(csv_path, 'r', encoding='utf-8-sig') as csvfile:
-                reader = csv.DictReader(csvfile)
-                for row in reader:
-                    try:
-                        video_info = VideoInfo(file_path=row['file_path'], 
-                                             tags=row.get('tags', '').split(',') if row.get('tags') else [],
-                                             logical_path=row.get('logical_path', ''))
-                        video_info.filename = row['filename']
-                        video_info.video_code = row.get('video_code', '')
-                        video_info.file_fingerprint = row.get('file_fingerprint', '')
-                        video_info.created_time = row['created_time']
-                        video_info.width = int(row['width']) if row['width'] else None
-                        video_info.height = int(row['height']) if row['height'] else None
-                        video_info.duration = float(row['duration']) if row['duration'] else None
-                        video_info.video_codec = row['video_codec'] if row['video_codec'] else None
-                        video_info.audio_codec = row['audio_codec'] if row['audio_codec'] else None
-                        video_info.file_size = int(row['file_size']) if row['file_size'] else None
-                        video_info.bit_rate = int(row['bit_rate']) if row['bit_rate'] else None
-                        video_info.frame_rate = float(row['frame_rate']) if row.get('frame_rate') else None
-                        
-                        videos.append(video_info)
-                    except (ValueError, KeyError):
-                        continue
+            return self.ingest_csv(csv_path).videos
         except Exception:
-            pass
-        
-        return videos
+            return []
     
     def get_all_video_infos(self) -> List[VideoInfo]:
         """
@@ -1419,7 +2074,7 @@ class SQLiteStorage:
         
         videos = []
         for row in rows:
-            video_info = VideoInfo(file_path=row['file_path'])
+            video_info = VideoInfo(file_path=row['file_path'], probe_file=False)
             video_info.id = row['id']
             video_info.filename = row['filename']
             video_info.created_time = row['created_time']
@@ -1458,7 +2113,7 @@ class SQLiteStorage:
             SET files_processed = ? 
             WHERE id = ?
         """, (processed_count, history_id))
-        self.connection.commit()
+        self._commit()
 
     def close(self):
         """关闭数据库连接"""
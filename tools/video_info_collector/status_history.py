@@ -0,0 +1,109 @@
+"""
+文件状态变更历史持久化模块
+
+状态变更先进入内存缓冲区，缓冲达到 buffer_size 条或距上次写入超过 flush_interval 秒时，
+用一次 executemany 在单个事务中写入 status_change_history 表（组提交），
+避免每次状态变更都单独提交一次数据库事务。
+"""
+
+import threading
+import time
+from typing import Dict, List, Optional
+
+try:
+    from .sqlite_storage import SQLiteStorage
+except ImportError:
+    from sqlite_storage import SQLiteStorage
+
+
+class StatusHistoryWriter:
+    """带缓冲、批量提交的状态变更历史写入器"""
+
+    def __init__(self, storage: SQLiteStorage, buffer_size: int = 500, flush_interval: float = 5.0):
+        """
+        初始化状态变更历史写入器
+
+        Args:
+            storage: SQLite存储对象
+            buffer_size: 缓冲区达到该条数时写入数据库
+            flush_interval: 距上次写入超过该秒数时，下一次记录会触发写入；0表示只按条数写入
+        """
+        self.storage = storage
+        self.buffer_size = max(1, buffer_size)
+        self.flush_interval = flush_interval
+        self._buffer: List[Dict] = []
+        self._lock = threading.Lock()
+        self._last_flush = time.monotonic()
+        self.written_count = 0
+
+    @property
+    def pending_count(self) -> int:
+        """缓冲区中尚未写入的记录数"""
+        return len(self._buffer)
+
+    def record(self, change: Dict) -> None:
+        """
+        记录一条状态变更
+
+        Args:
+            change: 状态变更记录，键为 file_path / video_code / old_status / new_status / reason / timestamp
+        """
+        with self._lock:
+            self._buffer.append(change)
+            due = len(self._buffer) >= self.buffer_size or (
+                self.flush_interval > 0 and time.monotonic() - self._last_flush >= self.flush_interval
+            )
+        if due:
+            self.flush()
+
+    def flush(self) -> int:
+        """
+        把缓冲区中的记录一次写入数据库
+
+        Returns:
+            int: 写入的记录数
+        """
+        with self._lock:
+            pending, self._buffer = self._buffer, []
+            self._last_flush = time.monotonic()
+        if not pending:
+            return 0
+
+        try:
+            written = self.storage.insert_status_changes(pending)
+        except Exception:
+            # 写入失败时放回缓冲区，下次写入时重试
+            with self._lock:
+                self._buffer[:0] = pending
+            raise
+        self.written_count += written
+        return written
+
+    def query(self, file_path: Optional[str] = None, video_code: Optional[str] = None,
+              since: Optional[str] = None, until: Optional[str] = None, limit: int = 100) -> List[Dict]:
+        """
+        先写入缓冲区中的记录，再查询状态变更历史（按时间倒序）
+
+        Args:
+            file_path: 只返回该文件的记录
+            video_code: 只返回该视频代码的记录
+            since: 起始时间（ISO格式，包含）
+            until: 结束时间（ISO格式，不包含）
+            limit: 返回记录数限制
+
+        Returns:
+            List[Dict]: 状态变更记录
+        """
+        self.flush()
+        return self.storage.get_status_changes(file_path=file_path, video_code=video_code,
+                                               since=since, until=until, limit=limit)
+
+    def close(self) -> None:
+        """写入剩余记录"""
+        self.flush()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
@@ -0,0 +1,107 @@
+"""
+数据库文件状态对账模块
+
+从 video_info 读取记录的文件状态，用 BatchStatusChecker 对每个文件只检查一次实际状态，
+以记录id为键收集差异，再用一次 executemany 在事务中批量写回数据库。
+
+只对账 present / missing / offline 三种状态：ignore 是用户的显式标记，replaced 表示已被新版本替换，
+两者都不随磁盘上文件的存在与否变化。所在卷离线的记录按挂载点整体标记为 offline，卷重新上线后恢复。
+"""
+
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional
+
+try:
+    from .sqlite_storage import SQLiteStorage
+    from .file_status_manager import FileStatus
+    from .batch_status_checker import BatchStatusChecker
+    from .volume_monitor import VolumeMonitor
+except ImportError:
+    from sqlite_storage import SQLiteStorage
+    from file_status_manager import FileStatus
+    from batch_status_checker import BatchStatusChecker
+    from volume_monitor import VolumeMonitor
+
+
+RECONCILED_STATUSES = (FileStatus.PRESENT.value, FileStatus.MISSING.value, FileStatus.OFFLINE.value)
+
+
+@dataclass
+class ReconcileResult:
+    """对账结果"""
+    checked: int = 0
+    inconsistencies: List[Dict] = field(default_factory=list)
+    fixed: int = 0
+
+    @property
+    def inconsistencies_found(self) -> int:
+        """发现的不一致数量"""
+        return len(self.inconsistencies)
+
+
+class StatusReconciler:
+    """数据库文件状态对账器"""
+
+    def __init__(self, storage: SQLiteStorage, status_checker: Optional[BatchStatusChecker] = None):
+        """
+        初始化对账器
+
+        Args:
+            storage: SQLite存储对象
+            status_checker: 批量状态检查器，默认使用仅stat模式并检测离线卷
+        """
+        self.storage = storage
+        self.status_checker = status_checker or BatchStatusChecker(volume_monitor=VolumeMonitor())
+
+    def _load_records(self, path_prefix: Optional[str]) -> Dict[int, Dict]:
+        """读取需要对账的记录，以id为键"""
+        query = f"""
+            SELECT id, file_path, file_status, video_code, file_size
+            FROM video_info
+            WHERE file_status IN ({','.join('?' * len(RECONCILED_STATUSES))})
+        """
+        params: List = list(RECONCILED_STATUSES)
+        if path_prefix:
+            # 精确比较前缀（LIKE 对ASCII大小写不敏感，且需要转义通配符）
+            query += " AND substr(file_path, 1, ?) = ?"
+            params.extend([len(path_prefix), path_prefix])
+
+        cursor = self.storage.connection.cursor()
+        cursor.execute(query, params)
+        return {row['id']: dict(row) for row in cursor.fetchall()}
+
+    def reconcile(self, apply: bool = True, path_prefix: Optional[str] = None) -> ReconcileResult:
+        """
+        对账并（可选）修复数据库中的文件状态
+
+        Args:
+            apply: True时把差异写回数据库；False只报告
+            path_prefix: 只对账该路径前缀下的记录
+
+        Returns:
+            ReconcileResult: 对账结果
+        """
+        records = self._load_records(path_prefix)
+        result = ReconcileResult(checked=len(records))
+        if not records:
+            return result
+
+        actual_statuses = self.status_checker.check(record['file_path'] for record in records.values())
+
+        changes = []
+        for video_id, record in records.items():
+            actual_status = actual_statuses[record['file_path']].value
+            if actual_status != record['file_status']:
+                changes.append((video_id, actual_status))
+                result.inconsistencies.append({
+                    'id': video_id,
+                    'file_path': record['file_path'],
+                    'recorded_status': record['file_status'],
+                    'actual_status': actual_status,
+                    'video_code': record['video_code'],
+                    'file_size': record['file_size']
+                })
+
+        if apply and changes:
+            result.fixed = self.storage.bulk_update_file_status(changes, reason='reconcile_status')
+        return result
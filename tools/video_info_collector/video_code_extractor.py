@@ -4,13 +4,85 @@
 
 从视频文件名中提取业务编码（video_code）的工具模块。
 支持多种编码格式和自定义规则。
+
+默认规则合并为预编译的正则（命名组 + 零宽前瞻，见 PriorityMatcher），通常一次扫描即可得到
+优先级最高的候选；只有该候选未通过校验时才逐个规则回退查找。提取结果按去除扩展名后的文件名做LRU缓存。
 """
 
 import re
 import os
+from functools import lru_cache
 from typing import Optional, List, Pattern, Dict, Any
 from pathlib import Path
 
+try:
+    from ..video_code_utils import canonicalize_video_code
+except ImportError:
+    from tools.video_code_utils import canonicalize_video_code
+
+
+# 方括号内容：[1080p], [BluRay], [x264]
+_BRACKET_PATTERN = re.compile(r'\[.*?\]')
+
+# 圆括号内容和常见的质量标记；二者互不重叠，可以在同一次替换中移除
+_NOISE_PATTERN = re.compile(
+    r'\(.*?\)'
+    r'|\b(?:1080p|720p|480p|4K|HD|SD|BluRay|DVDRip|WEBRip|HDTV)\b'
+    r'|\b(?:x264|x265|H264|H265|HEVC|AVC)\b'
+    r'|\b(?:AAC|AC3|DTS|MP3|FLAC)\b'
+    r'|\b(?:PROPER|REPACK|INTERNAL|LIMITED)\b',
+    re.IGNORECASE
+)
+
+DEFAULT_CACHE_SIZE = 65536
+
+
+class PriorityMatcher:
+    """
+    按优先级匹配多个正则：返回能匹配的规则中优先级最高者的最左侧匹配，
+    结果与依次对每个规则调用 search 相同，但通常只需一次扫描。
+    
+    每个位置上按优先级尝试各规则（零宽前瞻，命中的规则记在命名组中）；找到优先级为k的候选后，
+    只需从下一个位置起继续查找优先级高于k的规则，最多扫描规则数次。
+    """
+    
+    def __init__(self, patterns: List[str], flags: int = 0, group_prefix: str = 'p'):
+        """
+        初始化匹配器
+        
+        Args:
+            patterns: 正则表达式列表（按优先级排序），每个规则的第一个分组为提取结果
+            flags: 正则编译选项
+            group_prefix: 命名组前缀
+        """
+        self.pattern_count = len(patterns)
+        branches = [f'(?=(?P<{group_prefix}{index}>{pattern}))' for index, pattern in enumerate(patterns)]
+        # _matchers[k] 只包含优先级最高的k个规则
+        self._matchers = [None] + [re.compile('|'.join(branches[:count]), flags)
+                                   for count in range(1, len(patterns) + 1)]
+        self._index_by_group = {f'{group_prefix}{index}': index for index in range(len(patterns))}
+    
+    def search(self, text: str):
+        """
+        查找优先级最高的规则的最左侧匹配
+        
+        Args:
+            text: 待匹配文本
+            
+        Returns:
+            Tuple[Optional[int], Optional[str]]: (规则序号, 匹配文本)，均未匹配时为 (None, None)
+        """
+        best_index, best_text = None, None
+        limit, position = self.pattern_count, 0
+        while limit:
+            match = self._matchers[limit].search(text, position)
+            if match is None:
+                break
+            best_index = self._index_by_group[match.lastgroup]
+            best_text = match.group(match.lastgroup)
+            limit, position = best_index, match.start() + 1
+        return best_index, best_text
+
 
 class VideoCodeExtractor:
     """视频编码提取器"""
@@ -36,30 +108,35 @@ class VideoCodeExtractor:
         r'([A-Z]{2,6}-\d{2,6}(?:-[A-Z0-9]{1,4})?)',
     ]
     
-    def __init__(self, custom_patterns: Optional[List[str]] = None):
+    # 默认规则合并后的匹配器
+    _DEFAULT_MATCHER = PriorityMatcher(DEFAULT_PATTERNS, re.IGNORECASE)
+    _DEFAULT_COMPILED = [re.compile(pattern, re.IGNORECASE) for pattern in DEFAULT_PATTERNS]
+    
+    def __init__(self, custom_patterns: Optional[List[str]] = None, cache_size: int = DEFAULT_CACHE_SIZE):
         """
         初始化编码提取器
         
         Args:
             custom_patterns: 自定义正则表达式模式列表
+            cache_size: 按文件名缓存提取结果的条数，0表示不缓存
         """
-        self.patterns: List[Pattern] = []
+        self.custom_patterns: List[Pattern] = []
         
         # 编译自定义模式（优先级最高）
         if custom_patterns:
             for pattern in custom_patterns:
                 try:
-                    self.patterns.append(re.compile(pattern, re.IGNORECASE))
+                    self.custom_patterns.append(re.compile(pattern, re.IGNORECASE))
                 except re.error:
                     # 忽略无效的正则表达式
                     continue
         
-        # 编译默认模式
-        for pattern in self.DEFAULT_PATTERNS:
-            try:
-                self.patterns.append(re.compile(pattern, re.IGNORECASE))
-            except re.error:
-                continue
+        self._extract_cached = lru_cache(maxsize=cache_size)(self._extract_from_base_name)
+    
+    @property
+    def patterns(self) -> List[Pattern]:
+        """全部提取规则（自定义规则在前，默认规则在后）"""
+        return self.custom_patterns + self._DEFAULT_COMPILED
     
     def extract_code(self, filename: str) -> Optional[str]:
         """
@@ -76,12 +153,27 @@ class VideoCodeExtractor:
         
         # 只使用文件名部分，去除路径和扩展名
         base_name = os.path.splitext(os.path.basename(filename))[0]
+        return self._extract_cached(base_name)
+    
+    def extract_canonical_code(self, filename: str) -> Optional[str]:
+        """
+        从文件名中提取视频编码并转换为规范形式（如 abc_00123 -> ABC-123）
         
+        Args:
+            filename: 文件名（可以包含路径）
+            
+        Returns:
+            规范编码，如果未找到返回None
+        """
+        return canonicalize_video_code(self.extract_code(filename))
+    
+    def _extract_from_base_name(self, base_name: str) -> Optional[str]:
+        """从去除路径和扩展名的文件名中提取编码"""
         # 清理文件名：移除常见的无关字符和标记
         cleaned_name = self._clean_filename(base_name)
         
-        # 按优先级尝试每个模式
-        for pattern in self.patterns:
+        # 自定义模式优先级最高，逐个尝试
+        for pattern in self.custom_patterns:
             matches = pattern.findall(cleaned_name)
             if matches:
                 # 返回第一个匹配的结果，转换为大写
@@ -91,22 +183,49 @@ class VideoCodeExtractor:
                 if self._validate_code(code):
                     return code
         
+        # 默认模式：找出优先级最高的规则及其最左侧的匹配
+        best_index, best_code = self._DEFAULT_MATCHER.search(cleaned_name)
+        if best_code is None:
+            return None
+        
+        code = best_code.upper()
+        if self._validate_code(code):
+            return code
+        
+        # 候选未通过校验时，按原有顺序逐个尝试优先级更低的规则
+        for pattern in self._DEFAULT_COMPILED[best_index + 1:]:
+            match = pattern.search(cleaned_name)
+            if match:
+                code = match.group(1).upper()
+                if self._validate_code(code):
+                    return code
+        
         return None
     
     def extract_codes_batch(self, filenames: List[str]) -> Dict[str, Optional[str]]:
         """
         批量提取视频编码
         
+        先按去除路径和扩展名后的文件名去重，每个不同的文件名只提取一次，不经过LRU缓存，
+        避免大批量提取时挤掉缓存中的常用条目。
+        
         Args:
             filenames: 文件名列表
             
         Returns:
             文件名到编码的映射字典
         """
-        result = {}
-        for filename in filenames:
-            result[filename] = self.extract_code(filename)
-        return result
+        base_names = {
+            filename: os.path.splitext(os.path.basename(filename))[0] if filename else ''
+            for filename in filenames
+        }
+        codes = {base_name: self._extract_from_base_name(base_name) if base_name else None
+                 for base_name in set(base_names.values())}
+        return {filename: codes[base_name] for filename, base_name in base_names.items()}
+    
+    def clear_cache(self) -> None:
+        """清空提取结果缓存"""
+        self._extract_cached.cache_clear()
     
     def _clean_filename(self, filename: str) -> str:
         """
@@ -118,30 +237,13 @@ class VideoCodeExtractor:
         Returns:
             清理后的文件名
         """
-        # 移除常见的标记和分隔符
-        cleaned = filename
-        
-        # 移除方括号内容：[1080p], [BluRay], [x264]
-        cleaned = re.sub(r'\[.*?\]', ' ', cleaned)
-        
-        # 移除圆括号内容：(2024), (Director's Cut)
-        cleaned = re.sub(r'\(.*?\)', ' ', cleaned)
-        
-        # 移除常见的质量标记
-        quality_markers = [
-            r'\b(1080p|720p|480p|4K|HD|SD|BluRay|DVDRip|WEBRip|HDTV)\b',
-            r'\b(x264|x265|H264|H265|HEVC|AVC)\b',
-            r'\b(AAC|AC3|DTS|MP3|FLAC)\b',
-            r'\b(PROPER|REPACK|INTERNAL|LIMITED)\b'
-        ]
-        
-        for marker in quality_markers:
-            cleaned = re.sub(marker, ' ', cleaned, flags=re.IGNORECASE)
+        # 先移除方括号内容（方括号与圆括号交错时以方括号优先），
+        # 再一次移除圆括号内容：(2024), (Director's Cut) 和常见的质量标记
+        cleaned = _BRACKET_PATTERN.sub(' ', filename)
+        cleaned = _NOISE_PATTERN.sub(' ', cleaned)
         
         # 标准化空白字符
-        cleaned = re.sub(r'\s+', ' ', cleaned).strip()
-        
-        return cleaned
+        return ' '.join(cleaned.split())
     
     def _validate_code(self, code: str) -> bool:
         """
@@ -235,7 +337,8 @@ class VideoCodeExtractor:
         try:
             compiled_pattern = re.compile(pattern, re.IGNORECASE)
             # 插入到列表开头，给予最高优先级
-            self.patterns.insert(0, compiled_pattern)
+            self.custom_patterns.insert(0, compiled_pattern)
+            self.clear_cache()
             return True
         except re.error:
             return False
@@ -0,0 +1,205 @@
+"""
+挂载卷离线检测模块
+
+外接磁盘拔出或网络挂载断开时，逐个 stat 其中的文件要么全部失败（误标为 missing），
+要么每次都要等待超时。本模块把路径按所在的挂载点分组，每个挂载点只探测一次：
+卷不在线时，其中的记录整体标记为 offline（或直接跳过），不再逐个检查文件。
+
+挂载点来自系统挂载表（Linux 读取 /proc/self/mounts，macOS 解析 mount 命令输出）；
+位于 /Volumes、/media、/run/media、/mnt 下但不在挂载表中的路径按卷根目录分组，
+卷根目录已不存在或无法读取（外接卷拔出后通常被删除）时视为离线，
+目录仍可读时按普通目录处理（例如 /mnt 下的普通目录、指向 / 的 /Volumes/Macintosh HD）。
+"""
+
+import os
+import re
+import subprocess
+import threading
+from typing import Dict, Iterable, List, Optional, Tuple
+
+
+# 外接卷的常见挂载父目录及卷根所在的层级（/media/<user>/<label> 为两层）
+VOLUME_PARENTS = {
+    '/Volumes': 1,
+    '/mnt': 1,
+    '/media': 2,
+    '/run/media': 2,
+}
+
+# 网络挂载断开时 stat 可能阻塞很久，探测超过该秒数即视为离线
+DEFAULT_PROBE_TIMEOUT = 3.0
+
+_MOUNT_LINE_PATTERN = re.compile(r'^.+? on (.+) \(')
+
+
+def _unescape_mount_path(path: str) -> str:
+    """还原 /proc/mounts 中的八进制转义（例如空格为 \\040）"""
+    return re.sub(r'\\([0-7]{3})', lambda match: chr(int(match.group(1), 8)), path)
+
+
+def read_mount_table() -> List[str]:
+    """
+    读取系统挂载表
+
+    Returns:
+        List[str]: 挂载点路径列表；无法读取时为空列表
+    """
+    if os.path.exists('/proc/self/mounts'):
+        try:
+            with open('/proc/self/mounts', 'r', encoding='utf-8', errors='replace') as f:
+                return [_unescape_mount_path(line.split()[1]) for line in f if len(line.split()) >= 2]
+        except OSError:
+            return []
+
+    try:
+        output = subprocess.run(['mount'], capture_output=True, text=True, timeout=5).stdout
+    except (OSError, subprocess.SubprocessError):
+        return []
+    mount_points = []
+    for line in output.splitlines():
+        match = _MOUNT_LINE_PATTERN.match(line)
+        if match:
+            mount_points.append(match.group(1))
+    return mount_points
+
+
+class VolumeMonitor:
+    """按挂载点分组并探测卷是否在线"""
+
+    def __init__(self, mount_points: Optional[Iterable[str]] = None,
+                 probe_timeout: float = DEFAULT_PROBE_TIMEOUT):
+        """
+        初始化卷监视器
+
+        Args:
+            mount_points: 已知挂载点列表，默认读取系统挂载表
+            probe_timeout: 单个挂载点的探测超时（秒）
+        """
+        self.probe_timeout = probe_timeout
+        # 未指定时首次解析路径才读取挂载表
+        self._mount_points = None if mount_points is None else self._normalize(mount_points)
+        self._online_cache: Dict[str, bool] = {}
+        self._lock = threading.Lock()
+
+    @property
+    def mount_points(self) -> List[str]:
+        """已知挂载点列表（按长度降序）"""
+        if self._mount_points is None:
+            self._mount_points = self._normalize(read_mount_table())
+        return self._mount_points
+
+    @staticmethod
+    def _normalize(mount_points: Iterable[str]) -> List[str]:
+        """去重并按长度降序排列，便于最长前缀匹配"""
+        normalized = {os.path.normpath(mount_point) for mount_point in mount_points if mount_point}
+        return sorted(normalized, key=len, reverse=True)
+
+    def refresh(self, mount_points: Optional[Iterable[str]] = None) -> None:
+        """
+        重新读取挂载表并清空在线状态缓存
+
+        Args:
+            mount_points: 已知挂载点列表，默认读取系统挂载表
+        """
+        with self._lock:
+            self._mount_points = None if mount_points is None else self._normalize(mount_points)
+            self._online_cache.clear()
+
+    @staticmethod
+    def _expected_volume_root(path: str) -> Optional[str]:
+        """路径位于外接卷父目录下时，返回其卷根目录"""
+        for parent, depth in VOLUME_PARENTS.items():
+            prefix = parent + os.sep
+            if path.startswith(prefix):
+                parts = path[len(prefix):].split(os.sep)
+                if len(parts) > depth:
+                    return os.path.join(parent, *parts[:depth])
+        return None
+
+    def mount_point_for(self, file_path: str) -> str:
+        """
+        解析文件所在的挂载点（纯字符串运算，不访问文件系统）
+
+        Args:
+            file_path: 文件路径
+
+        Returns:
+            str: 挂载点路径；外接卷父目录下未挂载的卷返回其卷根目录
+        """
+        path = os.path.normpath(os.path.abspath(file_path))
+        mounted = os.sep
+        for mount_point in self.mount_points:
+            if path == mount_point or path.startswith(mount_point.rstrip(os.sep) + os.sep):
+                mounted = mount_point
+                break
+
+        expected = self._expected_volume_root(path)
+        if expected and len(expected) > len(mounted):
+            return expected
+        return mounted
+
+    def _probe(self, mount_point: str) -> bool:
+        """在后台线程中探测挂载点，超时视为离线"""
+        result = {'online': False}
+        is_known_mount = mount_point in self.mount_points
+
+        def target():
+            try:
+                if is_known_mount:
+                    os.stat(mount_point)
+                    result['online'] = os.path.isdir(mount_point)
+                else:
+                    # 不在挂载表中的卷根可能只是普通目录：只有目录不存在或无法读取才视为离线
+                    with os.scandir(mount_point):
+                        result['online'] = True
+            except (OSError, ValueError):
+                result['online'] = False
+
+        # 使用守护线程，探测卡住时不阻止进程退出
+        thread = threading.Thread(target=target, daemon=True)
+        thread.start()
+        thread.join(self.probe_timeout)
+        return False if thread.is_alive() else result['online']
+
+    def is_online(self, mount_point: str) -> bool:
+        """
+        判断挂载点是否在线（每个挂载点只探测一次，结果缓存）
+
+        Args:
+            mount_point: mount_point_for 返回的挂载点
+
+        Returns:
+            bool: 是否在线
+        """
+        if mount_point == os.sep:
+            return True
+        with self._lock:
+            if mount_point in self._online_cache:
+                return self._online_cache[mount_point]
+        online = self._probe(mount_point)
+        with self._lock:
+            self._online_cache[mount_point] = online
+        return online
+
+    def partition(self, file_paths: Iterable[str]) -> Tuple[List[str], Dict[str, List[str]]]:
+        """
+        按所在卷是否在线划分路径
+
+        Args:
+            file_paths: 文件路径列表
+
+        Returns:
+            Tuple[List[str], Dict[str, List[str]]]: (在线卷上的路径, 离线挂载点到其路径列表的映射)
+        """
+        by_mount: Dict[str, List[str]] = {}
+        for path in file_paths:
+            by_mount.setdefault(self.mount_point_for(path), []).append(path)
+
+        online_paths: List[str] = []
+        offline: Dict[str, List[str]] = {}
+        for mount_point, paths in by_mount.items():
+            if self.is_online(mount_point):
+                online_paths.extend(paths)
+            else:
+                offline[mount_point] = paths
+        return online_paths, offline
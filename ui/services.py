@@ -13,6 +13,7 @@ try:
     from tools.video_info_collector.smart_merge_manager import SmartMergeManager
     from tools.video_info_collector.cli import get_default_paths
     from tools.video_info_collector.error_handler import ErrorHandler
+    from tools.video_code_utils import split_video_code
     
     # 获取默认数据库路径
     default_paths = get_default_paths()
@@ -74,6 +75,11 @@ class VideoService:
             cursor.execute("PRAGMA table_info(video_info)")
             columns = [col[1] for col in cursor.fetchall()]
 
+            # 完整编码的任意写法（abc123、ABC_123）先经编码别名索引精确匹配，排在模糊匹配结果之前
+            exact_rows = []
+            if 'video_code' in columns and split_video_code(keyword):
+                exact_rows = self.storage.get_videos_by_video_code_variants([keyword])
+
             if 'video_code' in columns:
                 cursor.execute(
                     """
@@ -97,8 +103,11 @@ class VideoService:
                     (f"%{keyword}%", f"%{keyword}%")
                 )
 
+            seen_paths = {row['file_path'] for row in exact_rows}
+            rows = exact_rows + [row for row in cursor.fetchall() if row['file_path'] not in seen_paths]
+
             results = []
-            for row in cursor.fetchall():
+            for row in rows[:100]:
                 file_size_bytes = row['file_size']
                 if file_size_bytes:
                     file_size_gb = file_size_bytes / (1024 * 1024 * 1024)
@@ -14,6 +14,7 @@ try:
     from tools.video_info_collector.smart_merge_manager import SmartMergeManager
     from tools.video_info_collector.cli import get_default_paths
     from tools.video_info_collector.error_handler import ErrorHandler
+    from tools.video_code_utils import split_video_code
     
     # 获取默认数据库路径
     default_paths = get_default_paths()
@@ -70,6 +71,11 @@ class VideoService:
         try:
             self._ensure_storage()
             
+            # 完整编码的任意写法（abc123、ABC_123）先经编码别名索引精确匹配，排在文件名搜索结果之前
+            exact_rows = []
+            if split_video_code(keyword):
+                exact_rows = self.storage.get_videos_by_video_code_variants([keyword])
+
             # 简单的文件名搜索
             cursor = self.storage.connection.cursor()
             cursor.execute(
@@ -82,8 +88,11 @@ class VideoService:
                 (f"%{keyword}%", f"%{keyword}%")
             )
             
+            seen_paths = {row['file_path'] for row in exact_rows}
+            rows = exact_rows + [row for row in cursor.fetchall() if row['file_path'] not in seen_paths]
+
             results = []
-            for row in cursor.fetchall():
+            for row in rows[:100]:
                 # 格式化文件大小
                 file_size_bytes = row['file_size']
                 if file_size_bytes: